@@ -0,0 +1,154 @@
+"""주간/일정 목록처럼 여러 날짜를 한 화면에 보여주는 범위 조회.
+
+일정과 거래를 구간 전체에 대해 각각 쿼리 한 번으로 읽고, 한 번 훑으면서 지역 시각 변환과
+날짜·시간대 분류를 함께 끝낸다. 하루 화면을 날짜 수만큼 다시 만드는 것과 달리 쿼리 수가 구간 길이와 무관하다.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from core import occurrences
+from core.timeranges import local_range_bounds, within
+from finance.models import Transaction
+from tasks.models import Task
+
+# 한 번에 조회할 수 있는 최대 일수. 목록이 한 응답에 담기는 크기로 제한한다.
+MAX_RANGE_DAYS = 62
+
+
+def task_row(task):
+    """캐시에 담을 수 있도록 일정 모델을 템플릿이 쓰는 필드만 가진 dict로 바꾼다."""
+
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'start_at': task.start_at,
+        'due_at': task.due_at,
+        'is_recurring': bool(task.recurrence),
+        # 반복 일정의 가상 발생이면 id가 None이고 원본 id와 발생 날짜를 가진다.
+        'occurrence_of': task.recurrence_parent_id,
+        'occurrence_date': task.recurrence_date,
+    }
+
+
+def transaction_row(tx):
+    """거래 모델을 템플릿이 쓰는 필드만 가진 dict로 바꾼다."""
+
+    return {
+        'id': tx.id,
+        'amount': tx.amount,
+        'memo': tx.memo,
+        'occurred_at': tx.occurred_at,
+        'task_id': tx.task_id,
+        'account': {'id': tx.account_id, 'name': tx.account.name},
+        'category': {'id': tx.category_id, 'name': tx.category.name, 'kind': tx.category.kind},
+    }
+
+
+def week_range(day: date) -> tuple[date, date]:
+    """day가 속한 주(일요일 시작, 달력과 같은 기준)의 첫날과 마지막 날."""
+
+    first = day - timedelta(days=(day.weekday() + 1) % 7)
+    return first, first + timedelta(days=6)
+
+
+class _Day:
+    __slots__ = ('date', 'tasks', 'transactions', 'hours', 'totals')
+
+    def __init__(self, day: date):
+        self.date = day
+        self.tasks: list[dict] = []
+        self.transactions: list[dict] = []
+        self.hours: dict[int, dict] = {}
+        self.totals: dict[str, Decimal] = defaultdict(Decimal)
+
+    def add(self, key: str, hour: int, row: dict) -> None:
+        getattr(self, key).append(row)
+        block = self.hours.get(hour)
+        if block is None:
+            block = self.hours[hour] = {'hour': hour, 'label': f'{hour:02d}:00', 'tasks': [], 'transactions': []}
+        block[key].append(row)
+
+    def as_dict(self, today: date) -> dict:
+        return {
+            'date': self.date,
+            'is_today': self.date == today,
+            'tasks': self.tasks,
+            'transactions': self.transactions,
+            'hours': [self.hours[hour] for hour in sorted(self.hours)],
+            'totals': dict(self.totals),
+        }
+
+
+def build_range(user, first_day: date, last_day: date) -> list[dict]:
+    """[first_day, last_day]의 날짜별 {'date', 'tasks', 'transactions', 'hours', 'totals'} 목록.
+
+    일정은 시작일과 (다르면) 마감일에 모두 보인다(하루 화면과 같은 기준). 예정된 반복 거래는
+    거래 목록에 projected로 섞이지만 합계에는 더하지 않는다.
+    """
+
+    bounds = local_range_bounds(first_day, last_day)
+    days = {first_day + timedelta(days=offset): _Day(first_day + timedelta(days=offset))
+            for offset in range((last_day - first_day).days + 1)}
+
+    tasks = list(
+        Task.objects.filter(owner=user)
+        .filter(Q(**within('start_at', bounds)) | Q(**within('due_at', bounds)))
+        .order_by('start_at', 'due_at', 'title')
+    )
+    virtual_tasks = [task for day_tasks in occurrences.task_occurrences(user, first_day, last_day).values()
+                     for task in day_tasks]
+    if virtual_tasks:
+        tasks = sorted(
+            tasks + virtual_tasks,
+            key=lambda task: (task.start_at is not None, task.start_at or bounds[0], task.due_at or bounds[0], task.title),
+        )
+
+    for task in tasks:
+        start_local = timezone.localtime(task.start_at) if task.start_at else None
+        end_local = timezone.localtime(task.due_at) if task.due_at else None
+        entry = {'task': task_row(task), 'start_local': start_local, 'end_local': end_local}
+        start_day = start_local.date() if start_local else None
+        if start_day in days:
+            days[start_day].add('tasks', start_local.hour, entry)
+        if end_local and end_local.date() != start_day and end_local.date() in days:
+            days[end_local.date()].add('tasks', end_local.hour, entry)
+
+    transactions = (
+        Transaction.objects.filter(owner=user, **within('occurred_at', bounds))
+        .select_related('account', 'category')
+        .order_by('occurred_at', 'id')
+    )
+    for tx in transactions:
+        local = timezone.localtime(tx.occurred_at)
+        bucket = days.get(local.date())
+        if bucket is None:
+            continue
+        row = transaction_row(tx)
+        row['occurred_local'] = local
+        bucket.add('transactions', local.hour, row)
+        bucket.totals[tx.category.kind] += tx.amount
+
+    for day, rows in occurrences.transaction_occurrences(user, first_day, last_day).items():
+        for row in sorted(rows, key=lambda row: row['occurred_at']):
+            local = timezone.localtime(row['occurred_at'])
+            days[day].add('transactions', local.hour, {**row, 'occurred_local': local})
+
+    today = timezone.localdate()
+    return [days[day].as_dict(today) for day in sorted(days)]
+
+
+def range_totals(days: list[dict]) -> dict[str, Decimal]:
+    totals: dict[str, Decimal] = defaultdict(Decimal)
+    for day in days:
+        for kind, amount in day['totals'].items():
+            totals[kind] += amount
+    return dict(totals)
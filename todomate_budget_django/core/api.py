@@ -0,0 +1,273 @@
+"""Planner 관련 REST 엔드포인트."""
+
+from datetime import datetime, timedelta
+
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.utils import timezone
+
+from core import agenda, changelog, planner_cache, search, views
+from finance.models import Account, Category, Transaction
+from finance.serializers import AccountSerializer, CategorySerializer, TransactionSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from core.calendar_summary import day_summaries, month_days
+from core.optimizer import optimize
+from core.timeranges import month_date_range
+
+
+class CalendarDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    task_count = serializers.IntegerField()
+    expense = serializers.DecimalField(max_digits=16, decimal_places=2)
+    income = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class PlannerCalendarView(APIView):
+    """GET /api/planner/calendar?month=YYYY-MM → 날짜별 일정 수와 수입/지출 합계."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        first_day, last_day = month_date_range(query_month(request))
+        return Response(calendar_data(first_day, day_summaries(request.user, first_day, last_day)))
+
+
+def query_month(request):
+    month_param = request.query_params.get('month')
+    if not month_param:
+        return timezone.localdate()
+    try:
+        return datetime.strptime(month_param, "%Y-%m").date()
+    except ValueError:
+        raise ValidationError({'month': 'YYYY-MM 형식이어야 합니다.'})
+
+
+def calendar_data(first_day, summaries):
+    days = month_days(first_day, month_date_range(first_day)[1], summaries)
+    return {
+        'month': first_day.strftime("%Y-%m"),
+        'days': CalendarDaySerializer(days, many=True).data,
+    }
+
+
+class AgendaTaskSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='task.id', allow_null=True)
+    title = serializers.CharField(source='task.title')
+    status = serializers.CharField(source='task.status')
+    start_at = serializers.DateTimeField(source='start_local', allow_null=True)
+    due_at = serializers.DateTimeField(source='end_local', allow_null=True)
+    is_recurring = serializers.BooleanField(source='task.is_recurring')
+    occurrence_of = serializers.IntegerField(source='task.occurrence_of', allow_null=True)
+    occurrence_date = serializers.DateField(source='task.occurrence_date', allow_null=True)
+
+
+class AgendaTransactionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(allow_null=True)
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    memo = serializers.CharField()
+    occurred_at = serializers.DateTimeField(source='occurred_local')
+    task_id = serializers.IntegerField(allow_null=True)
+    account = serializers.DictField()
+    category = serializers.DictField()
+    projected = serializers.BooleanField(default=False)
+
+
+class AgendaHourSerializer(serializers.Serializer):
+    hour = serializers.IntegerField()
+    tasks = AgendaTaskSerializer(many=True)
+    transactions = AgendaTransactionSerializer(many=True)
+
+
+class AgendaDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    hours = AgendaHourSerializer(many=True)
+    totals = serializers.DictField(child=serializers.DecimalField(max_digits=16, decimal_places=2))
+
+
+def _range_response(user, first_day, last_day):
+    days = agenda.build_range(user, first_day, last_day)
+    return Response({
+        'from': first_day.isoformat(),
+        'to': last_day.isoformat(),
+        'totals': {kind: f'{amount:.2f}' for kind, amount in agenda.range_totals(days).items()},
+        'days': AgendaDaySerializer(days, many=True).data,
+    })
+
+
+def query_date(request, name, default=None):
+    value = request.query_params.get(name)
+    if not value:
+        if default is None:
+            raise ValidationError({name: '필수 값입니다.'})
+        return default
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({name: 'YYYY-MM-DD 형식이어야 합니다.'})
+
+
+class DayTransactionSerializer(AgendaTransactionSerializer):
+    occurred_at = serializers.DateTimeField()
+
+
+class DayHourSerializer(serializers.Serializer):
+    hour = serializers.IntegerField()
+    tasks = AgendaTaskSerializer(many=True, source='events')
+    transactions = DayTransactionSerializer(many=True)
+
+
+class PlannerDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    hours = DayHourSerializer(many=True)
+    untimed_tasks = AgendaTaskSerializer(many=True)
+    loose_transactions = DayTransactionSerializer(many=True)
+    totals = serializers.DictField(child=serializers.DecimalField(max_digits=16, decimal_places=2))
+    accounts = serializers.ListField(child=serializers.DictField())
+    categories = serializers.ListField(child=serializers.DictField())
+
+
+def day_data(day, payload):
+    """플래너 하루 페이로드(core.views.build_day_payload)를 API 응답으로 바꾼다. 빈 시간대는 뺀다."""
+
+    *hours, after_hours = payload['hourly_schedule']
+    return PlannerDaySerializer({
+        'date': day,
+        'hours': [hour for hour in hours if hour['events'] or hour['transactions']],
+        'untimed_tasks': after_hours['todos'],
+        'loose_transactions': payload['loose_transactions'],
+        'totals': payload['daily_totals'],
+        'accounts': payload['accounts'],
+        'categories': payload['categories'],
+    }).data
+
+
+class PlannerDayView(APIView):
+    """GET /api/planner/day?date=YYYY-MM-DD → 플래너 하루 화면과 같은 (캐시된) 타임라인."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        day = query_date(request, 'date', timezone.localdate())
+        payload = planner_cache.get_or_build(request.user.id, day, lambda: views.build_day_payload(request.user, day))
+        return Response(day_data(day, payload))
+
+
+class PlannerWeekView(APIView):
+    """GET /api/planner/week?date=YYYY-MM-DD → 그 날짜가 속한 주(일~토)의 날짜·시간대별 일정과 거래."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        first_day, last_day = agenda.week_range(query_date(request, 'date', timezone.localdate()))
+        return _range_response(request.user, first_day, last_day)
+
+
+class PlannerAgendaView(APIView):
+    """GET /api/planner/agenda?from=YYYY-MM-DD&to=YYYY-MM-DD → 구간(최대 MAX_RANGE_DAYS일)의 날짜별 일정과 거래."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        first_day = query_date(request, 'from', timezone.localdate())
+        last_day = query_date(request, 'to', first_day + timedelta(days=13))
+        if last_day < first_day:
+            raise ValidationError({'to': 'from 이후 날짜여야 합니다.'})
+        if (last_day - first_day).days >= agenda.MAX_RANGE_DAYS:
+            raise ValidationError({'to': f'한 번에 {agenda.MAX_RANGE_DAYS}일까지 조회할 수 있습니다.'})
+        return _range_response(request.user, first_day, last_day)
+
+
+class PlannerCacheStatsView(APIView):
+    """GET /api/planner/cache-stats → 플래너 캐시 적중/실패 횟수 (관리자 전용)."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(planner_cache.stats())
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField(source='model')
+    id = serializers.IntegerField(source='object_id')
+    title = serializers.CharField()
+    occurred_at = serializers.DateTimeField(allow_null=True)
+    score = serializers.FloatField()
+
+
+class SearchView(APIView):
+    """GET /api/search/?q=<검색어>&type=task|transaction&limit=N → 일정 제목/설명과 거래 메모 전문 검색(관련도 순)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not search.query_parts(query):
+            raise ValidationError({'q': '검색어를 입력하세요.'})
+        model = request.query_params.get('type') or None
+        if model is not None and model not in search.SOURCES:
+            raise ValidationError({'type': 'task 또는 transaction이어야 합니다.'})
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': '정수여야 합니다.'})
+        documents = search.search(request.user.id, query, model, max(limit, 1))
+        return Response({'query': query, 'results': SearchResultSerializer(documents, many=True).data})
+
+
+# 변경 로그의 model 값 → (응답 키, 조회 쿼리셋, 직렬화기)
+SYNC_RESOURCES = {
+    'task': ('tasks', Task.objects.all(), TaskSerializer),
+    'transaction': ('transactions', Transaction.objects.all(), TransactionSerializer),
+    'account': ('accounts', Account.objects.all(), AccountSerializer),
+    'category': ('categories', Category.objects.all(), CategorySerializer),
+}
+
+
+class SyncView(APIView):
+    """GET /api/sync/?since=<cursor>&limit=N → 커서 이후 바뀐 일정/거래/계정/분류.
+
+    `since` 없이 호출하면 현재 커서만 돌려준다(reset=true). 클라이언트는 커서를 먼저 받은 뒤
+    목록 API로 전체를 받아오고, 이후에는 이 엔드포인트로 변경분만 가져온다.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 5000
+
+    def get(self, request):
+        owner_id = request.user.id
+        since = request.query_params.get('since')
+        if not since:
+            return Response({'cursor': changelog.latest_cursor(owner_id), 'reset': True, 'has_more': False})
+
+        try:
+            since_id, horizon = changelog.decode_cursor(since)
+        except changelog.InvalidCursor:
+            raise ValidationError({'since': '올바르지 않은 커서입니다.'})
+        if changelog.cursor_expired(horizon):
+            # 읽지 않은 로그가 보존 기간을 넘겨 정리됐을 수 있으므로 전체 재동기화를 요구한다.
+            return Response({'cursor': changelog.latest_cursor(owner_id), 'reset': True, 'has_more': False})
+
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': '정수여야 합니다.'})
+        delta = changelog.collect(owner_id, since_id, max(limit, 1))
+
+        payload = {'reset': False, 'has_more': delta.has_more}
+        for model, (key, queryset, serializer_class) in SYNC_RESOURCES.items():
+            ids = delta.upserts.get(model, [])
+            objects = list(optimize(queryset, serializer_class).filter(owner_id=owner_id, id__in=ids).order_by('id')) if ids else []
+            found = {obj.id for obj in objects}
+            payload[key] = {
+                'updated': serializer_class(objects, many=True, context={'request': request}).data,
+                # 이후에 삭제되어 더 이상 없는 객체도 tombstone으로 내려준다.
+                'deleted': sorted(set(delta.deletes.get(model, [])) | (set(ids) - found)),
+            }
+        # 같은 페이지를 다시 받아도 안전하도록, 커서는 확정된 마지막 로그 id까지만 전진한다.
+        payload['cursor'] = changelog.encode_cursor(delta.last_id, delta.horizon)
+        return Response(payload)
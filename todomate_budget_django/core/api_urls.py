@@ -1,7 +1,9 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from tasks.api import TaskViewSet, TagViewSet
-from finance.api import AccountViewSet, CategoryViewSet, TransactionViewSet, BudgetPeriodViewSet, BudgetItemViewSet
+from core import async_api
+from core.api import PlannerAgendaView, PlannerCacheStatsView, PlannerCalendarView, PlannerDayView, PlannerWeekView, SearchView, SyncView
+from finance.api import AccountViewSet, CategoryViewSet, TransactionViewSet, RecurringTransactionViewSet, BudgetPeriodViewSet, BudgetItemViewSet, BudgetAlertViewSet, RollingAverageView, SpendingSeriesView, YearOverYearView
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
@@ -10,9 +12,26 @@ router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'finance/accounts', AccountViewSet, basename='account')
 router.register(r'finance/categories', CategoryViewSet, basename='category')
 router.register(r'finance/transactions', TransactionViewSet, basename='transaction')
+router.register(r'finance/recurring-transactions', RecurringTransactionViewSet, basename='recurringtransaction')
 router.register(r'finance/budget-periods', BudgetPeriodViewSet, basename='budgetperiod')
 router.register(r'finance/budget-items', BudgetItemViewSet, basename='budgetitem')
+router.register(r'finance/budget-alerts', BudgetAlertViewSet, basename='budgetalert')
 
 urlpatterns = [
+    path('planner/day', PlannerDayView.as_view(), name='planner_day_api'),
+    path('planner/calendar', PlannerCalendarView.as_view(), name='planner_calendar'),
+    path('planner/week', PlannerWeekView.as_view(), name='planner_week_api'),
+    path('planner/agenda', PlannerAgendaView.as_view(), name='planner_agenda_api'),
+    path('planner/cache-stats', PlannerCacheStatsView.as_view(), name='planner_cache_stats'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('finance/analytics/series/', SpendingSeriesView.as_view(), name='analytics_series'),
+    path('finance/analytics/yoy/', YearOverYearView.as_view(), name='analytics_yoy'),
+    path('finance/analytics/rolling/', RollingAverageView.as_view(), name='analytics_rolling'),
+    # ASGI 배포에서 쓰는 비동기 읽기 경로. 응답은 위/라우터의 같은 이름 엔드포인트와 같다.
+    path('async/planner/day', async_api.planner_day, name='async_planner_day'),
+    path('async/planner/calendar', async_api.planner_calendar, name='async_planner_calendar'),
+    path('async/tasks/upcoming/', async_api.upcoming_tasks, name='async_task_upcoming'),
+    path('async/finance/transactions/', async_api.transaction_list, name='async_transaction_list'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,168 @@
+"""ASGI로 띄웠을 때 쓰는 비동기 읽기 엔드포인트(/api/async/...).
+
+가장 많이 불리는 읽기 네 가지를 동기 API와 같은 JSON으로 돌려준다.
+- planner/day      ↔ /api/planner/day
+- planner/calendar ↔ /api/planner/calendar
+- tasks/upcoming/  ↔ /api/tasks/upcoming/
+- finance/transactions/ ↔ /api/finance/transactions/ (필터·검색·정렬·키셋 커서 동일)
+
+DRF 뷰는 비동기를 지원하지 않으므로 일반 Django 비동기 뷰로 만들고, 인증(JWT/세션)과 필터 검증처럼
+DRF에 기대는 부분만 sync_to_async로 부른다. 서로 독립적인 쿼리는 asyncio.gather로 함께 기다린다.
+Django 5.0의 비동기 ORM은 요청마다 스레드 하나에서 쿼리를 실행하므로 한 요청 안의 쿼리가 DB에서 겹치지는
+않는다. 이득은 DB를 기다리는 동안 이벤트 루프가 다른 요청을 받는 데 있다(`manage.py benchmark_asgi`).
+WSGI(gunicorn core.wsgi)에서도 동작하지만 요청마다 이벤트 루프를 새로 만드니 ASGI로 띄울 때만 쓴다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, MethodNotAllowed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core import occurrences, planner_cache, views
+from core.api import calendar_data, day_data, query_date, query_month
+from core.calendar_summary import aday_summaries
+from core.conditional import aledger_validators, atask_validators, make_etag, not_modified, set_validator_headers
+from core.optimizer import optimize
+from core.timeranges import month_date_range
+from finance import rollups
+from finance.api import TransactionViewSet
+from finance.serializers import TransactionSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def _json(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def _error(request, exc: APIException):
+    response = _json({'detail': exc.detail} if not isinstance(exc.detail, (dict, list)) else exc.detail, exc.status_code)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        # DRF처럼 첫 번째 인증 방식(JWT)의 WWW-Authenticate를 주고 401로 돌려준다.
+        header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if header:
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = status.HTTP_403_FORBIDDEN
+    return response
+
+
+def async_api_view(view):
+    """GET 전용 비동기 API 뷰. DRF 기본 인증 클래스로 사용자를 확인하고 APIException을 JSON으로 바꾼다.
+
+    view는 DRF Request를 받아 HttpResponse를 돌려주는 코루틴 함수다.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        api_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        try:
+            if request.method not in ('GET', 'HEAD'):
+                raise MethodNotAllowed(request.method)
+            # 세션 인증은 세션/사용자 조회를, JWT는 사용자 조회를 하므로 스레드에서 실행한다.
+            user = await sync_to_async(lambda: api_request.user)()
+            if not user or not user.is_authenticated:
+                raise NotAuthenticated()
+            return await view(api_request, *args, **kwargs)
+        except APIException as exc:
+            return _error(api_request, exc)
+
+    return wrapper
+
+
+async def _conditional(request, validators, build):
+    """ConditionalRequestMixin.conditional_response의 비동기 버전. 일치하면 직렬화 전에 304로 끝낸다."""
+
+    seed, last_modified = validators
+    etag = make_etag(seed, request.user.id, request.path, request.META.get('QUERY_STRING', ''), 'json')
+    if not_modified(request, etag, last_modified):
+        return set_validator_headers(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return set_validator_headers(await build(), etag, last_modified)
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def abuild_day_payload(user, selected_date):
+    """core.views.build_day_payload의 비동기 버전. 독립 쿼리들을 한꺼번에 기다린다."""
+
+    queries = views.day_queries(user, selected_date)
+    tasks, virtual_tasks, transactions, projected, daily_totals, references = await asyncio.gather(
+        _alist(queries['tasks']),
+        sync_to_async(occurrences.task_occurrences)(user, selected_date, selected_date),
+        _alist(queries['transactions']),
+        sync_to_async(occurrences.transaction_occurrences)(user, selected_date, selected_date),
+        rollups.atotals_by_kind(user, selected_date, selected_date),
+        _alist(queries['references']),
+    )
+    accounts, categories = views.split_references(references)
+    return views.assemble_day_payload(
+        selected_date,
+        tasks=tasks,
+        virtual_tasks=virtual_tasks.get(selected_date, []),
+        transactions=transactions,
+        projected_transactions=projected.get(selected_date, []),
+        daily_totals=daily_totals,
+        accounts=accounts,
+        categories=categories,
+    )
+
+
+@async_api_view
+async def planner_day(request):
+    """GET /api/async/planner/day?date=YYYY-MM-DD"""
+
+    day = query_date(request, 'date', timezone.localdate())
+    payload = await planner_cache.aget_or_build(request.user.id, day, lambda: abuild_day_payload(request.user, day))
+    return _json(day_data(day, payload))
+
+
+@async_api_view
+async def planner_calendar(request):
+    """GET /api/async/planner/calendar?month=YYYY-MM"""
+
+    first_day, last_day = month_date_range(query_month(request))
+    return _json(calendar_data(first_day, await aday_summaries(request.user, first_day, last_day)))
+
+
+@async_api_view
+async def upcoming_tasks(request):
+    """GET /api/async/tasks/upcoming/ — 마감이 가까운 일정 10개."""
+
+    async def build():
+        queryset = optimize(Task.objects.filter(owner=request.user), TaskSerializer).order_by('due_at')[:10]
+        return _json(TaskSerializer(await _alist(queryset), many=True, context={'request': request}).data)
+
+    return await _conditional(request, await atask_validators(request.user.id), build)
+
+
+def _transaction_list_view(request):
+    # 필터/검색/정렬은 동기 뷰셋의 설정을 그대로 써서 결과가 같게 한다(필터 값 검증에 쿼리가 들 수 있다).
+    view = TransactionViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    return view, queryset
+
+
+@async_api_view
+async def transaction_list(request):
+    """GET /api/async/finance/transactions/?cursor=&page_size=&ordering=&account=&search=..."""
+
+    async def build():
+        view, queryset = await sync_to_async(_transaction_list_view)(request)
+        paginator = view.paginator
+        rows = await paginator.apaginate_queryset(queryset, request, view=view)
+        data = TransactionSerializer(rows, many=True, context={'request': request, 'view': view}).data
+        return _json(paginator.get_paginated_response(data).data)
+
+    return await _conditional(request, await aledger_validators(request.user.id), build)
@@ -0,0 +1,278 @@
+"""목록 payload를 한 번에 생성/수정/삭제하는 bulk 엔드포인트.
+
+- 참조 id(계정/분류/일정/태그)는 직렬화기의 관계 필드 쿼리셋(core.relations)으로 모델별 IN 쿼리 한 번에 미리 읽는다.
+- 쓰기는 하나의 트랜잭션 안에서 bulk_create/bulk_update로 처리한다.
+- 행 단위 시그널은 끄고, 파생 데이터(롤업, 워터마크, 변경 로그, 플래너 캐시)는 모아서 한 번에 반영한다.
+- mode=atomic(기본)은 하나라도 실패하면 아무것도 쓰지 않고, mode=partial은 유효한 항목만 쓴다.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import changelog, metrics, planner_cache, search
+from core.relations import prefetch_related_ids, related_spec
+from core.signals import task_days, transaction_days
+from finance import balances, budgets, rollups, watermarks
+from finance.signals import LEDGER_FIELDS, ledger_deltas, muted
+
+BULK_MODES = ('atomic', 'partial')
+
+
+def ledger_state(obj) -> dict:
+    return {'id': obj.pk, **{field: getattr(obj, field) for field in LEDGER_FIELDS}}
+
+
+def task_state(obj) -> dict:
+    return {'id': obj.pk, 'start_at': obj.start_at, 'due_at': obj.due_at, 'recurrence': obj.recurrence}
+
+
+def transaction_effects(owner_id, before, after):
+    """거래 before/after 상태 목록을 파생 데이터(롤업, 예산, 잔액, 워터마크, 변경 로그, 플래너 캐시, 검색 색인)에
+    한 번에 반영한다."""
+
+    merged = defaultdict(lambda: [Decimal('0'), 0])
+    for previous, current in [(state, None) for state in before] + [(None, state) for state in after]:
+        for key, (amount, count) in ledger_deltas(previous, current).items():
+            merged[key][0] += amount
+            merged[key][1] += count
+    deltas = {key: tuple(value) for key, value in merged.items()}
+    rollups.apply_deltas(deltas)
+    budgets.apply_deltas(deltas)
+    balances.apply_states(before, after)
+    watermarks.bump(owner_id)
+
+    after_ids = [state['id'] for state in after]
+    metrics.inc('transactions_created_total', amount=len(set(after_ids) - {state['id'] for state in before}))
+    changelog.record(owner_id, 'transaction', after_ids)
+    deleted_ids = [state['id'] for state in before if state['id'] not in set(after_ids)]
+    changelog.record(owner_id, 'transaction', deleted_ids, action='delete')
+    search.index('transaction', after_ids)
+    search.remove('transaction', deleted_ids)
+    planner_cache.invalidate_days(owner_id, transaction_days(owner_id, *before, *after))
+
+
+def task_effects(owner_id, before, after):
+    """일정 before/after 상태 목록을 변경 로그, 플래너 캐시와 검색 색인에 반영한다."""
+
+    after_ids = [state['id'] for state in after]
+    metrics.inc('tasks_created_total', amount=len(set(after_ids) - {state['id'] for state in before}))
+    changelog.record(owner_id, 'task', after_ids)
+    deleted_ids = [state['id'] for state in before if state['id'] not in set(after_ids)]
+    changelog.record(owner_id, 'task', deleted_ids, action='delete')
+    search.index('task', after_ids)
+    search.remove('task', deleted_ids)
+    if any(state.get('recurrence') for state in (*before, *after)):
+        # 반복 원본은 규칙이 닿는 모든 날짜에 가상 발생으로 보이므로 사용자 전체 버전을 올린다.
+        planner_cache.invalidate_user(owner_id)
+    else:
+        planner_cache.invalidate_days(owner_id, task_days(*before, *after))
+
+
+class BulkWriteMixin:
+    """`/<resource>/bulk/` POST(생성)·PATCH(수정)·DELETE(삭제)를 제공하는 ViewSet 믹스인.
+
+    하위 클래스가 정할 것:
+    - bulk_state(obj) / bulk_effects(owner_id, before, after)
+    - save()가 채우던 파생 필드가 있으면 bulk_derived_fields와 bulk_prepare(obj)
+    """
+
+    bulk_batch_size = 1000
+    bulk_m2m_fields: tuple[str, ...] = ()
+    # bulk_prepare가 다시 계산해 bulk_update에 함께 쓰는 필드
+    bulk_derived_fields: tuple[str, ...] = ()
+
+    def bulk_state(self, obj) -> dict:
+        raise NotImplementedError
+
+    def bulk_prepare(self, obj):
+        """bulk_create/bulk_update로 쓰기 직전 훅. save()를 거치지 않으므로 파생 필드를 여기서 채운다."""
+
+    def bulk_effects(self, owner_id, before, after):
+        raise NotImplementedError
+
+    def get_bulk_model(self):
+        return self.get_serializer_class().Meta.model
+
+    def get_bulk_max_items(self):
+        return getattr(settings, 'BULK_MAX_ITEMS', 10_000)
+
+    # ---- payload 처리 -------------------------------------------------
+
+    def _bulk_mode(self, request):
+        mode = request.query_params.get('mode', 'atomic')
+        if mode not in BULK_MODES:
+            raise ValidationError({'mode': "'atomic' 또는 'partial'이어야 합니다."})
+        return mode
+
+    def _bulk_items(self, request, key):
+        data = request.data
+        items = data.get(key) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            raise ValidationError({key: '목록이어야 합니다.'})
+        if len(items) > self.get_bulk_max_items():
+            raise ValidationError({key: f'한 번에 최대 {self.get_bulk_max_items()}개까지 처리할 수 있습니다.'})
+        return items
+
+    def _bulk_validate(self, items, partial=False, instances=None):
+        """instances({pk: obj})가 있으면 항목마다 그 id의 기존 객체를 instance로 두고 검증한다(수정)."""
+
+        context = self.get_serializer_context()
+        # 필드 구성 비용을 한 번만 치르도록 직렬화기 하나로 모든 항목을 검증한다.
+        validator = self.get_serializer_class()(context=context, partial=partial)
+        context['related_cache'] = prefetch_related_ids(items, related_spec(validator))
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['객체여야 합니다.']}})
+                continue
+            if instances is not None:
+                # validate()가 기존 값(self.instance)과 합쳐 검사할 수 있도록 한다.
+                validator.instance = instances.get(item.get('id'))
+            try:
+                valid.append((index, item, validator.run_validation(item)))
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+        return valid, errors
+
+    def _split_m2m(self, data):
+        data = dict(data)
+        m2m = {field: data.pop(field) for field in self.bulk_m2m_fields if field in data}
+        return data, m2m
+
+    def _set_m2m(self, objs_with_values, replace):
+        for field in self.bulk_m2m_fields:
+            descriptor = getattr(self.get_bulk_model(), field)
+            through = descriptor.through
+            source, target = descriptor.field.m2m_field_name(), descriptor.field.m2m_reverse_field_name()
+            touched = [(obj, values[field]) for obj, values in objs_with_values if field in values]
+            if not touched:
+                continue
+            if replace:
+                through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in touched]}).delete()
+            through.objects.bulk_create(
+                [through(**{f'{source}_id': obj.pk, f'{target}_id': related.pk}) for obj, values in touched for related in values],
+                batch_size=self.bulk_batch_size,
+                ignore_conflicts=not replace,
+            )
+
+    # ---- 엔드포인트 -----------------------------------------------------
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        mode = self._bulk_mode(request)
+        if request.method == 'POST':
+            return self.bulk_create(request, mode)
+        if request.method == 'PATCH':
+            return self.bulk_update(request, mode)
+        return self.bulk_destroy(request, mode)
+
+    def _bulk_response(self, key, ids, errors, mode, success_status=status.HTTP_200_OK):
+        if errors and mode == 'atomic':
+            return Response({key: [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {key: ids, 'errors': errors},
+            status=status.HTTP_207_MULTI_STATUS if errors else success_status,
+        )
+
+    def bulk_create(self, request, mode):
+        items = self._bulk_items(request, 'items')
+        valid, errors = self._bulk_validate(items)
+        if errors and mode == 'atomic':
+            return self._bulk_response('created', [], errors, mode)
+
+        model = self.get_bulk_model()
+        pairs = []
+        for _, _, data in valid:
+            fields, m2m = self._split_m2m(data)
+            obj = model(owner=request.user, **fields)
+            self.bulk_prepare(obj)
+            pairs.append((obj, m2m))
+        with transaction.atomic(), muted():
+            created = model.objects.bulk_create([obj for obj, _ in pairs], batch_size=self.bulk_batch_size)
+            self._set_m2m(pairs, replace=False)
+            self.bulk_effects(request.user.id, [], [self.bulk_state(obj) for obj in created])
+        return self._bulk_response('created', [obj.pk for obj in created], errors, mode, status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, mode):
+        items = self._bulk_items(request, 'items')
+        model = self.get_bulk_model()
+        ids = {item.get('id') for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)}
+        existing = {obj.pk: obj for obj in model.objects.filter(owner=request.user, pk__in=list(ids))}
+        # 같은 id를 두 번 고치면 뒤 항목의 before가 앞 항목의 변경을 담아 파생 데이터가 어긋나므로 처음 것만 받는다.
+        seen, repeated = set(), set()
+        for index, item in enumerate(items):
+            pk = item.get('id') if isinstance(item, dict) else None
+            if isinstance(pk, int):
+                if pk in seen:
+                    repeated.add(index)
+                seen.add(pk)
+
+        valid, errors = self._bulk_validate(items, partial=True, instances=existing)
+        updates = []
+        for index, item, data in valid:
+            obj = existing.get(item.get('id'))
+            if index in repeated:
+                errors.append({'index': index, 'errors': {'id': ['중복된 id입니다.']}})
+                continue
+            if obj is None:
+                errors.append({'index': index, 'errors': {'id': ['존재하지 않는 항목입니다.']}})
+                continue
+            updates.append((obj, data))
+        errors.sort(key=lambda error: error['index'])
+        if errors and mode == 'atomic':
+            return self._bulk_response('updated', [], errors, mode)
+
+        before, changed_fields, pairs = [], set(), []
+        for obj, data in updates:
+            before.append(self.bulk_state(obj))
+            fields, m2m = self._split_m2m(data)
+            for name, value in fields.items():
+                setattr(obj, name, value)
+            self.bulk_prepare(obj)
+            changed_fields.update(fields, self.bulk_derived_fields)
+            pairs.append((obj, m2m))
+        objs = [obj for obj, _ in pairs]
+        auto_now = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+        for field in auto_now:
+            for obj in objs:
+                field.pre_save(obj, add=False)
+            changed_fields.add(field.name)
+
+        with transaction.atomic(), muted():
+            if objs and changed_fields:
+                model.objects.bulk_update(objs, sorted(changed_fields), batch_size=self.bulk_batch_size)
+            self._set_m2m(pairs, replace=True)
+            self.bulk_effects(request.user.id, before, [self.bulk_state(obj) for obj in objs])
+        return self._bulk_response('updated', [obj.pk for obj in objs], errors, mode)
+
+    def bulk_destroy(self, request, mode):
+        ids = self._bulk_items(request, 'ids')
+        model = self.get_bulk_model()
+        clean_ids = [i for i in ids if isinstance(i, int) and not isinstance(i, bool)]
+        targets = list(model.objects.filter(owner=request.user, pk__in=clean_ids))
+        found = {obj.pk for obj in targets}
+        errors = [
+            {'index': index, 'errors': {'id': ['존재하지 않는 항목입니다.']}}
+            for index, value in enumerate(ids) if value not in found
+        ]
+        if errors and mode == 'atomic':
+            return self._bulk_response('deleted', [], errors, mode)
+
+        before = [self.bulk_state(obj) for obj in targets]
+        with transaction.atomic(), muted():
+            self.before_bulk_destroy(request.user.id, found)
+            model.objects.filter(pk__in=found).delete()
+            self.bulk_effects(request.user.id, before, [])
+        return self._bulk_response('deleted', sorted(found), errors, mode)
+
+    def before_bulk_destroy(self, owner_id, ids):
+        """삭제 직전 훅. CASCADE/SET_NULL로 함께 바뀌는 행을 기록할 때 쓴다."""
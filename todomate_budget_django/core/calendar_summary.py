@@ -0,0 +1,114 @@
+"""월간 달력 히트맵: 지역 날짜별 일정 수와 수입/지출 합계를 한 번의 쿼리로 집계한다."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import CharField, Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from core import occurrences
+from core.timeranges import local_range_bounds, within
+from finance.models import DailyLedgerRollup
+from tasks.models import Task
+
+TASK_LABEL = 'tasks'
+AMOUNT_FIELD = DecimalField(max_digits=16, decimal_places=2)
+
+
+def _empty_day():
+    return {'task_count': 0, 'expense': Decimal('0'), 'income': Decimal('0')}
+
+
+def _summary_query(user, first_day: date, last_day: date):
+    """시작일/마감일 기준 일정 수(같은 날이면 한 번만 센다)와 롤업 합계를 UNION ALL로 묶은 그룹 집계."""
+
+    tz = timezone.get_current_timezone()
+    bounds = local_range_bounds(first_day, last_day)
+
+    # 시작일 기준으로 한 번씩 센다.
+    by_start = (
+        Task.objects.filter(owner=user, **within('start_at', bounds))
+        .order_by()
+        .annotate(day=TruncDate('start_at', tzinfo=tz), label=Value(TASK_LABEL, output_field=CharField()))
+        .values('day', 'label')
+        .annotate(value=Cast(Count('id'), AMOUNT_FIELD))
+    )
+    # 마감일 기준은 시작일과 같은 지역 날짜가 아닌 경우만 더해 중복을 피한다.
+    by_due = (
+        Task.objects.filter(owner=user, **within('due_at', bounds))
+        .order_by()
+        .annotate(
+            day=TruncDate('due_at', tzinfo=tz),
+            start_day=TruncDate('start_at', tzinfo=tz),
+            label=Value(TASK_LABEL, output_field=CharField()),
+        )
+        .filter(Q(start_at__isnull=True) | ~Q(start_day=F('day')))
+        .values('day', 'label')
+        .annotate(value=Cast(Count('id'), AMOUNT_FIELD))
+    )
+    # 금액은 거래 대신 일별 롤업에서 읽는다.
+    amounts = (
+        DailyLedgerRollup.objects.filter(
+            owner=user, date__gte=first_day, date__lte=last_day, kind__in=('expense', 'income')
+        )
+        .order_by()
+        .annotate(day=F('date'), label=F('kind'))
+        .values('day', 'label')
+        .annotate(value=Sum('total'))
+    )
+
+    return by_start.union(by_due, amounts, all=True)
+
+
+def _merge(rows, virtual_tasks) -> dict[date, dict[str, object]]:
+    summaries: dict[date, dict[str, object]] = defaultdict(_empty_day)
+    for row in rows:
+        day = row['day']
+        bucket = summaries[day]
+        if row['label'] == TASK_LABEL:
+            bucket['task_count'] += int(row['value'])
+        else:
+            bucket[row['label']] += Decimal(str(row['value']))
+    for day, tasks in virtual_tasks.items():
+        summaries[day]['task_count'] += len(tasks)
+    return dict(summaries)
+
+
+def day_summaries(user, first_day: date, last_day: date) -> dict[date, dict[str, object]]:
+    """[first_day, last_day] 구간의 지역 날짜별 {'task_count', 'expense', 'income'}.
+
+    DB에서 그룹 집계한 결과만 가져온다. 반복 일정의 가상 발생은 규칙에서 계산해 일정 수에 더한다.
+    """
+
+    rows = list(_summary_query(user, first_day, last_day))
+    return _merge(rows, occurrences.task_occurrences(user, first_day, last_day))
+
+
+async def aday_summaries(user, first_day: date, last_day: date) -> dict[date, dict[str, object]]:
+    """day_summaries의 비동기 버전. 집계 쿼리와 반복 일정 전개를 동시에 기다린다."""
+
+    async def summary_rows():
+        return [row async for row in _summary_query(user, first_day, last_day)]
+
+    rows, virtual_tasks = await asyncio.gather(
+        summary_rows(),
+        sync_to_async(occurrences.task_occurrences)(user, first_day, last_day),
+    )
+    return _merge(rows, virtual_tasks)
+
+
+def month_days(first_day: date, last_day: date, summaries: dict[date, dict[str, object]]):
+    """구간의 모든 날짜를 채운 리스트. 값이 없는 날은 0으로 채운다."""
+
+    days = []
+    current = first_day
+    while current <= last_day:
+        days.append({'date': current, **summaries.get(current, _empty_day())})
+        current += timedelta(days=1)
+    return days
@@ -0,0 +1,166 @@
+"""변경 로그 기록, 불투명 커서, 델타 수집, 보존/압축 작업."""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import ChangeLogEntry
+
+CURSOR_VERSION = 'v1'
+
+
+def retention_days() -> int:
+    return getattr(settings, 'SYNC_CHANGE_LOG_RETENTION_DAYS', 30)
+
+
+def settle_seconds() -> int:
+    return getattr(settings, 'SYNC_CURSOR_SETTLE_SECONDS', 10)
+
+
+def _settled_before() -> datetime:
+    """이 시각 전에 만든 로그 행만 확정된 것으로 본다.
+
+    id는 INSERT 때 정해지고 행은 커밋 때 보이므로, 동시 트랜잭션에서는 작은 id가 나중에 보일 수 있다.
+    커서는 만든 지 settle_seconds가 지난 행까지만 넘어가고, 그 뒤의 행은 내려주되 다음 요청에서 다시 읽는다.
+    트랜잭션이 이 시간보다 짧으면 늦게 커밋된 행을 건너뛰지 않는다.
+    """
+
+    return timezone.now() - timedelta(seconds=settle_seconds())
+
+
+def record(owner_id: int, model: str, object_ids: Iterable[int], action: str = 'upsert') -> None:
+    """객체 변경을 로그에 남긴다. bulk_create 같은 시그널 없는 경로도 이 함수를 호출한다."""
+
+    entries = [
+        ChangeLogEntry(owner_id=owner_id, model=model, object_id=object_id, action=action)
+        for object_id in dict.fromkeys(object_ids)
+    ]
+    if entries:
+        ChangeLogEntry.objects.bulk_create(entries)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(entry_id: int, horizon: datetime | None = None) -> str:
+    """horizon: 아직 읽지 않은 가장 오래된 로그 행이 만들어진 시각(없으면 지금)."""
+
+    horizon = horizon or timezone.now()
+    raw = f'{CURSOR_VERSION}:{entry_id}:{int(horizon.timestamp())}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[int, datetime]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        version, entry_id, issued = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        if version != CURSOR_VERSION:
+            raise ValueError(version)
+        return int(entry_id), datetime.fromtimestamp(int(issued), tz=dt_timezone.utc)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def cursor_expired(horizon: datetime) -> bool:
+    """아직 읽지 않은 행이 보존 기간보다 오래됐으면 압축으로 지워졌을 수 있어 전체 재동기화가 필요하다.
+
+    커서를 발급한 시각이 아니라 읽지 않은 가장 오래된 행의 시각으로 판단하므로, has_more로 밀린 로그를
+    넘겨 가는 중에 새로 받은 커서도 그 뒤의 행이 지워졌으면 만료된다.
+    """
+
+    return horizon < timezone.now() - timedelta(days=retention_days())
+
+
+def latest_cursor(owner_id: int) -> str:
+    """지금까지 확정된 마지막 행을 가리키는 커서. 그 뒤의 최근 행은 첫 동기화에서 다시 내려준다."""
+
+    last_id = (
+        ChangeLogEntry.objects.filter(owner_id=owner_id, created_at__lte=_settled_before())
+        .aggregate(last=Max('id'))['last'] or 0
+    )
+    return encode_cursor(last_id)
+
+
+@dataclass
+class Delta:
+    upserts: dict[str, list[int]] = field(default_factory=dict)
+    deletes: dict[str, list[int]] = field(default_factory=dict)
+    last_id: int = 0
+    has_more: bool = False
+    # 커서 뒤에 남은(다음에 읽을) 가장 오래된 행의 생성 시각. 없으면 None(지금).
+    horizon: datetime | None = None
+
+
+def collect(owner_id: int, since_id: int, limit: int) -> Delta:
+    """since_id 이후의 로그를 최대 limit줄 읽어 객체별 최종 동작으로 접는다.
+
+    last_id는 확정된 행(_settled_before)이 이어지는 데까지만 전진한다. 그 뒤의 행도 내려주지만
+    다음 요청에서 다시 읽으며, 그때는 has_more를 올리지 않아 같은 페이지를 되풀이하지 않게 한다.
+    """
+
+    rows = list(
+        ChangeLogEntry.objects.filter(owner_id=owner_id, id__gt=since_id)
+        .order_by('id')
+        .values_list('id', 'model', 'object_id', 'action', 'created_at')[: limit + 1]
+    )
+    settled_before = _settled_before()
+    delta = Delta(last_id=since_id)
+    final: dict[tuple[str, int], str] = {}
+    settled = True
+    for entry_id, model, object_id, action, created_at in rows[:limit]:
+        # 같은 객체가 여러 번 바뀌었다면 마지막 동작만 남긴다.
+        final.pop((model, object_id), None)
+        final[(model, object_id)] = action
+        if settled and created_at <= settled_before:
+            delta.last_id = entry_id
+        elif settled:
+            settled = False
+            delta.horizon = created_at
+    if settled and len(rows) > limit:
+        delta.has_more = True
+        delta.horizon = rows[limit][4]
+    for (model, object_id), action in final.items():
+        bucket = delta.upserts if action == 'upsert' else delta.deletes
+        bucket.setdefault(model, []).append(object_id)
+    return delta
+
+
+def compact(batch_size: int = 10_000) -> tuple[int, int]:
+    """보존 기간이 지난 행을 지우고, 같은 객체의 중복 행은 가장 최근 것만 남긴다.
+
+    보존 기간은 커서 만료 판단(`cursor_expired`)과 같은 값을 써야 변경이 유실되지 않는다.
+    (expired, duplicates) 삭제 건수를 돌려준다.
+    """
+
+    cutoff = timezone.now() - timedelta(days=retention_days())
+    expired = 0
+    while True:
+        ids = list(ChangeLogEntry.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        expired += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+
+    # 객체별 최신 id만 남긴다. 커서 이후 최종 상태는 최신 행 하나로 결정되므로 안전하다.
+    latest_ids = (
+        ChangeLogEntry.objects.order_by()
+        .values('owner_id', 'model', 'object_id')
+        .annotate(latest=Max('id'))
+        .values_list('latest', flat=True)
+    )
+    duplicates = 0
+    while True:
+        ids = list(
+            ChangeLogEntry.objects.exclude(id__in=latest_ids).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        duplicates += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+    return expired, duplicates
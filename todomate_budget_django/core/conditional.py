@@ -0,0 +1,161 @@
+"""조건부 요청(ETag / Last-Modified) 지원.
+
+검증자는 페이로드를 직렬화하지 않고 값싼 집계만으로 만든다.
+- 일정: (owner, updated_at) 인덱스 위의 Max(updated_at)와 Count, 응답에 실리는 태그의 Max(updated_at)와 Count
+- 가계부: 사용자별 LedgerWatermark 한 행
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max, Subquery, Value
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from finance import watermarks
+from tasks.models import Tag, Task
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def tag_columns() -> dict:
+    """태그 전체의 Max(updated_at)/Count 스칼라 서브쿼리. 일정 응답에 태그 이름/색이 실리므로 일정 집계 쿼리에
+    함께 실어 쿼리 수를 늘리지 않고 태그 수정도 감지한다. 태그는 사용자 공용이고 수가 적다."""
+
+    tags = Tag.objects.order_by().annotate(group=Value(1)).values('group')
+    return {
+        'tags_last': Subquery(tags.annotate(value=Max('updated_at')).values('value')),
+        'tags_count': Subquery(tags.annotate(value=Count('id')).values('value')),
+    }
+
+
+def _task_seed(row) -> tuple[tuple, datetime | None]:
+    return combine_validators(
+        (('tasks', row['last'], row['count']), row['last']),
+        (('tags', row['tags_last'], row['tags_count']), row['tags_last']),
+    )
+
+
+def _task_aggregates() -> dict:
+    return {'last': Max('updated_at'), 'count': Count('id'), **{name: Max(column) for name, column in tag_columns().items()}}
+
+
+def task_validators(owner_id: int) -> tuple[tuple, datetime | None]:
+    """사용자 일정 전체에 대한 (seed, last_modified). 삭제는 Count 변화로, 태그 수정은 태그 집계로 감지한다."""
+
+    return _task_seed(Task.objects.filter(owner_id=owner_id).order_by().aggregate(**_task_aggregates()))
+
+
+async def atask_validators(owner_id: int) -> tuple[tuple, datetime | None]:
+    return _task_seed(await Task.objects.filter(owner_id=owner_id).order_by().aaggregate(**_task_aggregates()))
+
+
+def ledger_validators(owner_id: int) -> tuple[tuple, datetime | None]:
+    """사용자 가계부 전체에 대한 (seed, last_modified)."""
+
+    version, changed_at = watermarks.current(owner_id)
+    return ('ledger', version), changed_at
+
+
+async def aledger_validators(owner_id: int) -> tuple[tuple, datetime | None]:
+    version, changed_at = await watermarks.acurrent(owner_id)
+    return ('ledger', version), changed_at
+
+
+def combine_validators(*validators) -> tuple[tuple, datetime | None]:
+    seeds = tuple(seed for seed, _ in validators)
+    moments = [moment for _, moment in validators if moment is not None]
+    return seeds, (max(moments) if moments else None)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    tags = parse_etags(header)
+    return '*' in tags or etag in tags
+
+
+def not_modified(request, etag: str, last_modified: datetime | None) -> bool:
+    """If-None-Match가 있으면 그것만, 없으면 If-Modified-Since로 판단한다(RFC 9110)."""
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is not None and last_modified is not None:
+        return int(last_modified.timestamp()) <= if_modified_since
+    return False
+
+
+def set_validator_headers(response, etag: str, last_modified: datetime | None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalRequestMixin:
+    """ViewSet용 조건부 요청 믹스인.
+
+    하위 클래스는 `get_conditional_validators(detail)`에서 (seed, last_modified)를 돌려준다.
+    목록/상세 GET은 일치하면 직렬화 전에 304로 끝나고, 수정/삭제는 If-Match가 어긋나면 412를 돌려준다.
+    """
+
+    def get_conditional_validators(self, detail: bool):
+        raise NotImplementedError
+
+    def _conditional_etag(self, seed):
+        request = self.request
+        # 같은 URL이라도 사용자/렌더러(JSON, 브라우저블 API)가 다르면 다른 표현이다.
+        return make_etag(seed, request.user.id, request.path, self._etag_query(), self.request.accepted_renderer.format)
+
+    def _etag_query(self):
+        # If-Match는 GET으로 받은 상세 ETag와 비교하므로 상세 경로는 쿼리스트링을 무시한다.
+        return self.request.META.get('QUERY_STRING', '') if self.action not in self._detail_actions else ''
+
+    _detail_actions = ('retrieve', 'update', 'partial_update', 'destroy')
+
+    def conditional_response(self, detail: bool, build):
+        seed, last_modified = self.get_conditional_validators(detail)
+        etag = self._conditional_etag(seed)
+        if not_modified(self.request, etag, last_modified):
+            return set_validator_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return set_validator_headers(build(), etag, last_modified)
+
+    def precondition_failed(self):
+        if_match = self.request.META.get('HTTP_IF_MATCH')
+        if not if_match:
+            return None
+        seed, last_modified = self.get_conditional_validators(detail=True)
+        etag = self._conditional_etag(seed)
+        if etag_matches(if_match, etag):
+            return None
+        return set_validator_headers(
+            Response({'detail': '리소스가 변경되었습니다. 다시 조회한 뒤 수정해주세요.'}, status=status.HTTP_412_PRECONDITION_FAILED),
+            etag,
+            last_modified,
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(False, lambda: super(ConditionalRequestMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(True, lambda: super(ConditionalRequestMixin, self).retrieve(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        failed = self.precondition_failed()
+        if failed is not None:
+            return failed
+        response = super().update(request, *args, **kwargs)
+        seed, last_modified = self.get_conditional_validators(detail=True)
+        return set_validator_headers(response, self._conditional_etag(seed), last_modified)
+
+    def destroy(self, request, *args, **kwargs):
+        failed = self.precondition_failed()
+        if failed is not None:
+            return failed
+        return super().destroy(request, *args, **kwargs)
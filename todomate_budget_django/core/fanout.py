@@ -0,0 +1,181 @@
+"""서로 독립적인 쿼리를 스레드 풀에서 동시에 보내는 작은 팬아웃 도구.
+
+    rows = fanout.gather(tasks=lambda: list(task_qs), totals=lambda: rollups.totals_by_kind(user, day, day))
+
+DB가 네트워크 너머에 있으면 요청 시간은 쿼리 수 × 왕복 시간만큼 늘어난다. 서로 결과를 쓰지 않는 쿼리는
+워커 스레드(각자 자기 DB 연결)에서 함께 보내 요청이 기다리는 왕복 수를 가장 긴 갈래의 쿼리 수로 줄인다.
+
+- 호출한 스레드가 첫 작업을 직접 실행하고, 나머지는 풀에 넣는다. 기다릴 차례에 아직 시작되지 않은 작업은
+  취소하고 직접 실행한다. 풀이 다른 요청으로 바쁘면 차례로 실행한 것과 같아질 뿐 더 느려지지 않고,
+  워커 안에서 다시 gather를 불러도(중첩) 서로를 기다리며 멈추지 않는다.
+- 호출한 스레드 연결에 걸린 execute_wrapper(메트릭/프로파일링)와 contextvars를 워커에서도 그대로 쓴다.
+- 워커 스레드에는 request_started/request_finished가 없으므로 작업마다 시작 전에 연결의 CONN_MAX_AGE,
+  CONN_HEALTH_CHECKS와 오류 상태를 직접 확인해 오래됐거나 끊긴 연결을 닫는다(다음 쿼리가 새로 연다).
+  풀은 프로세스마다 하나이므로 프로세스당 추가 DB 연결은 최대 FANOUT_WORKERS개다.
+- FANOUT_WORKERS=0이거나, 호출한 쪽이 트랜잭션 안이면(다른 연결은 커밋 전 변경을 보지 못한다) 차례로 실행한다.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_WORKERS = 4
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_executor_key: tuple[int, int] | None = None
+
+# 지금 실행 중인 갈래의 왕복 수 [count]. 갈래 밖(요청 스레드)이면 None.
+_lane: contextvars.ContextVar[list | None] = contextvars.ContextVar('fanout_lane', default=None)
+_tracker: contextvars.ContextVar['RoundTrips | None'] = contextvars.ContextVar('fanout_tracker', default=None)
+
+
+def workers() -> int:
+    return max(int(getattr(settings, 'FANOUT_WORKERS', DEFAULT_WORKERS)), 0)
+
+
+def _pool(size: int) -> ThreadPoolExecutor:
+    global _executor, _executor_key
+    # fork된 워커 프로세스는 부모의 스레드를 물려받지 않으므로 pid마다 새로 만든다.
+    key = (os.getpid(), size)
+    with _lock:
+        if _executor_key != key:
+            if _executor is not None and _executor_key[0] == os.getpid():
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='fanout')
+            _executor_key = key
+        return _executor
+
+
+def _in_transaction() -> bool:
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def _caller_wrappers() -> dict[str, list]:
+    return {
+        connection.alias: list(connection.execute_wrappers)
+        for connection in connections.all(initialized_only=True)
+        if connection.execute_wrappers
+    }
+
+
+def _recycle_connections() -> None:
+    """요청 스레드에서 request_started/finished가 하는 일. 서버가 끊은 연결로 다음 작업이 실패하지 않게 한다."""
+
+    for connection in connections.all(initialized_only=True):
+        connection.close_if_unusable_or_obsolete()
+
+
+def _run_in_worker(fn: Callable, wrappers: dict[str, list], lane: list):
+    _recycle_connections()
+    _lane.set(lane)
+    with ExitStack() as stack:
+        for alias, items in wrappers.items():
+            connection = connections[alias]
+            for wrapper in items:
+                # 연결을 열 때 이미 걸린 래퍼(connection_created 수신자)는 두 번 걸지 않는다.
+                if wrapper not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+        return fn()
+
+
+def _run_inline(fn: Callable, lane: list):
+    _lane.set(lane)
+    return fn()
+
+
+def _add_round_trips(count: int) -> None:
+    lane = _lane.get()
+    if lane is not None:
+        lane[0] += count
+        return
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.add_round_trips(count)
+
+
+def gather(**calls: Callable) -> dict:
+    """이름=인자 없는 함수들을 동시에 실행해 {이름: 결과}를 돌려준다. 하나라도 실패하면 모두 끝난 뒤 첫 예외를 올린다."""
+
+    size = workers()
+    if len(calls) < 2 or size == 0 or _in_transaction():
+        return {name: call() for name, call in calls.items()}
+
+    pool = _pool(size)
+    wrappers = _caller_wrappers()
+    own_lane = [0]
+    lanes = []
+    names = list(calls)
+    futures = {}
+    for name in names[1:]:
+        lane = [0]
+        futures[name] = (pool.submit(contextvars.copy_context().run, _run_in_worker, calls[name], wrappers, lane), lane)
+
+    results, error = {}, None
+    try:
+        results[names[0]] = contextvars.copy_context().run(_run_inline, calls[names[0]], own_lane)
+    except Exception as exc:
+        error = exc
+    for name in names[1:]:
+        future, lane = futures[name]
+        try:
+            if future.cancel():
+                # 풀이 바빠 아직 시작하지 못한 작업은 직접 실행한다.
+                results[name] = contextvars.copy_context().run(_run_inline, calls[name], own_lane)
+            else:
+                results[name] = future.result()
+                lanes.append(lane[0])
+        except Exception as exc:
+            error = error or exc
+    _add_round_trips(max([own_lane[0], *lanes]))
+    if error is not None:
+        raise error
+    return results
+
+
+class RoundTrips:
+    """요청 하나에서 보낸 쿼리 수(queries)와 그중 차례로 기다린 왕복 수(round_trips).
+
+    gather로 동시에 보낸 갈래들은 가장 긴 갈래의 쿼리 수만큼만 round_trips에 더한다.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def add_round_trips(self, count: int) -> None:
+        with self._lock:
+            self.round_trips += count
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.queries += 1
+        if _lane.get() is None:
+            self.add_round_trips(1)
+        else:
+            _lane.get()[0] += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def track_round_trips():
+    """with 블록 안에서 현재 스레드(와 gather 워커)가 보낸 쿼리 수와 왕복 수를 센다."""
+
+    tracker = RoundTrips()
+    token = _tracker.set(tracker)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            yield tracker
+    finally:
+        _tracker.reset(token)
@@ -0,0 +1,213 @@
+"""ModelSerializer의 읽기 출력을 values() 행에서 바로 만드는 빠른 읽기 경로.
+
+목록 API는 행마다 모델 인스턴스를 만들고 필드마다 DRF의 get_attribute/to_representation을 거친다.
+RowSerializer는 직렬화기 선언을 한 번 읽어 (열, 변환) 계획을 만들고 같은 JSON을
+- 필요한 열만 고른 values() 행과
+- 중첩 목록(M2M)마다 중간 테이블을 한 번 읽는 IN 조회
+로 만든다. 변환이 항등인 필드(문자열/정수/불리언/pk)는 값을 그대로 쓰고, 날짜/금액처럼 형식이 있는
+필드는 직렬화기의 필드 객체(to_representation)를 그대로 불러 출력이 바이트 단위로 같다.
+
+지원하는 필드: 모델 필드, pk 관계(PrimaryKeyRelatedField), null이 아닌 FK를 따라가는 점 경로,
+OwnerUsernameField(owner_id 열과 요청 사용자로 채운다), M2M 필드의 중첩 ModelSerializer(many=True, 모델 기본
+정렬이 없으면 pk 순).
+그 밖의 필드가 있으면 처음 쓸 때 ImproperlyConfigured를 낸다. FAST_READ_SERIALIZERS=False면
+RowReadMixin은 원래 ModelSerializer 경로로 돌아간다.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.optimizer import ordering_columns
+from core.relations import OwnerUsernameField, owner_usernames
+
+# OwnerUsernameField 자리 표시. 이름은 data()에서 요청당 한 번 모은다.
+_OWNER = object()
+
+# to_representation이 DB 값을 그대로 돌려주는 필드
+_IDENTITY = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField)
+
+
+def _model_field(model, name: str):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise ImproperlyConfigured(f'{model.__name__}.{name}: 모델 필드가 아니면 values()로 읽을 수 없습니다.')
+
+
+def _column(model, source: str, pk_relation: bool) -> str:
+    """직렬화 필드 source를 values() 열 이름으로 바꾼다."""
+
+    *hops, name = source.split('.')
+    for hop in hops:
+        field = _model_field(model, hop)
+        if not (field.many_to_one or field.one_to_one) or field.null:
+            raise ImproperlyConfigured(f'{source}: null이 아닌 FK 경로만 따라갈 수 있습니다.')
+        model = field.related_model
+    field = _model_field(model, name)
+    if field.many_to_many or field.one_to_many or (field.is_relation and not pk_relation):
+        raise ImproperlyConfigured(f'{source}: 관계 필드는 pk(PrimaryKeyRelatedField)로만 읽을 수 있습니다.')
+    return '__'.join([*hops, field.attname])
+
+
+class _Plan:
+    """직렬화기 하나의 읽기 계획. prefix는 중첩 목록에서 중간 테이블 기준 열 이름 앞에 붙는다."""
+
+    def __init__(self, serializer, prefix: str = ''):
+        model = serializer.Meta.model
+        self.model = model
+        self.pk = prefix + model._meta.pk.attname
+        self.columns = [self.pk]
+        # (출력 키, 열 또는 중첩 계획, 변환 함수 또는 None 또는 _OWNER)
+        self.fields = []
+        for field in serializer._readable_fields:
+            if isinstance(field, OwnerUsernameField):
+                column = prefix + _column(model, 'owner', pk_relation=True)
+                if column not in self.columns:
+                    self.columns.append(column)
+                self.fields.append((field.field_name, column, _OWNER))
+                continue
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+                if prefix:
+                    raise ImproperlyConfigured(f'{field.field_name}: 중첩 목록 안의 중첩 목록은 지원하지 않습니다.')
+                self.fields.append((field.field_name, _Nested(model, field), None))
+                continue
+            if isinstance(field, serializers.BaseSerializer) or field.source == '*':
+                raise ImproperlyConfigured(f'{field.field_name}: values()로 만들 수 없는 필드입니다.')
+            pk_relation = isinstance(field, serializers.PrimaryKeyRelatedField)
+            if isinstance(field, serializers.RelatedField) and not (pk_relation and field.pk_field is None):
+                raise ImproperlyConfigured(f'{field.field_name}: pk 관계 필드만 지원합니다.')
+            column = prefix + _column(model, field.source, pk_relation)
+            if column not in self.columns:
+                self.columns.append(column)
+            convert = None if pk_relation or isinstance(field, _IDENTITY) else field.to_representation
+            self.fields.append((field.field_name, column, convert))
+
+    def represent(self, row, lookups) -> dict:
+        item = {}
+        for name, column, convert in self.fields:
+            if isinstance(column, _Nested):
+                item[name] = lookups[name].get(row[self.pk]) or []
+                continue
+            value = row[column]
+            if convert is _OWNER:
+                item[name] = lookups[name][value]
+            else:
+                # DRF도 None은 변환하지 않고 그대로 둔다.
+                item[name] = value if convert is None or value is None else convert(value)
+        return item
+
+    def data(self, rows, context: dict) -> list[dict]:
+        lookups = {}
+        for name, column, convert in self.fields:
+            if isinstance(column, _Nested):
+                lookups[name] = column.load([row[self.pk] for row in rows], context)
+            elif convert is _OWNER:
+                lookups[name] = owner_usernames(context, {row[column] for row in rows})
+        return [self.represent(row, lookups) for row in rows]
+
+
+class _Nested:
+    """M2M 필드의 중첩 ModelSerializer(many=True). 부모 id 목록으로 중간 테이블을 한 번 읽는다."""
+
+    def __init__(self, model, field):
+        m2m = _model_field(model, field.source)
+        if not isinstance(m2m, models.ManyToManyField):
+            raise ImproperlyConfigured(f'{field.field_name}: M2M 필드의 중첩 목록만 지원합니다.')
+        target = m2m.m2m_reverse_field_name()
+        self.parent = f'{m2m.m2m_field_name()}_id'
+        self.child = _Plan(field.child, prefix=f'{target}__')
+        ordering = self.child.model._meta.ordering or ['pk']
+        self.queryset = m2m.remote_field.through.objects.order_by(
+            *[('-' if key.startswith('-') else '') + f'{target}__{key.lstrip("-")}' for key in ordering]
+        )
+
+    def load(self, parent_ids, context: dict) -> dict:
+        grouped = {}
+        if parent_ids:
+            rows = list(self.queryset.filter(**{f'{self.parent}__in': parent_ids}).values(self.parent, *self.child.columns))
+            for parent_id, item in zip((row[self.parent] for row in rows), self.child.data(rows, context)):
+                grouped.setdefault(parent_id, []).append(item)
+        return grouped
+
+
+@cache
+def _plan(serializer_class) -> _Plan:
+    return _Plan(serializer_class())
+
+
+class RowSerializer:
+    """serializer_class와 같은 JSON을 values() 행으로 만든다.
+
+        reader = RowSerializer(TaskSerializer)
+        data = reader.data(reader.values(queryset)[:20])
+    """
+
+    def __init__(self, serializer_class):
+        self.plan = _plan(serializer_class)
+
+    def values(self, queryset, *extra):
+        """출력에 필요한 열(과 extra 열)만 고른 values() 쿼리셋. prefetch는 쓰지 않으므로 지운다."""
+
+        columns = self.plan.columns + [column for column in extra if column not in self.plan.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def data(self, rows, context: dict | None = None) -> list[dict]:
+        """context는 직렬화기 context(요청 사용자로 owner 이름을 채운다)."""
+
+        return self.plan.data(list(rows), {} if context is None else context)
+
+
+def fast_read_enabled() -> bool:
+    return getattr(settings, 'FAST_READ_SERIALIZERS', True)
+
+
+class RowReadMixin:
+    """ModelViewSet의 list/retrieve를 RowSerializer로 처리한다.
+
+    필터/검색/정렬/페이지네이션은 그대로 거친다. 상세의 객체 권한은 row_permission_fields 열만 가진
+    객체로 검사한다.
+    """
+
+    # 객체 권한(IsOwner)이 읽는 열
+    row_permission_fields = ('owner_id',)
+
+    def row_serializer(self) -> RowSerializer:
+        return RowSerializer(self.get_serializer_class())
+
+    def read_many(self, queryset) -> list[dict]:
+        """queryset(정렬/슬라이스까지 끝난 것)을 목록 JSON으로 만든다."""
+
+        if not fast_read_enabled():
+            return self.get_serializer(queryset, many=True).data
+        reader = self.row_serializer()
+        return reader.data(reader.values(queryset), self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        if not fast_read_enabled():
+            return super().list(request, *args, **kwargs)
+        reader = self.row_serializer()
+        # 키셋 페이지네이션은 마지막 행의 정렬 키로 커서를 만든다.
+        queryset = reader.values(self.filter_queryset(self.get_queryset()), *ordering_columns(self))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.data(page, self.get_serializer_context()))
+        return Response(reader.data(queryset, self.get_serializer_context()))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not fast_read_enabled():
+            return super().retrieve(request, *args, **kwargs)
+        reader = self.row_serializer()
+        queryset = reader.values(self.filter_queryset(self.get_queryset()), *self.row_permission_fields)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, SimpleNamespace(**row))
+        return Response(reader.data([row], self.get_serializer_context())[0])
@@ -0,0 +1,308 @@
+"""부하/규모 테스트용 합성 데이터 생성기.
+
+    python manage.py generate_load_data --users 100 --transactions 100000
+
+- 사용자 인덱스마다 Random(f'{seed}:{index}')을 따로 쓰므로, 같은 seed와 종료일이면
+  청크 크기나 이미 만들어 둔 사용자 수와 무관하게 사용자별 데이터가 같다.
+- 행은 메모리에 모두 올리지 않고 chunk_size 단위로 만들어 넣는다(청크마다 트랜잭션 하나). 행이 적은
+  계정/분류/예산은 bulk_create, 일정/태그 연결/거래는 컴파일러를 거치지 않는 insert_rows를 쓴다.
+- bulk_create는 시그널을 거치지 않으므로 롤업/예산 사용액/잔액/검색 색인은 끝에 한 번에 다시 만든다.
+  새 사용자라 플래너 캐시와 변경 로그는 건드리지 않는다.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from core import search
+from finance import balances, rollups, watermarks
+from finance.models import Account, BudgetItem, BudgetPeriod, Category, Transaction
+from finance.signals import muted
+from tasks.models import Tag, Task
+
+User = get_user_model()
+
+ACCOUNT_TYPES = ('cash', 'bank', 'card', 'other')
+EXPENSE_NAMES = ('Food', 'Transport', 'Housing', 'Utilities', 'Health', 'Leisure', 'Shopping', 'Education')
+# 거래 분류 비율. 대부분 지출이고 수입/이체는 드물다.
+KIND_WEIGHTS = {'expense': 0.9, 'income': 0.03, 'transfer': 0.07}
+TASK_COLUMNS = ['owner', 'title', 'priority', 'status', 'start_at', 'due_at']
+TRANSACTION_COLUMNS = ['owner', 'account', 'category', 'task', 'amount', 'memo', 'occurred_at']
+AMOUNT_CENTS = {'expense': (1_000, 10_000_000), 'income': (100_000, 500_000_000), 'transfer': (10_000, 50_000_000)}
+
+
+@dataclass(frozen=True)
+class LoadSpec:
+    """사용자당 개수. tags만 모든 사용자가 함께 쓴다(Tag.name이 전역 unique)."""
+
+    users: int = 10
+    accounts: int = 3
+    categories: int = 8
+    tasks: int = 1_000
+    transactions: int = 10_000
+    tags: int = 50
+    max_tags_per_task: int = 2
+    # 일정에 연결되는 거래 비율(나머지는 loose)
+    linked_ratio: float = 0.25
+    # end 이전 days일에 걸쳐 거래/일정을 흩뿌리고, 일정은 future_days일 뒤까지 잡는다.
+    days: int = 365
+    future_days: int = 30
+    budget_months: int = 12
+    end: date | None = None
+    seed: int = 42
+    chunk_size: int = 5000
+    prefix: str = 'load_user_'
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _adapter(field):
+    """값 하나를 드라이버에 넘길 형태로 바꾸는 함수. 정수/문자열/None처럼 그대로 넘기면 되는 필드는 None."""
+
+    ops = connection.ops
+    if isinstance(field, models.DateTimeField):
+        return ops.adapt_datetimefield_value
+    if isinstance(field, models.DateField):
+        return ops.adapt_datefield_value
+    if isinstance(field, models.DecimalField):
+        return lambda value: ops.adapt_decimalfield_value(value, field.max_digits, field.decimal_places)
+    if isinstance(field, (models.ForeignKey, models.IntegerField, models.CharField, models.TextField,
+                          models.BooleanField)):
+        return None
+    return lambda value: field.get_db_prep_save(value, connection)
+
+
+def insert_rows(model, names: list[str], rows: Iterable[tuple], chunk_size: int, stdout=None, label: str = '') -> int:
+    """names 순서의 값 튜플을 chunk_size개씩 INSERT한다(청크마다 트랜잭션 하나).
+
+    bulk_create와 같은 청크 단위 다중 행 INSERT지만, 값마다 도는 SQL 컴파일러(pre_save/get_db_prep_save)를
+    건너뛰고 필드별 변환 함수만 적용한다. 나머지 필드는 기본값(auto_now는 지금 시각)을 한 번만 변환해 붙인다.
+    """
+
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    varying = [model._meta.get_field(name) for name in names]
+    adapters = [_adapter(field) for field in varying]
+    now = timezone.now()
+    constant = [field for field in fields if field not in varying]
+    constant_values = tuple(
+        field.get_db_prep_save(
+            now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default(),
+            connection,
+        )
+        for field in constant
+    )
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in varying + constant),
+        ', '.join(['%s'] * (len(varying) + len(constant))),
+    )
+
+    inserted = 0
+    for chunk in _chunks(rows, chunk_size):
+        params = [
+            tuple(value if adapt is None or value is None else adapt(value) for adapt, value in zip(adapters, row))
+            + constant_values
+            for row in chunk
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+        inserted += len(chunk)
+        if stdout is not None:
+            stdout.write(f'  {label}{model.__name__}: {inserted}', ending='\r')
+    return inserted
+
+
+def _category_specs(count: int) -> list[tuple[str, str]]:
+    """(name, kind). 수입 하나, 이체 하나(3개 이상일 때), 나머지는 지출."""
+
+    specs = [('Salary', 'income')]
+    if count > 2:
+        specs.append(('Savings', 'transfer'))
+    for index in range(max(count - len(specs), 1)):
+        name = EXPENSE_NAMES[index % len(EXPENSE_NAMES)]
+        specs.append((name if index < len(EXPENSE_NAMES) else f'{name} {index // len(EXPENSE_NAMES) + 1}', 'expense'))
+    return specs[:max(count, 2)]
+
+
+def _month_starts(end: date, months: int) -> list[date]:
+    starts = []
+    current = end.replace(day=1)
+    for _ in range(months):
+        starts.append(current)
+        current = (current - timedelta(days=1)).replace(day=1)
+    return starts
+
+
+def ensure_tags(count: int) -> list[int]:
+    names = [f'load-{index}' for index in range(count)]
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    by_name = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    return [by_name[name] for name in names]
+
+
+class _UserGenerator:
+    def __init__(self, spec: LoadSpec, user, index: int, tag_ids: list[int], stdout=None):
+        self.spec = spec
+        self.user = user
+        self.rng = random.Random(f'{spec.seed}:{index}')
+        self.tag_ids = tag_ids
+        self.stdout = stdout
+        self.tz = timezone.get_current_timezone()
+        end = spec.end or timezone.localdate()
+        self.end = end
+        self.history_start = timezone.make_aware(
+            datetime.combine(end - timedelta(days=spec.days - 1), datetime.min.time()), self.tz
+        )
+        # 과거 종료일로 만들 때도 '이미 지난' 일정/거래의 기준은 종료일 끝이다.
+        self.now = min(timezone.now(), self.history_start + timedelta(days=spec.days))
+
+    def _moment(self, extra_days: int = 0) -> datetime:
+        return self.history_start + timedelta(seconds=self.rng.randrange((self.spec.days + extra_days) * 86400))
+
+    def _amount(self, kind: str) -> Decimal:
+        low, high = AMOUNT_CENTS[kind]
+        return Decimal(self.rng.randrange(low, high)).scaleb(-2)
+
+    def run(self) -> dict[str, int]:
+        spec, rng, owner_id = self.spec, self.rng, self.user.pk
+        accounts = Account.objects.bulk_create([
+            Account(owner_id=owner_id, name=f'Account {index + 1}', type=ACCOUNT_TYPES[index % len(ACCOUNT_TYPES)])
+            for index in range(max(spec.accounts, 1))
+        ])
+        categories = Category.objects.bulk_create([
+            Category(owner_id=owner_id, name=name, kind=kind) for name, kind in _category_specs(spec.categories)
+        ])
+        account_ids = list(Account.objects.filter(owner_id=owner_id).order_by('pk').values_list('pk', flat=True))
+        by_kind: dict[str, list[int]] = {}
+        for category in Category.objects.filter(owner_id=owner_id).order_by('pk'):
+            by_kind.setdefault(category.kind, []).append(category.pk)
+        kinds = [kind for kind in KIND_WEIGHTS if kind in by_kind]
+        weights = [KIND_WEIGHTS[kind] for kind in kinds]
+
+        label = f'{self.user.username} '
+        task_count = insert_rows(Task, TASK_COLUMNS, self._tasks(), spec.chunk_size, self.stdout, label)
+        # 일정 id는 청크가 끝난 뒤 한 번에 읽는다(백엔드가 bulk insert의 pk를 돌려주지 않아도 된다).
+        tasks = list(Task.objects.filter(owner_id=owner_id).order_by('pk').values_list('pk', 'start_at'))
+        tag_links = insert_rows(Task.tags.through, ['task', 'tag'], self._tag_links(tasks), spec.chunk_size)
+        past_tasks = [(pk, start_at) for pk, start_at in tasks if start_at is None or start_at <= self.now]
+
+        def transactions():
+            for _ in range(spec.transactions):
+                kind = rng.choices(kinds, weights)[0]
+                task_id, occurred_at = None, None
+                if past_tasks and rng.random() < spec.linked_ratio:
+                    task_id, start_at = rng.choice(past_tasks)
+                    if start_at is not None:
+                        occurred_at = start_at + timedelta(minutes=rng.randrange(180))
+                yield (
+                    owner_id, rng.choice(account_ids), rng.choice(by_kind[kind]), task_id, self._amount(kind),
+                    f'{kind} {rng.randrange(10_000)}', occurred_at or self._moment(),
+                )
+
+        tx_count = insert_rows(Transaction, TRANSACTION_COLUMNS, transactions(), spec.chunk_size, self.stdout, label)
+        periods = self._budgets(by_kind.get('expense', []))
+        return {
+            'accounts': len(accounts), 'categories': len(categories), 'tasks': task_count,
+            'tag_links': tag_links, 'transactions': tx_count, 'budget_periods': periods,
+        }
+
+    def _tasks(self) -> Iterator[tuple]:
+        spec, rng = self.spec, self.rng
+        for index in range(spec.tasks):
+            start_at = self._moment(spec.future_days) if rng.random() > 0.1 else None
+            due_at = start_at + timedelta(minutes=30 * rng.randint(1, 8)) if start_at else None
+            status = (
+                'done' if start_at and start_at < self.now and rng.random() < 0.7
+                else rng.choice(('todo', 'in_progress'))
+            )
+            yield self.user.pk, f'task {index}', rng.randint(1, 3), status, start_at, due_at
+
+    def _tag_links(self, tasks) -> Iterator[tuple]:
+        limit = min(self.spec.max_tags_per_task, len(self.tag_ids))
+        for task_id, _start_at in tasks:
+            for tag_id in self.rng.sample(self.tag_ids, self.rng.randint(0, limit)):
+                yield task_id, tag_id
+
+    def _budgets(self, expense_ids: list[int]) -> int:
+        starts = _month_starts(self.end, self.spec.budget_months)
+        BudgetPeriod.objects.bulk_create([
+            BudgetPeriod(
+                owner_id=self.user.pk, start_date=start,
+                end_date=(start + timedelta(days=32)).replace(day=1) - timedelta(days=1),
+            )
+            for start in starts
+        ])
+        periods = BudgetPeriod.objects.filter(owner_id=self.user.pk, start_date__in=starts).values_list('pk', flat=True)
+        BudgetItem.objects.bulk_create([
+            BudgetItem(period_id=period_id, category_id=category_id,
+                       limit_amount=Decimal(self.rng.randrange(100, 2000) * 1000))
+            for period_id in periods for category_id in expense_ids
+        ])
+        return len(starts)
+
+
+def generate(spec: LoadSpec, stdout=None) -> list[int]:
+    """spec대로 사용자와 데이터를 만들고 새 사용자 id 목록을 돌려준다.
+
+    이미 prefix로 시작하는 사용자가 있으면 그 다음 인덱스부터 이어서 만든다.
+    """
+
+    start = User.objects.filter(username__startswith=spec.prefix).count()
+    tag_ids = ensure_tags(spec.tags)
+    owner_ids = []
+    for index in range(start, start + spec.users):
+        user = User(username=f'{spec.prefix}{index}')
+        user.set_unusable_password()
+        user.save()
+        counts = _UserGenerator(spec, user, index, tag_ids, stdout).run()
+        owner_ids.append(user.pk)
+        if stdout is not None:
+            stdout.write(f'{user.username}: ' + ', '.join(f'{key} {value}' for key, value in counts.items()))
+
+    if stdout is not None:
+        stdout.write('Rebuilding ledger rollups, budget usage, balances and search index ...')
+    rollups.rebuild(owner_ids, stdout=stdout)
+    balances.verify(owner_ids, repair=True)
+    search.rebuild(owner_ids, stdout=stdout)
+    for owner_id in owner_ids:
+        watermarks.bump(owner_id)
+    return owner_ids
+
+
+def delete(prefix: str, chunk_size: int = 5000, stdout=None) -> int:
+    """prefix로 만든 사용자와 그 데이터를 지운다.
+
+    생성 때처럼 행 단위 시그널을 끄고, 거래를 청크로 먼저 지운 뒤(계정/분류를 PROTECT하므로) 사용자를 지운다.
+    """
+
+    owner_ids = list(User.objects.filter(username__startswith=prefix).values_list('pk', flat=True))
+    with muted():
+        for owner_id in owner_ids:
+            while True:
+                ids = list(Transaction.objects.filter(owner_id=owner_id).values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    Transaction.objects.filter(pk__in=ids).delete()
+            User.objects.filter(pk=owner_id).delete()
+            if stdout is not None:
+                stdout.write(f'  deleted user {owner_id}', ending='\r')
+    return len(owner_ids)
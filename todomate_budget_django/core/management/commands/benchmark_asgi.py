@@ -0,0 +1,74 @@
+"""동시 클라이언트에서 동기(WSGI) 경로와 비동기(ASGI) 경로의 처리량을 비교한다(core.perf.ASYNC_PAIRS).
+
+    python manage.py benchmark_asgi                              # 클라이언트 32, DB 왕복 2ms 흉내
+    python manage.py benchmark_asgi --clients 64 --requests 2000 --db-latency-ms 5
+    python manage.py benchmark_asgi --db-latency-ms 0 --only planner-day
+
+두 경로 모두 프로세스 안에서 Django 핸들러를 직접 부른다(WSGI는 Client, ASGI는 AsyncClient).
+WSGI는 동시에 처리하는 요청을 --workers개(gunicorn 워커 × 스레드)로 묶고, ASGI는 이벤트 루프 하나가 모두 받는다.
+SQLite 테스트 DB는 쿼리가 너무 빨라 Postgres 왕복과 다르므로 --db-latency-ms로 쿼리마다 대기를 넣는다.
+플래너 하루 캐시는 저장하자마자 만료되게 해(PLANNER_CACHE_TIMEOUT=0) 매 요청이 DB 경로를 탄다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core import perf
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput of the sync (WSGI) and async (ASGI) read endpoints under concurrent clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(perf.SCALES), default='ci')
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=640, help='Requests per endpoint and mode.')
+        parser.add_argument('--workers', type=int, default=4, help='Requests the WSGI path serves at once.')
+        parser.add_argument('--db-latency-ms', type=float, default=2.0, help='Simulated round trip added to every query.')
+        parser.add_argument('--only', action='append', default=[], choices=sorted(perf.ASYNC_PAIRS))
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        if min(options['clients'], options['requests'], options['workers']) < 1:
+            raise CommandError('--clients, --requests and --workers must be positive.')
+        pairs = {name: paths for name, paths in perf.ASYNC_PAIRS.items() if not options['only'] or name in options['only']}
+
+        with perf.throwaway_database(options['keepdb'], PLANNER_CACHE_TIMEOUT=0):
+            self.stdout.write(f'Seeding scale {options["scale"]}...')
+            context = perf.seed(options['scale'])
+            login = Client()
+            login.force_login(context.user)
+            rows = self._run(pairs, context, login.cookies, options)
+
+        self.stdout.write(
+            f'{options["clients"]} clients, {options["requests"]} requests each, WSGI workers {options["workers"]}, '
+            f'DB latency {options["db_latency_ms"]} ms/query'
+        )
+        self.stdout.write(f'{"endpoint":20} {"mode":5} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"failed":>6}')
+        failed = 0
+        for name, mode, result in rows:
+            failed += result['failures']
+            self.stdout.write(
+                f'{name:20} {mode:5} {result["rps"]:>8.1f} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+                f'{result["failures"]:>6}'
+            )
+        if failed:
+            raise CommandError(f'{failed} requests failed.')
+
+    def _run(self, pairs, context, cookies, options):
+        rows = []
+        with perf.simulated_db_latency(options['db_latency_ms'] / 1000):
+            for name, (sync_path, async_path) in pairs.items():
+                sync_path, async_path = sync_path.format(**context.params), async_path.format(**context.params)
+                self.stdout.write(f'{name}: WSGI {sync_path} / ASGI {async_path}')
+                rows.append((name, 'wsgi', perf.concurrent_wsgi(
+                    cookies, sync_path, options['clients'], options['requests'], options['workers']
+                )))
+                rows.append((name, 'asgi', asyncio.run(perf.concurrent_asgi(
+                    cookies, async_path, options['clients'], options['requests']
+                ))))
+        return rows
@@ -0,0 +1,131 @@
+"""플래너 핫패스 쿼리의 실행 계획과 소요 시간을 대량 데이터 위에서 확인한다.
+
+    python manage.py benchmark_planner_queries --transactions 1000000
+
+벤치마크용 사용자(bench_user_*)를 core.loadgen으로 다시 만든 뒤, 대시보드가 실제로 보내는
+하루/월 범위 쿼리마다 EXPLAIN 결과와 인덱스 사용 여부를 출력한다.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import date, datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core import loadgen
+from core.timeranges import local_day_bounds, local_month_bounds, within
+from finance.models import Transaction
+from tasks.models import Task
+
+User = get_user_model()
+
+BENCH_USER_PREFIX = 'bench_user_'
+# Postgres는 "Index Scan"/"Bitmap Index Scan", SQLite는 "USING INDEX" 형태로 표시된다.
+INDEX_PLAN_MARKERS = ('Index Scan', 'Index Only Scan', 'USING INDEX', 'USING COVERING INDEX')
+
+
+class Command(BaseCommand):
+    help = 'Seed a large ledger and print query plans/timings for the planner day and month queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=1_000_000, help='Total transactions across bench users.')
+        parser.add_argument('--tasks', type=int, default=100_000, help='Total tasks across bench users.')
+        parser.add_argument('--days', type=int, default=365 * 3, help='History length the rows are spread over.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--date', help='Local date (YYYY-MM-DD) to explain. Defaults to today.')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse already seeded bench data instead of regenerating it.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions per query.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                selected_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError as exc:
+                raise CommandError('--date must be YYYY-MM-DD') from exc
+        else:
+            selected_date = timezone.localdate()
+
+        if not options['skip_seed']:
+            self._seed(options)
+
+        user = User.objects.filter(username__startswith=BENCH_USER_PREFIX).order_by('id').first()
+        if user is None:
+            raise CommandError('No bench users found. Run without --skip-seed first.')
+
+        if connection.vendor == 'postgresql':
+            # 방금 채운 테이블의 통계를 갱신해야 플래너가 올바른 계획을 고른다.
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        for label, queryset in self._planner_queries(user, selected_date):
+            self._report(label, queryset, options['repeat'])
+
+    def _planner_queries(self, user, selected_date: date):
+        """대시보드/상세 페이지가 보내는 것과 같은 조건의 쿼리 목록."""
+
+        day_bounds = local_day_bounds(selected_date)
+        month_bounds = local_month_bounds(selected_date)
+        return [
+            (
+                'day tasks (start_at OR due_at)',
+                Task.objects.filter(owner=user).filter(
+                    Q(**within('start_at', day_bounds)) | Q(**within('due_at', day_bounds))
+                ),
+            ),
+            (
+                'day transactions',
+                Transaction.objects.filter(owner=user, **within('occurred_at', day_bounds)),
+            ),
+            (
+                'day loose transactions (task IS NULL)',
+                Transaction.objects.filter(owner=user, task__isnull=True, **within('occurred_at', day_bounds)),
+            ),
+            (
+                'month tasks (start_at OR due_at)',
+                Task.objects.filter(owner=user)
+                .filter(Q(**within('start_at', month_bounds)) | Q(**within('due_at', month_bounds)))
+                .only('id', 'start_at', 'due_at'),
+            ),
+        ]
+
+    def _report(self, label, queryset, repeat):
+        plan = queryset.explain()
+        uses_index = any(marker in plan for marker in INDEX_PLAN_MARKERS)
+
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(plan)
+        verdict = self.style.SUCCESS('index range scan') if uses_index else self.style.WARNING('NO index used')
+        self.stdout.write(f'  -> {verdict}, median {timings[len(timings) // 2]:.2f} ms over {len(timings)} runs\n')
+
+    def _seed(self, options):
+        # 첫 벤치 사용자의 규모가 옵션과 맞도록 이전 벤치 사용자는 지우고 다시 만든다.
+        removed = loadgen.delete(BENCH_USER_PREFIX, chunk_size=options['chunk_size'], stdout=self.stdout)
+        if removed:
+            self.stdout.write(f'Removed {removed} existing bench users.')
+        users = max(options['users'], 1)
+        spec = loadgen.LoadSpec(
+            users=users,
+            # 옵션은 전체 개수라 사용자 수로 나눠 사용자당 개수로 바꾼다.
+            transactions=-(-options['transactions'] // users),
+            tasks=-(-options['tasks'] // users),
+            days=options['days'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            prefix=BENCH_USER_PREFIX,
+        )
+        self.stdout.write(f'Seeding {spec.transactions * users} transactions and {spec.tasks * users} tasks ...')
+        loadgen.generate(spec, stdout=self.stdout)
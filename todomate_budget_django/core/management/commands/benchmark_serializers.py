@@ -0,0 +1,123 @@
+"""일정/거래 목록의 직렬화 비용을 ModelSerializer와 values() 경로(core.fastread)로 나눠 잰다.
+
+    python manage.py benchmark_serializers                     # 페이지 20/200행, 10회
+    python manage.py benchmark_serializers --rows 50 500 --repeat 30
+
+테스트 DB에 generate_load_data와 같은 생성기로 사용자 한 명의 데이터를 채운 뒤, 크기별로
+- serialize: 이미 읽은 행을 JSON으로 렌더링하기까지(모델 인스턴스 ↔ values() 행)
+- query+serialize: 쿼리(core.optimizer로 최적화한 쿼리셋, 태그 prefetch 포함)부터 렌더링까지
+- endpoint: /api/tasks/, /api/finance/transactions/ 전체 요청(FAST_READ_SERIALIZERS 끔/켬)
+의 p50을 출력한다. 두 경로의 응답 바이트가 다르면 실패한다.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from core import loadgen, perf
+from core.fastread import RowSerializer
+from core.optimizer import optimize
+from finance.models import Transaction
+from finance.serializers import TransactionSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def _p50(timings):
+    ordered = sorted(timings)
+    return ordered[len(ordered) // 2]
+
+
+def _timed(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return _p50(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer and values()-row serialization for the task and transaction list endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[20, 200], help='Rows per page to time.')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or min(options['rows']) < 1:
+            raise CommandError('--rows and --repeat must be positive.')
+
+        with perf.throwaway_database(options['keepdb']):
+            rows = self._run(options)
+
+        self.stdout.write(f'{"case":44} {"rows":>5} {"model ms":>9} {"rows ms":>9} {"speedup":>8}')
+        for name, size, slow, fast in rows:
+            self.stdout.write(f'{name:44} {size:>5} {slow:>9.2f} {fast:>9.2f} {slow / fast:>7.1f}x')
+
+    def _run(self, options):
+        largest = max(options['rows'])
+        spec = loadgen.LoadSpec(
+            users=1, tasks=max(largest, 1_000), transactions=max(largest, 5_000), max_tags_per_task=3,
+            budget_months=0, prefix='serializer_bench_',
+        )
+        self.stdout.write(f'Seeding {spec.tasks} tasks and {spec.transactions} transactions...')
+        owner_id = loadgen.generate(spec)[0]
+        client = Client()
+        client.force_login(get_user_model().objects.get(pk=owner_id))
+        render = JSONRenderer().render
+
+        sources = {
+            'tasks': (
+                optimize(Task.objects.filter(owner_id=owner_id), TaskSerializer).order_by('-created_at', '-id'),
+                TaskSerializer, '/api/tasks/',
+            ),
+            'transactions': (
+                optimize(Transaction.objects.filter(owner_id=owner_id), TransactionSerializer).order_by('-occurred_at', '-id'),
+                TransactionSerializer, '/api/finance/transactions/',
+            ),
+        }
+        results = []
+        for name, (queryset, serializer_class, path) in sources.items():
+            reader = RowSerializer(serializer_class)
+            for size in options['rows']:
+                objects = list(queryset[:size])
+                rows = list(reader.values(queryset)[:size])
+                if render(reader.data(rows)) != render(serializer_class(objects, many=True).data):
+                    raise CommandError(f'{name}: values() rows render differently from {serializer_class.__name__}.')
+                results.append((
+                    f'{name} serialize', size,
+                    _timed(lambda: render(serializer_class(objects, many=True).data), options['repeat']),
+                    _timed(lambda: render(reader.data(rows)), options['repeat']),
+                ))
+                results.append((
+                    f'{name} query+serialize', size,
+                    _timed(lambda: render(serializer_class(list(queryset[:size]), many=True).data), options['repeat']),
+                    _timed(lambda: render(reader.data(reader.values(queryset)[:size])), options['repeat']),
+                ))
+                if size <= 200:
+                    results.append((f'{name} endpoint', size, *self._endpoint(client, path, size, options['repeat'])))
+        return results
+
+    def _endpoint(self, client, path, size, repeat):
+        timings, bodies = [], []
+        for enabled in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=enabled):
+                def get():
+                    response = client.get(path, {'page_size': size}, HTTP_ACCEPT='application/json')
+                    if response.status_code != 200:
+                        raise CommandError(f'GET {path} returned {response.status_code}')
+                    return response.content
+                bodies.append(get())
+                timings.append(_timed(get, repeat))
+        if bodies[0] != bodies[1]:
+            raise CommandError(f'{path}: FAST_READ_SERIALIZERS changes the response body.')
+        return timings
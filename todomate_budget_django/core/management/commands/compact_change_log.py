@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core import changelog
+
+
+class Command(BaseCommand):
+    help = (
+        'Drop change log rows older than SYNC_CHANGE_LOG_RETENTION_DAYS and keep only the latest row per object. '
+        'Run periodically (e.g. daily cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        expired, duplicates = changelog.compact(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {expired} expired and {duplicates} superseded change log rows.'))
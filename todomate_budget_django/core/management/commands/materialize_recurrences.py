@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import occurrences
+
+
+class Command(BaseCommand):
+    help = (
+        'Create real rows for recurring tasks up to today + RECURRENCE_MATERIALIZE_DAYS and for recurring '
+        'transactions up to today. Future transactions stay projected so balances and budgets only count '
+        'money that has actually moved. Run periodically (e.g. daily cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='How many days ahead to materialize tasks.')
+        parser.add_argument('--owner', help='Only materialize for this username.')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'RECURRENCE_MATERIALIZE_DAYS', 14)
+        if days < 0:
+            raise CommandError('--days must be zero or positive.')
+        owner_ids = None
+        if options['owner']:
+            user = get_user_model().objects.filter(username=options['owner']).first()
+            if user is None:
+                raise CommandError(f"Unknown user {options['owner']!r}.")
+            owner_ids = [user.pk]
+
+        today = timezone.localdate()
+        tasks = occurrences.materialize_tasks(today + timedelta(days=days), owner_ids=owner_ids)
+        transactions = occurrences.materialize_transactions(today, owner_ids=owner_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Materialized {tasks} task occurrences and {transactions} recurring transactions.'
+        ))
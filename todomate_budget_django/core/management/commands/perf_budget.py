@@ -0,0 +1,74 @@
+"""모든 화면/엔드포인트의 쿼리 수 예산과 응답 시간 회귀를 검사한다(core.perf).
+
+    python manage.py perf_budget                            # ci 규모, perf_baseline.json과 비교
+    python manage.py perf_budget --scale full --repeat 50
+    python manage.py perf_budget --update-baseline          # 현재 측정값을 기준선으로 저장
+
+실제 DB를 건드리지 않도록 테스트 DB를 만들어 데이터를 채우고 끝나면 지운다.
+캐시도 로컬 메모리로 바꿔 측정 중 비우는 캐시가 운영 Redis가 되지 않게 한다.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import perf
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database and check per-view query budgets and p95 latency against a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(perf.SCALES), default='ci')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per scenario (p50/p95 are over these).')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'perf_baseline.json'))
+        parser.add_argument('--update-baseline', action='store_true', help='Write the measurements as the new baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p95 slowdown ratio (0.25 = 25%%).')
+        parser.add_argument('--only', action='append', default=[], help='Run scenarios whose name contains this text.')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in perf.SCENARIOS
+            if not options['only'] or any(text in scenario.name for text in options['only'])
+        ]
+        if not scenarios:
+            raise CommandError('No scenario matches --only.')
+        baseline_path = Path(options['baseline'])
+        baseline = perf.load_baseline(baseline_path)
+        if baseline and baseline.get('scale') != options['scale']:
+            self.stderr.write(f'Baseline was recorded at scale {baseline.get("scale")!r}; latency is not compared.')
+            baseline = None
+
+        with perf.throwaway_database(options['keepdb']):
+            self.stdout.write(f'Seeding scale {options["scale"]}...')
+            context = perf.seed(options['scale'])
+            results = perf.run(context, scenarios, repeat=options['repeat'])
+
+        budgets = {scenario.name: scenario.max_queries for scenario in scenarios}
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:40} {result["queries"]:>3}/{budgets[name]:<3} queries  {result["round_trips"]:>3} round trips  '
+                f'p50 {result["p50_ms"]:>8.2f} ms  p95 {result["p95_ms"]:>8.2f} ms'
+            )
+
+        if options['update_baseline']:
+            # --only로 일부만 잰 경우 나머지는 이전 값을 잇되, 없어진 시나리오나
+            # 지금 상한을 넘는 예전 측정값은 버린다.
+            budgets_all = {scenario.name: scenario.max_queries for scenario in perf.SCENARIOS}
+            merged = {
+                name: entry for name, entry in (baseline or {}).get('scenarios', {}).items()
+                if name in budgets_all and entry.get('queries', 0) <= budgets_all[name]
+            }
+            merged.update(results)
+            perf.write_baseline(baseline_path, options['scale'], merged)
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}.'))
+            failures = perf.compare(results, None, scenarios=scenarios)
+        else:
+            failures = perf.compare(results, baseline, threshold=options['threshold'], scenarios=scenarios)
+        if failures:
+            raise CommandError('Performance budget exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} scenarios within budget.'))
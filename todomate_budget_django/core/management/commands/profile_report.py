@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = 'Summarize the profiling JSONL log: slowest endpoints and the worst repeated (N+1) query patterns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help='Profile log path. Defaults to PROFILING_LOG (rotated files included).')
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--view', help='Only include requests whose view name contains this text.')
+        parser.add_argument('--sql-width', type=int, default=160, help='Truncate SQL patterns to this width.')
+
+    def handle(self, *args, **options):
+        path = Path(options['log']) if options['log'] else profiling.log_path()
+        records = profiling.read_log(path)
+        if options['view']:
+            records = [record for record in records if options['view'] in record.get('view', '')]
+        if not records:
+            raise CommandError(f'No profiled requests in {path}.')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Slowest endpoints ({len(records)} profiled requests)'))
+        self.stdout.write(f'{"method":6} {"view":40} {"reqs":>5} {"p50":>9} {"p95":>9} {"max":>9} '
+                          f'{"db avg":>8} {"queries":>8} {"tpl avg":>8}')
+        for row in profiling.slow_endpoints(records, options['top']):
+            self.stdout.write(
+                f'{row["method"]:6} {row["view"][:40]:40} {row["requests"]:>5} {row["p50_ms"]:>7.1f}ms '
+                f'{row["p95_ms"]:>7.1f}ms {row["max_ms"]:>7.1f}ms {row["avg_db_ms"]:>6.1f}ms '
+                f'{row["avg_queries"]:>8} {row["avg_template_ms"]:>6.1f}ms'
+            )
+
+        patterns = profiling.repeated_queries(records, options['top'])
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Repeated query patterns (N+1 candidates)'))
+        if not patterns:
+            self.stdout.write('  none')
+        width = options['sql_width']
+        for row in patterns:
+            sql = row['sql'] if len(row['sql']) <= width else row['sql'][:width - 3] + '...'
+            self.stdout.write(
+                f'[{row["id"]}] up to {row["max_per_request"]}x per request, {row["total_queries"]} queries '
+                f'in {row["requests"]} requests, {row["db_ms"]} ms'
+            )
+            self.stdout.write(f'  views: {", ".join(row["views"])}')
+            self.stdout.write(f'  {sql}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents from Task and Transaction rows, a chunk of owners at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, action='append', dest='owners', help='Only rebuild this owner id (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Owners indexed per transaction.')
+
+    def handle(self, *args, **options):
+        written = search.rebuild(options['owners'], chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} search documents.'))
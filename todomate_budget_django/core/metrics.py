@@ -0,0 +1,377 @@
+"""Prometheus 텍스트 형식의 /metrics 익스포터.
+
+gunicorn 워커마다 메모리에만 값을 두면 스크레이프가 닿은 워커 하나의 값만 보인다. 그래서 프로세스마다
+METRICS_DIR/<pid>.db 파일 하나를 mmap으로 열어 값을 쓰고, /metrics는 디렉터리의 모든 파일을 읽어 더한다.
+- 파일은 자기 프로세스만 쓰므로 프로세스 간 잠금이 없다. 같은 프로세스의 스레드끼리는 Lock 하나를 쓴다.
+- 종료된 워커의 파일은 collect()가 archive.db 하나로 합치고 지운다. 카운터는 줄지 않고 파일 수는 살아 있는
+  워커 수 + 1로 유지된다. 배포할 때는 디렉터리를 비운다(docker-compose.yml).
+- 값은 모두 더해지는 카운터/히스토그램이다. 적중률 같은 비율은 내보낼 때 합계에서 계산한다.
+
+파일 구조: [사용한 바이트 수 u32, 패딩 4] 뒤에 [키 길이 u32, 키(8바이트 정렬), 값 f64] 항목이 이어진다.
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: 종료된 파일을 합치지 않고 읽기만 한다.
+    fcntl = None
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from core.profiling import wrap_connections
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INITIAL_FILE_SIZE = 64 * 1024
+HEADER_SIZE = 8
+ARCHIVE_NAME = 'archive.db'
+LOCK_NAME = '.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# 이름 → (타입, 설명). 여기 없는 이름은 기록하지 않는다.
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by URL name, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by URL name.'),
+    'http_request_db_queries': ('histogram', 'Database queries per request by URL name.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss).'),
+    'tasks_created_total': ('counter', 'Tasks created (single saves, bulk API and recurrence materialization).'),
+    'transactions_created_total': ('counter', 'Transactions created (single saves, bulk API, imports, recurrences).'),
+}
+HIT_RATIO = 'cache_hit_ratio'
+
+
+def metrics_dir() -> Path:
+    return Path(getattr(settings, 'METRICS_DIR', None) or Path(tempfile.gettempdir()) / 'todomate-metrics')
+
+
+def _key(name: str, labels: dict[str, object] | None) -> str:
+    return json.dumps([name, sorted((key, str(value)) for key, value in (labels or {}).items())])
+
+
+def _entries(data, used: int):
+    """(키, 값, 값 위치)를 차례로 돌려준다."""
+
+    position = HEADER_SIZE
+    while position < used:
+        length = struct.unpack_from('I', data, position)[0]
+        key_end = position + 4 + length
+        value_position = key_end + (8 - (4 + length) % 8) % 8
+        key = bytes(data[position + 4:key_end]).decode('utf-8')
+        yield key, struct.unpack_from('d', data, value_position)[0], value_position
+        position = value_position + 8
+
+
+class _ValueFile:
+    """한 프로세스가 쓰는 mmap 파일. 키별 값 위치를 기억해 두고 제자리에서 더한다."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_FILE_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from('I', self._map, 0)[0] or HEADER_SIZE
+        self._positions = {key: position for key, _value, position in _entries(self._map, self._used)}
+
+    def _append(self, key: str) -> int:
+        encoded = key.encode('utf-8')
+        padding = (8 - (4 + len(encoded)) % 8) % 8
+        entry = struct.pack(f'I{len(encoded) + padding}sd', len(encoded), encoded, 0.0)
+        if self._used + len(entry) > len(self._map):
+            size = len(self._map)
+            while self._used + len(entry) > size:
+                size *= 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self._map[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        # 항목을 다 쓴 뒤에 사용량을 늘려 읽는 쪽이 반쯤 쓴 항목을 보지 않게 한다.
+        struct.pack_into('I', self._map, 0, self._used)
+        position = self._used - 8
+        self._positions[key] = position
+        return position
+
+    def add(self, key: str, amount: float) -> None:
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        struct.pack_into('d', self._map, position, struct.unpack_from('d', self._map, position)[0] + amount)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+_lock = threading.Lock()
+_files: dict[tuple[int, str], _ValueFile] = {}
+
+
+def _values() -> _ValueFile:
+    # fork된 워커가 부모의 파일을 이어 쓰지 않도록 pid마다 따로 연다.
+    directory = metrics_dir()
+    slot = (os.getpid(), str(directory))
+    values = _files.get(slot)
+    if values is None:
+        values = _files[slot] = _ValueFile(directory / f'{os.getpid()}.db')
+    return values
+
+
+def inc(name: str, labels: dict[str, object] | None = None, amount: float = 1) -> None:
+    if name not in METRICS or not amount:
+        return
+    with _lock:
+        _values().add(_key(name, labels), amount)
+
+
+def observe(name: str, labels: dict[str, object] | None, value: float, buckets) -> None:
+    """히스토그램 관측. 누적 버킷(le 이하)과 _sum/_count를 함께 올린다."""
+
+    if name not in METRICS:
+        return
+    labels = dict(labels or {})
+    with _lock:
+        values = _values()
+        for bound in buckets:
+            if value <= bound:
+                values.add(_key(f'{name}_bucket', {**labels, 'le': _format(bound)}), 1)
+        values.add(_key(f'{name}_bucket', {**labels, 'le': '+Inf'}), 1)
+        values.add(_key(f'{name}_sum', labels), value)
+        values.add(_key(f'{name}_count', labels), 1)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    inc('cache_requests_total', {'cache': cache, 'result': 'hit'}, hits)
+    inc('cache_requests_total', {'cache': cache, 'result': 'miss'}, misses)
+
+
+# ---- 내보내기 --------------------------------------------------------------
+
+def _read(path: Path):
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return
+    if len(data) < HEADER_SIZE:
+        return
+    used = min(struct.unpack_from('I', data, 0)[0], len(data))
+    for key, value, _position in _entries(data, used):
+        yield key, value
+
+
+def _alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _collect_lock(directory: Path):
+    """collect()끼리 병합과 읽기가 겹치지 않게 한다. 병합해도 되면(배타 잠금) True를 돌려준다."""
+
+    if fcntl is None:
+        yield False
+        return
+    with open(directory / LOCK_NAME, 'a+b') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            exclusive = True
+        except BlockingIOError:
+            # 다른 요청이 병합 중이면 끝날 때까지 기다렸다가 읽기만 한다.
+            fcntl.flock(handle, fcntl.LOCK_SH)
+            exclusive = False
+        yield exclusive
+
+
+def _merge_dead_files(directory: Path) -> None:
+    """종료된 프로세스의 파일을 archive.db에 더하고 지운다.
+
+    새 archive는 임시 파일에 쓴 뒤 rename으로 바꾼다. 배타 잠금 안에서만 돌기 때문에 다른 collect()가
+    새 archive와 아직 지우지 않은 파일을 함께 읽는 일은 없다.
+    """
+
+    dead = [path for path in directory.glob('*.db') if path.stem.isdigit() and not _alive(int(path.stem))]
+    if not dead:
+        return
+    archive = directory / ARCHIVE_NAME
+    totals: dict[str, float] = defaultdict(float)
+    for path in (archive, *dead):
+        for key, value in _read(path):
+            totals[key] += value
+    staging = directory / f'{ARCHIVE_NAME}.{os.getpid()}.tmp'
+    merged = _ValueFile(staging)
+    try:
+        for key, value in totals.items():
+            merged.add(key, value)
+    finally:
+        merged.close()
+    os.replace(staging, archive)
+    for path in dead:
+        path.unlink(missing_ok=True)
+
+
+def collect() -> dict[str, float]:
+    """모든 프로세스 파일의 값을 키별로 더한다. 종료된 프로세스의 파일은 먼저 archive.db로 합친다."""
+
+    totals: dict[str, float] = defaultdict(float)
+    directory = metrics_dir()
+    if not directory.exists():
+        return totals
+    with _collect_lock(directory) as exclusive:
+        if exclusive:
+            _merge_dead_files(directory)
+        for path in directory.glob('*.db'):
+            for key, value in _read(path):
+                totals[key] += value
+    return totals
+
+
+def _format(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _line(name: str, labels, value: float) -> str:
+    if not labels:
+        return f'{name} {_format(value)}'
+    # 히스토그램의 le는 관례대로 마지막에 둔다.
+    labels = sorted(labels, key=lambda pair: pair[0] == 'le')
+    rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+    return f'{name}{{{rendered}}} {_format(value)}'
+
+
+def _sample_order(sample):
+    name, labels = sample
+    plain = [(key, value) for key, value in labels if key != 'le']
+    le = dict(labels).get('le')
+    suffix = {'_bucket': 0, '_sum': 1, '_count': 2}
+    return plain, suffix.get(name[name.rfind('_'):], 0), float('inf') if le == '+Inf' else float(le or 0)
+
+
+def render(totals: dict[str, float] | None = None) -> str:
+    totals = collect() if totals is None else totals
+    samples: dict[str, list] = defaultdict(list)
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        base = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                base = name[:-len(suffix)]
+        samples[base].append(((name, tuple(map(tuple, labels))), value))
+
+    lines = []
+    for base, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {base} {description}')
+        lines.append(f'# TYPE {base} {kind}')
+        for (name, labels), value in sorted(samples.get(base, ()), key=lambda item: _sample_order(item[0])):
+            lines.append(_line(name, labels, value))
+
+    lines.append(f'# HELP {HIT_RATIO} Cache hits / lookups since the metrics directory was reset.')
+    lines.append(f'# TYPE {HIT_RATIO} gauge')
+    lookups: dict[str, dict[str, float]] = defaultdict(lambda: {'hit': 0.0, 'miss': 0.0})
+    for (_name, labels), value in samples.get('cache_requests_total', ()):
+        labels = dict(labels)
+        lookups[labels['cache']][labels['result']] += value
+    for cache, counts in sorted(lookups.items()):
+        total = counts['hit'] + counts['miss']
+        lines.append(_line(HIT_RATIO, (('cache', cache),), counts['hit'] / total if total else 0.0))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """GET /metrics. METRICS_TOKEN이 설정되어 있으면 `Authorization: Bearer <token>`이 필요하다."""
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(supplied, f'Bearer {token}'):
+            return HttpResponseForbidden('metrics token required')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+# ---- 미들웨어 --------------------------------------------------------------
+
+class _QueryCounter:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _view_label(request) -> str:
+    # 원래 경로를 쓰면 /api/tasks/123/처럼 값마다 시계열이 생기므로 URL 이름만 쓴다.
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or match.route or '<unnamed>'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # ASGI에서는 비동기로 동작해야 비동기 뷰(core.async_api) 앞에서 스레드 전환이 생기지 않는다.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        with wrap_connections(counter):
+            response = self.get_response(request)
+        _record_request(request, response, time.perf_counter() - started, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        # ORM은 sync_to_async 스레드에서 연결을 쓰므로 래퍼도 그 스레드에서 보이는 연결에 건다.
+        wrappers = await sync_to_async(wrap_connections)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        _record_request(request, response, time.perf_counter() - started, counter.count)
+        return response
+
+
+def _record_request(request, response, elapsed: float, queries: int) -> None:
+    view = _view_label(request)
+    inc('http_requests_total', {'view': view, 'method': request.method, 'status': response.status_code})
+    observe('http_request_duration_seconds', {'view': view}, elapsed, LATENCY_BUCKETS)
+    observe('http_request_db_queries', {'view': view}, queries, QUERY_BUCKETS)
@@ -0,0 +1,116 @@
+# Generated by Django 5.0.6 on 2026-10-17 23:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# SQLite: 외부 콘텐츠 FTS5 테이블과 그림자 테이블을 따라가는 트리거.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(
+        owner_id, title_terms, body_terms,
+        content='core_searchdocument', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, owner_id, title_terms, body_terms)
+        VALUES (new.id, new.owner_id, new.title_terms, new.body_terms);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, owner_id, title_terms, body_terms)
+        VALUES ('delete', old.id, old.owner_id, old.title_terms, old.body_terms);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, owner_id, title_terms, body_terms)
+        VALUES ('delete', old.id, old.owner_id, old.title_terms, old.body_terms);
+        INSERT INTO core_searchdocument_fts(rowid, owner_id, title_terms, body_terms)
+        VALUES (new.id, new.owner_id, new.title_terms, new.body_terms);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_au",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_ad",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_ai",
+    "DROP TABLE IF EXISTS core_searchdocument_fts",
+]
+
+# Postgres: core.search.PG_VECTOR와 같은 식이어야 플래너가 인덱스를 쓴다.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX core_searchdoc_vector_gin ON core_searchdocument USING gin ((
+        setweight(to_tsvector('simple'::regconfig, title_terms), 'A')
+        || setweight(to_tsvector('simple'::regconfig, body_terms), 'B')
+    ))
+    """,
+]
+POSTGRES_BACKWARD = ["DROP INDEX IF EXISTS core_searchdoc_vector_gin"]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+    return run
+
+
+create_search_index = _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+drop_search_index = _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_change_log"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[("task", "Task"), ("transaction", "Transaction")],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("occurred_at", models.DateTimeField(blank=True, null=True)),
+                ("title_terms", models.TextField()),
+                ("body_terms", models.TextField(blank=True, default="")),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_documents",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="searchdocument",
+            constraint=models.UniqueConstraint(
+                fields=("model", "object_id"), name="searchdoc_model_object_uniq"
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
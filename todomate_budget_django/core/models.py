@@ -0,0 +1,61 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+class ChangeLogEntry(models.Model):
+    """동기화용 변경 로그. id가 단조 증가하는 커서 역할을 한다(늦게 커밋되는 행은 core.changelog 참고).
+
+    모델 시그널이 upsert/delete를 한 줄씩 남기고, `compact_change_log` 명령이
+    같은 객체의 오래된 중복 행과 보존 기간이 지난 행을 정리한다.
+    """
+    MODEL_CHOICES = [
+        ("task","Task"),
+        ("transaction","Transaction"),
+        ("account","Account"),
+        ("category","Category"),
+    ]
+    ACTION_CHOICES = [("upsert","Upsert"), ("delete","Delete")]
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='change_log')
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["owner", "id"], name="changelog_owner_cursor_idx"),
+            models.Index(fields=["owner", "model", "object_id"], name="changelog_owner_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model}:{self.object_id}"
+
+
+class SearchDocument(models.Model):
+    """일정 제목/설명과 거래 메모의 검색용 그림자 행 (core/search.py).
+
+    title_terms/body_terms는 원문을 단어와 한글 2-gram으로 나눈 토큰 문자열이다. SQLite에서는
+    FTS5 가상 테이블이 트리거로 이 테이블을 따라가고, Postgres에서는 두 열의 tsvector 식에 GIN 인덱스를 건다.
+    """
+    MODEL_CHOICES = [
+        ("task","Task"),
+        ("transaction","Transaction"),
+    ]
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    # 결과에 보여 줄 원문(일정 제목, 거래 메모)과 시각(일정 시작 또는 마감, 거래 시각)
+    title = models.CharField(max_length=255)
+    occurred_at = models.DateTimeField(null=True, blank=True)
+    title_terms = models.TextField()
+    body_terms = models.TextField(blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id"], name="searchdoc_model_object_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id} {self.title}"
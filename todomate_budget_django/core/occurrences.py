@@ -0,0 +1,261 @@
+"""반복 일정/거래의 구간 전개(가상 발생)와 실제 행 만들기(materialize).
+
+저장 공간은 규칙 수에 비례한다. DB에는 원본 행과 실제로 만들어진(또는 따로 수정된) 발생만 있고,
+나머지 발생은 화면이 보고 있는 구간에 대해서만 계산한다.
+- 일정 원본의 start_at 날짜는 원본 행 자체가 보여 주므로 전개하지 않는다.
+- materialized_until 이하 날짜는 실제 행이 있거나 사용자가 지운 날이므로 전개하지 않는다.
+- 예외 날짜와 recurrence_date로 따로 만들어진 발생은 건너뛴다.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import recurrence
+from core.bulk import ledger_state, task_effects, task_state, transaction_effects
+from core.timeranges import local_midnight
+from finance.models import RecurringTransaction, Transaction
+from finance.signals import muted
+from tasks.models import Task
+
+
+def _exception_dates(values: Iterable[str]) -> set[date]:
+    days = set()
+    for value in values or ():
+        try:
+            days.add(date.fromisoformat(str(value)))
+        except ValueError:
+            continue
+    return days
+
+
+def _on_day(value: datetime, day: date) -> datetime:
+    """value의 지역 시각을 유지한 채 날짜만 day로 옮긴다."""
+
+    local = timezone.localtime(value)
+    return timezone.make_aware(datetime.combine(day, local.time()), timezone.get_current_timezone())
+
+
+def _dates(text: str, start_at: datetime, exceptions, materialized_until: date | None,
+           first_day: date, last_day: date, include_start: bool) -> list[date]:
+    dtstart = timezone.localdate(start_at)
+    lower = first_day if include_start else max(first_day, dtstart + timedelta(days=1))
+    if materialized_until is not None:
+        lower = max(lower, materialized_until + timedelta(days=1))
+    if lower > last_day:
+        return []
+    try:
+        rule = recurrence.parse(text)
+    except recurrence.InvalidRule:
+        return []
+    return list(recurrence.occurrences(rule, dtstart, lower, last_day, _exception_dates(exceptions)))
+
+
+def _active_in(qs, start_field: str, first_day: date, last_day: date):
+    return qs.filter(**{f'{start_field}__lt': local_midnight(last_day + timedelta(days=1))}).filter(
+        Q(recurrence_until__isnull=True) | Q(recurrence_until__gte=first_day)
+    )
+
+
+# ---- 일정 --------------------------------------------------------------
+
+def recurring_tasks(user, first_day: date, last_day: date):
+    """구간에 발생이 있을 수 있는 반복 일정 원본. (owner, start_at) 부분 인덱스를 쓴다."""
+
+    return _active_in(
+        Task.objects.filter(~Q(recurrence=''), owner=user), 'start_at', first_day, last_day
+    ).order_by('start_at', 'pk')
+
+
+def _virtual_task(master: Task, day: date) -> Task:
+    start_at = _on_day(master.start_at, day)
+    due_at = start_at + (master.due_at - master.start_at) if master.due_at else None
+    return Task(
+        owner_id=master.owner_id,
+        title=master.title,
+        description=master.description,
+        priority=master.priority,
+        start_at=start_at,
+        due_at=due_at,
+        is_all_day=master.is_all_day,
+        recurrence_parent_id=master.pk,
+        recurrence_date=day,
+    )
+
+
+def task_occurrences(user, first_day: date, last_day: date) -> dict[date, list[Task]]:
+    """[first_day, last_day]의 가상 일정 발생(저장되지 않은 Task, pk=None)을 날짜별로 돌려준다.
+
+    반복 일정이 없으면 쿼리 한 번, 있으면 따로 만들어진 발생을 읽는 쿼리 한 번이 더 든다.
+    """
+
+    masters = list(recurring_tasks(user, first_day, last_day))
+    if not masters:
+        return {}
+    existing = set(
+        Task.objects.filter(
+            recurrence_parent__in=[master.pk for master in masters],
+            recurrence_date__gte=first_day,
+            recurrence_date__lte=last_day,
+        ).values_list('recurrence_parent_id', 'recurrence_date')
+    )
+    by_day: dict[date, list[Task]] = defaultdict(list)
+    for master in masters:
+        for day in _dates(master.recurrence, master.start_at, master.recurrence_exceptions,
+                          master.materialized_until, first_day, last_day, include_start=False):
+            if (master.pk, day) not in existing:
+                by_day[day].append(_virtual_task(master, day))
+    return dict(by_day)
+
+
+def materialize_task(master: Task, day: date) -> Task:
+    """가상 발생 하나를 실제 행으로 만든다. 이미 있으면 그 행을 돌려준다(완료 표시·수정 전에 호출)."""
+
+    with transaction.atomic():
+        Task.objects.select_for_update().filter(pk=master.pk).first()
+        found = Task.objects.filter(recurrence_parent=master, recurrence_date=day).first()
+        if found is not None:
+            return found
+        task = _virtual_task(master, day)
+        task.save()
+        task.tags.set(master.tags.all())
+    return task
+
+
+def materialize_tasks(until: date, owner_ids: Iterable[int] | None = None) -> int:
+    """반복 일정의 발생을 until까지 실제 행으로 만든다. 원본마다 잠근 뒤 bulk_create 한 번."""
+
+    masters = Task.objects.filter(~Q(recurrence=''), start_at__lt=local_midnight(until + timedelta(days=1))).filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=until)
+    )
+    if owner_ids is not None:
+        masters = masters.filter(owner_id__in=list(owner_ids))
+
+    created = 0
+    for master_id in masters.order_by('pk').values_list('pk', flat=True).iterator():
+        with transaction.atomic(), muted():
+            master = Task.objects.select_for_update().filter(pk=master_id).first()
+            if master is None or not master.recurrence or (
+                master.materialized_until and master.materialized_until >= until
+            ):
+                continue
+            lower = master.materialized_until or timezone.localdate(master.start_at)
+            existing = set(
+                Task.objects.filter(recurrence_parent=master, recurrence_date__gt=lower)
+                .values_list('recurrence_date', flat=True)
+            )
+            tasks = [
+                _virtual_task(master, day)
+                for day in _dates(master.recurrence, master.start_at, master.recurrence_exceptions,
+                                  master.materialized_until, lower, until, include_start=False)
+                if day not in existing
+            ]
+            if tasks:
+                Task.objects.bulk_create(tasks)
+                tag_ids = list(master.tags.values_list('pk', flat=True))
+                if tag_ids:
+                    Task.tags.through.objects.bulk_create([
+                        Task.tags.through(task_id=task.pk, tag_id=tag_id) for task in tasks for tag_id in tag_ids
+                    ])
+                task_effects(master.owner_id, [], [task_state(task) for task in tasks])
+            Task.objects.filter(pk=master.pk).update(materialized_until=until)
+        created += len(tasks)
+    return created
+
+
+# ---- 거래 --------------------------------------------------------------
+
+def _projected_row(template: RecurringTransaction, day: date) -> dict:
+    """플래너가 거래 행과 같은 모양으로 그리는 예정 거래. 합계에는 더하지 않는다."""
+
+    return {
+        'id': None,
+        'amount': template.amount,
+        'memo': template.memo,
+        'occurred_at': _on_day(template.starts_at, day),
+        'task_id': None,
+        'account': {'id': template.account_id, 'name': template.account.name},
+        'category': {'id': template.category_id, 'name': template.category.name, 'kind': template.category.kind},
+        'recurring_id': template.pk,
+        'projected': True,
+    }
+
+
+def transaction_occurrences(user, first_day: date, last_day: date) -> dict[date, list[dict]]:
+    """[first_day, last_day]에서 아직 실제 거래가 없는 반복 거래 발생을 날짜별 예정 행으로 돌려준다."""
+
+    templates = list(
+        _active_in(RecurringTransaction.objects.filter(owner=user, is_active=True), 'starts_at', first_day, last_day)
+        .select_related('account', 'category')
+    )
+    if not templates:
+        return {}
+    existing = set(
+        Transaction.objects.filter(
+            recurring__in=[template.pk for template in templates],
+            recurrence_date__gte=first_day,
+            recurrence_date__lte=last_day,
+        ).values_list('recurring_id', 'recurrence_date')
+    )
+    by_day: dict[date, list[dict]] = defaultdict(list)
+    for template in templates:
+        for day in _dates(template.recurrence, template.starts_at, template.exceptions,
+                          template.materialized_until, first_day, last_day, include_start=True):
+            if (template.pk, day) not in existing:
+                by_day[day].append(_projected_row(template, day))
+    return dict(by_day)
+
+
+def materialize_transactions(until: date, owner_ids: Iterable[int] | None = None) -> int:
+    """반복 거래의 발생을 until까지 실제 거래로 만든다.
+
+    미래 날짜까지 만들면 잔액과 예산 사용률이 아직 일어나지 않은 지출을 포함하게 되므로,
+    호출하는 쪽은 until로 오늘을 넘기지 않는다.
+    """
+
+    templates = RecurringTransaction.objects.filter(
+        is_active=True, starts_at__lt=local_midnight(until + timedelta(days=1))
+    ).filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=until))
+    if owner_ids is not None:
+        templates = templates.filter(owner_id__in=list(owner_ids))
+
+    created = 0
+    for template_id in templates.order_by('pk').values_list('pk', flat=True).iterator():
+        with transaction.atomic(), muted():
+            template = RecurringTransaction.objects.select_for_update().filter(pk=template_id).first()
+            if template is None or not template.is_active or (
+                template.materialized_until and template.materialized_until >= until
+            ):
+                continue
+            lower = template.materialized_until or timezone.localdate(template.starts_at)
+            existing = set(
+                Transaction.objects.filter(recurring=template, recurrence_date__gte=lower)
+                .values_list('recurrence_date', flat=True)
+            )
+            rows = [
+                Transaction(
+                    owner_id=template.owner_id,
+                    account_id=template.account_id,
+                    category_id=template.category_id,
+                    amount=template.amount,
+                    memo=template.memo,
+                    occurred_at=_on_day(template.starts_at, day),
+                    recurring=template,
+                    recurrence_date=day,
+                )
+                for day in _dates(template.recurrence, template.starts_at, template.exceptions,
+                                  template.materialized_until, lower, until, include_start=True)
+                if day not in existing
+            ]
+            if rows:
+                Transaction.objects.bulk_create(rows)
+                transaction_effects(template.owner_id, [], [ledger_state(tx) for tx in rows])
+            RecurringTransaction.objects.filter(pk=template.pk).update(materialized_until=until)
+        created += len(rows)
+    return created
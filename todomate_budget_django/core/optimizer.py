@@ -0,0 +1,139 @@
+"""직렬화기 선언에서 읽기 쿼리셋의 select_related/prefetch_related/only()를 만든다.
+
+    queryset = optimize(Account.objects.filter(owner=user), AccountSerializer)
+
+- 점 경로(`item.category.name`)와 중첩 직렬화기(FK)는 select_related, 중첩 목록(M2M, 역방향 FK)은
+  자식 직렬화기로 다시 최적화한 Prefetch가 된다. 중첩 목록은 모델 기본 정렬, 없으면 pk 순이다(core.fastread와 같다).
+- pk 관계 필드는 FK 열(`account_id`)만 읽으므로 조인하지 않는다. owner.username은 요청 사용자에서
+  채우므로(core.relations.OwnerUsernameField) owner도 조인하지 않는다.
+- 모든 필드가 모델 필드로 풀리면 only()로 그 열(과 extra 열)만 읽는다. 메서드/프로퍼티 필드가 있으면
+  열은 줄이지 않는다.
+- 쿼리셋에 이미 걸린 select_related/prefetch_related는 지우고 직렬화기가 읽는 것만 남긴다. 그래서 읽기 액션
+  (OptimizedQuerysetMixin.optimized_actions)에만 쓴다. 쓰기 경로의 save()/시그널은 모든 열이 필요하다.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from core.relations import OwnerUsernameField
+
+
+def _nested_ordering(model) -> list[str]:
+    return list(model._meta.ordering or ['pk'])
+
+
+class _QueryPlan:
+    def __init__(self, serializer, model):
+        self.select: set[str] = set()
+        # None이면 열을 줄이지 않는다.
+        self.only: set[str] | None = {model._meta.pk.name}
+        # (source, 자식 모델, 자식 계획, 자식 쪽에서 부모를 가리키는 FK 이름 또는 None)
+        self.prefetch: list[tuple] = []
+        for field in serializer._readable_fields:
+            if isinstance(field, OwnerUsernameField):
+                self._add_only('owner')
+            elif isinstance(field, serializers.ListSerializer):
+                self._add_prefetch(model, field)
+            elif field.source == '*':
+                self.only = None
+            elif isinstance(field, serializers.BaseSerializer):
+                self._add_nested(model, field)
+            else:
+                self._add_path(model, field.source.split('.'))
+
+    def _add_only(self, path: str) -> None:
+        if self.only is not None:
+            self.only.add(path)
+
+    def _add_path(self, model, path: list[str]) -> None:
+        for index, name in enumerate(path):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # 메서드나 프로퍼티는 어떤 열을 읽을지 알 수 없다.
+                self.only = None
+                return
+            lookup = '__'.join(path[:index + 1])
+            if field.many_to_many or field.one_to_many:
+                self.only = None
+                return
+            self._add_only(lookup)
+            if not field.is_relation or index == len(path) - 1:
+                # 마지막 FK는 pk 관계 필드이므로 FK 열만 읽는다.
+                return
+            self.select.add(lookup)
+            model = field.related_model
+
+    def _add_nested(self, model, field) -> None:
+        try:
+            relation = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            self.only = None
+            return
+        self.select.add(field.source)
+        self._add_only(field.source)
+        child = _QueryPlan(field, relation.related_model)
+        self.select.update(f'{field.source}__{path}' for path in child.select)
+        if child.only is None:
+            self.only = None
+        else:
+            for path in child.only:
+                self._add_only(f'{field.source}__{path}')
+        for source, *rest in child.prefetch:
+            self.prefetch.append((f'{field.source}__{source}', *rest))
+
+    def _add_prefetch(self, model, field) -> None:
+        relation = model._meta.get_field(field.source)
+        child_model = relation.related_model
+        back = relation.field.name if relation.one_to_many else None
+        self.prefetch.append((field.source, child_model, _QueryPlan(field.child, child_model), back))
+
+
+@cache
+def _plan(serializer_class) -> _QueryPlan:
+    return _QueryPlan(serializer_class(), serializer_class.Meta.model)
+
+
+def _apply(queryset, plan: _QueryPlan, extra=()):
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    for source, child_model, child_plan, back in plan.prefetch:
+        child = _apply(child_model._default_manager.order_by(*_nested_ordering(child_model)), child_plan, [back] if back else ())
+        queryset = queryset.prefetch_related(Prefetch(source, queryset=child))
+    if plan.only is not None:
+        queryset = queryset.only(*sorted(plan.only | set(extra)))
+    return queryset
+
+
+def optimize(queryset, serializer_class, *extra):
+    """serializer_class가 읽는 관계만 조인/프리페치하고 필요한 열(과 extra 열)만 읽는 쿼리셋."""
+
+    return _apply(queryset, _plan(serializer_class), extra)
+
+
+def ordering_columns(view) -> list[str]:
+    """뷰가 정렬할 수 있는 모델 열. 키셋 커서는 마지막 행에서 정렬 키를 읽으므로 함께 읽어 둔다."""
+
+    ordering = [*(getattr(view, 'ordering_fields', None) or ()), *(getattr(view, 'keyset_ordering', None) or ())]
+    return [field.lstrip('-') for field in ordering if field != '__all__' and '__' not in field]
+
+
+class OptimizedQuerysetMixin:
+    """get_queryset()을 읽기 액션에서 직렬화기에 맞춰 최적화한다."""
+
+    optimized_actions = ('list', 'retrieve')
+    # 직렬화기 밖(객체 권한 등)에서 읽는 열
+    optimized_extra_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.optimized_actions:
+            extra = [*self.optimized_extra_fields, *ordering_columns(self)]
+            queryset = optimize(queryset, self.get_serializer_class(), *extra)
+        return queryset
@@ -0,0 +1,214 @@
+"""(정렬 필드..., id) 키셋 기반 커서 페이지네이션.
+
+OFFSET/COUNT 대신 마지막 행의 정렬 키를 커서로 넘겨 `WHERE (key, id) > (...)`로 이어서 읽는다.
+삽입이 일어나도 이미 본 행이 밀리거나 중복되지 않으며, 아무리 뒤로 가도 비용이 같다.
+NULL 값은 정렬 방향과 무관하게 항상 마지막에 둔다.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def normalize_ordering(ordering, tiebreaker='id'):
+    """정렬 목록 끝에 유일 키(id)를 붙인다. id 방향은 첫 필드 방향을 따른다."""
+
+    fields = [field for field in ordering if field.lstrip('-') != tiebreaker]
+    descending = bool(fields) and fields[0].startswith('-')
+    return fields + [f"-{tiebreaker}" if descending else tiebreaker]
+
+
+def order_expressions(ordering):
+    expressions = []
+    for field in ordering:
+        name = field.lstrip('-')
+        if field.startswith('-'):
+            expressions.append(F(name).desc(nulls_last=True))
+        else:
+            expressions.append(F(name).asc(nulls_last=True))
+    return expressions
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(model, name, value):
+    if value is None:
+        return None
+    field = model._meta.get_field(name)
+    internal = field.get_internal_type()
+    if internal == 'DateTimeField':
+        parsed = parse_datetime(value)
+    elif internal == 'DateField':
+        parsed = parse_date(value)
+    else:
+        parsed = field.to_python(value)
+    if parsed is None:
+        raise InvalidCursor(value)
+    return parsed
+
+
+def encode_cursor(ordering, values) -> str:
+    payload = json.dumps({'o': ordering, 'v': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, ordering, cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload['o'] != ordering or len(payload['v']) != len(ordering):
+            # 정렬이 바뀐 커서는 이어 읽을 위치가 의미가 없다.
+            raise InvalidCursor(cursor)
+        return [_decode_value(model, field.lstrip('-'), value) for field, value in zip(ordering, payload['v'])]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def after_filter(model, ordering, values) -> Q:
+    """(f1, f2, ..., id)가 values보다 '뒤'인 행을 고르는 사전식 비교 조건."""
+
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        nullable = model._meta.get_field(name).null
+        if value is None:
+            # NULL은 맨 뒤이므로 이 필드에서 더 뒤인 값은 없다.
+            beyond = Q(pk__in=[])
+            equal = Q(**{f'{name}__isnull': True})
+        else:
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            beyond = Q(**{f'{name}__{lookup}': value})
+            if nullable:
+                beyond |= Q(**{f'{name}__isnull': True})
+            equal = Q(**{name: value})
+        condition |= prefix & beyond
+        prefix &= equal
+    return condition
+
+
+def _keyset_query(queryset, ordering, cursor: str | None, page_size: int):
+    model = queryset.model
+    queryset = queryset.order_by(*order_expressions(ordering))
+    if cursor:
+        queryset = queryset.filter(after_filter(model, ordering, decode_cursor(model, ordering, cursor)))
+    return queryset[: page_size + 1]
+
+
+def _cut_page(rows, ordering, page_size: int):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        # values() 행(dict)도 받는다(core.fastread).
+        read = last.__getitem__ if isinstance(last, dict) else lambda name: getattr(last, name)
+        next_cursor = encode_cursor(ordering, [read(field.lstrip('-')) for field in ordering])
+    return rows, next_cursor
+
+
+def keyset_page(queryset, ordering, cursor: str | None, page_size: int):
+    """queryset을 ordering 기준 키셋으로 잘라 (rows, next_cursor)를 돌려준다."""
+
+    ordering = normalize_ordering(ordering)
+    rows = list(_keyset_query(queryset, ordering, cursor, page_size))
+    return _cut_page(rows, ordering, page_size)
+
+
+async def akeyset_page(queryset, ordering, cursor: str | None, page_size: int):
+    """keyset_page의 비동기 버전."""
+
+    ordering = normalize_ordering(ordering)
+    rows = [row async for row in _keyset_query(queryset, ordering, cursor, page_size)]
+    return _cut_page(rows, ordering, page_size)
+
+
+class KeysetPagination(BasePagination):
+    """COUNT/OFFSET 없이 다음 페이지 커서만 돌려주는 페이지네이션.
+
+    정렬은 뷰의 `ordering` 쿼리 파라미터(ordering_fields 안에서)를 따르고,
+    없으면 `keyset_ordering` 또는 모델 기본 정렬을 쓴다.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    invalid_cursor_message = '올바르지 않은 커서입니다.'
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except ValueError:
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        ordering = OrderingFilter().get_ordering(request, queryset, view)
+        if ordering:
+            return list(ordering)
+        return list(getattr(view, 'keyset_ordering', None) or queryset.model._meta.ordering or ['-id'])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(request, queryset, view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            rows, self.next_cursor = keyset_page(queryset, ordering, cursor, self.get_page_size(request))
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return rows
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(request, queryset, view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            rows, self.next_cursor = await akeyset_page(queryset, ordering, cursor, self.get_page_size(request))
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
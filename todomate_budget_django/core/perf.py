@@ -0,0 +1,400 @@
+"""화면/엔드포인트별 쿼리 수 예산과 응답 시간 회귀 검사.
+
+    python manage.py perf_budget                    # ci 규모, 기준선과 비교
+    python manage.py perf_budget --scale full --update-baseline
+
+- 규모(SCALES)에 맞춰 결정적으로 데이터를 채운 뒤 SCENARIOS의 GET 요청을 차례로 보낸다.
+- 쿼리 수는 코드에 적힌 max_queries를 넘으면 실패한다. 행마다 쿼리가 느는 N+1은 한 페이지가
+  여러 행을 가지므로 규모와 무관하게 예산을 넘는다.
+- 응답 시간 p50/p95는 JSON 기준선에 기록하고, p50·p95가 모두 기준선보다 threshold 비율(+slack ms) 이상 느려지면 실패한다.
+- 캐시는 매 요청 전에 비워 캐시가 없을 때(최악의 경우)를 잰다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core import changelog, fanout, loadgen
+from core.profiling import percentile
+from finance.models import Account, BudgetAlert, BudgetItem, BudgetPeriod, Category, RecurringTransaction, Transaction
+from tasks.models import Tag, Task
+
+User = get_user_model()
+
+PERF_USER_PREFIX = 'perf_user_'
+PERF_ADMIN = 'perf_admin'
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'perf'}}
+
+# 사용자당 규모(core.loadgen). full은 5년 × 하루 20건 거래, 일정 1만 건.
+SCALES = {
+    'ci': loadgen.LoadSpec(users=2, categories=4, tasks=300, transactions=90 * 4, tags=10, days=90,
+                           future_days=14, budget_months=3),
+    'full': loadgen.LoadSpec(users=2, tasks=10_000, transactions=365 * 5 * 20, tags=50, days=365 * 5),
+}
+
+
+class PerfError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    # PerfContext.params로 채우는 경로 템플릿
+    path: str
+    max_queries: int
+    staff: bool = False
+
+
+# 로그인(session, user) 쿼리 2개를 포함한 요청 하나의 쿼리 수 상한.
+SCENARIOS = [
+    # 화면
+    Scenario('page:planner-dashboard', '/planner/?date={today}', 20),
+    Scenario('page:planner-day', '/planner/day/?date={today}', 13),
+    Scenario('page:planner-week', '/planner/week/?date={today}', 10),
+    Scenario('page:planner-agenda', '/planner/agenda/?from={week_ago}&to={today}', 10),
+    Scenario('page:task-list', '/tasks/', 3),
+    Scenario('page:task-create', '/tasks/new/', 2),
+    Scenario('page:transaction-list', '/finance/', 4),
+    Scenario('page:transaction-create', '/finance/new/', 5),
+    # 라우터 엔드포인트(core/api_urls.py의 router.registry마다 list/detail)
+    Scenario('api:task-list', '/api/tasks/', 5),
+    Scenario('api:task-detail', '/api/tasks/{task}/', 5),
+    Scenario('api:tag-list', '/api/tags/', 4),
+    Scenario('api:tag-detail', '/api/tags/{tag}/', 3),
+    Scenario('api:account-list', '/api/finance/accounts/', 5),
+    Scenario('api:account-detail', '/api/finance/accounts/{account}/', 4),
+    Scenario('api:category-list', '/api/finance/categories/', 5),
+    Scenario('api:category-detail', '/api/finance/categories/{category}/', 4),
+    Scenario('api:transaction-list', '/api/finance/transactions/', 4),
+    Scenario('api:transaction-detail', '/api/finance/transactions/{transaction}/', 4),
+    Scenario('api:recurringtransaction-list', '/api/finance/recurring-transactions/', 5),
+    Scenario('api:recurringtransaction-detail', '/api/finance/recurring-transactions/{recurring_transaction}/', 4),
+    Scenario('api:budgetperiod-list', '/api/finance/budget-periods/', 6),
+    Scenario('api:budgetperiod-detail', '/api/finance/budget-periods/{budget_period}/', 5),
+    Scenario('api:budgetitem-list', '/api/finance/budget-items/', 4),
+    Scenario('api:budgetitem-detail', '/api/finance/budget-items/{budget_item}/', 3),
+    Scenario('api:budgetalert-list', '/api/finance/budget-alerts/', 5),
+    Scenario('api:budgetalert-detail', '/api/finance/budget-alerts/{budget_alert}/', 4),
+    # 추가 액션과 라우터 밖 엔드포인트
+    Scenario('api:task-upcoming', '/api/tasks/upcoming/', 5),
+    Scenario('api:transaction-export-csv', '/api/finance/transactions/export/csv/?from={month_start}&to={today}', 3),
+    Scenario('api:budgetperiod-status', '/api/finance/budget-periods/{budget_period}/status/', 6),
+    Scenario('api:budgetperiod-current-status', '/api/finance/budget-periods/status/?date={today}', 6),
+    Scenario('api:planner-calendar', '/api/planner/calendar?month={month}', 5),
+    Scenario('api:planner-week', '/api/planner/week?date={today}', 8),
+    Scenario('api:planner-agenda', '/api/planner/agenda?from={week_ago}&to={today}', 8),
+    Scenario('api:sync', '/api/sync/?since={sync_cursor}', 6),
+    Scenario('api:search', '/api/search/?q=expense', 3),
+    Scenario('api:analytics-series', '/api/finance/analytics/series/?granularity=week&group_by=category', 4),
+    Scenario('api:analytics-yoy', '/api/finance/analytics/yoy/?group_by=account', 4),
+    Scenario('api:analytics-rolling', '/api/finance/analytics/rolling/', 4),
+    Scenario('api:planner-day', '/api/planner/day?date={today}', 11),
+    # ASGI용 비동기 경로(core.async_api). 같은 응답을 내는 동기 경로와 쿼리 수가 같아야 한다.
+    Scenario('async:planner-day', '/api/async/planner/day?date={today}', 11),
+    Scenario('async:planner-calendar', '/api/async/planner/calendar?month={month}', 5),
+    Scenario('async:task-upcoming', '/api/async/tasks/upcoming/', 5),
+    Scenario('async:transaction-list', '/api/async/finance/transactions/', 4),
+    # 관리자 목록(외래 키 __str__의 N+1이 가장 먼저 드러나는 곳)
+    Scenario('admin:task-changelist', '/admin/tasks/task/', 6, staff=True),
+    Scenario('admin:transaction-changelist', '/admin/finance/transaction/', 7, staff=True),
+    Scenario('admin:account-changelist', '/admin/finance/account/', 5, staff=True),
+    Scenario('admin:budgetitem-changelist', '/admin/finance/budgetitem/', 5, staff=True),
+]
+
+
+@dataclass
+class PerfContext:
+    user: object
+    admin: object
+    params: dict[str, object] = field(default_factory=dict)
+
+
+# ---- 데이터 ------------------------------------------------------------
+
+@contextmanager
+def throwaway_database(keepdb: bool = False, **overrides):
+    """측정용 명령이 실제 DB/캐시를 건드리지 않도록 테스트 DB와 프로세스 메모리 캐시 안에서 실행한다.
+    overrides는 함께 바꿀 설정이다(예: PLANNER_CACHE_TIMEOUT=0).
+    """
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, **overrides):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def _seed_extras(user, today: date) -> None:
+    """합성 데이터에 없는 반복 일정/거래, 예산 알림, 변경 로그를 더한다."""
+
+    tz = timezone.get_current_timezone()
+    account = Account.objects.filter(owner=user).order_by('pk').first()
+    category = Category.objects.filter(owner=user, kind='expense').order_by('pk').first()
+    first = timezone.make_aware(datetime.combine(today.replace(day=1), datetime.min.time()) + timedelta(hours=18), tz)
+    Task.objects.create(owner=user, title='weekly review', start_at=first, recurrence='FREQ=WEEKLY')
+    RecurringTransaction.objects.create(
+        owner=user, account=account, category=category, amount=Decimal('500'), memo='rent',
+        starts_at=first, recurrence='FREQ=MONTHLY',
+    )
+    item = BudgetItem.objects.filter(period__owner=user).order_by('-period__start_date', 'pk').first()
+    BudgetAlert.objects.create(owner=user, item=item, threshold=80, spent=item.spent)
+    # 동기화 엔드포인트가 실제 행을 직렬화하도록 변경 로그를 조금 남긴다.
+    changelog.record(user.pk, 'task', Task.objects.filter(owner=user).order_by('pk').values_list('pk', flat=True)[:50])
+    changelog.record(
+        user.pk, 'transaction', Transaction.objects.filter(owner=user).order_by('pk').values_list('pk', flat=True)[:50]
+    )
+
+
+def _first_pk(queryset) -> int:
+    return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+
+def seed(scale: str | loadgen.LoadSpec = 'ci', seed: int = 42) -> PerfContext:
+    """규모에 맞춰 성능 측정용 사용자와 데이터를 만든다. 같은 seed와 날짜면 같은 데이터가 나온다."""
+
+    today = timezone.localdate()
+    spec = scale if isinstance(scale, loadgen.LoadSpec) else SCALES[scale]
+    spec = replace(spec, seed=seed, end=today, prefix=PERF_USER_PREFIX)
+    owner_ids = loadgen.generate(spec)
+    users = list(User.objects.filter(pk__in=owner_ids).order_by('pk'))
+    for user in users:
+        _seed_extras(user, today)
+    admin = User.objects.create_superuser(username=PERF_ADMIN, password='perf', email='')
+
+    user = users[0]
+    params = {
+        'task': _first_pk(Task.objects.filter(owner=user)),
+        'tag': _first_pk(Tag.objects.filter(tasks__owner=user).distinct()),
+        'account': _first_pk(Account.objects.filter(owner=user)),
+        'category': _first_pk(Category.objects.filter(owner=user)),
+        'transaction': _first_pk(Transaction.objects.filter(owner=user)),
+        'recurring_transaction': _first_pk(RecurringTransaction.objects.filter(owner=user)),
+        'budget_period': BudgetPeriod.objects.filter(owner=user).order_by('-start_date').values_list('pk', flat=True)[0],
+        'budget_item': _first_pk(BudgetItem.objects.filter(period__owner=user)),
+        'budget_alert': _first_pk(BudgetAlert.objects.filter(owner=user)),
+        'today': today.isoformat(),
+        'week_ago': (today - timedelta(days=6)).isoformat(),
+        'month_start': today.replace(day=1).isoformat(),
+        'month': today.strftime('%Y-%m'),
+        'sync_cursor': changelog.encode_cursor(0),
+    }
+    return PerfContext(user=user, admin=admin, params=params)
+
+
+# ---- 측정 --------------------------------------------------------------
+
+def measure(client: Client, path: str, repeat: int = 1) -> dict:
+    """캐시를 비운 뒤 GET을 repeat번 보내 쿼리 수·DB 왕복 수(최댓값)와 응답 시간(ms)을 잰다.
+    스트리밍 응답은 끝까지 읽는다.
+
+    왕복 수는 요청이 차례로 기다린 쿼리 수다. core.fanout으로 함께 보낸 쿼리는 가장 긴 갈래만 센다.
+    첫 요청(템플릿/URL 로딩)은 쿼리 수만 세고 시간에서는 뺀다.
+    """
+
+    counts, round_trips, timings = [], [], []
+    for attempt in range(max(repeat, 1) + 1):
+        caches['default'].clear()
+        with fanout.track_round_trips() as captured:
+            started = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise PerfError(f'GET {path} returned {response.status_code}')
+        counts.append(captured.queries)
+        round_trips.append(captured.round_trips)
+        if attempt:
+            timings.append(elapsed)
+    return {
+        'queries': max(counts),
+        'round_trips': max(round_trips),
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+    }
+
+
+def run(context: PerfContext, scenarios=SCENARIOS, repeat: int = 5) -> dict[str, dict]:
+    clients = {}
+    for staff, user in ((False, context.user), (True, context.admin)):
+        clients[staff] = Client()
+        clients[staff].force_login(user)
+    return {
+        scenario.name: measure(clients[scenario.staff], scenario.path.format(**context.params), repeat)
+        for scenario in scenarios
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict | None, threshold: float = 0.25,
+            slack_ms: float = 2.0, scenarios=SCENARIOS) -> list[str]:
+    """예산/기준선을 넘은 항목 설명 목록. 비어 있으면 통과.
+
+    응답 시간은 p50과 p95가 모두 기준선보다 threshold 이상 느려졌을 때만 회귀로 본다.
+    한두 번 튄 요청은 p95만 올리므로 실제로 느려진 경우와 구분된다.
+    """
+
+    failures = []
+    budgets = {scenario.name: scenario.max_queries for scenario in scenarios}
+    previous = (baseline or {}).get('scenarios', {})
+    for name, result in results.items():
+        if result['queries'] > budgets[name]:
+            failures.append(f'{name}: {result["queries"]} queries > budget {budgets[name]}')
+        base = previous.get(name)
+        if base and all(
+            result[key] > base[key] * (1 + threshold) + slack_ms for key in ('p50_ms', 'p95_ms')
+        ):
+            failures.append(
+                f'{name}: p50/p95 {result["p50_ms"]}/{result["p95_ms"]} ms > '
+                f'baseline {base["p50_ms"]}/{base["p95_ms"]} ms (+{threshold:.0%})'
+            )
+    return failures
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_baseline(path: Path, scale: str, results: dict[str, dict]) -> None:
+    payload = {'scale': scale, 'vendor': connection.vendor, 'scenarios': dict(sorted(results.items()))}
+    path.write_text(json.dumps(payload, indent=2) + '\n')
+
+
+# ---- 동시 부하: WSGI와 ASGI 경로 비교 ------------------------------------------
+
+# 같은 JSON을 돌려주는 (동기 경로, 비동기 경로). manage.py benchmark_asgi가 동시 클라이언트로 비교한다.
+ASYNC_PAIRS = {
+    'planner-day': ('/api/planner/day?date={today}', '/api/async/planner/day?date={today}'),
+    'planner-calendar': ('/api/planner/calendar?month={month}', '/api/async/planner/calendar?month={month}'),
+    'task-upcoming': ('/api/tasks/upcoming/', '/api/async/tasks/upcoming/'),
+    'transaction-list': ('/api/finance/transactions/', '/api/async/finance/transactions/'),
+}
+
+
+@contextmanager
+def simulated_db_latency(seconds: float):
+    """이 스레드에 열려 있는 연결과 새로 여는 연결마다 쿼리 전에 seconds만큼 기다리게 한다
+    (네트워크 너머 DB의 왕복 시간 흉내).
+
+    time.sleep은 GIL을 놓으므로 실제 DB 대기처럼 다른 스레드/요청이 그동안 진행된다.
+    """
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # execute_wrapper()는 끝날 때 목록의 마지막을 꺼내므로, 요청 중에 연결이 열려도 맨 앞에 넣어야
+        # 미들웨어의 래퍼 대신 꺼내지지 않는다.
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    if seconds <= 0:
+        yield
+        return
+    opened = [conn for conn in connections.all(initialized_only=True) if conn.connection is not None]
+    for conn in opened:
+        install(None, conn)
+    connection_created.connect(install, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for conn in opened:
+            if delay in conn.execute_wrappers:
+                conn.execute_wrappers.remove(delay)
+
+
+def _load_summary(latencies: list[float], wall: float, failures: int) -> dict:
+    return {
+        'requests': len(latencies),
+        'failures': failures,
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+    }
+
+
+def concurrent_wsgi(cookies, path: str, clients: int, requests: int, workers: int) -> dict:
+    """clients개의 스레드가 동기 경로에 GET을 나눠 보낸다. 요청은 workers개 스레드 풀(gunicorn 워커 × 스레드
+    흉내)이 FIFO로 처리하고, 응답 시간에는 워커를 기다린 시간이 들어간다."""
+
+    latencies: list[float] = []
+    failures = 0
+    lock = threading.Lock()
+
+    def serve(client):
+        try:
+            return client.get(path, HTTP_ACCEPT='application/json')
+        finally:
+            # 워커 스레드의 연결은 요청이 끝날 때 닫힌다(CONN_MAX_AGE=0과 같다).
+            connections.close_all()
+
+    def client_loop(count: int):
+        nonlocal failures
+        client = Client()
+        client.cookies = cookies
+        for _ in range(count):
+            started = time.perf_counter()
+            response = server.submit(serve, client).result()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                failures += response.status_code >= 400
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as server, ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client_loop, _shares(requests, clients)))
+    return _load_summary(latencies, time.perf_counter() - started, failures)
+
+
+async def concurrent_asgi(cookies, path: str, clients: int, requests: int) -> dict:
+    """clients개의 코루틴이 비동기 경로에 GET을 나눠 보낸다. 한 ASGI 워커(이벤트 루프 하나)가 모두 받는다."""
+
+    latencies: list[float] = []
+    failures = 0
+
+    async def client_loop(count: int):
+        nonlocal failures
+        client = AsyncClient()
+        client.cookies = cookies
+        for _ in range(count):
+            started = time.perf_counter()
+            # 실제 ASGIHandler처럼 요청마다 동기 코드용 스레드를 따로 둔다. AsyncClient는 이것을 하지 않아
+            # 그대로 두면 모든 요청의 ORM 호출이 스레드 하나에 줄을 선다.
+            async with ThreadSensitiveContext():
+                response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            failures += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(count) for count in _shares(requests, clients)))
+    return _load_summary(latencies, time.perf_counter() - started, failures)
+
+
+def _shares(total: int, parts: int) -> list[int]:
+    return [total // parts + (index < total % parts) for index in range(parts)]
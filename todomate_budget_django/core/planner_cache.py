@@ -0,0 +1,138 @@
+"""플래너 하루 컨텍스트의 버전 기반 캐시.
+
+캐시 키는 (사용자, 날짜, 사용자 버전, 날짜 버전)으로 구성된다.
+- 날짜 버전: 그 날짜에 보이는 일정/거래가 바뀌면 올린다.
+- 사용자 버전: 계정/분류처럼 모든 날짜 화면에 보이는 데이터가 바뀌면 올린다.
+버전이 바뀌면 이전 키는 자연스럽게 참조되지 않다가 만료되므로 명시적 삭제가 필요 없다.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Awaitable, Callable, Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core import metrics
+
+KEY_PREFIX = 'planner'
+STAT_KEYS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[getattr(settings, 'PLANNER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'PLANNER_CACHE_TIMEOUT', 60 * 60)
+
+
+def _user_version_key(user_id: int) -> str:
+    return f'{KEY_PREFIX}:ver:{user_id}'
+
+
+def _day_version_key(user_id: int, day: date) -> str:
+    return f'{KEY_PREFIX}:ver:{user_id}:{day.isoformat()}'
+
+
+def _new_version() -> int:
+    # 버전 키가 축출되었다가 다시 만들어져도 예전 값과 겹치지 않도록 시각 기반으로 시작한다.
+    return time.time_ns()
+
+
+def _bump(keys: Iterable[str]) -> None:
+    cache = _cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def _versions(user_id: int, day: date) -> tuple[int, int]:
+    cache = _cache()
+    user_key, day_key = _user_version_key(user_id), _day_version_key(user_id, day)
+    found = cache.get_many([user_key, day_key])
+    missing = {key: _new_version() for key in (user_key, day_key) if key not in found}
+    for key, value in missing.items():
+        # 다른 요청이 먼저 만들었다면 그 값을 따른다.
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    found.update(missing)
+    return found[user_key], found[day_key]
+
+
+def invalidate_days(user_id: int, days: Iterable[date | None]) -> None:
+    """해당 날짜들의 하루 컨텍스트만 무효화한다."""
+
+    _bump(_day_version_key(user_id, day) for day in {day for day in days if day is not None})
+
+
+def invalidate_user(user_id: int) -> None:
+    """사용자의 모든 날짜 컨텍스트를 무효화한다."""
+
+    _bump([_user_version_key(user_id)])
+
+
+def _record(stat: str) -> None:
+    key = f'{KEY_PREFIX}:stats:{stat}'
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats() -> dict[str, float]:
+    """프로세스와 무관하게 캐시 백엔드에 누적된 적중/실패 횟수와 적중률."""
+
+    values = _cache().get_many([f'{KEY_PREFIX}:stats:{stat}' for stat in STAT_KEYS])
+    hits = values.get(f'{KEY_PREFIX}:stats:hits', 0)
+    misses = values.get(f'{KEY_PREFIX}:stats:misses', 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': (hits / total) if total else 0.0}
+
+
+def _day_key(user_id: int, day: date, versions: tuple[int, int]) -> str:
+    user_version, day_version = versions
+    return f'{KEY_PREFIX}:day:{user_id}:{day.isoformat()}:{user_version}:{day_version}'
+
+
+def get_or_build(user_id: int, day: date, builder: Callable[[], dict]) -> dict:
+    """캐시된 하루 컨텍스트를 돌려주고, 없으면 builder로 만들어 저장한다."""
+
+    key = _day_key(user_id, day, _versions(user_id, day))
+    cache = _cache()
+    payload = cache.get(key)
+    if payload is not None:
+        _record('hits')
+        metrics.record_cache('planner', hits=1)
+        return payload
+
+    _record('misses')
+    metrics.record_cache('planner', misses=1)
+    payload = builder()
+    cache.set(key, payload, _timeout())
+    return payload
+
+
+async def aget_or_build(user_id: int, day: date, builder: Callable[[], Awaitable[dict]]) -> dict:
+    """get_or_build의 비동기 버전. builder는 코루틴을 돌려준다."""
+
+    key = _day_key(user_id, day, await sync_to_async(_versions)(user_id, day))
+    cache = _cache()
+    payload = await cache.aget(key)
+    if payload is not None:
+        await sync_to_async(_record)('hits')
+        metrics.record_cache('planner', hits=1)
+        return payload
+
+    await sync_to_async(_record)('misses')
+    metrics.record_cache('planner', misses=1)
+    payload = await builder()
+    await cache.aset(key, payload, _timeout())
+    return payload
@@ -0,0 +1,372 @@
+"""요청 단위 프로파일링 미들웨어.
+
+켜는 방법(둘 다 꺼져 있으면 요청마다 난수 하나만 뽑고 지나간다)
+- 헤더: `X-Profile: <PROFILING_TOKEN>`. DEBUG에서는 값과 무관하게 헤더만 있으면 된다.
+- 샘플링: PROFILING_SAMPLE_RATE(0~1) 비율의 요청.
+
+기록 항목: 전체 시간, DB 시간/쿼리 수, 같은 모양(fingerprint) 쿼리의 반복(N+1 후보), 템플릿 렌더 시간,
+Python 할당량(tracemalloc). 응답에는 Server-Timing 헤더로, PROFILING_LOG에는 JSONL 한 줄로 남긴다
+(RotatingFileHandler). 집계는 `manage.py profile_report`.
+
+tracemalloc은 프로세스 전역이라 프로파일 중인 요청이 동시에 여럿이면 할당량에 서로의 몫이 섞인다.
+스트리밍 응답은 본문을 보내기 전까지만 잰다.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import hmac
+import json
+import logging
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template import base as template_base
+from django.utils import timezone
+
+HEADER = 'HTTP_X_PROFILE'
+# 로그에 남기는 반복 쿼리 패턴 수(반복 횟수 순)
+MAX_DUPLICATES = 10
+
+_active: contextvars.ContextVar['RequestProfile | None'] = contextvars.ContextVar('request_profile', default=None)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """값만 다른 쿼리가 같아지도록 IN 목록, 문자열/숫자 리터럴을 지운 SQL."""
+
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.by_fingerprint: dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_seconds += elapsed
+            self.queries += 1
+            entry = self.by_fingerprint[fingerprint(sql)]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def duplicates(self) -> list[dict]:
+        repeated = sorted(
+            ((sql, count, seconds) for sql, (count, seconds) in self.by_fingerprint.items() if count > 1),
+            key=lambda item: (-item[1], -item[2]),
+        )
+        return [
+            {
+                'id': hashlib.sha1(sql.encode()).hexdigest()[:12],
+                'count': count,
+                'db_ms': round(seconds * 1000, 2),
+                'sql': sql,
+            }
+            for sql, count, seconds in repeated[:MAX_DUPLICATES]
+        ]
+
+
+# ---- 템플릿 렌더 시간 ------------------------------------------------------
+
+_original_render = template_base.Template.render
+_install_lock = threading.Lock()
+
+
+def _timed_render(self, context):
+    profile = _active.get()
+    if profile is None:
+        return _original_render(self, context)
+    # include/extends로 중첩된 렌더는 가장 바깥 렌더 시간에 이미 들어 있다.
+    profile.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.template_depth -= 1
+        if not profile.template_depth:
+            profile.template_seconds += time.perf_counter() - started
+
+
+def install_template_timer() -> None:
+    with _install_lock:
+        if template_base.Template.render is not _timed_render:
+            template_base.Template.render = _timed_render
+
+
+# ---- 할당량 --------------------------------------------------------------
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+
+def _start_tracing() -> bool:
+    """tracemalloc을 이 요청을 위해 켰으면 True. 다른 코드가 이미 켜 둔 경우에는 끄지 않는다."""
+
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and tracemalloc.is_tracing():
+            return False
+        if _trace_users == 0:
+            tracemalloc.start()
+        _trace_users += 1
+        return True
+
+
+def _stop_tracing() -> None:
+    global _trace_users
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0:
+            tracemalloc.stop()
+
+
+# ---- 로그 ----------------------------------------------------------------
+
+_loggers: dict[str, logging.Logger] = {}
+_logger_lock = threading.Lock()
+
+
+def log_path() -> Path:
+    return Path(getattr(settings, 'PROFILING_LOG', Path(settings.BASE_DIR) / 'logs' / 'profile.jsonl'))
+
+
+def _logger() -> logging.Logger:
+    path = log_path()
+    key = str(path)
+    with _logger_lock:
+        logger = _loggers.get(key)
+        if logger is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=getattr(settings, 'PROFILING_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=getattr(settings, 'PROFILING_LOG_BACKUPS', 5),
+                encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger(f'{__name__}.{len(_loggers)}')
+            logger.handlers = [handler]
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            _loggers[key] = logger
+    return logger
+
+
+def read_log(path: Path | None = None) -> list[dict]:
+    """회전된 파일(profile.jsonl.N)까지 오래된 것부터 읽는다. 깨진 줄은 건너뛴다."""
+
+    path = path or log_path()
+    rotated = [item for item in path.parent.glob(path.name + '.*') if item.suffix[1:].isdigit()]
+    files = sorted(rotated, key=lambda item: int(item.suffix[1:]), reverse=True)
+    records = []
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        with file.open(encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+# ---- 미들웨어 --------------------------------------------------------------
+
+def _trigger(request) -> str | None:
+    value = request.META.get(HEADER)
+    if value is not None:
+        token = getattr(settings, 'PROFILING_TOKEN', '')
+        if settings.DEBUG or (token and hmac.compare_digest(value, token)):
+            return 'header'
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+    if rate > 0 and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def _route(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    return match.view_name or match.route or request.path
+
+
+class _ProfiledRequest:
+    """한 요청을 재는 동안 프로파일러, 쿼리 래퍼, tracemalloc을 켜 두는 컨텍스트."""
+
+    def __init__(self, trigger: str):
+        self.trigger = trigger
+        self.profile = RequestProfile()
+        self.allocated = self.peak = None
+
+    def __enter__(self):
+        self._token = _active.set(self.profile)
+        self._tracing = getattr(settings, 'PROFILING_TRACE_ALLOCATIONS', True) and _start_tracing()
+        if self._tracing:
+            tracemalloc.reset_peak()
+            self._baseline, _peak = tracemalloc.get_traced_memory()
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+        if self._tracing:
+            current, peak_bytes = tracemalloc.get_traced_memory()
+            self.allocated, self.peak = max(current - self._baseline, 0), max(peak_bytes - self._baseline, 0)
+            _stop_tracing()
+        return False
+
+    def finish(self, request, response):
+        profile = self.profile
+        wall = time.perf_counter() - profile.started
+        record = {
+            'ts': timezone.now().isoformat(),
+            'trigger': self.trigger,
+            'method': request.method,
+            'path': request.path,
+            'view': _route(request),
+            'status': response.status_code,
+            'wall_ms': round(wall * 1000, 2),
+            'db_ms': round(profile.db_seconds * 1000, 2),
+            'queries': profile.queries,
+            'template_ms': round(profile.template_seconds * 1000, 2),
+            'alloc_kb': round(self.allocated / 1024, 1) if self.allocated is not None else None,
+            'peak_kb': round(self.peak / 1024, 1) if self.peak is not None else None,
+            'duplicates': profile.duplicates(),
+        }
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={record["wall_ms"]}',
+            f'db;dur={record["db_ms"]};desc="{profile.queries} queries"',
+            f'tpl;dur={record["template_ms"]}',
+            f'app;dur={max(record["wall_ms"] - record["db_ms"] - record["template_ms"], 0):.2f}',
+        ])
+        _logger().info(json.dumps(record, ensure_ascii=False))
+        return response
+
+
+class ProfilingMiddleware:
+    """MIDDLEWARE 맨 앞에 두어 다른 미들웨어(세션/인증 쿼리 포함)까지 잰다. WSGI/ASGI 모두 지원한다."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timer()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = _trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        with _ProfiledRequest(trigger) as profiled, wrap_connections(profiled.profile):
+            response = self.get_response(request)
+        return profiled.finish(request, response)
+
+    async def __acall__(self, request):
+        trigger = _trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        with _ProfiledRequest(trigger) as profiled:
+            # ORM은 sync_to_async 스레드에서 연결을 쓰므로 쿼리 래퍼도 그 스레드에서 건다.
+            wrappers = await sync_to_async(wrap_connections)(profiled.profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(wrappers.close)()
+        return profiled.finish(request, response)
+
+
+def wrap_connections(wrapper) -> ExitStack:
+    """모든 DB 연결에 execute_wrapper를 건다. core.metrics도 같은 방식으로 쿼리를 센다."""
+
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+# ---- 집계 ----------------------------------------------------------------
+
+def percentile(values: list[float], fraction: float) -> float:
+    """가장 가까운 순위 방식의 백분위수. 벤치마크 명령들도 이 함수를 쓴다."""
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))]
+
+
+def slow_endpoints(records: list[dict], top: int = 10) -> list[dict]:
+    """(method, view)별 요청 수와 시간/쿼리 분포. p95 전체 시간이 큰 순."""
+
+    groups: dict[tuple[str, str], list[dict]] = defaultdict(list)
+    for record in records:
+        groups[(record.get('method', ''), record.get('view', record.get('path', '')))].append(record)
+    rows = []
+    for (method, view), items in groups.items():
+        walls = [item['wall_ms'] for item in items]
+        rows.append({
+            'method': method,
+            'view': view,
+            'requests': len(items),
+            'p50_ms': percentile(walls, 0.5),
+            'p95_ms': percentile(walls, 0.95),
+            'max_ms': max(walls),
+            'avg_db_ms': round(sum(item['db_ms'] for item in items) / len(items), 2),
+            'avg_queries': round(sum(item['queries'] for item in items) / len(items), 1),
+            'avg_template_ms': round(sum(item.get('template_ms') or 0 for item in items) / len(items), 2),
+        })
+    rows.sort(key=lambda row: (-row['p95_ms'], -row['requests']))
+    return rows[:top]
+
+
+def repeated_queries(records: list[dict], top: int = 10) -> list[dict]:
+    """요청 안에서 반복된 쿼리 패턴(N+1 후보). 한 요청의 최대 반복 횟수가 큰 순."""
+
+    patterns: dict[str, dict] = {}
+    for record in records:
+        view = record.get('view', record.get('path', ''))
+        for duplicate in record.get('duplicates', ()):
+            pattern = patterns.setdefault(duplicate['id'], {
+                'id': duplicate['id'], 'sql': duplicate['sql'], 'requests': 0, 'max_per_request': 0,
+                'total_queries': 0, 'db_ms': 0.0, 'views': set(),
+            })
+            pattern['requests'] += 1
+            pattern['max_per_request'] = max(pattern['max_per_request'], duplicate['count'])
+            pattern['total_queries'] += duplicate['count']
+            pattern['db_ms'] += duplicate['db_ms']
+            pattern['views'].add(view)
+    rows = sorted(patterns.values(), key=lambda row: (-row['max_per_request'], -row['total_queries']))[:top]
+    for row in rows:
+        row['views'] = sorted(row['views'])
+        row['db_ms'] = round(row['db_ms'], 2)
+    return rows
@@ -0,0 +1,172 @@
+"""RRULE 부분집합(DAILY/WEEKLY/MONTHLY) 파싱과 구간 전개.
+
+지원 속성: FREQ, INTERVAL, BYDAY(WEEKLY), BYMONTHDAY(MONTHLY, -1은 말일), UNTIL, COUNT.
+전개는 보고 있는 구간의 첫 주기로 바로 건너뛰므로 비용이 시작일로부터의 거리와 무관하다
+(COUNT가 있으면 앞에서부터 세어야 하지만 COUNT 자체가 상한이다).
+"""
+
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+# UNTIL/COUNT가 없는 규칙을 끝까지 전개하지 않도록 하는 안전장치
+MAX_OCCURRENCES = 10_000
+
+
+class InvalidRule(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    byweekday: tuple[int, ...] = ()
+    bymonthday: tuple[int, ...] = ()
+    until: date | None = None
+    count: int | None = None
+
+    def __str__(self):
+        parts = [f'FREQ={self.freq}']
+        if self.interval != 1:
+            parts.append(f'INTERVAL={self.interval}')
+        if self.byweekday:
+            parts.append('BYDAY=' + ','.join(WEEKDAYS[day] for day in self.byweekday))
+        if self.bymonthday:
+            parts.append('BYMONTHDAY=' + ','.join(str(day) for day in self.bymonthday))
+        if self.until:
+            parts.append(f'UNTIL={self.until:%Y%m%d}')
+        if self.count:
+            parts.append(f'COUNT={self.count}')
+        return ';'.join(parts)
+
+
+def parse(text: str) -> Rule:
+    """'FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20241231' 형태를 Rule로 바꾼다. 앞의 'RRULE:'은 허용한다."""
+
+    text = (text or '').strip()
+    if text.upper().startswith('RRULE:'):
+        text = text[6:]
+    try:
+        values = dict(part.split('=', 1) for part in text.split(';') if part)
+    except ValueError:
+        raise InvalidRule(f'규칙 형식이 올바르지 않습니다: {text!r}')
+    values = {key.strip().upper(): value.strip().upper() for key, value in values.items()}
+
+    unknown = set(values) - {'FREQ', 'INTERVAL', 'BYDAY', 'BYMONTHDAY', 'UNTIL', 'COUNT'}
+    if unknown:
+        raise InvalidRule(f'지원하지 않는 속성입니다: {", ".join(sorted(unknown))}')
+    freq = values.get('FREQ')
+    if freq not in FREQUENCIES:
+        raise InvalidRule('FREQ는 DAILY, WEEKLY, MONTHLY 중 하나여야 합니다.')
+    try:
+        interval = int(values.get('INTERVAL', 1))
+        count = int(values['COUNT']) if 'COUNT' in values else None
+        byweekday = tuple(sorted({WEEKDAYS.index(day) for day in values['BYDAY'].split(',')})) if 'BYDAY' in values else ()
+        bymonthday = tuple(sorted({int(day) for day in values['BYMONTHDAY'].split(',')})) if 'BYMONTHDAY' in values else ()
+        until = datetime.strptime(values['UNTIL'][:8], '%Y%m%d').date() if 'UNTIL' in values else None
+    except ValueError:
+        raise InvalidRule(f'규칙 값이 올바르지 않습니다: {text!r}')
+    if interval < 1 or (count is not None and count < 1):
+        raise InvalidRule('INTERVAL과 COUNT는 1 이상이어야 합니다.')
+    if until and count:
+        raise InvalidRule('UNTIL과 COUNT는 함께 쓸 수 없습니다.')
+    if byweekday and freq != 'WEEKLY':
+        raise InvalidRule('BYDAY는 WEEKLY에서만 쓸 수 있습니다.')
+    if bymonthday and (freq != 'MONTHLY' or any(day == 0 or not -1 <= day <= 31 for day in bymonthday)):
+        raise InvalidRule('BYMONTHDAY는 MONTHLY에서 1~31 또는 -1만 쓸 수 있습니다.')
+    return Rule(freq, interval, byweekday, bymonthday, until, count)
+
+
+def normalize(text: str) -> str:
+    """검증한 뒤 표준 표기로 바꾼다. 빈 값은 반복 없음."""
+
+    return str(parse(text)) if (text or '').strip() else ''
+
+
+def _add_months(day: date, months: int) -> tuple[int, int]:
+    index = day.year * 12 + day.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _period_dates(rule: Rule, dtstart: date, k: int) -> list[date]:
+    """k번째 주기에 속한 날짜들(dtstart 이전 제외)."""
+
+    if rule.freq == 'DAILY':
+        return [dtstart + timedelta(days=k * rule.interval)]
+    if rule.freq == 'WEEKLY':
+        week_start = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=k * rule.interval)
+        weekdays = rule.byweekday or (dtstart.weekday(),)
+        return [week_start + timedelta(days=day) for day in weekdays if week_start + timedelta(days=day) >= dtstart]
+    year, month = _add_months(dtstart, k * rule.interval)
+    last = calendar.monthrange(year, month)[1]
+    days = []
+    for monthday in rule.bymonthday or (dtstart.day,):
+        # 31일 규칙은 30일까지인 달을 건너뛴다(RFC 5545). 말일은 -1로 지정한다.
+        actual = last if monthday == -1 else monthday
+        if actual <= last:
+            days.append(date(year, month, actual))
+    return [day for day in sorted(days) if day >= dtstart]
+
+
+def _first_period(rule: Rule, dtstart: date, window_start: date) -> int:
+    if rule.count is not None or window_start <= dtstart:
+        return 0
+    if rule.freq == 'DAILY':
+        return (window_start - dtstart).days // rule.interval
+    if rule.freq == 'WEEKLY':
+        week0 = dtstart - timedelta(days=dtstart.weekday())
+        return (window_start - week0).days // (7 * rule.interval)
+    months = (window_start.year - dtstart.year) * 12 + window_start.month - dtstart.month
+    return max(0, months // rule.interval)
+
+
+def occurrences(rule: Rule, dtstart: date, window_start: date, window_end: date,
+                exceptions: Iterable[date] = ()) -> Iterator[date]:
+    """[window_start, window_end] 구간에 드는 발생 날짜. dtstart 이전 날짜는 나오지 않는다."""
+
+    excluded = set(exceptions)
+    last = min(window_end, rule.until) if rule.until else window_end
+    seen = 0
+    k = _first_period(rule, dtstart, window_start)
+    for _ in range(MAX_OCCURRENCES):
+        dates = _period_dates(rule, dtstart, k)
+        k += 1
+        if not dates:
+            continue
+        for day in dates:
+            seen += 1
+            if day > last or (rule.count is not None and seen > rule.count):
+                return
+            if day >= window_start and day not in excluded:
+                yield day
+    return
+
+
+def last_occurrence(rule: Rule, dtstart: date) -> date | None:
+    """규칙이 끝나는 날짜. 끝이 없으면 None. 창 조회 필터용으로 저장해 둔다."""
+
+    if rule.until:
+        return rule.until
+    if rule.count is None:
+        return None
+    final = None
+    for final in occurrences(rule, dtstart, dtstart, date.max - timedelta(days=400)):
+        pass
+    return final
+
+
+def rule_end(text: str, dtstart: date | None) -> date | None:
+    """저장용 마지막 발생 날짜. 규칙이 없거나 올바르지 않으면 None."""
+
+    if not text or dtstart is None:
+        return None
+    try:
+        return last_occurrence(parse(text), dtstart)
+    except InvalidRule:
+        return None
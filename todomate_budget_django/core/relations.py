@@ -0,0 +1,135 @@
+"""요청 단위로 미리 읽어 둔 관련 객체를 쓰는 직렬화 필드."""
+
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+
+def prefetch_related_ids(items, spec) -> dict:
+    """payload 목록에서 참조 id를 모아 모델별로 한 번의 IN 쿼리로 읽는다.
+
+    spec: {payload 필드명: queryset}. 반환값은 {model: {pk: obj}}이며
+    serializer context의 'related_cache'로 넘긴다.
+    """
+
+    wanted: dict = {}
+    for field_name, queryset in spec.items():
+        ids = wanted.setdefault(queryset.model, (queryset, set()))[1]
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            value = item.get(field_name)
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for raw in values:
+                try:
+                    ids.add(int(raw))
+                except (TypeError, ValueError):
+                    # 형식 오류는 필드 검증 단계에서 항목별 에러로 보고된다.
+                    continue
+    return {
+        model: ({obj.pk: obj for obj in queryset.filter(pk__in=ids)} if ids else {})
+        for model, (queryset, ids) in wanted.items()
+    }
+
+
+def related_spec(serializer) -> dict:
+    """serializer의 쓰기 가능한 Prefetched 관계 필드 → {payload 필드명: 검증 쿼리셋}."""
+
+    spec = {}
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        relation = field.child_relation if isinstance(field, serializers.ManyRelatedField) else field
+        if isinstance(relation, PrefetchedPrimaryKeyRelatedField):
+            spec[name] = relation.get_queryset()
+    return spec
+
+
+def _payload_items(root):
+    data = getattr(root, 'initial_data', None)
+    if isinstance(data, list):
+        return data
+    return [data] if isinstance(data, dict) else None
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """참조 id를 요청당 모델별 한 번의 IN 쿼리로 읽어 검증한다.
+
+    context['related_cache']({model: {pk: obj}})가 있으면 그것을 쓰고(bulk 경로), 없으면 처음 검증할 때
+    루트 직렬화기의 payload(단건이든 목록이든)에서 모든 관계 필드의 id를 모아 한 번에 채운다.
+    캐시에 없는 id는 존재하지 않는 것으로 처리하므로, 쿼리셋이 owner 범위면 다른 사용자의 객체도 함께 거부된다.
+    """
+
+    def _related_objects(self, model):
+        caches = self.context.setdefault('related_cache', {})
+        if model not in caches:
+            items = _payload_items(self.root)
+            serializer = self.parent.parent if isinstance(self.parent, serializers.ManyRelatedField) else self.parent
+            if items is None or serializer is None:
+                return None
+            caches.update(
+                (related, objects) for related, objects in prefetch_related_ids(items, related_spec(serializer)).items()
+                if related not in caches
+            )
+        return caches.get(model)
+
+    def to_internal_value(self, data):
+        cache = self._related_objects(self.get_queryset().model)
+        if cache is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return cache[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class OwnedPrimaryKeyRelatedField(PrefetchedPrimaryKeyRelatedField):
+    """요청 사용자의 객체만 받는 pk 관계 필드. 요청이 없으면 아무것도 받지 않는다."""
+
+    owner_field = 'owner'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = getattr(self.context.get('request'), 'user', None)
+        if user is None or not user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(**{self.owner_field: user})
+
+
+def owner_usernames(context: dict, owner_ids) -> dict:
+    """{owner_id: username}. 요청 사용자는 쿼리 없이, context에 없는 다른 id는 한 번의 IN 쿼리로 채운다."""
+
+    known = context.setdefault('owner_usernames', {})
+    if not known:
+        user = getattr(context.get('request'), 'user', None)
+        if user is not None and user.is_authenticated:
+            known[user.pk] = user.username
+    missing = {owner_id for owner_id in owner_ids if owner_id not in known}
+    if missing:
+        known.update(get_user_model().objects.filter(pk__in=missing).values_list('pk', 'username'))
+    return known
+
+
+class OwnerUsernameField(serializers.ReadOnlyField):
+    """owner.username을 owner FK를 읽지 않고 채운다.
+
+    목록의 행은 거의 모두 요청 사용자 것이므로 request.user에서 바로 가져오고, 다른 사용자 이름은
+    직렬화기 context에 모아 요청당 한 번씩만 조회한다. owner를 select_related할 필요가 없다.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'owner.username')
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        known = self.context.get('owner_usernames', {})
+        if instance.owner_id not in known and type(instance).owner.is_cached(instance):
+            return instance.owner.username
+        return owner_usernames(self.context, [instance.owner_id])[instance.owner_id]
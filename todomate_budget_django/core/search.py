@@ -0,0 +1,221 @@
+"""일정 제목/설명과 거래 메모의 전문 검색 (GET /api/search/?q=).
+
+- 원문은 단어(소문자)와 한글 2-gram으로 나눠 SearchDocument.title_terms/body_terms에 둔다.
+  한글은 조사가 붙고 띄어쓰기가 들쭉날쭉하므로 '커피숍'을 '커피 피숍'으로 저장해 '커피', '피숍',
+  '커피숍' 어느 것으로도 찾을 수 있게 한다.
+- 검색어도 같은 방식으로 나눈다. 두 글자 이상 한글은 2-gram 구(phrase), 한 글자 한글과 영문/숫자는
+  접두어로 찾고, 모든 항목을 AND로 묶는다.
+- SQLite는 FTS5(bm25), Postgres는 tsvector + GIN(ts_rank)을 쓴다. 제목이 설명보다 높은 가중치다.
+- 그림자 행은 모델 시그널(core.signals)이, 시그널을 끄는 bulk 경로는 core.bulk의 *_effects가 맞춘다.
+  처음 배포하거나 어긋났을 때는 `manage.py rebuild_search_index`로 다시 만든다.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.models import SearchDocument
+from finance.models import Transaction
+from tasks.models import Task
+
+MAX_RESULTS = 50
+
+_WORD = re.compile(r'[^\W_]+')
+_HANGUL = re.compile(r'([가-힣]+)')
+
+# 마이그레이션(core 0002)의 GIN 인덱스 식과 같아야 한다.
+PG_VECTOR = (
+    "(setweight(to_tsvector('simple'::regconfig, title_terms), 'A')"
+    " || setweight(to_tsvector('simple'::regconfig, body_terms), 'B'))"
+)
+
+
+def _runs(text: str):
+    for word in _WORD.findall((text or '').lower()):
+        for part in _HANGUL.split(word):
+            if part:
+                yield part
+
+
+def _is_hangul(run: str) -> bool:
+    return '가' <= run[0] <= '힣'
+
+
+def _bigrams(run: str) -> list[str]:
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def terms(text: str) -> str:
+    """색인할 토큰 문자열. 한글 두 글자 이상은 2-gram, 나머지는 단어 그대로."""
+
+    tokens = []
+    for run in _runs(text):
+        tokens.extend(_bigrams(run) if _is_hangul(run) and len(run) > 1 else [run])
+    return ' '.join(tokens)
+
+
+def query_parts(query: str) -> list[tuple[str, list[str]]]:
+    """검색어를 ('phrase', [2-gram...]) 또는 ('prefix', [단어]) 목록으로 나눈다."""
+
+    return [
+        ('phrase', _bigrams(run)) if _is_hangul(run) and len(run) > 1 else ('prefix', [run])
+        for run in _runs(query)
+    ]
+
+
+# ---- 색인 --------------------------------------------------------------
+
+def _task_document(row) -> SearchDocument:
+    return SearchDocument(
+        owner_id=row['owner_id'], model='task', object_id=row['id'],
+        title=row['title'][:255], occurred_at=row['start_at'] or row['due_at'],
+        title_terms=terms(row['title']), body_terms=terms(row['description']),
+    )
+
+
+def _transaction_document(row) -> SearchDocument:
+    return SearchDocument(
+        owner_id=row['owner_id'], model='transaction', object_id=row['id'],
+        title=row['memo'], occurred_at=row['occurred_at'], title_terms=terms(row['memo']),
+    )
+
+
+SOURCES = {
+    'task': (Task, ('id', 'owner_id', 'title', 'description', 'start_at', 'due_at'), _task_document),
+    'transaction': (Transaction, ('id', 'owner_id', 'memo', 'occurred_at'), _transaction_document),
+}
+
+
+def _write(model: str, rows) -> None:
+    documents, empty = [], []
+    for row in rows:
+        document = SOURCES[model][2](row)
+        if document.title_terms or document.body_terms:
+            documents.append(document)
+        else:
+            empty.append(row['id'])
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['model', 'object_id'],
+            update_fields=['owner', 'title', 'occurred_at', 'title_terms', 'body_terms'],
+        )
+    remove(model, empty)
+
+
+def index_instance(model: str, instance) -> None:
+    """저장된 일정/거래 하나를 색인한다(시그널 경로). 검색할 글자가 없으면 행을 지운다."""
+
+    _write(model, [{field: getattr(instance, field) for field in SOURCES[model][1]}])
+
+
+def index(model: str, ids) -> None:
+    """id 목록을 다시 읽어 색인한다(bulk 경로). 사라진 id는 호출한 쪽이 remove로 지운다."""
+
+    ids = list(ids)
+    if ids:
+        source, fields, _ = SOURCES[model]
+        _write(model, source.objects.filter(pk__in=ids).values(*fields))
+
+
+def remove(model: str, ids) -> None:
+    ids = list(ids)
+    if ids:
+        SearchDocument.objects.filter(model=model, object_id__in=ids).delete()
+
+
+def rebuild(owner_ids=None, chunk_size: int = 200, stdout=None) -> int:
+    """사용자 chunk_size명씩 그림자 행을 지우고 원본에서 다시 만든다. 만든 행 수를 돌려준다."""
+
+    if owner_ids is None:
+        owner_ids = set()
+        for source, _fields, _ in SOURCES.values():
+            owner_ids |= set(source.objects.order_by().values_list('owner_id', flat=True).distinct())
+        owner_ids |= set(SearchDocument.objects.order_by().values_list('owner_id', flat=True).distinct())
+    owner_ids = sorted(set(owner_ids))
+
+    written = 0
+    for offset in range(0, len(owner_ids), chunk_size):
+        chunk = owner_ids[offset:offset + chunk_size]
+        with transaction.atomic():
+            SearchDocument.objects.filter(owner_id__in=chunk).delete()
+            for model, (source, fields, build) in SOURCES.items():
+                rows = source.objects.filter(owner_id__in=chunk).values(*fields).iterator(chunk_size=2000)
+                documents = [document for document in map(build, rows) if document.title_terms or document.body_terms]
+                SearchDocument.objects.bulk_create(documents, batch_size=1000)
+                written += len(documents)
+        if stdout is not None:
+            stdout.write(f'  owners {offset + len(chunk)}/{len(owner_ids)}, documents {written}')
+    return written
+
+
+# ---- 검색 --------------------------------------------------------------
+
+def _fts5_query(owner_id: int, parts) -> str:
+    clauses = [
+        '"' + ' '.join(tokens) + '"' if kind == 'phrase' else f'"{tokens[0]}"*'
+        for kind, tokens in parts
+    ]
+    return f'owner_id : "{owner_id}" AND {{title_terms body_terms}} : ({" AND ".join(clauses)})'
+
+
+def _tsquery(parts) -> str:
+    clauses = [
+        '(' + ' <-> '.join(f"'{token}'" for token in tokens) + ')' if kind == 'phrase' else f"'{tokens[0]}':*"
+        for kind, tokens in parts
+    ]
+    return ' & '.join(clauses)
+
+
+def _sqlite_search(owner_id, parts, model, limit):
+    sql = (
+        'SELECT d.*, -bm25(core_searchdocument_fts, 0.0, 2.0, 1.0) AS score'
+        ' FROM core_searchdocument_fts JOIN core_searchdocument d ON d.id = core_searchdocument_fts.rowid'
+        ' WHERE core_searchdocument_fts MATCH %s' + (' AND d.model = %s' if model else '') +
+        ' ORDER BY score DESC, d.occurred_at DESC, d.id DESC LIMIT %s'
+    )
+    params = [_fts5_query(owner_id, parts), *([model] if model else []), limit]
+    return SearchDocument.objects.raw(sql, params)
+
+
+def _postgres_search(owner_id, parts, model, limit):
+    sql = (
+        f'SELECT d.*, ts_rank({PG_VECTOR}, q) AS score'
+        " FROM core_searchdocument d, to_tsquery('simple'::regconfig, %s) q"
+        f' WHERE d.owner_id = %s AND {PG_VECTOR} @@ q' + (' AND d.model = %s' if model else '') +
+        ' ORDER BY score DESC, d.occurred_at DESC NULLS LAST, d.id DESC LIMIT %s'
+    )
+    params = [_tsquery(parts), owner_id, *([model] if model else []), limit]
+    return SearchDocument.objects.raw(sql, params)
+
+
+def _fallback_search(owner_id, parts, model, limit):
+    # 색인이 없는 DB는 토큰 문자열을 부분 일치로 훑는다. 순위는 매기지 않는다.
+    queryset = SearchDocument.objects.filter(owner_id=owner_id)
+    if model:
+        queryset = queryset.filter(model=model)
+    for _kind, tokens in parts:
+        token = ' '.join(tokens)
+        queryset = queryset.filter(Q(title_terms__contains=token) | Q(body_terms__contains=token))
+    documents = list(queryset.order_by('-occurred_at', '-id')[:limit])
+    for document in documents:
+        document.score = 0.0
+    return documents
+
+
+BACKENDS = {'sqlite': _sqlite_search, 'postgresql': _postgres_search}
+
+
+def search(owner_id: int, query: str, model: str | None = None, limit: int = 20) -> list[SearchDocument]:
+    """owner의 일정/거래 중 query에 맞는 SearchDocument 목록(score 높은 순, 같으면 최근 순)."""
+
+    parts = query_parts(query)
+    if not parts:
+        return []
+    backend = BACKENDS.get(connection.vendor, _fallback_search)
+    return list(backend(owner_id, parts, model, min(limit, MAX_RESULTS)))
@@ -25,11 +25,15 @@ INSTALLED_APPS = [
     'django_filters',
     'corsheaders',
     # local
+    'core',
     'tasks',
     'finance',
 ]
 
 MIDDLEWARE = [
+    # 맨 앞에 두어야 다른 미들웨어의 쿼리/시간까지 잰다. 켜지 않은 요청에는 거의 비용이 없다.
+    'core.profiling.ProfilingMiddleware',
+    'core.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,6 +73,9 @@ if os.getenv('POSTGRES_HOST'):
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('POSTGRES_HOST'),
             'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            # 요청 스레드와 팬아웃 워커(core/fanout.py) 모두 연결을 재사용하되 끊긴 연결은 쓰기 전에 확인해 닫는다.
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 else:
@@ -79,6 +86,66 @@ else:
         }
     }
 
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'todomate',
+        }
+    }
+
+# 플래너 하루 컨텍스트 캐시 (core/planner_cache.py)
+PLANNER_CACHE_ALIAS = 'default'
+PLANNER_CACHE_TIMEOUT = int(os.getenv('PLANNER_CACHE_TIMEOUT', '3600'))
+
+# 플래너 화면의 독립 쿼리를 동시에 보내는 워커 스레드 수 (core/fanout.py). 0이면 차례로 실행한다.
+# 풀은 프로세스마다 하나이고 풀 스레드마다 DB 연결을 하나씩 더 쓰므로 Postgres 연결은
+# 최대 gunicorn 워커 × (스레드 + FANOUT_WORKERS)개다.
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '4'))
+
+# 예산 항목 사용률 알림 임계치(%)와 상태 캐시 유지 시간 (finance/budgets.py)
+BUDGET_ALERT_THRESHOLDS = (80, 100)
+BUDGET_STATUS_CACHE_TIMEOUT = int(os.getenv('BUDGET_STATUS_CACHE_TIMEOUT', '3600'))
+
+# 가계부 분석 결과 캐시 유지 시간 (finance/analytics.py). 키에 워터마크 버전이 들어가므로 변경 시 따로 지울 필요가 없다.
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', '3600'))
+
+# 일정/거래 목록·상세를 모델 인스턴스 없이 values() 행으로 직렬화한다 (core/fastread.py). 출력은 같다.
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', 'True') == 'True'
+
+# 반복 일정을 실제 행으로 미리 만들어 둘 기간(일). 그 뒤 날짜는 화면에서 규칙으로 전개한다 (core/occurrences.py)
+RECURRENCE_MATERIALIZE_DAYS = int(os.getenv('RECURRENCE_MATERIALIZE_DAYS', '14'))
+
+# bulk 엔드포인트 한 요청당 최대 항목 수와 그에 맞춘 요청 본문 크기 상한
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '10000'))
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', str(10 * 1024 * 1024)))
+
+# 동기화 변경 로그 보존 기간. 이보다 오래된 커서는 전체 재동기화를 요구한다.
+SYNC_CHANGE_LOG_RETENTION_DAYS = int(os.getenv('SYNC_CHANGE_LOG_RETENTION_DAYS', '30'))
+# 동기화 커서가 넘어가기 전에 로그 행이 확정되기를 기다리는 시간(초). 가장 긴 쓰기 트랜잭션보다 길어야 한다.
+SYNC_CURSOR_SETTLE_SECONDS = int(os.getenv('SYNC_CURSOR_SETTLE_SECONDS', '10'))
+
+# 요청 프로파일링 (core/profiling.py). X-Profile 헤더 값이 PROFILING_TOKEN과 같거나(DEBUG에서는 아무 값)
+# PROFILING_SAMPLE_RATE 비율로 뽑힌 요청만 잰다.
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_TRACE_ALLOCATIONS = os.getenv('PROFILING_TRACE_ALLOCATIONS', 'True') == 'True'
+PROFILING_LOG = Path(os.getenv('PROFILING_LOG', str(BASE_DIR / 'logs' / 'profile.jsonl')))
+PROFILING_LOG_MAX_BYTES = int(os.getenv('PROFILING_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+PROFILING_LOG_BACKUPS = int(os.getenv('PROFILING_LOG_BACKUPS', '5'))
+
+# /metrics 익스포터 (core/metrics.py). 워커별 값 파일을 두는 디렉터리로, 배포(서버 시작) 때 비운다.
+# METRICS_TOKEN을 정하면 스크레이퍼가 Authorization: Bearer <token>을 보내야 한다.
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -0,0 +1,211 @@
+"""도메인 모델 변경을 플래너 캐시 무효화, 동기화용 변경 로그와 검색 색인에 반영한다."""
+
+from collections import defaultdict
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core import changelog, metrics, planner_cache, search
+from finance import watermarks
+from finance.models import Account, Category, RecurringTransaction, Transaction
+from finance.rollups import local_date_of
+from finance.signals import is_owner_cascade, unless_muted
+from tasks.models import Task
+
+
+def task_days(*states):
+    """일정의 시작/마감 지역 날짜들. state는 start_at/due_at을 가진 dict."""
+
+    days = set()
+    for state in states:
+        if not state:
+            continue
+        for value in (state.get('start_at'), state.get('due_at')):
+            if value:
+                days.add(local_date_of(value))
+    return days
+
+
+@receiver(pre_save, sender=Task)
+@unless_muted
+def remember_previous_task_dates(sender, instance, raw=False, **kwargs):
+    instance._planner_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._planner_previous = (
+        Task.objects.filter(pk=instance.pk).values('start_at', 'due_at', 'recurrence').first()
+    )
+
+
+@receiver(post_save, sender=Task)
+@unless_muted
+def invalidate_task_days(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_planner_previous', None)
+    if instance.recurrence or (previous and previous['recurrence']):
+        # 반복 원본은 규칙이 닿는 모든 날짜에 가상 발생으로 보이므로 사용자 전체 버전을 올린다.
+        planner_cache.invalidate_user(instance.owner_id)
+        return
+    current = {'start_at': instance.start_at, 'due_at': instance.due_at}
+    planner_cache.invalidate_days(
+        instance.owner_id, task_days(getattr(instance, '_planner_previous', None), current)
+    )
+
+
+@receiver(pre_delete, sender=Task)
+@unless_muted
+def invalidate_deleted_task_days(sender, instance, **kwargs):
+    if instance.recurrence:
+        planner_cache.invalidate_user(instance.owner_id)
+    # 일정이 지워지면 연결된 거래는 SET_NULL로 '기타' 지출이 되므로 거래 날짜도 함께 무효화한다.
+    days = task_days({'start_at': instance.start_at, 'due_at': instance.due_at})
+    linked = list(instance.linked_transactions.values_list('id', 'occurred_at'))
+    days.update(local_date_of(occurred_at) for _, occurred_at in linked)
+    planner_cache.invalidate_days(instance.owner_id, days)
+    if linked and not is_owner_cascade(kwargs.get('origin')):
+        # SET_NULL은 시그널 없이 UPDATE로 처리되므로 연결이 끊길 거래를 미리 기록하고 가계부 버전도 올린다.
+        changelog.record(instance.owner_id, 'transaction', [tx_id for tx_id, _ in linked])
+        watermarks.bump(instance.owner_id)
+
+
+@receiver(post_delete, sender=Task)
+@unless_muted
+def skip_deleted_occurrence(sender, instance, origin=None, **kwargs):
+    """실제 행으로 만든 발생을 지우면 원본 예외에 날짜를 더해 가상 발생으로 되살아나지 않게 한다."""
+
+    if instance.recurrence_parent_id is None or is_owner_cascade(origin):
+        return
+    master = Task.objects.filter(pk=instance.recurrence_parent_id).first()
+    if master is None:
+        # 원본과 함께 CASCADE로 지워지는 중이다.
+        return
+    day = instance.recurrence_date.isoformat()
+    if day not in master.recurrence_exceptions:
+        master.recurrence_exceptions = [*master.recurrence_exceptions, day]
+        master.save(update_fields=['recurrence_exceptions', 'updated_at'])
+
+
+def transaction_days(owner_id, *states):
+    days = set()
+    task_ids = set()
+    for state in states:
+        if not state:
+            continue
+        days.add(local_date_of(state['occurred_at']))
+        if state.get('task_id'):
+            task_ids.add(state['task_id'])
+    if task_ids:
+        # 연결된 거래는 일정이 놓인 날짜의 타임라인에도 보인다.
+        days |= task_days(*Task.objects.filter(pk__in=task_ids, owner_id=owner_id).values('start_at', 'due_at'))
+    return days
+
+
+@receiver(post_save, sender=Transaction)
+@unless_muted
+def invalidate_transaction_days(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # 이전 상태는 finance.signals가 pre_save에서 읽어 둔 값을 그대로 쓴다.
+    previous = getattr(instance, '_ledger_previous', None)
+    current = {'occurred_at': instance.occurred_at, 'task_id': instance.task_id}
+    planner_cache.invalidate_days(instance.owner_id, transaction_days(instance.owner_id, previous, current))
+
+
+@receiver(post_delete, sender=Transaction)
+@unless_muted
+def invalidate_deleted_transaction_days(sender, instance, **kwargs):
+    state = {'occurred_at': instance.occurred_at, 'task_id': instance.task_id}
+    planner_cache.invalidate_days(instance.owner_id, transaction_days(instance.owner_id, state))
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+@unless_muted
+def invalidate_owner_planner(sender, instance, raw=False, **kwargs):
+    # 계정/분류 이름과 반복 거래의 예정 행은 여러 날짜 화면에 보이므로 사용자 전체 버전을 올린다.
+    if not raw:
+        planner_cache.invalidate_user(instance.owner_id)
+
+
+SYNCED_MODELS = {Task: 'task', Transaction: 'transaction', Account: 'account', Category: 'category'}
+
+
+def _record_upsert(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changelog.record(instance.owner_id, SYNCED_MODELS[sender], [instance.pk])
+
+
+def _record_delete(sender, instance, origin=None, **kwargs):
+    # 사용자 삭제로 함께 지워지는 경우 변경 로그도 CASCADE되므로 남기지 않는다.
+    if not is_owner_cascade(origin):
+        changelog.record(instance.owner_id, SYNCED_MODELS[sender], [instance.pk], action='delete')
+
+
+_record_upsert = unless_muted(_record_upsert)
+_record_delete = unless_muted(_record_delete)
+
+for _model in SYNCED_MODELS:
+    post_save.connect(_record_upsert, sender=_model, dispatch_uid=f'changelog_upsert_{_model.__name__}')
+    post_delete.connect(_record_delete, sender=_model, dispatch_uid=f'changelog_delete_{_model.__name__}')
+
+
+CREATED_METRICS = {Task: 'tasks_created_total', Transaction: 'transactions_created_total'}
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Transaction)
+@unless_muted
+def count_created(sender, instance, created=False, raw=False, **kwargs):
+    # bulk 경로(시그널을 끄는 곳)는 core.bulk의 *_effects가 센다.
+    if created and not raw:
+        metrics.inc(CREATED_METRICS[sender])
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+@unless_muted
+def record_task_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            changelog.record(instance.owner_id, 'task', [instance.pk])
+        return
+    # 태그 쪽에서 바꾼 경우(tag.tasks.add(...)) 일정마다 owner가 다를 수 있다.
+    if action == 'pre_clear':
+        # clear 후에는 어떤 일정이 연결돼 있었는지 알 수 없으므로 미리 읽는다.
+        pk_set = set(instance.tasks.values_list('id', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+    by_owner = defaultdict(list)
+    for task_id, owner_id in Task.objects.filter(pk__in=pk_set).values_list('id', 'owner_id'):
+        by_owner[owner_id].append(task_id)
+    for owner_id, task_ids in by_owner.items():
+        changelog.record(owner_id, 'task', task_ids)
+
+
+SEARCHED_MODELS = {Task: ('task', {'title', 'description', 'start_at', 'due_at'}), Transaction: ('transaction', {'memo', 'occurred_at'})}
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Transaction)
+@unless_muted
+def index_for_search(sender, instance, raw=False, update_fields=None, **kwargs):
+    model, fields = SEARCHED_MODELS[sender]
+    # 상태 토글처럼 검색에 쓰지 않는 필드만 저장했으면 색인을 건드리지 않는다.
+    if raw or (update_fields is not None and not fields & set(update_fields)):
+        return
+    search.index_instance(model, instance)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Transaction)
+@unless_muted
+def remove_from_search(sender, instance, origin=None, **kwargs):
+    # 사용자 삭제로 함께 지워지는 경우 검색 행도 CASCADE된다.
+    if not is_owner_cascade(origin):
+        search.remove(SEARCHED_MODELS[sender][0], [instance.pk])
@@ -0,0 +1,983 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time as time_module
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+
+from core import changelog, fanout, fastread, loadgen, optimizer, metrics, occurrences, perf, planner_cache, profiling, recurrence, search
+from core.api_urls import router
+from core.models import ChangeLogEntry, SearchDocument
+from finance import balances
+from finance.api import TransactionViewSet
+from finance.models import Account, BudgetAlert, BudgetItem, BudgetPeriod, Category, DailyLedgerRollup, RecurringTransaction, Transaction
+from finance.serializers import AccountSerializer, BudgetAlertSerializer, BudgetPeriodSerializer, TransactionSerializer
+from tasks.models import Tag, Task
+from tasks.serializers import TaskSerializer
+
+
+def local_dt(day, hour, minute=0, second=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute, second)))
+
+
+class PlannerRangeQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.day = date(2024, 3, 15)
+
+    def test_day_range_is_half_open_in_local_time(self):
+        inside = Task.objects.create(owner=self.u, title='late', start_at=local_dt(self.day, 23, 59, 59))
+        Task.objects.create(owner=self.u, title='next', start_at=local_dt(date(2024, 3, 16), 0))
+        Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, amount=Decimal('5'), occurred_at=local_dt(self.day, 0)
+        )
+        Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, amount=Decimal('7'), occurred_at=local_dt(date(2024, 3, 16), 0)
+        )
+
+        res = self.client.get('/planner/day/', {'date': '2024-03-15'})
+
+        self.assertEqual([t['id'] for t in res.context['tasks']], [inside.id])
+        self.assertEqual(res.context['daily_totals'], {'expense': Decimal('5')})
+
+
+class CalendarHeatmapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+
+    def test_counts_tasks_once_per_local_day_and_sums_spend(self):
+        day = date(2024, 3, 10)
+        # 같은 날 시작/마감 → 1건, 다음 날 마감 → 다음 날에도 1건
+        Task.objects.create(owner=self.u, title='same', start_at=local_dt(day, 9), due_at=local_dt(day, 10))
+        Task.objects.create(owner=self.u, title='span', start_at=local_dt(day, 23), due_at=local_dt(date(2024, 3, 11), 1))
+        Transaction.objects.create(owner=self.u, account=self.a, category=self.c, amount=Decimal('12.5'), occurred_at=local_dt(day, 8))
+
+        with self.assertNumQueries(4):  # session, user, heatmap, recurring task masters
+            res = self.client.get('/api/planner/calendar', {'month': '2024-03'})
+
+        days = {row['date']: row for row in res.json()['days']}
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days['2024-03-10'], {'date': '2024-03-10', 'task_count': 2, 'expense': '12.50', 'income': '0.00'})
+        self.assertEqual(days['2024-03-11']['task_count'], 1)
+        self.assertEqual(days['2024-03-12']['task_count'], 0)
+
+    def test_rejects_bad_month(self):
+        res = self.client.get('/api/planner/calendar', {'month': '2024-13'})
+        self.assertEqual(res.status_code, 400)
+
+    def test_dashboard_cells_use_heatmap(self):
+        Task.objects.create(owner=self.u, title='t', start_at=local_dt(date(2024, 3, 10), 9))
+        res = self.client.get('/planner/', {'date': '2024-03-10'})
+        cells = {cell['date']: cell for week in res.context['calendar_weeks'] for cell in week}
+        self.assertEqual(cells[date(2024, 3, 10)]['task_count'], 1)
+        self.assertEqual(cells[date(2024, 3, 9)]['task_count'], 0)
+
+
+class PlannerCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.day = date(2024, 3, 15)
+        self.task = Task.objects.create(owner=self.u, title='meet', start_at=local_dt(self.day, 9))
+
+    def get_day(self):
+        return self.client.get('/planner/day/', {'date': self.day.isoformat()})
+
+    def test_second_read_is_served_from_cache(self):
+        self.get_day()
+        with self.assertNumQueries(4):  # session, user, ETag 검증자 2개
+            res = self.get_day()
+        self.assertEqual(res.context['tasks'][0]['title'], 'meet')
+        self.assertEqual(planner_cache.stats()['hits'], 1)
+        self.assertEqual(planner_cache.stats()['misses'], 1)
+
+    def test_only_affected_dates_are_invalidated(self):
+        self.get_day()
+        Task.objects.create(owner=self.u, title='other day', start_at=local_dt(date(2024, 3, 20), 9))
+        self.get_day()
+        self.assertEqual(planner_cache.stats()['hits'], 1)
+
+        self.task.title = 'renamed'
+        self.task.save()
+        self.assertEqual(self.get_day().context['tasks'][0]['title'], 'renamed')
+
+        # 다른 날짜의 거래를 이 날짜의 일정에 연결하면 이 날짜도 다시 계산한다.
+        Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, task=self.task,
+            amount=Decimal('3'), occurred_at=local_dt(date(2024, 3, 20), 9),
+        )
+        res = self.get_day()
+        self.assertEqual(len(res.context['timed_tasks'][0]['transactions']), 1)
+
+    def test_category_change_invalidates_every_date(self):
+        self.get_day()
+        self.c.name = 'Meals'
+        self.c.save()
+        self.assertEqual(self.get_day().context['categories'], [{'id': self.c.id, 'name': 'Meals'}])
+
+
+class PlannerConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+
+    def test_dashboard_returns_304_until_data_changes(self):
+        etag = self.client.get('/planner/', {'date': '2024-03-15'})['ETag']
+        res = self.client.get('/planner/', {'date': '2024-03-15'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        Task.objects.create(owner=self.u, title='new')
+        res = self.client.get('/planner/', {'date': '2024-03-15'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+
+@override_settings(SYNC_CURSOR_SETTLE_SECONDS=0)
+class DeltaSyncTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+
+    def sync(self, cursor, **params):
+        return self.client.get('/api/sync/', {'since': cursor, **params}).json()
+
+    def test_returns_only_changes_since_cursor_with_tombstones(self):
+        kept = Task.objects.create(owner=self.u, title='kept')
+        gone = Task.objects.create(owner=self.u, title='gone')
+        cursor = self.client.get('/api/sync/').json()['cursor']
+
+        kept.title = 'edited'
+        kept.save()
+        gone_id = gone.id
+        gone.delete()
+        tx = Transaction.objects.create(owner=self.u, account=self.a, category=self.c, amount=Decimal('1'), occurred_at=timezone.now())
+        other = User.objects.create_user(username='u2', password='p')
+        Task.objects.create(owner=other, title='not mine')
+
+        body = self.sync(cursor)
+        self.assertFalse(body['reset'])
+        self.assertEqual([t['title'] for t in body['tasks']['updated']], ['edited'])
+        self.assertEqual(body['tasks']['deleted'], [gone_id])
+        self.assertEqual([t['id'] for t in body['transactions']['updated']], [tx.id])
+
+        # 새 커서 이후로는 변경이 없다.
+        empty = self.sync(body['cursor'])
+        self.assertEqual(empty['tasks'], {'updated': [], 'deleted': []})
+
+    def test_limit_pages_through_changes(self):
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        for i in range(3):
+            Task.objects.create(owner=self.u, title=f't{i}')
+        first = self.sync(cursor, limit=2)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['cursor'], limit=2)
+        self.assertFalse(second['has_more'])
+        titles = [t['title'] for page in (first, second) for t in page['tasks']['updated']]
+        self.assertEqual(titles, ['t0', 't1', 't2'])
+
+    def test_compaction_keeps_latest_row_per_object(self):
+        task = Task.objects.create(owner=self.u, title='t')
+        task.save()
+        task.save()
+        call_command('compact_change_log', stdout=StringIO())
+        self.assertEqual(ChangeLogEntry.objects.filter(model='task', object_id=task.id).count(), 1)
+
+    def test_expired_cursor_requires_reset(self):
+        stale = changelog.encode_cursor(0, timezone.now() - timedelta(days=365))
+        self.assertTrue(self.sync(stale)['reset'])
+
+    def test_cursor_waits_for_recent_rows_to_settle(self):
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        task = Task.objects.create(owner=self.u, title='late')
+        with override_settings(SYNC_CURSOR_SETTLE_SECONDS=60):
+            first = self.sync(cursor)
+            # 이 행보다 작은 id가 아직 커밋 전일 수 있으므로 커서는 넘어가지 않고 다음에 다시 읽는다.
+            self.assertEqual([t['id'] for t in first['tasks']['updated']], [task.id])
+            self.assertEqual(changelog.decode_cursor(first['cursor'])[0], changelog.decode_cursor(cursor)[0])
+            again = self.sync(first['cursor'])
+            self.assertEqual([t['id'] for t in again['tasks']['updated']], [task.id])
+            ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+            settled = self.sync(again['cursor'])
+        self.assertEqual(self.sync(settled['cursor'])['tasks'], {'updated': [], 'deleted': []})
+
+    def test_expiry_follows_the_oldest_unread_row(self):
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        for i in range(3):
+            Task.objects.create(owner=self.u, title=f't{i}')
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=29, hours=23))
+        page = self.sync(cursor, limit=1)
+        self.assertTrue(page['has_more'])
+        # 방금 받은 커서라도 그 뒤의 행이 보존 기간을 넘기면 압축으로 지워질 수 있다.
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=2)):
+            self.assertTrue(self.sync(page['cursor'])['reset'])
+
+
+class RecurrenceRuleTest(TestCase):
+    def test_parse_round_trip_and_validation(self):
+        rule = recurrence.parse('RRULE:freq=weekly;byday=WE,MO;interval=2')
+        self.assertEqual(str(rule), 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE')
+        for bad in ('FREQ=YEARLY', 'FREQ=DAILY;BYDAY=MO', 'FREQ=DAILY;COUNT=2;UNTIL=20240101', 'FREQ=MONTHLY;BYMONTHDAY=0'):
+            with self.assertRaises(recurrence.InvalidRule):
+                recurrence.parse(bad)
+
+    def test_window_expansion(self):
+        weekly = recurrence.parse('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE')
+        self.assertEqual(
+            list(recurrence.occurrences(weekly, date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 31))),
+            [date(2024, 1, 3), date(2024, 1, 15), date(2024, 1, 17), date(2024, 1, 29), date(2024, 1, 31)],
+        )
+        # 말일(-1)과 31일이 없는 달 건너뛰기
+        last_day = recurrence.parse('FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=3')
+        self.assertEqual(recurrence.last_occurrence(last_day, date(2024, 1, 31)), date(2024, 3, 31))
+        monthly = recurrence.parse('FREQ=MONTHLY')
+        self.assertEqual(
+            list(recurrence.occurrences(monthly, date(2024, 1, 31), date(2030, 1, 1), date(2030, 5, 31))),
+            [date(2030, 1, 31), date(2030, 3, 31), date(2030, 5, 31)],
+        )
+        daily = recurrence.parse('FREQ=DAILY;INTERVAL=3')
+        self.assertEqual(
+            list(recurrence.occurrences(daily, date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15), [date(2024, 1, 10)])),
+            [date(2024, 1, 13)],
+        )
+
+
+class RecurringPlannerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.start = date(2024, 3, 4)
+        self.master = Task.objects.create(
+            owner=self.u, title='standup', start_at=local_dt(self.start, 9), due_at=local_dt(self.start, 9, 30),
+            recurrence='FREQ=WEEKLY;BYDAY=MO,WE',
+        )
+
+    def get_day(self, day):
+        return self.client.get('/planner/day/', {'date': day.isoformat()})
+
+    def test_occurrences_are_expanded_for_the_viewed_day_only(self):
+        res = self.get_day(date(2024, 3, 13))
+        [row] = res.context['tasks']
+        self.assertIsNone(row['id'])
+        self.assertEqual((row['occurrence_of'], row['occurrence_date']), (self.master.id, date(2024, 3, 13)))
+        self.assertEqual(timezone.localtime(row['due_at']).time(), time(9, 30))
+        self.assertEqual(self.get_day(date(2024, 3, 12)).context['tasks'], [])
+        self.assertEqual(Task.objects.count(), 1)
+
+        # 규칙을 바꾸면 모든 날짜의 캐시가 무효화된다.
+        self.master.recurrence_exceptions = ['2024-03-13']
+        self.master.save()
+        self.assertEqual(self.get_day(date(2024, 3, 13)).context['tasks'], [])
+
+    def test_calendar_counts_virtual_occurrences(self):
+        res = self.client.get('/api/planner/calendar', {'month': '2024-03'})
+        counts = {row['date']: row['task_count'] for row in res.json()['days']}
+        self.assertEqual(counts['2024-03-04'], 1)  # 원본 행
+        self.assertEqual(counts['2024-03-06'], 1)
+        self.assertEqual(counts['2024-03-05'], 0)
+        self.assertEqual(sum(counts.values()), 8)
+
+    def test_materialize_is_bounded_and_idempotent(self):
+        until = date(2024, 3, 13)
+        self.assertEqual(occurrences.materialize_tasks(until), 3)  # 6, 11, 13일
+        self.assertEqual(occurrences.materialize_tasks(until), 0)
+        self.master.refresh_from_db()
+        self.assertEqual(self.master.materialized_until, until)
+
+        # 만들어진 발생은 실제 행으로만 보이고, 지우면 예외로 남아 되살아나지 않는다.
+        [row] = self.get_day(date(2024, 3, 11)).context['tasks']
+        self.assertIsNotNone(row['id'])
+        Task.objects.get(pk=row['id']).delete()
+        self.master.refresh_from_db()
+        self.assertEqual(self.master.recurrence_exceptions, ['2024-03-11'])
+        self.assertEqual(self.get_day(date(2024, 3, 11)).context['tasks'], [])
+        # 이후 날짜는 계속 가상으로 전개된다.
+        self.assertIsNone(self.get_day(date(2024, 3, 18)).context['tasks'][0]['id'])
+
+    def test_deleting_master_removes_occurrences(self):
+        occurrences.materialize_tasks(date(2024, 3, 13))
+        self.master.delete()
+        self.assertEqual(Task.objects.count(), 0)
+
+
+class PlannerRangeViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.sunday = date(2024, 3, 10)
+
+    def seed_week(self, per_day):
+        for offset in range(7):
+            day = self.sunday + timedelta(days=offset)
+            for i in range(per_day):
+                Task.objects.create(owner=self.u, title=f't{offset}-{i}', start_at=local_dt(day, 9 + i))
+                Transaction.objects.create(
+                    owner=self.u, account=self.a, category=self.c, amount=Decimal('1'), occurred_at=local_dt(day, 12)
+                )
+
+    def test_week_query_count_does_not_grow_with_days_or_rows(self):
+        self.seed_week(1)
+        self.client.get('/planner/week/', {'date': '2024-03-13'})
+        # session, user, ETag 검증자 2개, 일정, 반복 일정 원본, 거래, 반복 거래 템플릿
+        with self.assertNumQueries(8):
+            res = self.client.get('/planner/week/', {'date': '2024-03-13'})
+        self.assertEqual([day['date'] for day in res.context['days']][0], self.sunday)
+        self.assertEqual(res.context['range_totals'], {'expense': Decimal('7')})
+
+        self.seed_week(3)
+        with self.assertNumQueries(8):
+            res = self.client.get('/planner/week/', {'date': '2024-03-16'})
+        self.assertEqual(sum(len(day['tasks']) for day in res.context['days']), 28)
+        self.assertEqual([block['hour'] for block in res.context['days'][0]['hours']], [9, 10, 11, 12])
+
+    def test_agenda_api_buckets_by_local_day_and_hour(self):
+        Task.objects.create(
+            owner=self.u, title='overnight', start_at=local_dt(self.sunday, 23), due_at=local_dt(date(2024, 3, 11), 1)
+        )
+        Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, amount=Decimal('4.5'), occurred_at=local_dt(date(2024, 3, 11), 0, 30)
+        )
+        res = self.client.get('/api/planner/agenda', {'from': '2024-03-10', 'to': '2024-03-11'})
+        body = res.json()
+        self.assertEqual(body['totals'], {'expense': '4.50'})
+        sunday, monday = body['days']
+        self.assertEqual([(b['hour'], [t['title'] for t in b['tasks']]) for b in sunday['hours']], [(23, ['overnight'])])
+        self.assertEqual([b['hour'] for b in monday['hours']], [0, 1])
+        self.assertEqual(monday['hours'][0]['transactions'][0]['amount'], '4.50')
+
+        too_long = self.client.get('/api/planner/agenda', {'from': '2024-01-01', 'to': '2024-06-01'})
+        self.assertEqual(too_long.status_code, 400)
+        self.assertEqual(self.client.get('/api/planner/week', {'date': 'nope'}).status_code, 400)
+
+    def test_agenda_page_skips_empty_days(self):
+        Task.objects.create(owner=self.u, title='only', start_at=local_dt(date(2024, 3, 12), 9))
+        res = self.client.get('/planner/agenda/', {'from': '2024-03-10', 'to': '2024-03-16'})
+        self.assertEqual([day['date'] for day in res.context['days']], [date(2024, 3, 12)])
+        self.assertContains(res, 'only')
+
+
+class PerfBudgetTest(TestCase):
+    """ci 규모 데이터에서 모든 시나리오가 쿼리 예산 안에 드는지 확인한다(응답 시간은 perf_budget 명령에서)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.context = perf.seed('ci')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_router_endpoint_has_list_and_detail_scenarios(self):
+        names = {scenario.name for scenario in perf.SCENARIOS}
+        for _prefix, _viewset, basename in router.registry:
+            self.assertIn(f'api:{basename}-list', names)
+            self.assertIn(f'api:{basename}-detail', names)
+
+    def test_scenarios_stay_within_query_budgets(self):
+        results = perf.run(self.context, repeat=1)
+        self.assertEqual(perf.compare(results, None), [])
+
+    def test_latency_regression_is_reported(self):
+        baseline = {'scenarios': {'api:tag-list': {'queries': 1, 'p50_ms': 10.0, 'p95_ms': 20.0}}}
+        slower = {'api:tag-list': {'queries': 1, 'p50_ms': 20.0, 'p95_ms': 40.0}}
+        self.assertEqual(len(perf.compare(slower, baseline)), 1)
+        self.assertEqual(perf.compare(slower, baseline, threshold=1.0), [])
+        # p95만 튄 경우는 회귀로 보지 않는다.
+        spike = {'api:tag-list': {'queries': 1, 'p50_ms': 10.0, 'p95_ms': 40.0}}
+        self.assertEqual(perf.compare(spike, baseline), [])
+
+
+class FanoutTest(TransactionTestCase):
+    """TestCase는 트랜잭션 안이라 팬아웃이 차례로 실행되므로 커밋되는 TransactionTestCase에서 확인한다."""
+
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.day = date(2024, 3, 15)
+        Task.objects.create(owner=self.u, title='meet', start_at=local_dt(self.day, 9))
+        Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, amount=Decimal('5'), occurred_at=local_dt(self.day, 12),
+        )
+
+    def test_independent_queries_share_one_round_trip(self):
+        def slow_count():
+            time_module.sleep(0.05)  # 다른 갈래가 워커에서 시작할 시간을 준다.
+            return threading.get_ident(), Task.objects.count()
+
+        with fanout.track_round_trips() as tracked:
+            rows = fanout.gather(
+                first=slow_count,
+                second=lambda: (threading.get_ident(), Account.objects.count()),
+                third=lambda: (threading.get_ident(), Category.objects.count()),
+            )
+        self.assertEqual([count for _thread, count in rows.values()], [1, 1, 1])
+        self.assertEqual(rows['first'][0], threading.get_ident())
+        self.assertNotEqual(rows['second'][0], threading.get_ident())
+        self.assertEqual((tracked.queries, tracked.round_trips), (3, 1))
+
+    def test_runs_serially_inside_a_transaction_or_when_disabled(self):
+        with transaction.atomic():
+            rows = fanout.gather(a=threading.get_ident, b=threading.get_ident)
+        self.assertEqual(set(rows.values()), {threading.get_ident()})
+        with override_settings(FANOUT_WORKERS=0):
+            rows = fanout.gather(a=threading.get_ident, b=threading.get_ident)
+        self.assertEqual(set(rows.values()), {threading.get_ident()})
+
+    def test_first_error_is_raised_after_every_call_finishes(self):
+        finished = []
+
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaisesMessage(ValueError, 'boom'):
+            fanout.gather(a=fail, b=lambda: finished.append(Task.objects.count()))
+        self.assertEqual(finished, [1])
+
+    def test_worker_checks_its_connection_before_each_call(self):
+        checked = []
+        original = BaseDatabaseWrapper.close_if_unusable_or_obsolete
+
+        def record(connection):
+            checked.append(threading.get_ident())
+            return original(connection)
+
+        def slow():
+            time_module.sleep(0.05)  # 다른 갈래가 워커에서 시작할 시간을 준다.
+            return threading.get_ident()
+
+        with mock.patch.object(BaseDatabaseWrapper, 'close_if_unusable_or_obsolete', record):
+            with override_settings(FANOUT_WORKERS=1):
+                fanout.gather(a=slow, b=Task.objects.count)  # 워커 연결을 연다.
+                rows = fanout.gather(a=slow, b=lambda: (threading.get_ident(), Task.objects.count()))
+        worker = rows['b'][0]
+        self.assertNotEqual(worker, threading.get_ident())
+        self.assertIn(worker, checked)
+
+    def test_dashboard_matches_serial_result_with_fewer_round_trips(self):
+        self.client.force_login(self.u)
+        keys = ('tasks', 'transactions', 'daily_totals', 'accounts', 'categories', 'monthly_totals', 'calendar_weeks')
+
+        def dashboard():
+            cache.clear()
+            with fanout.track_round_trips() as tracked:
+                res = self.client.get('/planner/', {'date': self.day.isoformat()})
+            return {key: res.context[key] for key in keys}, tracked
+
+        with override_settings(FANOUT_WORKERS=0):
+            serial, serial_tracked = dashboard()
+        fanned, fanned_tracked = dashboard()
+        self.assertEqual(fanned, serial)
+        self.assertEqual(serial_tracked.round_trips, serial_tracked.queries)
+        self.assertEqual(fanned_tracked.queries, serial_tracked.queries)
+        self.assertLess(fanned_tracked.round_trips, serial_tracked.round_trips)
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.other = User.objects.create_user(username='u2', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.day = date(2024, 3, 15)
+
+    def find(self, q, **params):
+        res = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [(row['type'], row['id']) for row in res.json()['results']]
+
+    def test_terms_split_hangul_into_bigrams(self):
+        self.assertEqual(search.terms('아이스커피숍 Coffee_Bean 3월'), '아이 이스 스커 커피 피숍 coffee bean 3 월')
+
+    def test_hangul_infix_prefix_and_ranking(self):
+        titled = Task.objects.create(owner=self.u, title='팀 회의록 정리', start_at=local_dt(self.day, 9))
+        described = Task.objects.create(owner=self.u, title='정리', description='지난 회의 메모', start_at=local_dt(self.day, 10))
+        tx = Transaction.objects.create(
+            owner=self.u, account=self.a, category=self.c, amount=Decimal('4500'),
+            memo='스타벅스 아이스커피', occurred_at=local_dt(self.day, 12),
+        )
+        Task.objects.create(owner=self.other, title='회의', start_at=local_dt(self.day, 9))
+
+        # 제목에서 찾은 일정이 설명에서 찾은 일정보다 앞선다. 다른 사용자의 일정은 보이지 않는다.
+        self.assertEqual(self.find('회의'), [('task', titled.id), ('task', described.id)])
+        self.assertEqual(self.find('커피'), [('transaction', tx.id)])
+        self.assertEqual(self.find('스타'), [('transaction', tx.id)])
+        self.assertEqual(self.find('회의 메모'), [('task', described.id)])
+        self.assertEqual(self.find('회의', type='transaction'), [])
+        self.assertEqual(self.find('커피숍'), [])
+
+    def test_index_follows_updates_deletes_and_bulk_writes(self):
+        task = Task.objects.create(owner=self.u, title='dentist appointment')
+        self.assertEqual(self.find('dent'), [('task', task.id)])
+        task.title = 'haircut'
+        task.save()
+        self.assertEqual(self.find('dent'), [])
+        with CaptureQueriesContext(connection) as captured:
+            task.status = 'done'
+            task.save(update_fields=['status'])
+        self.assertFalse([query for query in captured if 'core_searchdocument' in query['sql']])
+        task.delete()
+        self.assertEqual(self.find('haircut'), [])
+
+        res = self.client.post(
+            '/api/tasks/bulk/', {'items': [{'title': '장보기'}, {'title': '청소'}]}, content_type='application/json',
+        )
+        first, second = res.json()['created']
+        self.assertEqual(self.find('장보기'), [('task', first)])
+        self.client.delete('/api/tasks/bulk/', {'ids': [first]}, content_type='application/json')
+        self.assertEqual(self.find('장보기'), [])
+        self.assertEqual(self.find('청소'), [('task', second)])
+
+    def test_rebuild_restores_missing_documents(self):
+        task = Task.objects.create(owner=self.u, title='weekly review')
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.find('review'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.find('review'), [('task', task.id)])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': ' !? '}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'tag'}).status_code, 400)
+        self.client.logout()
+        self.assertIn(self.client.get('/api/search/', {'q': 'x'}).status_code, (401, 403))
+
+
+class LoadGeneratorTest(TestCase):
+    spec = loadgen.LoadSpec(users=2, accounts=2, categories=4, tasks=40, transactions=300, tags=5, days=30,
+                            budget_months=2, end=date(2024, 3, 31), chunk_size=64, prefix='lg_a_')
+
+    def _ledger(self, owner_id):
+        return list(
+            Transaction.objects.filter(owner_id=owner_id).order_by('pk')
+            .values_list('account__name', 'category__name', 'amount', 'memo', 'occurred_at', 'task__title')
+        )
+
+    def test_generates_requested_volumes_with_consistent_derived_data(self):
+        owner_ids = loadgen.generate(self.spec)
+
+        self.assertEqual(len(owner_ids), 2)
+        self.assertEqual(Transaction.objects.filter(owner_id__in=owner_ids).count(), 600)
+        self.assertEqual(Task.objects.filter(owner_id__in=owner_ids).count(), 80)
+        self.assertTrue(Transaction.objects.filter(owner_id=owner_ids[0], task__isnull=False).exists())
+        self.assertTrue(Task.tags.through.objects.filter(task__owner_id=owner_ids[0]).exists())
+        self.assertEqual(BudgetPeriod.objects.filter(owner_id=owner_ids[0]).count(), 2)
+        self.assertEqual(balances.verify(owner_ids), [])
+        rollup_total = DailyLedgerRollup.objects.filter(owner_id=owner_ids[0]).aggregate(n=Sum('count'))['n']
+        self.assertEqual(rollup_total, 300)
+
+    def test_same_seed_generates_same_rows_regardless_of_chunk_size(self):
+        first = loadgen.generate(replace(self.spec, users=1))
+        second = loadgen.generate(replace(self.spec, users=1, prefix='lg_b_', chunk_size=1000))
+
+        self.assertEqual(self._ledger(first[0]), self._ledger(second[0]))
+
+    def test_continues_numbering_and_reset_removes_generated_users(self):
+        loadgen.generate(replace(self.spec, users=1, transactions=10))
+        loadgen.generate(replace(self.spec, users=1, transactions=10))
+        self.assertEqual(
+            set(User.objects.filter(username__startswith='lg_a_').values_list('username', flat=True)),
+            {'lg_a_0', 'lg_a_1'},
+        )
+
+        self.assertEqual(loadgen.delete('lg_a_'), 2)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log = Path(self.tmp.name) / 'profile.jsonl'
+        overrides = self.settings(PROFILING_LOG=self.log, PROFILING_TOKEN='secret', PROFILING_SAMPLE_RATE=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        for hour in range(3):
+            Transaction.objects.create(owner=self.u, account=a, category=c, amount=Decimal('5'),
+                                       occurred_at=local_dt(date(2024, 3, 15), 9 + hour))
+
+    def test_unprofiled_requests_have_no_timing(self):
+        self.assertNotIn('Server-Timing', self.client.get('/planner/'))
+        self.assertNotIn('Server-Timing', self.client.get('/planner/', HTTP_X_PROFILE='wrong'))
+        self.assertFalse(self.log.exists())
+
+    def test_header_records_server_timing_and_log_line(self):
+        res = self.client.get('/planner/', {'date': '2024-03-15'}, HTTP_X_PROFILE='secret')
+
+        self.assertRegex(res['Server-Timing'], r'total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=')
+        record = profiling.read_log(self.log)[-1]
+        self.assertEqual(record['view'], 'planner_dashboard')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertIsNotNone(record['alloc_kb'])
+
+    async def test_asgi_requests_are_profiled(self):
+        await self.async_client.aforce_login(self.u)
+        res = await self.async_client.get('/api/async/planner/day', {'date': '2024-03-15'}, headers={'X-Profile': 'secret'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertRegex(res['Server-Timing'], r'total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        record = (await sync_to_async(profiling.read_log)(self.log))[-1]
+        self.assertEqual(record['path'], '/api/async/planner/day')
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(FAST_READ_SERIALIZERS=False)
+    def test_repeated_queries_are_fingerprinted_and_reported(self):
+        # owner를 조인하지 않고 행마다 owner.username을 읽던 예전 직렬화기로 N+1을 만든다.
+        class UsernameSerializer(TransactionSerializer):
+            owner = serializers.ReadOnlyField(source='owner.username')
+
+        with mock.patch.object(TransactionViewSet, 'serializer_class', UsernameSerializer), \
+                mock.patch.object(TransactionViewSet, 'optimized_actions', ()):
+            self.client.get('/api/finance/transactions/', HTTP_X_PROFILE='secret')
+
+        record = profiling.read_log(self.log)[-1]
+        # 행마다 owner.username을 읽는 N+1이 하나의 패턴으로 묶인다.
+        self.assertTrue(any(item['count'] >= 3 and 'auth_user' in item['sql'] for item in record['duplicates']))
+        out = StringIO()
+        call_command('profile_report', log=str(self.log), stdout=out)
+        self.assertIn('transaction-list', out.getvalue())
+        self.assertIn('auth_user', out.getvalue())
+
+    def test_fingerprint_ignores_literal_values(self):
+        self.assertEqual(
+            profiling.fingerprint('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            profiling.fingerprint('SELECT * FROM t WHERE id IN (%s)  LIMIT 5'),
+        )
+
+
+def _increment_in_child(directory, amount):
+    from django.test import override_settings
+
+    with override_settings(METRICS_DIR=directory):
+        for _ in range(amount):
+            metrics.inc('tasks_created_total')
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        overrides = self.settings(METRICS_DIR=self.tmp.name, METRICS_TOKEN='')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+
+    def test_exposes_request_histograms_cache_ratio_and_created_counters(self):
+        self.client.get('/planner/', {'date': '2024-03-15'})
+        self.client.get('/planner/', {'date': '2024-03-15'})
+        self.client.post('/api/tasks/', {'title': 'one'}, content_type='application/json')
+        self.client.post('/api/tasks/bulk/', {'items': [{'title': 'a'}, {'title': 'b'}]}, content_type='application/json')
+
+        res = self.client.get('/metrics')
+        body = res.content.decode()
+        self.assertTrue(res['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('http_requests_total{method="GET",status="200",view="planner_dashboard"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="planner_dashboard",le="+Inf"} 2', body)
+        self.assertIn('http_request_db_queries_count{view="planner_dashboard"} 2', body)
+        self.assertIn('cache_requests_total{cache="planner",result="hit"} 1', body)
+        self.assertIn('cache_hit_ratio{cache="planner"} 0.5', body)
+        self.assertIn('tasks_created_total 3', body)
+
+    def test_values_from_worker_processes_are_summed(self):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_increment_in_child, args=(self.tmp.name, 5)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        metrics.inc('tasks_created_total')
+
+        self.assertEqual(len(list(Path(self.tmp.name).glob('*.db'))), 4)
+        self.assertEqual(metrics.collect()[metrics._key('tasks_created_total', None)], 16)
+
+    def test_files_of_exited_workers_are_folded_into_the_archive(self):
+        context = multiprocessing.get_context('fork')
+        for amount in (2, 3):
+            worker = context.Process(target=_increment_in_child, args=(self.tmp.name, amount))
+            worker.start()
+            worker.join()
+        metrics.inc('tasks_created_total')
+        key = metrics._key('tasks_created_total', None)
+
+        self.assertEqual(metrics.collect()[key], 6)
+        self.assertEqual(sorted(path.name for path in Path(self.tmp.name).glob('*.db')), [f'{os.getpid()}.db', 'archive.db'])
+        worker = context.Process(target=_increment_in_child, args=(self.tmp.name, 4))
+        worker.start()
+        worker.join()
+        self.assertEqual(metrics.collect()[key], 10)
+        self.assertEqual(metrics.collect()[key], 10)
+
+    def test_token_is_required_when_configured(self):
+        with self.settings(METRICS_TOKEN='scrape'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+
+
+class AsyncApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.day = timezone.localdate()
+        task = Task.objects.create(owner=self.u, title='lunch', start_at=local_dt(self.day, 12), due_at=local_dt(self.day, 13))
+        for hour, linked in ((9, None), (12, task), (18, None)):
+            Transaction.objects.create(
+                owner=self.u, account=a, category=c, amount=Decimal('1000'), occurred_at=local_dt(self.day, hour), task=linked
+            )
+        Task.objects.create(owner=self.u, title='someday')
+
+    async def _pair(self, sync_path, async_path, **params):
+        await self.async_client.aforce_login(self.u)
+        expected = await sync_to_async(self.client.get)(sync_path, params, HTTP_ACCEPT='application/json')
+        actual = await self.async_client.get(async_path, params)
+        return expected, actual
+
+    async def test_async_endpoints_return_the_same_json_as_sync_ones(self):
+        cases = [
+            ('/api/planner/day', '/api/async/planner/day', {'date': self.day.isoformat()}),
+            ('/api/planner/calendar', '/api/async/planner/calendar', {'month': self.day.strftime('%Y-%m')}),
+            ('/api/tasks/upcoming/', '/api/async/tasks/upcoming/', {}),
+            ('/api/finance/transactions/', '/api/async/finance/transactions/', {'ordering': 'amount'}),
+        ]
+        for sync_path, async_path, params in cases:
+            with self.subTest(async_path):
+                expected, actual = await self._pair(sync_path, async_path, **params)
+                self.assertEqual(actual.status_code, 200)
+                self.assertEqual(actual['Content-Type'], 'application/json')
+                self.assertEqual(actual.content, expected.content)
+
+    async def test_transaction_cursor_pages_match(self):
+        expected, actual = await self._pair('/api/finance/transactions/', '/api/async/finance/transactions/', page_size=2)
+        self.assertEqual(actual.json()['results'], expected.json()['results'])
+        cursor = actual.json()['next'].split('cursor=')[1].split('&')[0]
+        expected, actual = await self._pair(
+            '/api/finance/transactions/', '/api/async/finance/transactions/', page_size=2, cursor=cursor
+        )
+        self.assertEqual(len(actual.json()['results']), 1)
+        self.assertEqual(actual.json(), expected.json())
+
+    async def test_invalid_parameters_and_anonymous_requests_use_drf_errors(self):
+        expected, actual = await self._pair('/api/planner/calendar', '/api/async/planner/calendar', month='2024-13')
+        self.assertEqual((actual.status_code, actual.content), (400, expected.content))
+
+        await self.async_client.alogout()
+        res = await self.async_client.get('/api/async/tasks/upcoming/')
+        self.assertEqual(res.status_code, 401)
+        self.assertIn('Bearer', res['WWW-Authenticate'])
+
+    async def test_unchanged_lists_return_304(self):
+        await self.async_client.aforce_login(self.u)
+        first = await self.async_client.get('/api/async/tasks/upcoming/')
+        again = await self.async_client.get('/api/async/tasks/upcoming/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        await Task.objects.acreate(owner=self.u, title='new')
+        changed = await self.async_client.get('/api/async/tasks/upcoming/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(changed.status_code, 200)
+
+
+class FastReadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        other = User.objects.create_user(username='u2', password='p')
+        self.client.force_login(self.u)
+        a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        food = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        pay = Category.objects.create(owner=self.u, name='Pay', kind='income')
+        tags = [Tag.objects.create(name=name, color=color) for name, color in (('b', '#111111'), ('a', '#222222'), ('c', '#333333'))]
+        day = date(2024, 3, 15)
+        self.task = Task.objects.create(
+            owner=self.u, title='회의 "준비"', description='줄\n바꿈', priority=3, status='in_progress',
+            start_at=local_dt(day, 9, 30), due_at=local_dt(day, 10), recurrence='FREQ=WEEKLY;BYDAY=FR',
+            recurrence_exceptions=['2024-03-22'],
+        )
+        self.task.tags.set([tags[2], tags[0], tags[1]])
+        Task.objects.create(owner=self.u, title='someday', is_all_day=True).tags.set([tags[1]])
+        for index in range(5):
+            Task.objects.create(owner=self.u, title=f'task {index}', due_at=local_dt(day + timedelta(days=index), 8))
+        Task.objects.create(owner=other, title='other')
+        for index, (category, amount, linked) in enumerate([
+            (food, Decimal('4500'), self.task), (food, Decimal('12.5'), None), (pay, Decimal('3000000.00'), None),
+            (food, Decimal('0.01'), None), (food, Decimal('4500'), None),
+        ]):
+            self.tx = Transaction.objects.create(
+                owner=self.u, account=a, category=category, amount=amount, memo=f'메모 {index}',
+                occurred_at=local_dt(day, 8 + index, 0, 123 % (index + 1)), task=linked,
+            )
+
+    def both(self, path, params=None):
+        responses = []
+        for enabled in (False, True):
+            cache.clear()
+            with override_settings(FAST_READ_SERIALIZERS=enabled):
+                responses.append(self.client.get(path, params or {}, HTTP_ACCEPT='application/json'))
+        return responses
+
+    def test_rows_render_byte_identical_json(self):
+        cases = [
+            ('/api/tasks/', {}),
+            ('/api/tasks/', {'ordering': 'due_at', 'page_size': 3}),
+            ('/api/tasks/', {'ordering': '-priority', 'status': 'in_progress'}),
+            ('/api/tasks/', {'search': '회의'}),
+            ('/api/tasks/upcoming/', {}),
+            (f'/api/tasks/{self.task.id}/', {}),
+            ('/api/finance/transactions/', {}),
+            ('/api/finance/transactions/', {'ordering': 'amount', 'page_size': 2}),
+            ('/api/finance/transactions/', {'category__kind': 'expense', 'task': self.task.id}),
+            (f'/api/finance/transactions/{self.tx.id}/', {}),
+        ]
+        for path, params in cases:
+            with self.subTest(path=path, params=params):
+                expected, actual = self.both(path, params)
+                self.assertEqual(expected.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+
+    def test_cursor_pages_and_missing_objects_match(self):
+        expected, actual = self.both('/api/tasks/', {'ordering': 'due_at', 'page_size': 3})
+        cursor = actual.json()['next'].split('cursor=')[1].split('&')[0]
+        expected, actual = self.both('/api/tasks/', {'ordering': 'due_at', 'page_size': 3, 'cursor': cursor})
+        self.assertEqual(actual.content, expected.content)
+
+        other_task = Task.objects.get(title='other')
+        for path in (f'/api/tasks/{other_task.id}/', '/api/tasks/abc/', '/api/finance/transactions/999999/'):
+            expected, actual = self.both(path)
+            self.assertEqual((actual.status_code, actual.content), (404, expected.content))
+
+    def test_tags_are_read_in_one_query_for_the_page(self):
+        with override_settings(FAST_READ_SERIALIZERS=True), CaptureQueriesContext(connection) as captured:
+            data = self.client.get('/api/tasks/', {'page_size': 50}).json()['results']
+        self.assertEqual(len([query for query in captured if 'tasks_task_tags' in query['sql']]), 1)
+        self.assertEqual([tag['name'] for tag in next(row for row in data if row['id'] == self.task.id)['tags']], ['b', 'a', 'c'])
+
+    def test_unsupported_fields_are_rejected(self):
+        class Computed(TaskSerializer):
+            title_length = serializers.SerializerMethodField()
+
+            class Meta(TaskSerializer.Meta):
+                fields = ['id', 'title_length']
+
+            def get_title_length(self, obj):
+                return len(obj.title)
+
+        with self.assertRaises(ImproperlyConfigured):
+            fastread.RowSerializer(Computed)
+
+
+class QueryOptimizerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.rows = 0
+
+    def add_rows(self, count):
+        """라우터의 모든 목록에 행을 count개씩 더한다."""
+        for index in range(self.rows, self.rows + count):
+            day = date(2024, 1, 1) + timedelta(days=index)
+            task = Task.objects.create(owner=self.u, title=f't{index}', due_at=local_dt(day, 9))
+            task.tags.set([Tag.objects.create(name=f'tag{index}-{n}') for n in range(2)])
+            account = Account.objects.create(owner=self.u, name=f'a{index}', type='cash')
+            category = Category.objects.create(owner=self.u, name=f'c{index}', kind='expense')
+            Transaction.objects.create(
+                owner=self.u, account=account, category=category, task=task, amount=Decimal('5'), occurred_at=local_dt(day, 12),
+            )
+            RecurringTransaction.objects.create(
+                owner=self.u, account=account, category=category, amount=Decimal('5'), starts_at=local_dt(day, 12),
+                recurrence='FREQ=MONTHLY',
+            )
+            period = BudgetPeriod.objects.create(owner=self.u, start_date=day, end_date=day + timedelta(days=30))
+            item = BudgetItem.objects.create(period=period, category=category, limit_amount=Decimal('100'))
+            BudgetAlert.objects.create(owner=self.u, item=item, threshold=80, spent=Decimal('90'))
+        self.rows += count
+
+    def list_queries(self):
+        counts = {}
+        for prefix, _viewset, basename in router.registry:
+            for enabled in (False, True):
+                cache.clear()
+                with override_settings(FAST_READ_SERIALIZERS=enabled), CaptureQueriesContext(connection) as captured:
+                    res = self.client.get(f'/api/{prefix}/', {'page_size': 50})
+                self.assertEqual(res.status_code, 200)
+                counts[basename, enabled] = len(captured)
+        return counts
+
+    def test_router_list_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        few = self.list_queries()
+        self.add_rows(10)
+        self.assertEqual(self.list_queries(), few)
+
+    def test_owner_username_comes_from_the_request_user(self):
+        self.add_rows(3)
+        other = User.objects.create_user(username='u2', password='p')
+        account = Account.objects.create(owner=other, name='theirs', type='cash')
+        objects = list(optimizer.optimize(Account.objects.order_by('id'), AccountSerializer))
+        context = {'request': SimpleNamespace(user=self.u)}
+        # 요청 사용자의 행은 쿼리 없이, 다른 사용자 이름은 한 번만 읽는다.
+        with self.assertNumQueries(1):
+            data = AccountSerializer(objects, many=True, context=context).data
+        self.assertEqual([row['owner'] for row in data], ['u1'] * 3 + ['u2'])
+        self.assertEqual(data[-1]['id'], account.id)
+
+    def test_querysets_follow_serializer_fields(self):
+        self.add_rows(1)
+        alerts = optimizer.optimize(BudgetAlert.objects.all(), BudgetAlertSerializer)
+        self.assertEqual(alerts.query.select_related, {'item': {'category': {}}})
+        with self.assertNumQueries(1):
+            self.assertEqual(BudgetAlertSerializer(alerts, many=True).data[0]['category'], 'c0')
+
+        with CaptureQueriesContext(connection) as captured:
+            list(optimizer.optimize(Transaction.objects.all(), TransactionSerializer))
+        # pk 관계와 owner는 조인하지 않고, 직렬화기가 읽지 않는 열은 가져오지 않는다.
+        self.assertNotIn('JOIN', captured[0]['sql'])
+        self.assertNotIn('import_hash', captured[0]['sql'])
+
+        periods = optimizer.optimize(BudgetPeriod.objects.all(), BudgetPeriodSerializer)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(BudgetPeriodSerializer(periods, many=True).data[0]['items']), 1)
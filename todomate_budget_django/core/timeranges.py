@@ -0,0 +1,50 @@
+"""Helpers that turn local (Asia/Seoul) calendar dates into UTC datetime ranges.
+
+`start_at__date=` 같은 조회는 컬럼을 시간대 변환 함수로 감싸기 때문에 인덱스를 쓸 수 없다.
+대신 지역 날짜의 경계를 미리 aware datetime으로 계산해 `gte`/`lt` 반열린 구간으로 조회한다.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def local_midnight(day: date) -> datetime:
+    """지역 시간대 기준 자정을 aware datetime으로 돌려준다."""
+
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def local_range_bounds(first_day: date, last_day: date) -> tuple[datetime, datetime]:
+    """[first_day 00:00, last_day 다음날 00:00) 반열린 구간을 계산한다."""
+
+    return local_midnight(first_day), local_midnight(last_day + timedelta(days=1))
+
+
+def local_day_bounds(day: date) -> tuple[datetime, datetime]:
+    """하루를 덮는 반열린 구간."""
+
+    return local_range_bounds(day, day)
+
+
+def month_date_range(day: date) -> tuple[date, date]:
+    """day가 속한 달의 첫날과 마지막 날."""
+
+    last = calendar.monthrange(day.year, day.month)[1]
+    return day.replace(day=1), day.replace(day=last)
+
+
+def local_month_bounds(day: date) -> tuple[datetime, datetime]:
+    """day가 속한 달 전체를 덮는 반열린 구간."""
+
+    return local_range_bounds(*month_date_range(day))
+
+
+def within(field: str, bounds: tuple[datetime, datetime]) -> dict[str, datetime]:
+    """`field`가 구간 안에 들어오는지 검사하는 sargable 필터 kwargs를 만든다."""
+
+    start, end = bounds
+    return {f'{field}__gte': start, f'{field}__lt': end}
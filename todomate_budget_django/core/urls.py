@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
-from core.views import home_redirect, planner_dashboard, planner_day_detail, toggle_todo_status
+from core.views import home_redirect, planner_agenda, planner_dashboard, planner_day_detail, planner_week, toggle_todo_status
+from core.metrics import metrics_view
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
@@ -9,8 +10,13 @@ urlpatterns = [
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('core.api_urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', home_redirect, name='home'),
+    path('tasks/', include('tasks.urls')),
+    path('finance/', include('finance.urls')),
     path('planner/', planner_dashboard, name='planner_dashboard'),
     path('planner/day/', planner_day_detail, name='planner_day_detail'),
+    path('planner/week/', planner_week, name='planner_week'),
+    path('planner/agenda/', planner_agenda, name='planner_agenda'),
     path('planner/todos/<int:task_id>/status/', toggle_todo_status, name='planner_toggle_todo'),
 ]
@@ -3,15 +3,22 @@
 from __future__ import annotations
 
 import calendar
-from datetime import date, datetime, time, timedelta
+from datetime import datetime, time, timedelta
 
-from django.db.models import Q, Sum
+from django.db.models import Q, Value
 from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.views.decorators.http import condition, require_POST
 from django.contrib.auth.decorators import login_required
 
+from core import agenda, fanout, occurrences, planner_cache
+from core.agenda import task_row, transaction_row
+from core.conditional import combine_validators, ledger_validators, make_etag, task_validators
+from core.calendar_summary import day_summaries
+from core.timeranges import local_day_bounds, month_date_range, within
+from finance import budgets, rollups
 from finance.models import Account, Category, Transaction
 from tasks.models import Task
 
@@ -172,28 +179,10 @@ def _build_calendar_data(selected_date, user):
     cal = calendar.Calendar(firstweekday=6)  # 6=일요일을 주의 시작으로 지정한다.
     today = timezone.localdate()
 
-    month_range_end_day = calendar.monthrange(selected_date.year, selected_date.month)[1]
-    month_start = first_of_month
-    month_end = first_of_month.replace(day=month_range_end_day)
-
-    monthly_tasks = (
-        Task.objects.filter(owner=user)
-        .filter(
-            Q(start_at__date__range=(month_start, month_end))
-            | Q(due_at__date__range=(month_start, month_end))
-        )
-        .only('id', 'start_at', 'due_at')
-    )
-
-    tasks_by_day: dict[date, set[int]] = {}
-    for task in monthly_tasks:
-        # 시작일과 마감일이 같은 날짜일 수 있으므로 집합으로 관리한다.
-        for dt_field in (task.start_at, task.due_at):
-            if not dt_field:
-                continue
-            localized_date = timezone.localtime(dt_field).date()
-            if month_start <= localized_date <= month_end:
-                tasks_by_day.setdefault(localized_date, set()).add(task.id)
+    month_start, month_end = month_date_range(selected_date)
+    # 날짜별 일정 수와 수입/지출 합계를 DB에서 한 번에 그룹 집계해 가져온다.
+    summaries = day_summaries(user, month_start, month_end)
+    empty_summary = {'task_count': 0, 'expense': 0, 'income': 0}
 
     calendar_weeks = []
     for week in cal.monthdatescalendar(selected_date.year, selected_date.month):
@@ -205,7 +194,7 @@ def _build_calendar_data(selected_date, user):
                     'in_month': day.month == selected_date.month,
                     'is_today': day == today,
                     'is_selected': day == selected_date,
-                    'task_count': len(tasks_by_day.get(day, set())),
+                    **summaries.get(day, empty_summary),
                 }
             )
         calendar_weeks.append(week_cells)
@@ -218,32 +207,63 @@ def _build_calendar_data(selected_date, user):
     }
 
 
-def _build_planner_context(request, selected_date, form_errors, include_calendar=True):
-    """대시보드와 상세 페이지에 공통으로 전달할 컨텍스트를 생성한다."""
+def day_queries(user, selected_date):
+    """하루 타임라인에 필요한 서로 독립적인 쿼리셋들(아직 평가하지 않은 상태).
 
-    # 일정과 거래를 조회할 범위를 하루 단위로 계산한다.
-    day_start = _combine_with_date(selected_date, "00:00", time.min)
-    day_end = _combine_with_date(selected_date, "23:59", time.max)
+    동기 경로(build_day_payload)와 비동기 경로(core.async_api)가 같은 쿼리를 쓰도록 한곳에서 만든다.
+    """
 
-    # 일정은 시작일 또는 마감일이 해당 날짜에 걸쳐 있는 것만 모은다.
-    tasks = (
-        Task.objects.filter(owner=request.user)
-        .filter(
-            Q(start_at__date=selected_date)
-            | Q(due_at__date=selected_date)
-        )
-        .prefetch_related('linked_transactions__category', 'linked_transactions__account')
-        .order_by('start_at', 'due_at', 'title')
-    )
+    # 일정과 거래를 조회할 범위를 하루 단위 반열린 구간 [00:00, 다음날 00:00)으로 계산한다.
+    day_bounds = local_day_bounds(selected_date)
+    return {
+        # 일정은 시작일 또는 마감일이 해당 날짜에 걸쳐 있는 것만 모은다.
+        'tasks': (
+            Task.objects.filter(owner=user)
+            .filter(Q(**within('start_at', day_bounds)) | Q(**within('due_at', day_bounds)))
+            .prefetch_related('linked_transactions__category', 'linked_transactions__account')
+            .order_by('start_at', 'due_at', 'title')
+        ),
+        # 선택한 날짜에 발생한 모든 거래를 가져온다.
+        'transactions': (
+            Transaction.objects.filter(owner=user, **within('occurred_at', day_bounds))
+            .select_related('account', 'category')
+            .order_by('occurred_at')
+        ),
+        # 입력 폼 선택지(계좌, 지출 카테고리)는 UNION ALL 한 번으로 가져와 split_references로 나눈다.
+        'references': (
+            Account.objects.filter(owner=user).annotate(ref=Value('account')).values('ref', 'id', 'name')
+            .union(
+                Category.objects.filter(owner=user, kind='expense').annotate(ref=Value('category'))
+                .values('ref', 'id', 'name'),
+                all=True,
+            )
+        ),
+    }
 
-    # 선택한 날짜에 발생한 모든 거래를 가져온다.
-    transactions = (
-        Transaction.objects.filter(owner=request.user, occurred_at__range=(day_start, day_end))
-        .select_related('account', 'category', 'task')
-        .order_by('occurred_at')
-    )
+
+def split_references(rows):
+    """day_queries()['references'] 행을 (accounts, categories)로 나눈다. 각각 id 순."""
+
+    accounts, categories = [], []
+    for row in sorted(rows, key=lambda row: row['id']):
+        (accounts if row['ref'] == 'account' else categories).append({'id': row['id'], 'name': row['name']})
+    return accounts, categories
+
+
+def assemble_day_payload(selected_date, *, tasks, virtual_tasks, transactions, projected_transactions,
+                         daily_totals, accounts, categories):
+    """쿼리 결과로 하루 타임라인 페이로드를 만든다. DB에 접근하지 않는다."""
+
+    # 반복 일정은 원본 규칙에서 이 날짜의 발생만 계산해 끼워 넣는다.
+    if virtual_tasks:
+        day_start = local_day_bounds(selected_date)[0]
+        tasks = sorted(
+            [*tasks, *virtual_tasks],
+            key=lambda task: (task.start_at is not None, task.start_at or day_start, task.due_at or day_start, task.title),
+        )
 
     # 타임라인 UI에서 시간을 가진 일정과 그렇지 않은 일정을 분리한다.
+    task_rows: list[dict[str, object]] = []
     timed_tasks: list[dict[str, object]] = []
     untimed_tasks: list[dict[str, object]] = []
 
@@ -251,10 +271,12 @@ def _build_planner_context(request, selected_date, form_errors, include_calendar
         # 템플릿에서 반복적으로 지역 시간을 계산하지 않도록 미리 변환해 둔다.
         start_local = timezone.localtime(task.start_at) if task.start_at else None
         end_local = timezone.localtime(task.due_at) if task.due_at else None
-        linked_transactions = list(task.linked_transactions.all())
+        linked_transactions = [transaction_row(tx) for tx in task.linked_transactions.all()] if task.pk else []
+        row = task_row(task)
+        task_rows.append(row)
 
         task_payload = {
-            'task': task,
+            'task': row,
             'start_local': start_local,
             'end_local': end_local,
             'transactions': linked_transactions,
@@ -265,9 +287,11 @@ def _build_planner_context(request, selected_date, form_errors, include_calendar
         else:
             untimed_tasks.append(task_payload)
 
+    transaction_rows = [transaction_row(tx) for tx in transactions]
+
     # 일정에 연결되지 않은 지출은 별도의 섹션에 보여준다.
     loose_transactions = [
-        tx for tx in transactions if tx.task_id is None
+        tx for tx in transaction_rows if tx['task_id'] is None
     ]
 
     # 0시부터 23시까지의 타임라인 블록을 미리 구성해 둔다.
@@ -300,6 +324,11 @@ def _build_planner_context(request, selected_date, form_errors, include_calendar
         # 연결된 지출은 해당 시간대의 지출 열에 함께 노출한다.
         hour_block['transactions'].extend(entry['transactions'])
 
+    # 아직 실제 거래가 만들어지지 않은 반복 거래는 예정 행으로만 보여주고 합계에는 넣지 않는다.
+    projected_transactions = sorted(projected_transactions, key=lambda row: row['occurred_at'])
+    for row in projected_transactions:
+        hourly_map[timezone.localtime(row['occurred_at']).hour]['transactions'].append(row)
+
     hourly_schedule = [hourly_map[hour] for hour in range(24)]
 
     # 일정 외 지출을 보여주기 위한 가상의 행을 추가한다.
@@ -314,32 +343,64 @@ def _build_planner_context(request, selected_date, form_errors, include_calendar
         }
     )
 
-    # 수입/지출 합계를 미리 계산해 카드에 보여준다.
-    daily_totals = {
-        row['category__kind']: row['total']
-        for row in transactions.values('category__kind').annotate(total=Sum('amount'))
-    }
-
-    accounts = Account.objects.filter(owner=request.user)
-    expense_categories = Category.objects.filter(owner=request.user, kind='expense')
-
-    context = {
-        'selected_date': selected_date,
-        'tasks': tasks,
-        'transactions': transactions,
+    return {
+        'tasks': task_rows,
+        'transactions': transaction_rows,
         'timed_tasks': timed_tasks,
         'loose_transactions': loose_transactions,
+        'projected_transactions': projected_transactions,
         'hourly_schedule': hourly_schedule,
         'daily_totals': daily_totals,
-        'accounts': accounts,
-        'categories': expense_categories,
-        'form_errors': form_errors,
+        'accounts': list(accounts),
+        'categories': list(categories),
     }
 
+
+def build_day_payload(user, selected_date):
+    """하루 타임라인에서 캐시 가능한(직렬화 가능한) 부분을 계산한다."""
+
+    queries = day_queries(user, selected_date)
+    # 서로 독립적인 쿼리들은 팬아웃 워커에서 함께 보낸다(core.fanout).
+    rows = fanout.gather(
+        tasks=lambda: list(queries['tasks']),
+        virtual_tasks=lambda: occurrences.task_occurrences(user, selected_date, selected_date).get(selected_date, []),
+        transactions=lambda: list(queries['transactions']),
+        projected_transactions=lambda: (
+            occurrences.transaction_occurrences(user, selected_date, selected_date).get(selected_date, [])
+        ),
+        # 수입/지출 합계는 거래를 다시 훑지 않고 일별 롤업 행에서 읽는다.
+        daily_totals=lambda: rollups.totals_by_kind(user, selected_date, selected_date),
+        references=lambda: split_references(queries['references']),
+    )
+    accounts, categories = rows.pop('references')
+    return assemble_day_payload(selected_date, accounts=accounts, categories=categories, **rows)
+
+
+def _build_planner_context(request, selected_date, form_errors, include_calendar=True):
+    """대시보드와 상세 페이지에 공통으로 전달할 컨텍스트를 생성한다."""
+
+    user = request.user
+    parts = {
+        # 하루 타임라인은 (사용자, 날짜, 데이터 버전) 키로 캐시해 변경이 없으면 다시 계산하지 않는다.
+        'payload': lambda: planner_cache.get_or_build(
+            user.id, selected_date, lambda: build_day_payload(user, selected_date)
+        ),
+    }
     if include_calendar:
         # 대시보드에서만 월간 달력 데이터가 필요하다.
-        context.update(_build_calendar_data(selected_date, request.user))
+        parts['calendar'] = lambda: _build_calendar_data(selected_date, user)
+        parts['monthly_totals'] = lambda: rollups.totals_by_kind(user, *month_date_range(selected_date))
+        # 예산 상태는 가계부 워터마크 버전으로 따로 캐시되므로 하루 컨텍스트 캐시에 넣지 않는다.
+        parts['budget_statuses'] = lambda: budgets.statuses(user.id, budgets.active_periods(user, selected_date))
+    results = fanout.gather(**parts)
 
+    context = {
+        'selected_date': selected_date,
+        'form_errors': form_errors,
+        **results.pop('payload'),
+        **results.pop('calendar', {}),
+        **results,
+    }
     return context
 
 
@@ -359,6 +420,39 @@ def _combine_with_date(selected_date, time_str, fallback):
     return naive_datetime
 
 
+def _planner_validators(request):
+    """플래너 페이지용 (seed, last_modified). 로그인 전이거나 GET이 아니면 검증하지 않는다."""
+
+    if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+        return None
+    # 요청마다 캐시해 ETag와 Last-Modified 계산이 같은 집계를 두 번 하지 않게 한다.
+    if not hasattr(request, '_planner_validators'):
+        user_id = request.user.id
+        validators = fanout.gather(tasks=lambda: task_validators(user_id), ledger=lambda: ledger_validators(user_id))
+        request._planner_validators = combine_validators(validators['tasks'], validators['ledger'])
+    return request._planner_validators
+
+
+def _planner_etag(request, *args, **kwargs):
+    validators = _planner_validators(request)
+    if validators is None:
+        return None
+    seed, _ = validators
+    # 페이지에는 오늘 표시와 CSRF 토큰이 포함되므로 함께 섞는다.
+    return make_etag(
+        seed,
+        request.user.id,
+        request.get_full_path(),
+        timezone.localdate(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+    )
+
+
+def _planner_last_modified(request, *args, **kwargs):
+    validators = _planner_validators(request)
+    return validators[1] if validators else None
+
+
 def home_redirect(request):
     """Root URL 접근 시 플래너로 자연스럽게 연결한다."""
 
@@ -366,6 +460,7 @@ def home_redirect(request):
     return redirect('planner_dashboard')
 
 
+@condition(etag_func=_planner_etag, last_modified_func=_planner_last_modified)
 def planner_dashboard(request):
     """일정과 가계부를 하루 단위로 함께 살펴볼 수 있는 대시보드."""
 
@@ -391,6 +486,7 @@ def planner_dashboard(request):
     return render(request, 'planner/dashboard.html', context)
 
 
+@condition(etag_func=_planner_etag, last_modified_func=_planner_last_modified)
 def planner_day_detail(request):
     """더보기 링크로 진입하는 하루 전용 상세 페이지."""
 
@@ -416,6 +512,59 @@ def planner_day_detail(request):
     return render(request, 'planner/day_detail.html', context)
 
 
+def _parse_agenda_range(request):
+    """?from=&to= 를 date 구간으로 바꾼다. 잘못된 값은 오늘부터 2주로 폴백하고 최대 길이로 자른다."""
+
+    def parse(name):
+        try:
+            return datetime.strptime(request.GET.get(name, ''), "%Y-%m-%d").date()
+        except ValueError:
+            return None
+
+    first_day = parse('from') or timezone.localdate()
+    last_day = parse('to') or first_day + timedelta(days=13)
+    if last_day < first_day:
+        last_day = first_day
+    return first_day, min(last_day, first_day + timedelta(days=agenda.MAX_RANGE_DAYS - 1))
+
+
+@condition(etag_func=_planner_etag, last_modified_func=_planner_last_modified)
+def planner_week(request):
+    """선택한 날짜가 속한 주(일~토)를 한 화면에 보여준다. 일정/거래는 주 전체를 각각 한 번에 읽는다."""
+
+    if not request.user.is_authenticated:
+        return redirect('/admin/login/?next=' + request.path)
+
+    selected_date = _parse_selected_date(request)
+    first_day, last_day = agenda.week_range(selected_date)
+    days = agenda.build_range(request.user, first_day, last_day)
+    return render(request, 'planner/week.html', {
+        'selected_date': selected_date,
+        'days': days,
+        'range_totals': agenda.range_totals(days),
+        'prev_week': first_day - timedelta(days=7),
+        'next_week': first_day + timedelta(days=7),
+    })
+
+
+@condition(etag_func=_planner_etag, last_modified_func=_planner_last_modified)
+def planner_agenda(request):
+    """?from=&to= 구간의 일정과 거래를 날짜순 목록으로 보여준다."""
+
+    if not request.user.is_authenticated:
+        return redirect('/admin/login/?next=' + request.path)
+
+    first_day, last_day = _parse_agenda_range(request)
+    days = agenda.build_range(request.user, first_day, last_day)
+    return render(request, 'planner/agenda.html', {
+        'first_day': first_day,
+        'last_day': last_day,
+        # 일정 목록은 비어 있는 날을 접어서 보여준다.
+        'days': [day for day in days if day['tasks'] or day['transactions']],
+        'range_totals': agenda.range_totals(days),
+    })
+
+
 @login_required
 @require_POST
 def toggle_todo_status(request, task_id):
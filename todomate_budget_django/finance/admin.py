@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import Account, Category, Transaction, BudgetPeriod, BudgetItem
+from .models import Account, Category, Transaction, RecurringTransaction, DailyLedgerRollup, BudgetPeriod, BudgetItem, BudgetAlert
 
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
-    list_display = ("id","owner","name","type","balance")
+    list_display = ("id","owner","name","type","opening_balance","balance")
     list_filter = ("type",)
     search_fields = ("name",)
+    readonly_fields = ("balance",)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,12 +14,33 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ("kind",)
     search_fields = ("name",)
 
+class AccountListFilter(admin.RelatedFieldListFilter):
+    # Account.__str__가 owner를 읽으므로 선택지도 owner를 함께 가져온다.
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        accounts = Account.objects.select_related("owner").order_by(*ordering)
+        return [(a.pk, str(a)) for a in accounts]
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ("id","owner","account","category","task","amount","occurred_at","created_at")
-    list_filter = ("category__kind","account","task")
+    list_filter = ("category__kind",("account", AccountListFilter),"task")
+    search_fields = ("memo",)
+    # task는 nullable이라 기본 select_related에서 빠져 행마다 쿼리가 나간다.
+    list_select_related = ("owner","account__owner","category","task")
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ("id","owner","account","category","amount","recurrence","starts_at","materialized_until","is_active")
+    list_filter = ("is_active",)
     search_fields = ("memo",)
 
+@admin.register(DailyLedgerRollup)
+class DailyLedgerRollupAdmin(admin.ModelAdmin):
+    list_display = ("id","owner","date","kind","category","account","total","count")
+    list_filter = ("kind",)
+    ordering = ("-date",)
+
 @admin.register(BudgetPeriod)
 class BudgetPeriodAdmin(admin.ModelAdmin):
     list_display = ("id","owner","start_date","end_date")
@@ -26,4 +48,10 @@ class BudgetPeriodAdmin(admin.ModelAdmin):
 
 @admin.register(BudgetItem)
 class BudgetItemAdmin(admin.ModelAdmin):
-    list_display = ("id","period","category","limit_amount")
+    list_display = ("id","period","category","limit_amount","spent","alert_level")
+
+@admin.register(BudgetAlert)
+class BudgetAlertAdmin(admin.ModelAdmin):
+    list_display = ("id","owner","item","threshold","spent","created_at")
+    list_filter = ("threshold",)
+    ordering = ("-created_at",)
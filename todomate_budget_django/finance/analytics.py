@@ -0,0 +1,211 @@
+"""지출/수입 분석: 기간별 시계열, 전년 대비, 이동 평균 (GET /api/finance/analytics/...).
+
+- 모두 DailyLedgerRollup(지역 날짜 × 분류 × 계정 합계)을 GROUP BY로 한 번 집계해 읽는다.
+  거래 행이나 모델 인스턴스를 훑지 않으므로 기간이 몇 년이어도 읽는 행 수는 날짜 × 분류(계정) 수 이하다.
+- 집계 행은 빈 구간을 0으로 채운 배열에 위치(index)로 더하고, 이동 평균은 누적합의 차로 구한다.
+- DB는 날짜(와 분류/계정)별로만 묶고 주/월 구간은 그 행들을 접어 만든다. SQLite의 TruncMonth는 행마다
+  파이썬 함수를 불러 오히려 느리다. 주는 플래너 달력처럼 일요일에 시작한다.
+- 결과는 가계부 워터마크 버전을 키에 넣어 캐시한다(거래/분류/계정이 바뀌면 자연히 새 키).
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q, Sum
+
+from core import metrics
+from .models import DailyLedgerRollup
+
+GRANULARITIES = ('day', 'week', 'month')
+KINDS = ('expense', 'income')
+# group_by 값 → (롤업의 id 필드, 이름 필드)
+GROUPS = {'category': ('category_id', 'category__name'), 'account': ('account_id', 'account__name')}
+ROLLING_WINDOWS = (7, 30)
+# 한 응답에 담는 구간 수 상한(일 단위로 약 5년 반)
+MAX_PERIODS = 2000
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+
+class AnalyticsError(ValueError):
+    """요청한 기간/단위가 잘못됐다. (필드명, 메시지)를 담는다."""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+
+
+def _money(value: Decimal) -> str:
+    return f'{value:.2f}'
+
+
+# ---- 구간 --------------------------------------------------------------
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day - timedelta(days=(day.weekday() + 1) % 7)
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_index(day: date, first: date, granularity: str) -> int:
+    if granularity == 'month':
+        return (day.year - first.year) * 12 + day.month - first.month
+    return (day - first).days // (7 if granularity == 'week' else 1)
+
+
+def buckets(start: date, end: date, granularity: str) -> list[date]:
+    """start~end를 덮는 구간 시작일 목록(빈 구간 포함)."""
+
+    first, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    count = _bucket_index(last, first, granularity) + 1
+    if count > MAX_PERIODS:
+        raise AnalyticsError('from', f'한 번에 {MAX_PERIODS}개 구간까지 조회할 수 있습니다.')
+    if granularity == 'month':
+        return [date(first.year + (first.month - 1 + i) // 12, (first.month - 1 + i) % 12 + 1, 1) for i in range(count)]
+    step = timedelta(days=7 if granularity == 'week' else 1)
+    return [first + step * i for i in range(count)]
+
+
+def _grouped_rows(owner_id: int, kind: str, ranges: list[tuple[date, date]], group_by: str | None):
+    """ranges(양 끝 포함) 안의 롤업을 (날짜, [group_id, name,] 합계) 행으로 GROUP BY 한다."""
+
+    within = Q()
+    for start, end in ranges:
+        within |= Q(date__gte=start, date__lte=end)
+    queryset = DailyLedgerRollup.objects.filter(within, owner_id=owner_id, kind=kind).order_by()
+    fields = ['date', *(GROUPS[group_by] if group_by else ())]
+    return queryset.values(*fields).annotate(amount=Sum('total')).values_list(*fields, 'amount')
+
+
+def _fold(rows, first: date, granularity: str, size: int, grouped: bool):
+    """(date, [group_id, name,] amount) 행을 구간 배열로 모은다. → (합계 배열, {group_id: (name, 배열)})"""
+
+    totals = [ZERO] * size
+    groups: dict[int, tuple[str, list[Decimal]]] = {}
+    for row in rows:
+        index = _bucket_index(row[0], first, granularity)
+        if not 0 <= index < size:
+            continue
+        amount = row[-1] or ZERO
+        totals[index] += amount
+        if grouped:
+            values = groups.setdefault(row[1], (row[2], [ZERO] * size))[1]
+            values[index] += amount
+    return totals, groups
+
+
+# ---- 계산 --------------------------------------------------------------
+
+def series(owner_id: int, start: date, end: date, granularity: str = 'day', group_by: str | None = None,
+           kind: str = 'expense') -> dict:
+    """구간별 합계. group_by가 있으면 분류/계정별 시계열을 합계가 큰 순서로 함께 준다."""
+
+    periods = buckets(start, end, granularity)
+    rows = _grouped_rows(owner_id, kind, [(start, end)], group_by)
+    totals, groups = _fold(rows, periods[0], granularity, len(periods), bool(group_by))
+    data = {
+        'kind': kind, 'granularity': granularity, 'group_by': group_by,
+        'from': start.isoformat(), 'to': end.isoformat(),
+        'periods': [period.isoformat() for period in periods],
+        'totals': [_money(value) for value in totals],
+        'total': _money(sum(totals, ZERO)),
+    }
+    if group_by:
+        ranked = sorted(groups.items(), key=lambda item: (-sum(item[1][1], ZERO), item[0]))
+        data['series'] = [
+            {'id': group_id, 'name': name, 'values': [_money(value) for value in values], 'total': _money(sum(values, ZERO))}
+            for group_id, (name, values) in ranked
+        ]
+    return data
+
+
+def _same_day_last_year(day: date) -> date:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # 2월 29일
+        return day.replace(year=day.year - 1, day=28)
+
+
+def _change(current: Decimal, previous: Decimal) -> dict:
+    return {
+        'current': _money(current),
+        'previous': _money(previous),
+        'change': _money(current - previous),
+        'change_pct': float(((current - previous) * 100 / previous).quantize(Decimal('0.1'))) if previous else None,
+    }
+
+
+def year_over_year(owner_id: int, year: int, through: date | None = None, group_by: str | None = None,
+                   kind: str = 'expense') -> dict:
+    """year의 월별 합계를 전년 같은 달과 비교한다.
+
+    through(기본: 연말)까지만 세고 전년도도 같은 날짜까지만 세므로 진행 중인 해도 같은 기간끼리 비교한다.
+    """
+
+    end = min(through or date(year, 12, 31), date(year, 12, 31))
+    ranges = [(date(year - 1, 1, 1), _same_day_last_year(end)), (date(year, 1, 1), end)]
+    rows = _grouped_rows(owner_id, kind, ranges, group_by)
+    totals, groups = _fold(rows, date(year - 1, 1, 1), 'month', 24, bool(group_by))
+    months = end.month
+
+    def compare(values):
+        current, previous = values[12:12 + months], values[:months]
+        return {
+            'months': [
+                {'month': f'{year}-{index + 1:02d}', **_change(current[index], previous[index])}
+                for index in range(months)
+            ],
+            'total': _change(sum(current, ZERO), sum(previous, ZERO)),
+        }
+
+    data = {'kind': kind, 'year': year, 'through': end.isoformat(), 'group_by': group_by, **compare(totals)}
+    if group_by:
+        ranked = sorted(groups.items(), key=lambda item: (-sum(item[1][1][12:], ZERO), item[0]))
+        data['series'] = [{'id': group_id, 'name': name, **compare(values)} for group_id, (name, values) in ranked]
+    return data
+
+
+def rolling_averages(owner_id: int, start: date, end: date, windows=ROLLING_WINDOWS, kind: str = 'expense') -> dict:
+    """일별 합계와 windows일 이동 평균(달력 일 기준, 거래 없는 날은 0). 첫날 평균도 이전 기간을 포함한다."""
+
+    lead = max(windows) - 1
+    days = buckets(start - timedelta(days=lead), end, 'day')
+    totals, _ = _fold(_grouped_rows(owner_id, kind, [(days[0], end)], None), days[0], 'day', len(days), False)
+    prefix = [ZERO]
+    for value in totals:
+        prefix.append(prefix[-1] + value)
+    span = range(lead, len(days))
+    return {
+        'kind': kind, 'from': start.isoformat(), 'to': end.isoformat(),
+        'periods': [days[index].isoformat() for index in span],
+        'totals': [_money(totals[index]) for index in span],
+        'averages': {
+            str(window): [
+                _money(((prefix[index + 1] - prefix[index + 1 - window]) / window).quantize(CENT)) for index in span
+            ]
+            for window in windows
+        },
+    }
+
+
+# ---- 캐시 --------------------------------------------------------------
+
+def cached(owner_id: int, version: int, name: str, params: dict, build: Callable[[], dict]) -> dict:
+    """(사용자, 워터마크 버전, 계산 이름, 매개변수) 키로 결과를 캐시한다."""
+
+    key = f'analytics:{name}:{owner_id}:{version}:' + ':'.join(f'{field}={params[field]}' for field in sorted(params))
+    cache = caches[getattr(settings, 'PLANNER_CACHE_ALIAS', 'default')]
+    data = cache.get(key)
+    metrics.record_cache('analytics', hits=int(data is not None), misses=int(data is None))
+    if data is None:
+        data = build()
+        cache.set(key, data, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60))
+    return data
@@ -1,19 +1,40 @@
-from rest_framework import viewsets, permissions, filters
+from datetime import timedelta
+from rest_framework import viewsets, permissions, filters, status
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Account, Category, Transaction, BudgetPeriod, BudgetItem
-from .serializers import AccountSerializer, CategorySerializer, TransactionSerializer, BudgetPeriodSerializer, BudgetItemSerializer
+from core.bulk import BulkWriteMixin, ledger_state, transaction_effects
+from core.conditional import ConditionalRequestMixin, ledger_validators, make_etag, not_modified, set_validator_headers
+from core.fastread import RowReadMixin
+from core.optimizer import OptimizedQuerysetMixin
+from core.pagination import KeysetPagination
+from .exports import FORMATS as EXPORT_FORMATS, ExportUnavailable, export_filename, stream_export
+from .importers import StatementError, detect_format, import_statement
+from . import analytics, budgets
+from .models import Account, Category, Transaction, RecurringTransaction, BudgetPeriod, BudgetItem, BudgetAlert
+from .serializers import AccountSerializer, CategorySerializer, TransactionSerializer, TransactionImportSerializer, RecurringTransactionSerializer, BudgetPeriodSerializer, BudgetItemSerializer, BudgetAlertSerializer
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return getattr(obj, "owner_id", None) == request.user.id
 
-class OwnerViewSetMixin:
+class OwnerViewSetMixin(OptimizedQuerysetMixin, ConditionalRequestMixin):
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    optimized_extra_fields = ("owner",)
     def get_queryset(self):
-        return self.queryset.filter(owner=self.request.user)
+        return super().get_queryset().filter(owner=self.request.user)
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+    def get_conditional_validators(self, detail):
+        # 가계부 데이터는 사용자별 워터마크 하나로 목록/상세 모두 검증한다.
+        return ledger_validators(self.request.user.id)
 
 class AccountViewSet(OwnerViewSetMixin, viewsets.ModelViewSet):
     queryset = Account.objects.all()
@@ -29,23 +50,224 @@ class CategoryViewSet(OwnerViewSetMixin, viewsets.ModelViewSet):
     search_fields = ["name"]
     ordering_fields = ["name","id"]
 
-class TransactionViewSet(OwnerViewSetMixin, viewsets.ModelViewSet):
-    queryset = Transaction.objects.select_related("account","category","task")
+class TransactionViewSet(BulkWriteMixin, OwnerViewSetMixin, RowReadMixin, viewsets.ModelViewSet):
+    queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     filterset_fields = ["category__kind","account","category","occurred_at","task"]
     search_fields = ["memo"]
     ordering_fields = ["occurred_at","amount","id"]
+    # 오래된 내역까지 스크롤해도 OFFSET/COUNT 없이 (occurred_at, id) 키셋으로 이어 읽는다.
+    pagination_class = KeysetPagination
+    keyset_ordering = ["-occurred_at"]
+    def bulk_state(self, obj):
+        return ledger_state(obj)
+
+    def bulk_effects(self, owner_id, before, after):
+        transaction_effects(owner_id, before, after)
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser],
+            serializer_class=TransactionImportSerializer)
+    def import_statement(self, request):
+        """CSV/OFX/QIF 내역 파일을 한 줄씩 읽어 가져온다. 이미 가져온 행은 건너뛴다."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        upload = data["file"]
+        try:
+            result = import_statement(
+                request.user, upload, data.get("format") or detect_format(upload.name),
+                account=data.get("account"), date_format=data.get("date_format") or None,
+                delimiter=data["delimiter"],
+            )
+        except StatementError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<fmt>csv|jsonl|parquet)")
+    def export(self, request, fmt):
+        """전체 거래 내역을 직렬화기 없이 흘려 보낸다. ?from=YYYY-MM-DD&to=YYYY-MM-DD로 지역 날짜 구간을 제한한다."""
+        bounds = {}
+        for param in ("from", "to"):
+            raw = request.query_params.get(param)
+            if raw:
+                bounds[param] = parse_date(raw)
+                if bounds[param] is None:
+                    raise ValidationError({param: "YYYY-MM-DD 형식이어야 합니다."})
+        try:
+            chunks = stream_export(request.user, fmt, bounds.get("from"), bounds.get("to"))
+        except ExportUnavailable as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt][1])
+        response["Content-Disposition"] = f'attachment; filename="{export_filename(request.user, fmt)}"'
+        # 프록시가 전체 응답을 모았다가 보내지 않도록 한다.
+        response["X-Accel-Buffering"] = "no"
+        return response
 
 class BudgetPeriodViewSet(OwnerViewSetMixin, viewsets.ModelViewSet):
-    queryset = BudgetPeriod.objects.all().prefetch_related("items")
+    queryset = BudgetPeriod.objects.all()
     serializer_class = BudgetPeriodSerializer
     filterset_fields = ["start_date","end_date"]
     ordering_fields = ["start_date","end_date","id"]
 
-class BudgetItemViewSet(viewsets.ModelViewSet):
-    queryset = BudgetItem.objects.select_related("period","category")
+    @action(detail=True, methods=["get"], url_path="status")
+    def period_status(self, request, pk=None):
+        """항목별 한도/사용액/잔액/사용률. 사용액은 거래 시그널이 유지하는 카운터를 읽는다."""
+        period = self.get_object()
+        return self.conditional_response(True, lambda: Response(budgets.statuses(request.user.id, [period])[0]))
+
+    @action(detail=False, methods=["get"], url_path="status")
+    def current_status(self, request):
+        """?date=YYYY-MM-DD(기본 오늘)를 포함하는 모든 기간의 상태."""
+        raw = request.query_params.get("date")
+        on = parse_date(raw) if raw else timezone.localdate()
+        if on is None:
+            raise ValidationError({"date": "YYYY-MM-DD 형식이어야 합니다."})
+        return self.conditional_response(
+            False, lambda: Response(budgets.statuses(request.user.id, budgets.active_periods(request.user, on)))
+        )
+
+class RecurringTransactionViewSet(OwnerViewSetMixin, viewsets.ModelViewSet):
+    # 규칙만 저장한다. 지난 발생은 materialize_recurrences 명령이 실제 거래로 만든다.
+    queryset = RecurringTransaction.objects.all()
+    serializer_class = RecurringTransactionSerializer
+    filterset_fields = ["account","category","is_active"]
+    search_fields = ["memo"]
+    ordering_fields = ["starts_at","amount","id"]
+
+class BudgetAlertViewSet(OwnerViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = BudgetAlert.objects.all()
+    serializer_class = BudgetAlertSerializer
+    filterset_fields = ["item","threshold"]
+    ordering_fields = ["created_at","id"]
+
+class BudgetItemViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = BudgetItem.objects.all()
     serializer_class = BudgetItemSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["period","category"]
     ordering_fields = ["id"]
+
+
+def _query_date(request, param, default):
+    raw = request.query_params.get(param)
+    if not raw:
+        return default
+    value = parse_date(raw)
+    if value is None:
+        raise ValidationError({param: "YYYY-MM-DD 형식이어야 합니다."})
+    return value
+
+def _query_choice(request, param, choices, default):
+    value = request.query_params.get(param) or default
+    if value is not None and value not in choices:
+        raise ValidationError({param: f"{', '.join(choices)} 중 하나여야 합니다."})
+    return value
+
+def _query_range(request, default_days):
+    end = _query_date(request, "to", timezone.localdate())
+    start = _query_date(request, "from", end - timedelta(days=default_days - 1))
+    if start > end:
+        raise ValidationError({"to": "from 이후 날짜여야 합니다."})
+    return start, end
+
+class AnalyticsView(APIView):
+    """/api/finance/analytics/... 공통. 가계부 워터마크 하나로 ETag/Last-Modified와 결과 캐시 키를 정한다.
+
+    하위 클래스는 name, query_params_for(request) → dict, compute(owner_id, **params) → dict를 정한다.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    name = None
+
+    def query_params_for(self, request):
+        raise NotImplementedError
+
+    def compute(self, owner_id, **params):
+        raise NotImplementedError
+
+    def get(self, request):
+        params = self.query_params_for(request)
+        seed, last_modified = ledger_validators(request.user.id)
+        etag = make_etag(seed, request.user.id, request.path, request.META.get("QUERY_STRING", ""), request.accepted_renderer.format)
+        if not_modified(request, etag, last_modified):
+            return set_validator_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        try:
+            data = analytics.cached(
+                request.user.id, seed[1], self.name, params, lambda: self.compute(request.user.id, **params)
+            )
+        except analytics.AnalyticsError as exc:
+            raise ValidationError({exc.field: str(exc)})
+        return set_validator_headers(Response(data), etag, last_modified)
+
+class SpendingSeriesView(AnalyticsView):
+    """GET /api/finance/analytics/series/?from=&to=&granularity=day|week|month&group_by=category|account&kind=expense|income
+
+    구간별 합계(빈 구간은 0)와 group_by별 시계열. 기본은 오늘까지 1년, 일 단위 지출.
+    """
+
+    name = "series"
+
+    def query_params_for(self, request):
+        start, end = _query_range(request, 365)
+        return {
+            "start": start, "end": end,
+            "granularity": _query_choice(request, "granularity", analytics.GRANULARITIES, "day"),
+            "group_by": _query_choice(request, "group_by", tuple(analytics.GROUPS), None),
+            "kind": _query_choice(request, "kind", analytics.KINDS, "expense"),
+        }
+
+    def compute(self, owner_id, **params):
+        return analytics.series(owner_id, **params)
+
+class YearOverYearView(AnalyticsView):
+    """GET /api/finance/analytics/yoy/?year=YYYY&through=YYYY-MM-DD&group_by=&kind=
+
+    월별 합계를 전년 같은 달과 비교한다. 올해는 기본으로 오늘까지(전년도 같은 날짜까지)만 비교한다.
+    """
+
+    name = "yoy"
+
+    def query_params_for(self, request):
+        today = timezone.localdate()
+        try:
+            year = int(request.query_params.get("year", today.year))
+        except ValueError:
+            raise ValidationError({"year": "정수여야 합니다."})
+        if not 1900 < year < 10000:
+            raise ValidationError({"year": "올바른 연도가 아닙니다."})
+        return {
+            "year": year,
+            "through": _query_date(request, "through", today if year == today.year else None),
+            "group_by": _query_choice(request, "group_by", tuple(analytics.GROUPS), None),
+            "kind": _query_choice(request, "kind", analytics.KINDS, "expense"),
+        }
+
+    def compute(self, owner_id, **params):
+        return analytics.year_over_year(owner_id, **params)
+
+class RollingAverageView(AnalyticsView):
+    """GET /api/finance/analytics/rolling/?from=&to=&windows=7,30&kind=
+
+    일별 합계와 이동 평균(거래 없는 날은 0으로 센다). 기본은 오늘까지 90일.
+    """
+
+    name = "rolling"
+    max_window = 365
+
+    def query_params_for(self, request):
+        start, end = _query_range(request, 90)
+        raw = request.query_params.get("windows")
+        try:
+            windows = sorted({int(value) for value in raw.split(",")}) if raw else list(analytics.ROLLING_WINDOWS)
+        except ValueError:
+            raise ValidationError({"windows": "쉼표로 구분한 정수여야 합니다."})
+        if not windows or not all(1 <= window <= self.max_window for window in windows):
+            raise ValidationError({"windows": f"1~{self.max_window} 사이여야 합니다."})
+        return {
+            "start": start, "end": end, "windows": ",".join(map(str, windows)),
+            "kind": _query_choice(request, "kind", analytics.KINDS, "expense"),
+        }
+
+    def compute(self, owner_id, windows, **params):
+        return analytics.rolling_averages(owner_id, windows=[int(window) for window in windows.split(",")], **params)
@@ -0,0 +1,146 @@
+"""Account.balance 증분 갱신과 검증/복구.
+
+불변식: balance = opening_balance + Σ(분류 kind 부호 × amount)
+- income은 더하고 expense와 transfer는 뺀다(이체는 이 계정에서 나간 돈으로 기록된다).
+- 갱신은 계정 행을 pk 순서로 select_for_update 한 뒤 F()로 더해, 동시 요청과 복구 명령이 서로 덮어쓰지 않는다.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from .models import Account, Category, Transaction
+
+KIND_SIGN = {'income': 1, 'expense': -1, 'transfer': -1}
+ACCOUNT_BATCH = 200
+CENT = Decimal('0.01')
+
+
+def signed_amount_expression():
+    """Transaction 쿼리셋에서 kind 부호를 적용한 금액 식."""
+
+    return Case(
+        When(category__kind='income', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+
+
+def state_deltas(before: Iterable[dict], after: Iterable[dict]) -> dict[int, Decimal]:
+    """거래 상태(account_id, category_id, amount를 가진 dict) 목록으로 계정별 잔액 변화량을 계산한다."""
+
+    before, after = list(before), list(after)
+    kinds = dict(
+        Category.objects.filter(id__in={state['category_id'] for state in before + after}).values_list('id', 'kind')
+    )
+    deltas: dict[int, Decimal] = defaultdict(Decimal)
+    for states, direction in ((before, -1), (after, 1)):
+        for state in states:
+            sign = KIND_SIGN.get(kinds.get(state['category_id']), -1)
+            deltas[state['account_id']] += direction * sign * Decimal(str(state['amount']))
+    return {account_id: delta for account_id, delta in deltas.items() if delta}
+
+
+def _lock(account_ids: list[int]) -> None:
+    # pk 순서로 잠가 여러 계정을 건드리는 요청끼리 교착되지 않게 한다.
+    list(Account.objects.select_for_update().filter(pk__in=account_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def _set_balances(values: dict[int, Decimal]) -> None:
+    if values:
+        Account.objects.filter(pk__in=list(values)).update(balance=Case(
+            *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+
+
+def apply_deltas(deltas: dict[int, Decimal]) -> None:
+    """계정별 변화량을 잠금 후 F()로 반영한다. bulk 경로도 이 함수를 호출한다."""
+
+    if not deltas:
+        return
+    account_ids = sorted(deltas)
+    with transaction.atomic():
+        _lock(account_ids)
+        if len(account_ids) == 1:
+            Account.objects.filter(pk=account_ids[0]).update(balance=F('balance') + deltas[account_ids[0]])
+            return
+        for offset in range(0, len(account_ids), ACCOUNT_BATCH):
+            batch = account_ids[offset:offset + ACCOUNT_BATCH]
+            Account.objects.filter(pk__in=batch).update(balance=F('balance') + Case(
+                *[When(pk=pk, then=Value(deltas[pk])) for pk in batch],
+                default=Value(Decimal('0')),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ))
+
+
+def apply_states(before: Iterable[dict], after: Iterable[dict]) -> None:
+    apply_deltas(state_deltas(before, after))
+
+
+def expected_balances(account_ids: Iterable[int]) -> dict[int, Decimal]:
+    """거래 전체를 다시 합산한 기대 잔액. 계정 묶음당 GROUP BY 쿼리 한 번.
+
+    balance와 같은 소수 둘째 자리로 반올림해, DB가 합계를 어떻게 계산하든 verify()가 저장값과 그대로 비교할 수 있게 한다.
+    """
+
+    account_ids = list(account_ids)
+    sums = dict(
+        Transaction.objects.filter(account_id__in=account_ids)
+        .order_by()
+        .values('account_id')
+        .annotate(total=Sum(signed_amount_expression()))
+        .values_list('account_id', 'total')
+    )
+    openings = dict(Account.objects.filter(pk__in=account_ids).values_list('pk', 'opening_balance'))
+    # SQLite는 NUMERIC 합계를 부동소수점으로 계산하므로 거래가 많으면 소수점 아래 오차가 생긴다.
+    return {pk: (opening + (sums.get(pk) or Decimal('0'))).quantize(CENT) for pk, opening in openings.items()}
+
+
+def verify(owner_ids: Iterable[int] | None = None, repair: bool = False, chunk_size: int = ACCOUNT_BATCH,
+           stdout=None) -> list[tuple[int, Decimal, Decimal]]:
+    """저장된 잔액과 기대 잔액이 다른 계정을 (id, 저장값, 기대값) 목록으로 돌려준다.
+
+    repair=True면 묶음마다 계정을 잠근 채 다시 합산해 고친다. 잠금 덕분에 그 사이 들어온
+    거래 갱신은 복구 뒤에 순서대로 더해진다.
+    """
+
+    accounts = Account.objects.order_by('pk')
+    if owner_ids is not None:
+        accounts = accounts.filter(owner_id__in=list(owner_ids))
+    account_ids = list(accounts.values_list('pk', flat=True))
+
+    drift = []
+    for offset in range(0, len(account_ids), chunk_size):
+        batch = account_ids[offset:offset + chunk_size]
+        with transaction.atomic():
+            locked = Account.objects.filter(pk__in=batch).order_by('pk')
+            if repair:
+                locked = locked.select_for_update()
+            stored = dict(locked.values_list('pk', 'balance'))
+            expected = expected_balances(batch)
+            wrong = [(pk, stored[pk], expected[pk]) for pk in batch if pk in stored and stored[pk] != expected[pk]]
+            if repair and wrong:
+                _set_balances({pk: value for pk, _, value in wrong})
+        drift.extend(wrong)
+        if stdout is not None:
+            stdout.write(f'  accounts {offset + len(batch)}/{len(account_ids)}, drifted {len(drift)}')
+    return drift
+
+
+def recompute_for_category(category_id: int) -> None:
+    """분류 kind가 바뀌면 그 분류를 쓰는 계정의 잔액 부호가 달라지므로 해당 계정만 다시 계산한다."""
+
+    account_ids = sorted(set(
+        Transaction.objects.filter(category_id=category_id).order_by().values_list('account_id', flat=True)
+    ))
+    if not account_ids:
+        return
+    with transaction.atomic():
+        _lock(account_ids)
+        _set_balances(expected_balances(account_ids))
@@ -0,0 +1,228 @@
+"""예산 항목(BudgetItem) 사용률 계산, 증분 갱신, 임계치 알림, 상태 캐시.
+
+- spent는 거래 변경이 만든 롤업 변화량(`ledger_deltas`)을 그대로 받아 해당 기간/분류 항목에만 더한다.
+  항목 행을 잠근 채 이전/이후 값을 비교하므로 임계치 통과를 기간 재합산 없이 판단한다.
+- 항목/기간 설정이 바뀌면 DailyLedgerRollup을 분류×기간으로 묶은 쿼리 한 번으로 다시 계산한다.
+- 상태 응답은 (기간, 가계부 워터마크 버전) 키로 캐시한다. 거래/예산이 바뀌면 버전이 올라 자연히 무효화된다.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, DecimalField, OuterRef, PositiveSmallIntegerField, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from core import metrics
+
+from . import watermarks
+from .models import BudgetAlert, BudgetItem, BudgetPeriod, DailyLedgerRollup
+
+ITEM_BATCH = 200
+
+
+def thresholds() -> tuple[int, ...]:
+    return tuple(sorted(getattr(settings, 'BUDGET_ALERT_THRESHOLDS', (80, 100))))
+
+
+def percent(spent: Decimal, limit: Decimal) -> float | None:
+    if not limit or limit <= 0:
+        return None
+    return round(float(spent * 100 / limit), 1)
+
+
+def level_for(spent: Decimal, limit: Decimal) -> int:
+    """spent가 넘어선 가장 높은 임계치(%)."""
+
+    if not limit or limit <= 0:
+        return 0
+    return max((threshold for threshold in thresholds() if spent * 100 >= threshold * limit), default=0)
+
+
+# ---- 쓰기 --------------------------------------------------------------
+
+def _lock(item_ids) -> dict[int, tuple[Decimal, Decimal, int]]:
+    rows = (
+        BudgetItem.objects.select_for_update(of=('self',))
+        .filter(pk__in=list(item_ids))
+        .order_by('pk')
+        .values_list('pk', 'spent', 'limit_amount', 'alert_level')
+    )
+    return {pk: (spent, limit, level) for pk, spent, limit, level in rows}
+
+
+def _write(values: dict[int, tuple[Decimal, int]]) -> None:
+    pks = list(values)
+    for offset in range(0, len(pks), ITEM_BATCH):
+        batch = pks[offset:offset + ITEM_BATCH]
+        BudgetItem.objects.filter(pk__in=batch).update(
+            spent=Case(
+                *[When(pk=pk, then=Value(values[pk][0])) for pk in batch],
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+            alert_level=Case(
+                *[When(pk=pk, then=Value(values[pk][1])) for pk in batch],
+                output_field=PositiveSmallIntegerField(),
+            ),
+        )
+
+
+def apply_deltas(deltas: dict[tuple, tuple[Decimal, int]]) -> list[BudgetAlert]:
+    """롤업 키 (owner, 지역 날짜, 분류, 계정)별 금액 변화량을 예산 항목 spent에 반영한다.
+
+    새로 넘은 임계치마다 BudgetAlert를 만들어 돌려준다. 지출이 줄어 임계치 아래로 내려가면
+    alert_level도 낮춰 다시 넘을 때 알림이 나가게 한다.
+    """
+
+    by_category: dict[tuple[int, int], list[tuple[date, Decimal]]] = defaultdict(list)
+    for (owner_id, day, category_id, _account_id), (amount, _count) in deltas.items():
+        if amount:
+            by_category[(owner_id, category_id)].append((day, Decimal(amount)))
+    if not by_category:
+        return []
+
+    days = [day for entries in by_category.values() for day, _ in entries]
+    candidates = BudgetItem.objects.filter(
+        period__owner_id__in={owner_id for owner_id, _ in by_category},
+        category_id__in={category_id for _, category_id in by_category},
+        period__start_date__lte=max(days),
+        period__end_date__gte=min(days),
+    ).values_list('pk', 'period__owner_id', 'category_id', 'period__start_date', 'period__end_date')
+
+    item_deltas: dict[int, Decimal] = defaultdict(Decimal)
+    owners: dict[int, int] = {}
+    for pk, owner_id, category_id, start, end in candidates:
+        for day, amount in by_category.get((owner_id, category_id), ()):
+            if start <= day <= end:
+                item_deltas[pk] += amount
+                owners[pk] = owner_id
+    item_deltas = {pk: delta for pk, delta in item_deltas.items() if delta}
+    if not item_deltas:
+        return []
+
+    alerts = []
+    with transaction.atomic():
+        locked = _lock(item_deltas)
+        values = {}
+        for pk, (spent, limit, previous_level) in locked.items():
+            new_spent = spent + item_deltas[pk]
+            level = level_for(new_spent, limit)
+            values[pk] = (new_spent, level)
+            alerts.extend(
+                BudgetAlert(owner_id=owners[pk], item_id=pk, threshold=threshold, spent=new_spent)
+                for threshold in thresholds() if previous_level < threshold <= level
+            )
+        _write(values)
+        if alerts:
+            BudgetAlert.objects.bulk_create(alerts)
+    return alerts
+
+
+def spent_subquery():
+    """항목 기간 안 같은 분류의 롤업 합계. 항목 쿼리셋에 annotate해 항목 수와 무관하게 한 번에 읽는다."""
+
+    return Coalesce(
+        Subquery(
+            DailyLedgerRollup.objects.filter(
+                owner_id=OuterRef('period__owner_id'),
+                category_id=OuterRef('category_id'),
+                date__gte=OuterRef('period__start_date'),
+                date__lte=OuterRef('period__end_date'),
+            )
+            .order_by()
+            .values('category_id')
+            .annotate(total=Sum('total'))
+            .values('total')
+        ),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+
+
+def recompute(items) -> int:
+    """항목 spent/alert_level을 롤업에서 다시 계산한다. 설정 변경과 재생성 경로용이라 알림은 만들지 않는다."""
+
+    pks = list(items.values_list('pk', flat=True))
+    for offset in range(0, len(pks), ITEM_BATCH):
+        batch = pks[offset:offset + ITEM_BATCH]
+        with transaction.atomic():
+            _lock(batch)
+            rows = BudgetItem.objects.filter(pk__in=batch).annotate(actual=spent_subquery()).values_list(
+                'pk', 'actual', 'limit_amount'
+            )
+            _write({pk: (actual, level_for(actual, limit)) for pk, actual, limit in rows})
+    return len(pks)
+
+
+# ---- 읽기 --------------------------------------------------------------
+
+def _cache():
+    return caches[getattr(settings, 'PLANNER_CACHE_ALIAS', 'default')]
+
+
+def _money(value: Decimal) -> str:
+    return f'{value:.2f}'
+
+
+def _item_status(item: BudgetItem) -> dict:
+    remaining = item.limit_amount - item.spent
+    return {
+        'id': item.pk,
+        'category': {'id': item.category_id, 'name': item.category.name, 'kind': item.category.kind},
+        'limit': _money(item.limit_amount),
+        'spent': _money(item.spent),
+        'remaining': _money(remaining),
+        'percent': percent(item.spent, item.limit_amount),
+        'level': item.alert_level,
+    }
+
+
+def _period_status(period: BudgetPeriod, items: Iterable[BudgetItem]) -> dict:
+    rows = [_item_status(item) for item in items]
+    limit = sum((Decimal(row['limit']) for row in rows), Decimal('0'))
+    spent = sum((Decimal(row['spent']) for row in rows), Decimal('0'))
+    return {
+        'id': period.pk,
+        'start_date': period.start_date.isoformat(),
+        'end_date': period.end_date.isoformat(),
+        'items': rows,
+        'totals': {
+            'limit': _money(limit), 'spent': _money(spent), 'remaining': _money(limit - spent),
+            'percent': percent(spent, limit),
+        },
+    }
+
+
+def statuses(owner_id: int, periods: Iterable[BudgetPeriod]) -> list[dict]:
+    """기간별 상태. 캐시에 없는 기간의 항목만 select_related 쿼리 한 번으로 읽는다."""
+
+    periods = list(periods)
+    if not periods:
+        return []
+    version = watermarks.current(owner_id)[0]
+    keys = {period.pk: f'budget:status:{period.pk}:{version}' for period in periods}
+    cache = _cache()
+    found = cache.get_many(list(keys.values()))
+
+    missing = [period for period in periods if keys[period.pk] not in found]
+    metrics.record_cache('budget_status', hits=len(periods) - len(missing), misses=len(missing))
+    if missing:
+        items_by_period = defaultdict(list)
+        for item in (
+            BudgetItem.objects.filter(period__in=missing).select_related('category').order_by('category__name', 'pk')
+        ):
+            items_by_period[item.period_id].append(item)
+        built = {keys[period.pk]: _period_status(period, items_by_period[period.pk]) for period in missing}
+        cache.set_many(built, getattr(settings, 'BUDGET_STATUS_CACHE_TIMEOUT', 60 * 60))
+        found.update(built)
+    return [found[keys[period.pk]] for period in periods]
+
+
+def active_periods(owner, on: date):
+    return BudgetPeriod.objects.filter(owner=owner, start_date__lte=on, end_date__gte=on).order_by('start_date', 'pk')
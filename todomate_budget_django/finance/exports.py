@@ -0,0 +1,211 @@
+"""사용자 거래 내역 전체를 CSV/JSON Lines/Parquet으로 흘려 보내는 내보내기.
+
+직렬화기 대신 `values_list(...).iterator()`로 필요한 열만 청크 단위로 읽고,
+인코더는 일정 크기의 바이트 조각을 yield 하므로 내역 길이와 무관하게 메모리가 일정하다.
+헤더를 쿼리보다 먼저 내보내 첫 바이트가 바로 전송된다.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator
+
+from django.utils import timezone
+
+from core.timeranges import local_midnight
+
+from .models import Transaction
+
+# (내보낼 열 이름, values_list 조회 경로)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('occurred_at', 'occurred_at'),
+    ('kind', 'category__kind'),
+    ('amount', 'amount'),
+    ('account', 'account__name'),
+    ('category', 'category__name'),
+    ('task', 'task__title'),
+    ('memo', 'memo'),
+    ('created_at', 'created_at'),
+)
+HEADER = [name for name, _ in EXPORT_COLUMNS]
+# 이 크기만큼 모아서 한 번에 내보낸다. 행마다 yield 하면 WSGI 쓰기 호출이 병목이 된다.
+FLUSH_BYTES = 64 * 1024
+PARQUET_ROW_GROUP = 50_000
+# 스프레드시트가 수식으로 실행하는 첫 글자. 사용자가 입력한 문자열은 앞에 '를 붙여 글자로 남긴다.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportUnavailable(RuntimeError):
+    """선택적 의존성이 없어 요청한 형식을 만들 수 없을 때."""
+
+
+def export_rows(owner, first_day: date | None = None, last_day: date | None = None,
+                chunk_size: int = 2000) -> Iterator[tuple]:
+    """(occurred_at, id) 순으로 거래 행 튜플을 청크 단위로 읽는다. 구간은 지역 날짜 기준 [first_day, last_day]."""
+
+    qs = Transaction.objects.filter(owner=owner)
+    if first_day is not None:
+        qs = qs.filter(occurred_at__gte=local_midnight(first_day))
+    if last_day is not None:
+        qs = qs.filter(occurred_at__lt=local_midnight(last_day + timedelta(days=1)))
+    return (
+        qs.order_by('occurred_at', 'id')
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _csv_cell(value):
+    # 금액(Decimal)의 음수 부호는 그대로 두고 문자열 열만 막는다. JSONL/Parquet은 수식을 실행하지 않으므로 손대지 않는다.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return _text(value)
+
+
+class _Buffer:
+    """csv.writer가 쓰는 내용을 모아 두었다가 꺼내 가는 최소 버퍼."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.size = 0
+
+    def write(self, value):
+        self.parts.append(value)
+        self.size += len(value)
+
+    def drain(self) -> bytes:
+        data = ''.join(self.parts).encode()
+        self.parts, self.size = [], 0
+        return data
+
+
+def iter_csv(rows: Iterable[tuple]) -> Iterator[bytes]:
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    # 엑셀이 UTF-8로 인식하도록 BOM을 붙인다.
+    buffer.write('\ufeff')
+    writer.writerow(HEADER)
+    yield buffer.drain()
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.size >= FLUSH_BYTES:
+            yield buffer.drain()
+    if buffer.size:
+        yield buffer.drain()
+
+
+def iter_jsonl(rows: Iterable[tuple]) -> Iterator[bytes]:
+    buffer = _Buffer()
+    for row in rows:
+        buffer.write(json.dumps(dict(zip(HEADER, map(_text, row))), ensure_ascii=False))
+        buffer.write('\n')
+        if buffer.size >= FLUSH_BYTES:
+            yield buffer.drain()
+    if buffer.size:
+        yield buffer.drain()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ExportUnavailable('parquet 내보내기에는 pyarrow가 필요합니다.') from exc
+    return pyarrow
+
+
+class _Sink(io.RawIOBase):
+    """ParquetWriter가 쓴 바이트를 모아 두었다가 행 그룹마다 꺼내 간다."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(rows: Iterable[tuple], row_group_size: int = PARQUET_ROW_GROUP) -> Iterator[bytes]:
+    """행 그룹 단위로 열을 모아 Parquet을 쓴다. 메모리는 행 그룹 하나 크기로 제한된다."""
+
+    pa = _pyarrow()
+    tz = timezone.get_current_timezone_name()
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('occurred_at', pa.timestamp('us', tz=tz)),
+        ('kind', pa.string()),
+        ('amount', pa.decimal128(14, 2)),
+        ('account', pa.string()),
+        ('category', pa.string()),
+        ('task', pa.string()),
+        ('memo', pa.string()),
+        ('created_at', pa.timestamp('us', tz=tz)),
+    ])
+    sink = _Sink()
+    writer = pa.parquet.ParquetWriter(sink, schema, compression='snappy')
+    columns: list[list] = [[] for _ in HEADER]
+
+    def flush():
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=schema.field(index).type) for index, values in enumerate(columns)], schema=schema,
+        ))
+        for values in columns:
+            values.clear()
+
+    for row in rows:
+        for values, value in zip(columns, row):
+            values.append(value)
+        if len(columns[0]) >= row_group_size:
+            flush()
+            yield sink.drain()
+    if columns[0]:
+        flush()
+    writer.close()
+    yield sink.drain()
+
+
+# 형식 → (인코더, Content-Type, 확장자)
+FORMATS: dict[str, tuple[Callable[[Iterable[tuple]], Iterator[bytes]], str, str]] = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson; charset=utf-8', 'jsonl'),
+    'parquet': (iter_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def stream_export(owner, fmt: str, first_day: date | None = None, last_day: date | None = None,
+                  chunk_size: int = 2000) -> Iterator[bytes]:
+    encoder = FORMATS[fmt][0]
+    if fmt == 'parquet':
+        # 응답을 시작하기 전에 의존성 여부를 확인해 스트림 도중 실패하지 않게 한다.
+        _pyarrow()
+    return encoder(export_rows(owner, first_day, last_day, chunk_size=chunk_size))
+
+
+def export_filename(owner, fmt: str) -> str:
+    return f'ledger-{owner.username}-{timezone.localdate().isoformat()}.{FORMATS[fmt][2]}'
@@ -0,0 +1,421 @@
+"""은행 내역(CSV/OFX/QIF) 스트리밍 가져오기.
+
+- 파서는 파일을 한 줄씩 읽어 `StatementRow`를 하나씩 내보내므로 파일 크기와 무관하게 메모리가 일정하다.
+  중복 판별용 같은 내용 횟수도 지금 날짜의 행만 들고 있는다(내역은 날짜순이다).
+- 금액 부호로 수입/지출을 정하고, 금액은 기존 거래처럼 양수로 저장한다.
+- 같은 내역을 다시 올려도 중복되지 않도록 행 내용으로 만든 `import_hash`를 기존 거래와 비교한다.
+- 쓰기는 chunk_size 단위 bulk_create이며, 파생 데이터는 청크마다 한 번에 반영한다.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Iterable, Iterator
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.bulk import ledger_state, transaction_effects
+
+from .models import Account, Category, Transaction
+from .signals import muted
+
+FORMATS = ('csv', 'ofx', 'qif')
+DEFAULT_CATEGORY = '미분류'
+MAX_REPORTED_ERRORS = 100
+# Transaction.amount에 들어가지 않는 금액은 DB 오류(전체 업로드 실패) 대신 행 오류로 돌린다.
+AMOUNT_PLACES = Transaction._meta.get_field('amount').decimal_places
+AMOUNT_INTEGER_DIGITS = Transaction._meta.get_field('amount').max_digits - AMOUNT_PLACES
+
+# CSV 헤더 자동 인식용 별칭. 소문자로 비교한다.
+CSV_COLUMNS = {
+    'date': ('date', 'occurred_at', 'posted', 'transaction date', '날짜', '거래일', '거래일시'),
+    'amount': ('amount', '금액', '거래금액'),
+    'memo': ('memo', 'description', 'payee', 'name', '내용', '적요', '메모'),
+    'category': ('category', '분류', '카테고리'),
+    'account': ('account', '계정', '계좌'),
+    'kind': ('kind', 'type', '구분'),
+}
+KIND_ALIASES = {
+    'expense': 'expense', '지출': 'expense', 'debit': 'expense', '출금': 'expense',
+    'income': 'income', '수입': 'income', 'credit': 'income', '입금': 'income',
+    'transfer': 'transfer', '이체': 'transfer',
+}
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y%m%d', '%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d %H:%M', '%Y.%m.%d %H:%M')
+
+
+class StatementError(ValueError):
+    """행 하나를 해석할 수 없을 때. 가져오기 전체는 계속된다."""
+
+
+@dataclass
+class StatementRow:
+    line: int
+    occurred_at: datetime
+    amount: Decimal
+    kind: str
+    memo: str = ''
+    category: str = ''
+    account: str = ''
+    external_id: str = ''
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    created: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': str(message)})
+
+    def as_dict(self):
+        return {
+            'read': self.read, 'created': self.created, 'duplicates': self.duplicates,
+            'failed': self.failed, 'errors': self.errors,
+        }
+
+
+# ---- 값 해석 -----------------------------------------------------------
+
+def parse_amount(raw: str) -> Decimal:
+    text = (raw or '').strip().replace(',', '').replace(' ', '')
+    negative = text.startswith('(') and text.endswith(')')
+    text = re.sub(r'[^0-9.+-]', '', text)
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        raise StatementError(f'금액을 해석할 수 없습니다: {raw!r}')
+    _, digits, exponent = value.normalize().as_tuple()
+    if exponent < -AMOUNT_PLACES:
+        raise StatementError(f'금액은 소수 {AMOUNT_PLACES}자리까지만 쓸 수 있습니다: {raw!r}')
+    if len(digits) + exponent > AMOUNT_INTEGER_DIGITS:
+        raise StatementError(f'금액이 너무 큽니다(정수 {AMOUNT_INTEGER_DIGITS}자리까지): {raw!r}')
+    return -abs(value) if negative else value
+
+
+def parse_when(raw: str, date_format: str | None = None) -> datetime:
+    text = (raw or '').strip()
+    value = None
+    if date_format:
+        try:
+            value = datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+    else:
+        value = parse_datetime(text.replace(' ', 'T', 1)) if ' ' in text or 'T' in text else None
+        for fmt in DATE_FORMATS:
+            if value is not None:
+                break
+            try:
+                value = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+    if value is None:
+        raise StatementError(f'날짜를 해석할 수 없습니다: {raw!r}')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return value
+
+
+def signed_kind(amount: Decimal, raw_kind: str = '') -> tuple[Decimal, str]:
+    """명시된 구분이 있으면 따르고, 없으면 음수=지출, 양수=수입으로 본다."""
+
+    kind = KIND_ALIASES.get((raw_kind or '').strip().lower())
+    if kind is None:
+        kind = 'expense' if amount < 0 else 'income'
+    return abs(amount), kind
+
+
+# ---- 파서 --------------------------------------------------------------
+
+def _text_lines(stream, encoding='utf-8-sig') -> Iterator[str]:
+    """바이트/텍스트 스트림을 가리지 않고 한 줄씩 디코딩한다."""
+
+    decoder = None
+    for chunk in stream:
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunk = decoder.decode(chunk)
+        yield chunk
+
+
+def parse_csv(stream, columns: dict[str, str] | None = None, date_format: str | None = None,
+              delimiter: str = ',') -> Iterator[StatementRow | StatementError]:
+    reader = csv.reader(_text_lines(stream), delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = [name.strip().lower() for name in header]
+    mapping = {}
+    for key, aliases in CSV_COLUMNS.items():
+        wanted = (columns or {}).get(key)
+        candidates = (wanted.strip().lower(),) if wanted else aliases
+        mapping[key] = next((lowered.index(name) for name in candidates if name in lowered), None)
+    if mapping['date'] is None or mapping['amount'] is None:
+        raise StatementError('CSV 헤더에서 날짜/금액 열을 찾을 수 없습니다.')
+
+    def cell(row, key):
+        index = mapping[key]
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    for row in reader:
+        line = reader.line_num
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            amount, kind = signed_kind(parse_amount(cell(row, 'amount')), cell(row, 'kind'))
+            yield StatementRow(
+                line=line, occurred_at=parse_when(cell(row, 'date'), date_format), amount=amount, kind=kind,
+                memo=cell(row, 'memo'), category=cell(row, 'category'), account=cell(row, 'account'),
+            )
+        except StatementError as exc:
+            exc.line = line
+            yield exc
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_date(raw: str) -> datetime:
+    # 20240315120000.000[+9:KST] → 앞 14자리만 쓰고, 시간대 표기가 있으면 그 오프셋을 적용한다.
+    digits = re.match(r'(\d{8})(\d{6})?', raw.strip())
+    if not digits:
+        raise StatementError(f'날짜를 해석할 수 없습니다: {raw!r}')
+    value = datetime.strptime(digits.group(1) + (digits.group(2) or '000000'), '%Y%m%d%H%M%S')
+    offset = re.search(r'\[([+-]?\d+(?:\.\d+)?)', raw)
+    if offset:
+        hours = float(offset.group(1))
+        return value.replace(tzinfo=timezone.get_fixed_timezone(int(hours * 60)))
+    return timezone.make_aware(value, timezone.get_default_timezone())
+
+
+def parse_ofx(stream) -> Iterator[StatementRow | StatementError]:
+    """OFX 1.x(SGML, 닫는 태그 생략 가능)와 2.x(XML)의 <STMTTRN> 블록을 한 줄씩 읽는다."""
+
+    current = None
+    line = 0
+    start_line = 0
+    for text in _text_lines(stream):
+        line += 1
+        for closing, tag, value in OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield _ofx_row(current, start_line)
+                    current = None
+                elif not closing:
+                    current, start_line = {}, line
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def _ofx_row(values, line) -> StatementRow | StatementError:
+    try:
+        amount, kind = signed_kind(parse_amount(values.get('TRNAMT', '')))
+        memo = ' '.join(part for part in (values.get('NAME', ''), values.get('MEMO', '')) if part)
+        return StatementRow(
+            line=line, occurred_at=_ofx_date(values.get('DTPOSTED', '')), amount=amount, kind=kind,
+            memo=memo[:255], external_id=values.get('FITID', ''),
+        )
+    except StatementError as exc:
+        exc.line = line
+        return exc
+
+
+QIF_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%Y-%m-%d')
+
+
+def parse_qif(stream, date_format: str | None = None) -> Iterator[StatementRow | StatementError]:
+    current: dict[str, str] = {}
+    start_line = 0
+    line = 0
+    for text in _text_lines(stream):
+        for raw in text.splitlines():
+            line += 1
+            raw = raw.strip()
+            if not raw or raw.startswith('!'):
+                continue
+            if raw == '^':
+                if current:
+                    yield _qif_row(current, start_line, date_format)
+                current = {}
+                continue
+            if not current:
+                start_line = line
+            current.setdefault(raw[0], raw[1:].strip())
+    if current:
+        yield _qif_row(current, start_line, date_format)
+
+
+def _qif_row(values, line, date_format) -> StatementRow | StatementError:
+    try:
+        # Quicken은 3/15'24처럼 연도 앞에 '를 쓰기도 한다.
+        raw_date = values.get('D', '').replace("'", '/').replace(' ', '')
+        occurred_at = None
+        for fmt in ((date_format,) if date_format else QIF_DATE_FORMATS):
+            try:
+                occurred_at = timezone.make_aware(datetime.strptime(raw_date, fmt), timezone.get_default_timezone())
+                break
+            except ValueError:
+                continue
+        if occurred_at is None:
+            raise StatementError(f'날짜를 해석할 수 없습니다: {values.get("D")!r}')
+        amount, kind = signed_kind(parse_amount(values.get('T') or values.get('U', '')))
+        memo = ' '.join(part for part in (values.get('P', ''), values.get('M', '')) if part)
+        return StatementRow(
+            line=line, occurred_at=occurred_at, amount=amount, kind=kind,
+            memo=memo[:255], category=values.get('L', '').split(':')[0],
+        )
+    except StatementError as exc:
+        exc.line = line
+        return exc
+
+
+def detect_format(name: str) -> str:
+    suffix = (name or '').rsplit('.', 1)[-1].lower()
+    if suffix in ('ofx', 'qfx'):
+        return 'ofx'
+    if suffix == 'qif':
+        return 'qif'
+    return 'csv'
+
+
+def parse(stream, fmt: str, **options) -> Iterator[StatementRow | StatementError]:
+    if fmt == 'ofx':
+        return parse_ofx(stream)
+    if fmt == 'qif':
+        return parse_qif(stream, date_format=options.get('date_format'))
+    return parse_csv(
+        stream, columns=options.get('columns'), date_format=options.get('date_format'),
+        delimiter=options.get('delimiter') or ',',
+    )
+
+
+# ---- 중복 판별과 쓰기 ----------------------------------------------------
+
+def row_hash(account_id: int, row: StatementRow, occurrence: int = 0) -> str:
+    """행 내용으로 만든 중복 판별 키.
+
+    OFX FITID가 있으면 계정 안에서 유일하므로 그것만 쓴다. 없으면 같은 날 같은 금액의
+    거래가 여러 건일 수 있어 파일 안에서 몇 번째로 나온 같은 내용인지(occurrence)를 함께 넣는다.
+    """
+
+    if row.external_id:
+        raw = f'{account_id}|fitid|{row.external_id}'
+    else:
+        when = row.occurred_at.astimezone(dt_timezone.utc).isoformat()
+        memo = ' '.join(row.memo.lower().split())
+        raw = f'{account_id}|{when}|{row.amount:.2f}|{row.kind}|{memo}|{occurrence}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class StatementImporter:
+    """파서가 내보낸 행을 청크 단위로 계정/분류에 매핑하고 중복을 걸러 저장한다."""
+
+    def __init__(self, owner, account: Account | None = None, chunk_size: int = 1000,
+                 progress: Callable[[ImportResult], None] | None = None):
+        self.owner = owner
+        self.account = account
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.result = ImportResult()
+        self._accounts = {account.name: account} if account else {}
+        self._categories: dict[tuple[str, str], Category] = {}
+        # 같은 내용이 지금 날짜 안에서 몇 번 나왔는지. 원본 행 대신 16바이트 요약만 들고 있는다.
+        self._occurrences: dict[bytes, int] = {}
+        self._occurrence_day = None
+
+    def _resolve_account(self, name: str) -> Account:
+        if not name:
+            if self.account is None:
+                raise StatementError('계정을 지정하거나 account 열을 포함해야 합니다.')
+            return self.account
+        if name not in self._accounts:
+            found = Account.objects.filter(owner=self.owner, name=name).first()
+            if found is None:
+                raise StatementError(f'존재하지 않는 계정입니다: {name!r}')
+            self._accounts[name] = found
+        return self._accounts[name]
+
+    def _resolve_category(self, name: str, kind: str) -> Category:
+        name = (name or DEFAULT_CATEGORY)[:100]
+        key = (name, kind)
+        if key not in self._categories:
+            self._categories[key], _ = Category.objects.get_or_create(owner=self.owner, name=name, kind=kind)
+        return self._categories[key]
+
+    def _occurrence(self, account_id: int, row: StatementRow) -> int:
+        """같은 내용은 시각까지 같으므로 같은 날짜 안에서만 센다. 내역 파일은 날짜순(오름/내림 무관)이라
+        날짜가 바뀌면 앞 날짜의 기록을 버린다. 그래서 메모리는 파일 크기가 아니라 하루치 행 수에 비례한다."""
+
+        if row.external_id:
+            return 0
+        day = row.occurred_at.astimezone(dt_timezone.utc).date()
+        if day != self._occurrence_day:
+            self._occurrences.clear()
+            self._occurrence_day = day
+        digest = hashlib.blake2b(row_hash(account_id, row).encode(), digest_size=16).digest()
+        seen = self._occurrences.get(digest, 0)
+        self._occurrences[digest] = seen + 1
+        return seen
+
+    def run(self, rows: Iterable[StatementRow | StatementError]) -> ImportResult:
+        chunk: list[Transaction] = []
+        for row in rows:
+            self.result.read += 1
+            if isinstance(row, StatementError):
+                self.result.add_error(getattr(row, 'line', None), row)
+                continue
+            try:
+                account = self._resolve_account(row.account)
+                category = self._resolve_category(row.category, row.kind)
+            except StatementError as exc:
+                self.result.add_error(row.line, exc)
+                continue
+            chunk.append(Transaction(
+                owner=self.owner, account=account, category=category, amount=row.amount,
+                memo=row.memo[:255], occurred_at=row.occurred_at,
+                import_hash=row_hash(account.id, row, self._occurrence(account.id, row)),
+            ))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+        return self.result
+
+    def _flush(self, chunk: list[Transaction]) -> None:
+        existing = set(
+            Transaction.objects.filter(owner=self.owner, import_hash__in=[tx.import_hash for tx in chunk])
+            .values_list('import_hash', flat=True)
+        )
+        fresh = [tx for tx in chunk if tx.import_hash not in existing]
+        self.result.duplicates += len(chunk) - len(fresh)
+        if fresh:
+            with transaction.atomic(), muted():
+                created = Transaction.objects.bulk_create(fresh, batch_size=self.chunk_size)
+                transaction_effects(self.owner.id, [], [ledger_state(tx) for tx in created])
+            self.result.created += len(created)
+        if self.progress:
+            self.progress(self.result)
+
+
+def import_statement(owner, stream, fmt: str, account: Account | None = None, chunk_size: int = 1000,
+                     progress=None, **options) -> ImportResult:
+    if fmt not in FORMATS:
+        raise StatementError(f'지원하지 않는 형식입니다: {fmt}')
+    importer = StatementImporter(owner, account=account, chunk_size=chunk_size, progress=progress)
+    return importer.run(parse(stream, fmt, **options))
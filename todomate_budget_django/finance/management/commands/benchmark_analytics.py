@@ -0,0 +1,103 @@
+"""가계부 분석 API(/api/finance/analytics/...)를 사용자당 여러 해 데이터 위에서 잰다.
+
+    python manage.py benchmark_analytics                          # 사용자 1명, 5년, 거래 50,000건
+    python manage.py benchmark_analytics --years 5 --transactions 200000 --repeat 20
+
+테스트 DB에 generate_load_data와 같은 생성기로 데이터를 채우고, 엔드포인트마다
+캐시를 비운 요청(cold)과 캐시된 요청(warm)의 p50/p95와 쿼리 수를 출력한다.
+비교용으로 같은 5년 일별·분류별 합계를 롤업 없이 Transaction에서 바로 GROUP BY 하는 시간도 잰다.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import loadgen, perf
+from core.profiling import percentile
+from finance.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Time the spending analytics endpoints over several years of data per user, cold and cached.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=5)
+        parser.add_argument('--transactions', type=int, default=50_000, help='Transactions per user.')
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        if min(options['years'], options['transactions'], options['users'], options['repeat']) < 1:
+            raise CommandError('--years, --transactions, --users and --repeat must be positive.')
+
+        with perf.throwaway_database(options['keepdb']):
+            rows = self._run(options)
+
+        self.stdout.write(f'{"endpoint":44} {"mode":5} {"queries":>7} {"p50 ms":>9} {"p95 ms":>9}')
+        for name, mode, queries, timings in rows:
+            self.stdout.write(
+                f'{name:44} {mode:5} {queries:>7} {percentile(timings, 0.5):>9.2f} {percentile(timings, 0.95):>9.2f}'
+            )
+
+    def _run(self, options):
+        days = 365 * options['years']
+        spec = loadgen.LoadSpec(
+            users=options['users'], transactions=options['transactions'], tasks=100, days=days,
+            budget_months=0, prefix='analytics_bench_',
+        )
+        self.stdout.write(f'Seeding {options["users"]} user(s) x {options["transactions"]} transactions over {days} days...')
+        owner_ids = loadgen.generate(spec)
+        client = Client()
+        client.force_login(get_user_model().objects.get(pk=owner_ids[0]))
+
+        today = timezone.localdate()
+        start = (today - timedelta(days=days - 1)).isoformat()
+        paths = {
+            'series day, 5y': f'/api/finance/analytics/series/?from={start}',
+            'series week by category, 5y': f'/api/finance/analytics/series/?from={start}&granularity=week&group_by=category',
+            'series month by account, 5y': f'/api/finance/analytics/series/?from={start}&granularity=month&group_by=account',
+            'yoy by category': '/api/finance/analytics/yoy/?group_by=category',
+            'rolling 7/30, 1y': f'/api/finance/analytics/rolling/?from={(today - timedelta(days=364)).isoformat()}',
+        }
+        rows = []
+        for name, path in paths.items():
+            for mode in ('cold', 'warm'):
+                timings, queries = [], 0
+                for attempt in range(options['repeat'] + 1):
+                    if mode == 'cold':
+                        caches['default'].clear()
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = client.get(path)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    if response.status_code != 200:
+                        raise CommandError(f'GET {path} returned {response.status_code}')
+                    queries = len(captured)
+                    if attempt:
+                        timings.append(elapsed)
+                rows.append((name, mode, queries, timings))
+
+        # 롤업 없이 거래에서 바로 5년 일별·분류별 합계를 낼 때
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            list(
+                Transaction.objects.filter(owner_id=owner_ids[0], category__kind='expense').order_by()
+                .annotate(day=TruncDate('occurred_at', tzinfo=timezone.get_default_timezone()))
+                .values('day', 'category_id').annotate(amount=Sum('amount'))
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        rows.append(('(no rollup) Transaction GROUP BY day, category', 'query', 1, timings))
+        return rows
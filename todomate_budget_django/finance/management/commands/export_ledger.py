@@ -0,0 +1,47 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance.exports import FORMATS, ExportUnavailable, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream one user's full transaction history as CSV, JSON Lines or Parquet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', required=True, help='Username to export.')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', default='-', help="Destination file, '-' for stdout.")
+        parser.add_argument('--from', dest='first_day', help='First local date (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='last_day', help='Last local date (YYYY-MM-DD).')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip.')
+
+    def handle(self, *args, **options):
+        owner = get_user_model().objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"Unknown user {options['owner']!r}.")
+        days = {}
+        for key in ('first_day', 'last_day'):
+            if options[key]:
+                days[key] = parse_date(options[key])
+                if days[key] is None:
+                    raise CommandError(f'Invalid date {options[key]!r}.')
+
+        try:
+            chunks = stream_export(owner, options['format'], chunk_size=options['chunk_size'], **days)
+        except ExportUnavailable as exc:
+            raise CommandError(str(exc))
+
+        written = 0
+        target = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if target is not sys.stdout.buffer:
+                target.close()
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}."))
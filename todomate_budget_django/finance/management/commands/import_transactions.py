@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.importers import FORMATS, StatementError, detect_format, import_statement
+from finance.models import Account
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/OFX/QIF bank statement into Transaction rows, skipping rows imported before.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file path.')
+        parser.add_argument('--owner', required=True, help='Username that owns the imported rows.')
+        parser.add_argument('--account', help='Account name used when the file has no account column.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--date-format', help='strptime format for the date column, e.g. %%d/%%m/%%Y.')
+        parser.add_argument('--delimiter', default=',', help='CSV delimiter.')
+        parser.add_argument('--encoding', default='utf-8-sig', help='CSV/QIF text encoding.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows written per bulk insert.')
+        for column in ('date', 'amount', 'memo', 'category', 'account', 'kind'):
+            parser.add_argument(f'--{column}-column', dest=f'{column}_column', help=f'CSV header holding the {column}.')
+
+    def handle(self, *args, **options):
+        owner = get_user_model().objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"Unknown user {options['owner']!r}.")
+        account = None
+        if options['account']:
+            account = Account.objects.filter(owner=owner, name=options['account']).first()
+            if account is None:
+                raise CommandError(f"Unknown account {options['account']!r} for {owner.username}.")
+
+        columns = {
+            column: options[f'{column}_column']
+            for column in ('date', 'amount', 'memo', 'category', 'account', 'kind')
+            if options[f'{column}_column']
+        }
+
+        def progress(result):
+            self.stdout.write(f'  read {result.read}, created {result.created}, duplicates {result.duplicates}, failed {result.failed}')
+
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], newline='', encoding=options['encoding'], errors='replace') as stream:
+                result = import_statement(
+                    owner, stream, fmt, account=account, chunk_size=options['chunk_size'], progress=progress,
+                    columns=columns, date_format=options['date_format'], delimiter=options['delimiter'],
+                )
+        except (OSError, StatementError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"  line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} transactions ({result.duplicates} duplicates, {result.failed} failed).'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from finance import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyLedgerRollup from Transaction rows, a chunk of owners at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, action='append', dest='owners', help='Only rebuild this owner id (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Owners aggregated per transaction.')
+
+    def handle(self, *args, **options):
+        written = rollups.rebuild(options['owners'], chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} rollup rows.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from finance import balances
+
+
+class Command(BaseCommand):
+    help = 'Recompute Account.balance from transactions in bulk and report (or repair) drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, action='append', dest='owners', help='Only check this owner id (repeatable).')
+        parser.add_argument('--repair', action='store_true', help='Overwrite drifted balances with the recomputed value.')
+        parser.add_argument('--chunk-size', type=int, default=balances.ACCOUNT_BATCH, help='Accounts checked per transaction.')
+
+    def handle(self, *args, **options):
+        drift = balances.verify(
+            options['owners'], repair=options['repair'], chunk_size=options['chunk_size'], stdout=self.stdout,
+        )
+        for account_id, stored, expected in drift:
+            self.stdout.write(f'  account {account_id}: stored {stored}, expected {expected} (drift {stored - expected})')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All balances match.'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} account balances.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} account balances drifted; rerun with --repair.'))
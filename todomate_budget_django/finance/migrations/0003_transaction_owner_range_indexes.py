@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0002_ensure_transaction_task_link"),
+        ("tasks", "0002_task_owner_range_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["owner", "occurred_at"], name="tx_owner_occurred_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("task__isnull", True)),
+                fields=["owner", "occurred_at"],
+                name="tx_owner_loose_occurred_idx",
+            ),
+        ),
+    ]
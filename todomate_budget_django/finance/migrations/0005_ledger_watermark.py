@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("finance", "0004_daily_ledger_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerWatermark",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ledger_watermark",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+                ("changed_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0005_ledger_watermark"),
+        ("tasks", "0004_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="tx_owner_occurred_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["owner", "occurred_at", "id"], name="tx_owner_occurred_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0006_keyset_pagination_index"),
+        ("tasks", "0004_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="import_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("import_hash", ""), _negated=True),
+                fields=["owner", "import_hash"],
+                name="tx_owner_import_hash_idx",
+            ),
+        ),
+    ]
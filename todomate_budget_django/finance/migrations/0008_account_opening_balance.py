@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:17
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, When
+
+
+def split_opening_balance(apps, schema_editor):
+    """Keep the hand-entered balance as the opening balance and fold existing transactions into balance."""
+    Account = apps.get_model('finance', 'Account')
+    Transaction = apps.get_model('finance', 'Transaction')
+    # 지금까지 balance는 거래가 반영되지 않은 사용자 입력값이었다.
+    Account.objects.update(opening_balance=F('balance'))
+    signed = Case(
+        When(category__kind='income', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+    sums = (
+        Transaction.objects.order_by().values('account_id').annotate(total=Sum(signed)).values_list('account_id', 'total')
+    )
+    for account_id, total in sums.iterator(chunk_size=2000):
+        Account.objects.filter(pk=account_id).update(balance=F('opening_balance') + total)
+
+
+def merge_opening_balance(apps, schema_editor):
+    Account = apps.get_model('finance', 'Account')
+    Account.objects.update(balance=F('opening_balance'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0007_transaction_import_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="opening_balance",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(split_opening_balance, merge_opening_balance),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_spent(apps, schema_editor):
+    """Seed BudgetItem.spent from the daily rollup for items created before the counter existed."""
+    BudgetItem = apps.get_model('finance', 'BudgetItem')
+    DailyLedgerRollup = apps.get_model('finance', 'DailyLedgerRollup')
+    spent = Subquery(
+        DailyLedgerRollup.objects.filter(
+            owner_id=OuterRef('period__owner_id'),
+            category_id=OuterRef('category_id'),
+            date__gte=OuterRef('period__start_date'),
+            date__lte=OuterRef('period__end_date'),
+        ).order_by().values('category_id').annotate(total=Sum('total')).values('total')
+    )
+    rows = BudgetItem.objects.annotate(actual=Coalesce(spent, Value(Decimal('0')), output_field=models.DecimalField(max_digits=16, decimal_places=2)))
+    for pk, actual in rows.values_list('pk', 'actual').iterator(chunk_size=2000):
+        if actual:
+            BudgetItem.objects.filter(pk=pk).update(spent=actual)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0008_account_opening_balance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="budgetitem",
+            name="alert_level",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="budgetitem",
+            name="spent",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=16
+            ),
+        ),
+        migrations.CreateModel(
+            name="BudgetAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("threshold", models.PositiveSmallIntegerField()),
+                ("spent", models.DecimalField(decimal_places=2, max_digits=16)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alerts",
+                        to="finance.budgetitem",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="budget_alerts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "created_at"], name="budget_alert_owner_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_spent, migrations.RunPython.noop),
+    ]
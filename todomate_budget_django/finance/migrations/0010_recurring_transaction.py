@@ -0,0 +1,105 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0009_budget_utilization"),
+        ("tasks", "0005_task_recurrence"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="recurrence_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="RecurringTransaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("memo", models.CharField(blank=True, max_length=255)),
+                ("starts_at", models.DateTimeField()),
+                ("recurrence", models.CharField(max_length=200)),
+                ("exceptions", models.JSONField(blank=True, default=list)),
+                (
+                    "recurrence_until",
+                    models.DateField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "materialized_until",
+                    models.DateField(blank=True, editable=False, null=True),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="recurring_transactions",
+                        to="finance.account",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="recurring_transactions",
+                        to="finance.category",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recurring_transactions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["starts_at", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="recurring",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="transactions",
+                to="finance.recurringtransaction",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="transaction",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("recurring__isnull", False)),
+                fields=("recurring", "recurrence_date"),
+                name="tx_unique_recurrence",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recurringtransaction",
+            index=models.Index(
+                fields=["owner", "starts_at"], name="recurring_tx_owner_start_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core import recurrence
 
 User = get_user_model()
 
@@ -13,6 +16,8 @@ class Account(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='accounts')
     name = models.CharField(max_length=100)
     type = models.CharField(max_length=10, choices=TYPE_CHOICES, default="cash")
+    # 사용자가 입력하는 시작 잔액. balance는 여기에 거래를 반영한 값으로 finance.balances가 관리한다.
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
 
     class Meta:
@@ -21,6 +26,20 @@ class Account(models.Model):
     def __str__(self):
         return f"{self.name} ({self.owner})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # balance는 파생값이다. 만들 때 넘긴 값을 말없이 버리지 않도록 opening_balance와 다르면 거부한다.
+            if self.balance and self.balance != self.opening_balance:
+                raise ValueError("Account.balance는 거래에서 계산됩니다. 시작 잔액은 opening_balance로 지정하세요.")
+            self.balance = self.opening_balance
+        elif kwargs.get("update_fields") is None:
+            # balance는 F()로만 바꾼다. 이름 수정 같은 일반 저장이 메모리의 오래된 값으로 덮어쓰지 않게 뺀다.
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "balance"
+            ]
+        super().save(*args, **kwargs)
+
 class Category(models.Model):
     KIND_CHOICES = [("expense","Expense"), ("income","Income"), ("transfer","Transfer")]
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories')
@@ -50,13 +69,118 @@ class Transaction(models.Model):
     memo = models.CharField(max_length=255, blank=True)
     occurred_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # 은행 내역 가져오기로 만든 거래의 내용 해시. 같은 파일을 다시 올려도 중복되지 않게 한다.
+    import_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    # 반복 거래 템플릿에서 만들어진 거래라면 그 템플릿과 원래 발생 날짜
+    recurring = models.ForeignKey(
+        'RecurringTransaction', on_delete=models.SET_NULL, related_name='transactions', null=True, blank=True,
+        editable=False,
+    )
+    recurrence_date = models.DateField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-occurred_at","-created_at"]
+        indexes = [
+            # 하루 범위 조회와 (occurred_at, id) 키셋 페이지네이션을 함께 받친다.
+            models.Index(fields=["owner", "occurred_at", "id"], name="tx_owner_occurred_id_idx"),
+            # 일정에 연결되지 않은 지출만 보여주는 섹션을 위한 부분 인덱스
+            models.Index(
+                fields=["owner", "occurred_at"],
+                name="tx_owner_loose_occurred_idx",
+                condition=models.Q(task__isnull=True),
+            ),
+            models.Index(
+                fields=["owner", "import_hash"],
+                name="tx_owner_import_hash_idx",
+                condition=~models.Q(import_hash=""),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recurring", "recurrence_date"],
+                name="tx_unique_recurrence",
+                condition=models.Q(recurring__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.category.kind}: {self.amount} on {self.occurred_at.date()}"
 
+class RecurringTransaction(models.Model):
+    """월세·구독료처럼 규칙적으로 반복되는 거래의 템플릿.
+
+    규칙 하나만 저장하고, 지난 발생은 `materialize_recurrences` 명령이 실제 거래로 만든다.
+    아직 오지 않은 발생은 플래너에서 예정 거래로만 보여주며 잔액/예산에는 반영하지 않는다.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_transactions')
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name='recurring_transactions')
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='recurring_transactions')
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    memo = models.CharField(max_length=255, blank=True)
+    # 첫 발생 시각. 이후 발생도 같은 지역 시각에 놓인다.
+    starts_at = models.DateTimeField()
+    recurrence = models.CharField(max_length=200)
+    # 건너뛸 발생 날짜(ISO 문자열 목록)
+    exceptions = models.JSONField(default=list, blank=True)
+    recurrence_until = models.DateField(null=True, blank=True, editable=False)
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["starts_at", "id"]
+        indexes = [
+            models.Index(fields=["owner", "starts_at"], name="recurring_tx_owner_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recurrence}: {self.amount} ({self.memo or self.category})"
+
+    def save(self, *args, **kwargs):
+        start = timezone.localdate(self.starts_at) if self.starts_at else None
+        self.recurrence_until = recurrence.rule_end(self.recurrence, start)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "recurrence" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "recurrence_until"}
+        super().save(*args, **kwargs)
+
+class DailyLedgerRollup(models.Model):
+    """지역 날짜 × 분류 × 계정 단위로 미리 합산해 둔 거래 집계.
+
+    Transaction 저장/삭제 시그널이 증분으로 갱신하며, 대시보드와 목록의 합계 카드는
+    거래 전체 대신 이 테이블의 하루치 행만 읽는다. `rebuild_ledger_rollup` 명령으로 재생성할 수 있다.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ledger_rollups')
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=Category.KIND_CHOICES)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ledger_rollups')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='ledger_rollups')
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("owner","date","category","account")
+        indexes = [
+            models.Index(fields=["owner", "date", "kind"], name="rollup_owner_date_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.kind}: {self.total} ({self.count})"
+
+class LedgerWatermark(models.Model):
+    """사용자별 가계부 데이터(거래/계정/분류/예산) 변경 워터마크.
+
+    조건부 요청의 ETag/Last-Modified를 페이로드 직렬화 없이 계산하기 위해 쓰며,
+    finance.signals가 관련 모델 저장/삭제 시 version을 하나씩 올린다.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='ledger_watermark')
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.owner_id} v{self.version} @ {self.changed_at}"
+
 class BudgetPeriod(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budget_periods')
     start_date = models.DateField()
@@ -73,9 +197,30 @@ class BudgetItem(models.Model):
     period = models.ForeignKey(BudgetPeriod, on_delete=models.CASCADE, related_name='items')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='budget_items')
     limit_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    # 기간 안 같은 분류 거래 합계. finance.budgets가 거래 변경분으로 증분 갱신한다.
+    spent = models.DecimalField(max_digits=16, decimal_places=2, default=0, editable=False)
+    # 마지막으로 넘은 알림 임계치(%). 같은 임계치로 알림이 반복되지 않게 한다.
+    alert_level = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         unique_together = ("period","category")
 
     def __str__(self):
         return f"{self.category.name}: {self.limit_amount}"
+
+class BudgetAlert(models.Model):
+    """예산 항목 사용률이 임계치를 처음 넘은 시점의 기록."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budget_alerts')
+    item = models.ForeignKey(BudgetItem, on_delete=models.CASCADE, related_name='alerts')
+    threshold = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=16, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["owner", "created_at"], name="budget_alert_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item} ≥ {self.threshold}%"
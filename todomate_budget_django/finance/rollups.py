@@ -0,0 +1,218 @@
+"""DailyLedgerRollup 증분 갱신과 재생성, 그리고 합계 조회 헬퍼."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import budgets
+from .models import BudgetItem, Category, DailyLedgerRollup, Transaction
+
+# (owner_id, local date, category_id, account_id) → (금액 변화량, 건수 변화량)
+RollupKey = tuple[int, date, int, int]
+
+
+def local_date_of(value) -> date:
+    """occurred_at 값을 기본 시간대의 지역 날짜로 바꾼다. 폼에서 온 문자열도 허용한다."""
+
+    if isinstance(value, str):
+        value = Transaction._meta.get_field('occurred_at').to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return timezone.localtime(value, timezone.get_default_timezone()).date()
+
+
+def rollup_key(owner_id, occurred_at, category_id, account_id) -> RollupKey:
+    return (int(owner_id), local_date_of(occurred_at), int(category_id), int(account_id))
+
+
+# 이 개수 이하의 키는 키마다 UPDATE 한 번이 조회 후 일괄 갱신보다 싸다(시그널의 1~2건 경로).
+SMALL_DELTA_KEYS = 8
+# SQLite 매개변수 한도(999) 안에 들도록 한 번에 다루는 키 수
+KEY_BATCH = 150
+
+
+def apply_deltas(deltas: dict[RollupKey, tuple[Decimal, int]]) -> None:
+    """키별 변화량을 롤업 테이블에 반영한다.
+
+    `bulk_create`처럼 시그널을 거치지 않는 경로도 이 함수를 호출해 롤업을 맞춘다.
+    키가 많으면 기존 행을 한 번에 찾아 CASE UPDATE로 묶고, 없는 행은 bulk_create로 만든다.
+    """
+
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+    if not deltas:
+        return
+
+    kinds = dict(
+        Category.objects.filter(id__in={key[2] for key in deltas}).values_list('id', 'kind')
+    )
+
+    with transaction.atomic():
+        if len(deltas) <= SMALL_DELTA_KEYS:
+            for key, value in deltas.items():
+                _apply_one(key, value, kinds)
+            return
+        keys = list(deltas)
+        for offset in range(0, len(keys), KEY_BATCH):
+            _apply_batch({key: deltas[key] for key in keys[offset:offset + KEY_BATCH]}, kinds)
+
+
+def _lookup(key: RollupKey) -> dict:
+    owner_id, day, category_id, account_id = key
+    return dict(owner_id=owner_id, date=day, category_id=category_id, account_id=account_id)
+
+
+def _apply_one(key: RollupKey, value: tuple[Decimal, int], kinds: dict[int, str]) -> None:
+    amount, count = value
+    lookup = _lookup(key)
+    updated = DailyLedgerRollup.objects.filter(**lookup).update(
+        total=F('total') + amount, count=F('count') + count
+    )
+    if not updated:
+        if count <= 0:
+            # 뺄 대상 행이 없으면(이미 재생성/삭제됨) 음수 행을 만들지 않는다.
+            return
+        try:
+            with transaction.atomic():
+                DailyLedgerRollup.objects.create(kind=kinds[key[2]], total=amount, count=count, **lookup)
+        except IntegrityError:
+            # 동시에 같은 키를 만든 요청이 있었다면 갱신으로 다시 시도한다.
+            DailyLedgerRollup.objects.filter(**lookup).update(
+                total=F('total') + amount, count=F('count') + count
+            )
+    elif count < 0:
+        # 마지막 거래가 빠진 칸은 지워서 테이블이 일 수에 비례하도록 유지한다.
+        DailyLedgerRollup.objects.filter(count__lte=0, **lookup).delete()
+
+
+def _apply_batch(deltas: dict[RollupKey, tuple[Decimal, int]], kinds: dict[int, str]) -> None:
+    candidates = DailyLedgerRollup.objects.filter(
+        owner_id__in={key[0] for key in deltas},
+        date__in={key[1] for key in deltas},
+        category_id__in={key[2] for key in deltas},
+        account_id__in={key[3] for key in deltas},
+    ).values_list('id', 'owner_id', 'date', 'category_id', 'account_id')
+    existing = {}
+    for pk, *key in candidates:
+        if tuple(key) in deltas:
+            existing[tuple(key)] = pk
+
+    if existing:
+        # 증분은 F() 기준 상대값이라 동시에 다른 요청이 갱신해도 합이 맞는다.
+        DailyLedgerRollup.objects.filter(pk__in=existing.values()).update(
+            total=F('total') + Case(
+                *[When(pk=pk, then=Value(deltas[key][0])) for key, pk in existing.items()],
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+            count=F('count') + Case(
+                *[When(pk=pk, then=Value(deltas[key][1])) for key, pk in existing.items()],
+                output_field=IntegerField(),
+            ),
+        )
+        shrunk = [pk for key, pk in existing.items() if deltas[key][1] < 0]
+        if shrunk:
+            DailyLedgerRollup.objects.filter(pk__in=shrunk, count__lte=0).delete()
+
+    missing = {key: value for key, value in deltas.items() if key not in existing and value[1] > 0}
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            DailyLedgerRollup.objects.bulk_create([
+                DailyLedgerRollup(kind=kinds[key[2]], total=amount, count=count, **_lookup(key))
+                for key, (amount, count) in missing.items()
+            ])
+    except IntegrityError:
+        for key, value in missing.items():
+            _apply_one(key, value, kinds)
+
+
+def add_transactions(rows: Iterable, sign: int = 1) -> None:
+    """Transaction 인스턴스(또는 같은 속성을 가진 객체)들을 한 번에 롤업에 더하거나 뺀다."""
+
+    deltas: dict[RollupKey, list] = defaultdict(lambda: [Decimal('0'), 0])
+    for row in rows:
+        key = rollup_key(row.owner_id, row.occurred_at, row.category_id, row.account_id)
+        deltas[key][0] += sign * Decimal(str(row.amount))
+        deltas[key][1] += sign
+    apply_deltas({key: tuple(value) for key, value in deltas.items()})
+
+
+def rebuild(owner_ids: Iterable[int] | None = None, chunk_size: int = 200, stdout=None) -> int:
+    """거래 테이블에서 롤업을 처음부터 다시 만든다. owner 묶음 단위로 나눠 처리한다."""
+
+    if owner_ids is None:
+        owner_ids = Transaction.objects.order_by().values_list('owner_id', flat=True).distinct()
+        # 거래가 모두 삭제된 사용자의 롤업도 지워야 한다.
+        owner_ids = set(owner_ids) | set(
+            DailyLedgerRollup.objects.order_by().values_list('owner_id', flat=True).distinct()
+        )
+    owner_ids = sorted(set(owner_ids))
+
+    written = 0
+    tz = timezone.get_default_timezone()
+    for offset in range(0, len(owner_ids), chunk_size):
+        chunk = owner_ids[offset:offset + chunk_size]
+        rows = (
+            Transaction.objects.filter(owner_id__in=chunk)
+            .order_by()
+            .annotate(day=TruncDate('occurred_at', tzinfo=tz))
+            .values('owner_id', 'day', 'category_id', 'account_id', 'category__kind')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        with transaction.atomic():
+            DailyLedgerRollup.objects.filter(owner_id__in=chunk).delete()
+            objs = [
+                DailyLedgerRollup(
+                    owner_id=row['owner_id'],
+                    date=row['day'],
+                    kind=row['category__kind'],
+                    category_id=row['category_id'],
+                    account_id=row['account_id'],
+                    total=row['total'],
+                    count=row['count'],
+                )
+                for row in rows.iterator(chunk_size=2000)
+            ]
+            DailyLedgerRollup.objects.bulk_create(objs, batch_size=2000)
+            # 예산 사용액은 롤업에서 파생되므로 같은 트랜잭션에서 맞춘다.
+            budgets.recompute(BudgetItem.objects.filter(period__owner_id__in=chunk))
+        written += len(objs)
+        if stdout is not None:
+            stdout.write(f'  owners {offset + len(chunk)}/{len(owner_ids)}, rollup rows {written}')
+    return written
+
+
+def _totals_query(owner, start: date | None, end: date | None):
+    qs = DailyLedgerRollup.objects.filter(owner=owner)
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    return qs.order_by().values('kind').annotate(total=Sum('total'))
+
+
+def totals_by_kind(owner, start: date | None = None, end: date | None = None) -> dict[str, Decimal]:
+    """[start, end] 지역 날짜 구간의 kind별 합계. 구간을 생략하면 전체 기간."""
+
+    return {row['kind']: row['total'] for row in _totals_query(owner, start, end)}
+
+
+async def atotals_by_kind(owner, start: date | None = None, end: date | None = None) -> dict[str, Decimal]:
+    """totals_by_kind의 비동기 버전(ASGI 읽기 경로용)."""
+
+    return {row['kind']: row['total'] async for row in _totals_query(owner, start, end)}
+
+
+def sync_category_kind(category_id: int, kind: str) -> None:
+    """분류의 kind가 바뀌면 해당 분류의 롤업 행도 함께 옮긴다."""
+
+    DailyLedgerRollup.objects.filter(category_id=category_id).exclude(kind=kind).update(kind=kind)
+
@@ -1,37 +1,82 @@
 from rest_framework import serializers
+from core import recurrence
+from core.relations import OwnedPrimaryKeyRelatedField, OwnerUsernameField
 from tasks.models import Task
-from .models import Account, Category, Transaction, BudgetPeriod, BudgetItem
+from .importers import FORMATS
+from .models import Account, Category, Transaction, RecurringTransaction, BudgetPeriod, BudgetItem, BudgetAlert
 
 class AccountSerializer(serializers.ModelSerializer):
-    owner = serializers.ReadOnlyField(source="owner.username")
+    owner = OwnerUsernameField()
     class Meta:
         model = Account
-        fields = ["id","owner","name","type","balance"]
+        fields = ["id","owner","name","type","opening_balance","balance"]
+        # 잔액은 거래로부터 유지되므로 시작 잔액만 입력받는다.
+        read_only_fields = ["balance"]
 
 class CategorySerializer(serializers.ModelSerializer):
-    owner = serializers.ReadOnlyField(source="owner.username")
+    owner = OwnerUsernameField()
     class Meta:
         model = Category
         fields = ["id","owner","name","kind"]
 
 class TransactionSerializer(serializers.ModelSerializer):
-    owner = serializers.ReadOnlyField(source="owner.username")
+    # 계정/분류/일정 id는 요청 사용자 것만, 요청당 모델별 한 번씩만 조회한다(bulk 포함).
+    serializer_related_field = OwnedPrimaryKeyRelatedField
+    owner = OwnerUsernameField()
     # 일정 연동을 위해 Task 기본 키를 직접 주고받는다.
-    task = serializers.PrimaryKeyRelatedField(
+    task = OwnedPrimaryKeyRelatedField(
         queryset=Task.objects.all(), allow_null=True, required=False
     )
 
     class Meta:
         model = Transaction
-        fields = ["id","owner","account","category","task","amount","memo","occurred_at","created_at"]
+        fields = ["id","owner","account","category","task","amount","memo","occurred_at","created_at","recurring","recurrence_date"]
+        read_only_fields = ["recurring","recurrence_date"]
+
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
+    owner = OwnerUsernameField()
+    exceptions = serializers.ListField(child=serializers.DateField(), required=False)
+
+    class Meta:
+        model = RecurringTransaction
+        fields = ["id","owner","account","category","amount","memo","starts_at","recurrence","exceptions",
+                  "recurrence_until","materialized_until","is_active","created_at","updated_at"]
+
+    def validate_recurrence(self, value):
+        try:
+            value = recurrence.normalize(value)
+        except recurrence.InvalidRule as exc:
+            raise serializers.ValidationError(str(exc))
+        if not value:
+            raise serializers.ValidationError("반복 규칙을 입력해주세요.")
+        return value
+
+    def validate_exceptions(self, value):
+        return sorted({day.isoformat() for day in value})
+
+class TransactionImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    account = OwnedPrimaryKeyRelatedField(queryset=Account.objects.all(), required=False, allow_null=True)
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
+    date_format = serializers.CharField(required=False, allow_blank=True)
+    delimiter = serializers.CharField(required=False, max_length=1, default=",")
 
 class BudgetItemSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
     class Meta:
         model = BudgetItem
-        fields = ["id","period","category","limit_amount"]
+        fields = ["id","period","category","limit_amount","spent","alert_level"]
+        read_only_fields = ["spent","alert_level"]
 
 class BudgetPeriodSerializer(serializers.ModelSerializer):
     items = BudgetItemSerializer(many=True, read_only=True)
     class Meta:
         model = BudgetPeriod
         fields = ["id","owner","start_date","end_date","items"]
+
+class BudgetAlertSerializer(serializers.ModelSerializer):
+    category = serializers.ReadOnlyField(source="item.category.name")
+    class Meta:
+        model = BudgetAlert
+        fields = ["id","item","category","threshold","spent","created_at"]
@@ -0,0 +1,204 @@
+"""Transaction 등 가계부 변경을 파생 데이터(DailyLedgerRollup, LedgerWatermark, Account.balance, BudgetItem.spent)에 반영하는 시그널."""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import balances, budgets, rollups, watermarks
+from .models import Account, BudgetItem, BudgetPeriod, Category, RecurringTransaction, Transaction
+
+User = get_user_model()
+
+LEDGER_FIELDS = ('owner_id', 'occurred_at', 'category_id', 'account_id', 'amount', 'task_id')
+
+_state = threading.local()
+
+
+@contextmanager
+def muted():
+    """행 단위 파생 데이터 갱신 시그널을 잠시 끈다.
+
+    bulk 경로처럼 변화량을 한꺼번에 계산해 반영하는 코드가 사용한다.
+    """
+
+    previous = getattr(_state, 'muted', False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+
+def is_muted():
+    return getattr(_state, 'muted', False)
+
+
+def unless_muted(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not is_muted():
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+def ledger_deltas(previous, current):
+    """이전/현재 거래 상태(dict 또는 None)로부터 롤업 키별 변화량을 만든다."""
+
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for state, sign in ((previous, -1), (current, 1)):
+        if state is None:
+            continue
+        key = rollups.rollup_key(state['owner_id'], state['occurred_at'], state['category_id'], state['account_id'])
+        deltas[key][0] += sign * Decimal(str(state['amount']))
+        deltas[key][1] += sign
+    return {key: tuple(value) for key, value in deltas.items()}
+
+
+def is_owner_cascade(origin):
+    """사용자 삭제에 딸려 지워지는 중이면 True. 이때 파생 테이블도 함께 CASCADE되므로 갱신하지 않는다."""
+
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+@receiver(pre_save, sender=Transaction)
+@unless_muted
+def remember_previous_ledger_state(sender, instance, raw=False, **kwargs):
+    # 수정으로 날짜/분류/계정이 바뀌면 이전 칸에서 빼야 하므로 저장 전 값을 읽어 둔다.
+    instance._ledger_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._ledger_previous = Transaction.objects.filter(pk=instance.pk).values(*LEDGER_FIELDS).first()
+
+
+@receiver(post_save, sender=Transaction)
+@unless_muted
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = {field: getattr(instance, field) for field in LEDGER_FIELDS}
+    deltas = ledger_deltas(getattr(instance, '_ledger_previous', None), current)
+    rollups.apply_deltas(deltas)
+    budgets.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Transaction)
+@unless_muted
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    if is_owner_cascade(origin):
+        return
+    previous = {field: getattr(instance, field) for field in LEDGER_FIELDS}
+    deltas = ledger_deltas(previous, None)
+    rollups.apply_deltas(deltas)
+    budgets.apply_deltas(deltas)
+
+
+@receiver(post_save, sender=Transaction)
+@unless_muted
+def update_balance_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_ledger_previous', None)
+    current = {field: getattr(instance, field) for field in LEDGER_FIELDS}
+    balances.apply_states([previous] if previous else [], [current])
+
+
+@receiver(post_delete, sender=Transaction)
+@unless_muted
+def update_balance_on_delete(sender, instance, origin=None, **kwargs):
+    if is_owner_cascade(origin):
+        return
+    balances.apply_states([{field: getattr(instance, field) for field in LEDGER_FIELDS}], [])
+
+
+@receiver(pre_save, sender=Account)
+@unless_muted
+def remember_previous_opening_balance(sender, instance, raw=False, **kwargs):
+    instance._previous_opening_balance = None
+    if not raw and instance.pk is not None:
+        instance._previous_opening_balance = (
+            Account.objects.filter(pk=instance.pk).values_list('opening_balance', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Account)
+@unless_muted
+def apply_opening_balance_change(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_opening_balance', None)
+    if raw or created or previous is None or previous == instance.opening_balance:
+        return
+    balances.apply_deltas({instance.pk: Decimal(str(instance.opening_balance)) - previous})
+    instance.refresh_from_db(fields=['balance'])
+
+
+@receiver(pre_save, sender=Category)
+@unless_muted
+def remember_previous_kind(sender, instance, raw=False, **kwargs):
+    instance._previous_kind = None
+    if not raw and instance.pk is not None:
+        instance._previous_kind = Category.objects.filter(pk=instance.pk).values_list('kind', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@unless_muted
+def recompute_balances_on_kind_change(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_kind', None)
+    if not raw and not created and previous is not None and previous != instance.kind:
+        balances.recompute_for_category(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@unless_muted
+def sync_rollup_kind(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        rollups.sync_category_kind(instance.pk, instance.kind)
+
+
+@receiver(post_save, sender=BudgetItem)
+@unless_muted
+def recompute_budget_item(sender, instance, raw=False, **kwargs):
+    # 분류나 한도가 바뀌면 기간 합계와 알림 단계를 롤업에서 다시 계산한다.
+    if not raw:
+        budgets.recompute(BudgetItem.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=BudgetPeriod)
+@unless_muted
+def recompute_budget_period(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        budgets.recompute(BudgetItem.objects.filter(period=instance))
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=BudgetPeriod)
+@receiver(post_delete, sender=BudgetPeriod)
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+@unless_muted
+def bump_ledger_watermark(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw and not is_owner_cascade(origin):
+        watermarks.bump(instance.owner_id)
+
+
+@receiver(post_save, sender=BudgetItem)
+@receiver(post_delete, sender=BudgetItem)
+@unless_muted
+def bump_ledger_watermark_for_item(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or is_owner_cascade(origin):
+        return
+    owner_id = BudgetPeriod.objects.filter(pk=instance.period_id).values_list('owner_id', flat=True).first()
+    if owner_id is not None:
+        watermarks.bump(owner_id)
@@ -1,8 +1,19 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
-from .models import Account, Category, Transaction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .models import Account, Category, Transaction, RecurringTransaction, DailyLedgerRollup, LedgerWatermark, BudgetPeriod, BudgetItem, BudgetAlert
+from . import balances, rollups
+from .signals import muted
+from tasks.models import Task
 from django.utils import timezone
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
 
 class FinanceModelsTest(TestCase):
     def setUp(self):
@@ -13,3 +24,658 @@ class FinanceModelsTest(TestCase):
     def test_transaction(self):
         tx = Transaction.objects.create(owner=self.u, account=self.a, category=self.c, amount=Decimal("10.50"), occurred_at=timezone.now())
         self.assertEqual(tx.account, self.a)
+
+
+class DailyLedgerRollupTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.food = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.salary = Category.objects.create(owner=self.u, name='Salary', kind='income')
+
+    def snapshot(self):
+        return sorted(
+            DailyLedgerRollup.objects.values_list('date', 'kind', 'category_id', 'total', 'count')
+        )
+
+    def test_incremental_updates_follow_edits_and_deletes(self):
+        when = timezone.make_aware(datetime(2024, 3, 15, 23, 30))
+        tx = Transaction.objects.create(owner=self.u, account=self.a, category=self.food, amount=Decimal("10"), occurred_at=when)
+        Transaction.objects.create(owner=self.u, account=self.a, category=self.food, amount=Decimal("5"), occurred_at=when)
+        self.assertEqual(self.snapshot(), [(date(2024, 3, 15), 'expense', self.food.id, Decimal("15"), 2)])
+
+        # 다른 날짜와 분류로 옮기면 이전 칸에서 빠지고 새 칸에 더해진다.
+        tx.occurred_at = when + timedelta(hours=1)
+        tx.category = self.salary
+        tx.save()
+        self.assertEqual(self.snapshot(), [
+            (date(2024, 3, 15), 'expense', self.food.id, Decimal("5"), 1),
+            (date(2024, 3, 16), 'income', self.salary.id, Decimal("10"), 1),
+        ])
+
+        tx.delete()
+        self.assertEqual(self.snapshot(), [(date(2024, 3, 15), 'expense', self.food.id, Decimal("5"), 1)])
+        self.assertEqual(rollups.totals_by_kind(self.u), {'expense': Decimal("5")})
+
+    def test_rebuild_matches_incremental_state(self):
+        for day in (1, 1, 2):
+            Transaction.objects.create(
+                owner=self.u, account=self.a, category=self.food, amount=Decimal("3"),
+                occurred_at=timezone.make_aware(datetime(2024, 3, day, 12)),
+            )
+        incremental = self.snapshot()
+        DailyLedgerRollup.objects.all().delete()
+        call_command('rebuild_ledger_rollup', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_batched_deltas_match_rebuild(self):
+        # 키가 많으면 CASE UPDATE + bulk_create 경로를 탄다.
+        txs = [
+            Transaction(owner=self.u, account=self.a, category=self.food, amount=Decimal(day),
+                        occurred_at=timezone.make_aware(datetime(2024, 3, day, 12)))
+            for day in range(1, 21) for _ in range(2)
+        ]
+        Transaction.objects.bulk_create(txs)
+        rollups.add_transactions(txs)
+        with muted():
+            Transaction.objects.filter(pk__in=[tx.pk for tx in txs[::4]]).delete()
+        rollups.add_transactions(txs[::4], sign=-1)
+        incremental = self.snapshot()
+        self.assertEqual(len(incremental), 20)
+        call_command('rebuild_ledger_rollup', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+
+class LedgerConditionalRequestTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+
+    def create_tx(self):
+        return Transaction.objects.create(owner=self.u, account=self.a, category=self.c, amount=Decimal("1"), occurred_at=timezone.now())
+
+    def test_watermark_drives_etag(self):
+        self.create_tx()
+        etag = self.client.get('/api/finance/transactions/')['ETag']
+        self.assertEqual(self.client.get('/api/finance/transactions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.create_tx().delete()
+        self.assertEqual(self.client.get('/api/finance/transactions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_a_linked_task_changes_the_etag(self):
+        url = '/api/finance/transactions/'
+        for delete in (
+            lambda task: self.client.delete(f'/api/tasks/{task.id}/'),
+            lambda task: self.client.delete('/api/tasks/bulk/', {'ids': [task.id]}, content_type='application/json'),
+        ):
+            task = Task.objects.create(owner=self.u, title='Lunch')
+            tx = self.create_tx()
+            Transaction.objects.filter(pk=tx.pk).update(task=task)
+            self.create_tx()
+            etag = self.client.get(url)['ETag']
+            self.assertLess(delete(task).status_code, 300)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_owner_cascades_cleanly(self):
+        # 계정/분류가 CASCADE로 지워질 때 워터마크를 다시 만들지 않아야 한다.
+        self.u.delete()
+        self.assertFalse(DailyLedgerRollup.objects.exists())
+        self.assertFalse(LedgerWatermark.objects.exists())
+
+
+class TransactionBulkTest(TestCase):
+    url = '/api/finance/transactions/bulk/'
+
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        other = User.objects.create_user(username='u2', password='p')
+        self.foreign_account = Account.objects.create(owner=other, name='Theirs', type='cash')
+
+    def item(self, **overrides):
+        return {'account': self.a.id, 'category': self.c.id, 'amount': '10.00', 'occurred_at': '2024-03-15T12:00:00+09:00', **overrides}
+
+    def post(self, items, mode='atomic'):
+        return self.client.post(f'{self.url}?mode={mode}', {'items': items}, content_type='application/json')
+
+    def test_atomic_mode_writes_nothing_when_any_item_fails(self):
+        res = self.post([self.item(), self.item(account=self.foreign_account.id), self.item(amount='x')])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([e['index'] for e in res.json()['errors']], [1, 2])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_partial_mode_writes_valid_items_and_updates_rollups(self):
+        res = self.post([self.item(), self.item(amount='x'), self.item(amount='5.00')], mode='partial')
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual(len(res.json()['created']), 2)
+        self.assertEqual(rollups.totals_by_kind(self.u), {'expense': Decimal('15.00')})
+
+    def test_query_count_does_not_grow_with_payload(self):
+        # 첫 요청은 롤업/워터마크 행을 만드는 쿼리가 더 있으므로 미리 한 번 보낸다.
+        self.post([self.item()])
+        with CaptureQueriesContext(connection) as small:
+            self.post([self.item()] * 5)
+        with CaptureQueriesContext(connection) as large:
+            self.post([self.item()] * 50)
+        self.assertEqual(len(small), len(large))
+
+    def test_update_and_delete(self):
+        ids = self.post([self.item(), self.item()]).json()['created']
+        res = self.client.patch(self.url, {'items': [{'id': ids[0], 'occurred_at': '2024-03-16T12:00:00+09:00'}]}, content_type='application/json')
+        self.assertEqual(res.json(), {'updated': [ids[0]], 'errors': []})
+        self.assertEqual(
+            sorted(DailyLedgerRollup.objects.values_list('date', 'count')),
+            [(date(2024, 3, 15), 1), (date(2024, 3, 16), 1)],
+        )
+
+        res = self.client.delete(self.url, {'ids': ids}, content_type='application/json')
+        self.assertEqual(res.json(), {'deleted': sorted(ids), 'errors': []})
+        self.assertFalse(DailyLedgerRollup.objects.exists())
+
+    def test_update_rejects_repeated_ids(self):
+        tx_id = self.post([self.item()]).json()['created'][0]
+        items = [{'id': tx_id, 'amount': '20.00'}, {'id': tx_id, 'amount': '30.00'}]
+        res = self.client.patch(self.url, {'items': items}, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()['errors'], [{'index': 1, 'errors': {'id': ['중복된 id입니다.']}}])
+
+        res = self.client.patch(f'{self.url}?mode=partial', {'items': items}, content_type='application/json')
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual(res.json()['updated'], [tx_id])
+        self.assertEqual(rollups.totals_by_kind(self.u), {'expense': Decimal('20.00')})
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.balance, Decimal('-20.00'))
+
+
+class OwnedRelatedFieldTest(TestCase):
+    url = '/api/finance/transactions/'
+
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.task = Task.objects.create(owner=self.u, title='Lunch')
+        other = User.objects.create_user(username='u2', password='p')
+        self.foreign = {
+            'account': Account.objects.create(owner=other, name='Theirs', type='cash').id,
+            'category': Category.objects.create(owner=other, name='Theirs', kind='expense').id,
+            'task': Task.objects.create(owner=other, title='Theirs').id,
+        }
+
+    def item(self, **overrides):
+        return {'account': self.a.id, 'category': self.c.id, 'task': self.task.id, 'amount': '10.00',
+                'occurred_at': '2024-03-15T12:00:00+09:00', **overrides}
+
+    def lookups(self, queries, table):
+        # 검증용 조회는 owner 범위의 IN 쿼리다. 잔액/예산/캐시 반영이 읽는 행은 세지 않는다.
+        return [
+            q['sql'] for q in queries
+            if q['sql'].startswith(f'SELECT "{table}"."id", ') and f'WHERE ("{table}"."owner_id" = ' in q['sql']
+        ]
+
+    def test_rejects_other_users_objects_on_create_update_and_bulk(self):
+        res = self.client.post(self.url, self.item(**self.foreign), content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(sorted(res.json()), ['account', 'category', 'task'])
+
+        tx_id = self.client.post(self.url, self.item(), content_type='application/json').json()['id']
+        res = self.client.patch(f'{self.url}{tx_id}/', {'task': self.foreign['task']}, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Transaction.objects.get(pk=tx_id).task_id, self.task.id)
+
+        res = self.client.post(f'{self.url}bulk/', {'items': [self.item(), self.item(task=self.foreign['task'])]},
+                               content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()['errors'], [{'index': 1, 'errors': {'task': [f'유효하지 않은 pk "{self.foreign["task"]}" - 객체가 존재하지 않습니다.']}}])
+
+        period = BudgetPeriod.objects.create(owner=self.u, start_date=date(2024, 3, 1), end_date=date(2024, 3, 31))
+        res = self.client.post('/api/finance/budget-items/', {'period': period.id, 'category': self.foreign['category'],
+                                                             'limit_amount': '100.00'}, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(list(res.json()), ['category'])
+
+    def test_each_model_is_looked_up_once_per_request(self):
+        with CaptureQueriesContext(connection) as single:
+            res = self.client.post(self.url, self.item(), content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        with CaptureQueriesContext(connection) as bulk:
+            res = self.client.post(f'{self.url}bulk/', {'items': [self.item()] * 20}, content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        for queries in (single, bulk):
+            for table in ('finance_account', 'finance_category', 'tasks_task'):
+                self.assertEqual(len(self.lookups(queries, table)), 1, table)
+
+
+class StatementImportTest(TestCase):
+    CSV = (
+        "날짜,금액,내용,분류\n"
+        "2024-03-15 12:30,\"-12,000\",점심,Food\n"
+        "2024-03-15 12:30,\"-12,000\",점심,Food\n"
+        "2024-03-16,3000000,월급,\n"
+        "not-a-date,100,broken,\n"
+    )
+
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+
+    def run_import(self, text, fmt='csv', **options):
+        from .importers import import_statement
+        return import_statement(self.u, StringIO(text), fmt, account=self.a, chunk_size=2, **options)
+
+    def test_csv_import_is_idempotent_and_keeps_same_day_repeats(self):
+        result = self.run_import(self.CSV)
+        self.assertEqual((result.read, result.created, result.failed), (4, 3, 1))
+        self.assertEqual(result.errors[0]['line'], 5)
+        self.assertEqual(rollups.totals_by_kind(self.u), {'expense': Decimal('24000.00'), 'income': Decimal('3000000.00')})
+        self.assertTrue(Category.objects.filter(owner=self.u, name='미분류', kind='income').exists())
+
+        again = self.run_import(self.CSV)
+        self.assertEqual((again.created, again.duplicates), (0, 3))
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_amounts_that_do_not_fit_the_column_are_row_errors(self):
+        result = self.run_import(
+            '날짜,금액,내용\n2024-03-01,-1000,버스\n2024-03-01,12345678901234.5,큰 금액\n'
+            '2024-03-02,1.005,반 푼\n2024-03-02,999999999999.990,최대\n'
+        )
+        self.assertEqual((result.read, result.created, result.failed), (4, 2, 2))
+        self.assertEqual([error['line'] for error in result.errors], [3, 4])
+        self.assertEqual(Transaction.objects.get(memo='최대').amount, Decimal('999999999999.99'))
+
+    def test_repeat_counts_are_kept_for_the_current_date_only(self):
+        from .importers import StatementImporter, parse
+        lines = ['날짜,금액,내용'] + [f'2024-03-{day:02d} 09:00,-1000,버스' for day in range(1, 31) for _ in range(2)]
+        importer = StatementImporter(self.u, account=self.a, chunk_size=7)
+        result = importer.run(parse(StringIO('\n'.join(lines) + '\n'), 'csv'))
+        self.assertEqual(result.created, 60)
+        self.assertEqual(len(importer._occurrences), 1)
+        self.assertEqual(self.run_import('\n'.join(lines) + '\n').duplicates, 60)
+
+    def test_ofx_uses_fitid(self):
+        ofx = (
+            "OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240315120000[+9:KST]<TRNAMT>-4500.00<FITID>A1<NAME>Coffee\n</STMTTRN>\n"
+            "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240316\n<TRNAMT>100.00\n<FITID>A2\n<MEMO>Refund\n</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+        self.assertEqual(self.run_import(ofx, 'ofx').created, 2)
+        self.assertEqual(self.run_import(ofx, 'ofx').duplicates, 2)
+        coffee = Transaction.objects.get(memo='Coffee')
+        self.assertEqual((coffee.amount, coffee.category.kind), (Decimal('4500.00'), 'expense'))
+        self.assertEqual(timezone.localtime(coffee.occurred_at).hour, 12)
+
+    def test_qif(self):
+        qif = "!Type:Bank\nD03/15/2024\nT-25.00\nPGrocer\nLFood:Market\n^\nD3/16'24\nT10.00\nPGift\n^\n"
+        result = self.run_import(qif, 'qif')
+        self.assertEqual(result.created, 2)
+        self.assertEqual(Transaction.objects.get(memo='Grocer').category.name, 'Food')
+
+    def test_upload_api_rejects_foreign_account(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        other = User.objects.create_user(username='u2', password='p')
+        theirs = Account.objects.create(owner=other, name='Theirs', type='cash')
+        self.client.force_login(self.u)
+        url = '/api/finance/transactions/import/'
+
+        res = self.client.post(url, {'file': SimpleUploadedFile('s.csv', self.CSV.encode()), 'account': theirs.id})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(url, {'file': SimpleUploadedFile('s.csv', self.CSV.encode()), 'account': self.a.id})
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['created'], 3)
+
+
+class TransactionExportTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.c = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        for day in (1, 2, 3):
+            Transaction.objects.create(
+                owner=self.u, account=self.a, category=self.c, amount=Decimal(day), memo=f'점심 {day}',
+                occurred_at=timezone.make_aware(datetime(2024, 3, day, 12)),
+            )
+        other = User.objects.create_user(username='u2', password='p')
+        theirs = Category.objects.create(owner=other, name='Food', kind='expense')
+        Transaction.objects.create(
+            owner=other, account=Account.objects.create(owner=other, name='W', type='cash'), category=theirs,
+            amount=Decimal('9'), occurred_at=timezone.make_aware(datetime(2024, 3, 2, 12)),
+        )
+
+    def body(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    def test_csv_streams_only_own_rows_in_range(self):
+        import csv
+        res = self.client.get('/api/finance/transactions/export/csv/?from=2024-03-02&to=2024-03-03')
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('attachment', res['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.body(res))))
+        self.assertEqual([row['memo'] for row in rows], ['점심 2', '점심 3'])
+        self.assertEqual((rows[0]['account'], rows[0]['kind'], rows[0]['amount']), ('Wallet', 'expense', '2.00'))
+        self.assertTrue(rows[0]['occurred_at'].startswith('2024-03-02T12:00:00'))
+
+    def test_csv_neutralizes_formula_cells(self):
+        import csv
+        import json
+        Transaction.objects.filter(memo='점심 1').update(memo='=HYPERLINK("http://x","y")')
+        Transaction.objects.filter(memo='점심 2').update(memo='@SUM(1)')
+        Account.objects.filter(owner=self.u).update(name='+Wallet')
+
+        rows = list(csv.DictReader(StringIO(self.body(self.client.get('/api/finance/transactions/export/csv/')))))
+        self.assertEqual([row['memo'] for row in rows], ['\'=HYPERLINK("http://x","y")', "'@SUM(1)", '점심 3'])
+        self.assertEqual(rows[0]['account'], "'+Wallet")
+        self.assertEqual(rows[0]['amount'], '1.00')
+        lines = self.body(self.client.get('/api/finance/transactions/export/jsonl/')).splitlines()
+        self.assertEqual(json.loads(lines[1])['memo'], '@SUM(1)')
+
+    def test_jsonl(self):
+        import json
+        lines = self.body(self.client.get('/api/finance/transactions/export/jsonl/')).splitlines()
+        self.assertEqual([json.loads(line)['amount'] for line in lines], ['1.00', '2.00', '3.00'])
+
+    @skipUnless(find_spec('pyarrow'), 'parquet 내보내기는 선택 의존성 pyarrow가 있어야 한다.')
+    def test_parquet(self):
+        import io
+        import pyarrow.parquet as pq
+        res = self.client.get('/api/finance/transactions/export/parquet/')
+        self.assertEqual(res.status_code, 200)
+        table = pq.read_table(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(table.num_rows, 3)
+
+    def test_parquet_without_pyarrow_is_not_implemented(self):
+        with mock.patch.dict('sys.modules', {'pyarrow': None, 'pyarrow.parquet': None}):
+            res = self.client.get('/api/finance/transactions/export/parquet/')
+        self.assertEqual(res.status_code, 501)
+        self.assertIn('pyarrow', res.json()['detail'])
+
+    def test_command_writes_file(self):
+        import os, tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ledger.jsonl')
+            call_command('export_ledger', owner='u1', format='jsonl', output=path, stdout=StringIO())
+            with open(path, encoding='utf-8') as handle:
+                self.assertEqual(len(handle.readlines()), 3)
+
+
+class AccountBalanceTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.wallet = Account.objects.create(owner=self.u, name='Wallet', type='cash', opening_balance=Decimal('100'))
+        self.bank = Account.objects.create(owner=self.u, name='Bank', type='bank')
+        self.food = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.salary = Category.objects.create(owner=self.u, name='Salary', kind='income')
+
+    def balance(self, account):
+        return Account.objects.get(pk=account.pk).balance
+
+    def tx(self, **kwargs):
+        defaults = dict(owner=self.u, account=self.wallet, category=self.food, amount=Decimal('10'), occurred_at=timezone.now())
+        return Transaction.objects.create(**{**defaults, **kwargs})
+
+    def test_expected_balance_is_rounded_to_the_balance_precision(self):
+        # SQLite는 NUMERIC 합계를 부동소수점으로 더해 45 × 14867.31이 669028.950000001이 된다.
+        for _ in range(45):
+            self.tx(category=self.salary, amount=Decimal('14867.31'))
+
+        self.assertEqual(balances.expected_balances([self.wallet.pk])[self.wallet.pk], Decimal('669128.95'))
+        self.assertEqual(balances.verify([self.u.pk]), [])
+
+    def test_signals_follow_edits_across_accounts_and_kinds(self):
+        self.assertEqual(self.balance(self.wallet), Decimal('100'))
+        lunch = self.tx()
+        self.tx(category=self.salary, amount=Decimal('50'))
+        self.assertEqual(self.balance(self.wallet), Decimal('140'))
+
+        lunch.account = self.bank
+        lunch.amount = Decimal('30')
+        lunch.save()
+        self.assertEqual((self.balance(self.wallet), self.balance(self.bank)), (Decimal('150'), Decimal('-30')))
+
+        self.food.kind = 'income'
+        self.food.save()
+        self.assertEqual(self.balance(self.bank), Decimal('30'))
+
+        lunch.delete()
+        self.assertEqual(self.balance(self.bank), Decimal('0'))
+        self.assertEqual(balances.verify(), [])
+
+    def test_explicit_balance_on_create_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Account.objects.create(owner=self.u, name='Card', type='card', balance=Decimal('50'))
+        card = Account.objects.create(owner=self.u, name='Card', type='card', opening_balance=Decimal('50'), balance=Decimal('50'))
+        self.assertEqual(self.balance(card), Decimal('50'))
+
+    def test_plain_save_does_not_clobber_balance(self):
+        stale = Account.objects.get(pk=self.wallet.pk)
+        self.tx()
+        stale.name = 'Purse'
+        stale.save()
+        self.assertEqual(self.balance(self.wallet), Decimal('90'))
+
+        stale.opening_balance = Decimal('200')
+        stale.save()
+        self.assertEqual((stale.balance, self.balance(self.wallet)), (Decimal('190'), Decimal('190')))
+
+    def test_bulk_endpoint_and_repair_command(self):
+        self.client.force_login(self.u)
+        item = {'account': self.bank.id, 'category': self.salary.id, 'amount': '7.00', 'occurred_at': '2024-03-15T12:00:00+09:00'}
+        self.client.post('/api/finance/transactions/bulk/', {'items': [item] * 3}, content_type='application/json')
+        self.assertEqual(self.balance(self.bank), Decimal('21'))
+
+        Account.objects.filter(pk=self.bank.pk).update(balance=Decimal('999'))
+        out = StringIO()
+        call_command('verify_account_balances', stdout=out)
+        self.assertIn('stored 999', out.getvalue())
+        call_command('verify_account_balances', '--repair', stdout=StringIO())
+        self.assertEqual(self.balance(self.bank), Decimal('21'))
+
+
+class RecurringTransactionTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.wallet = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.rent = Category.objects.create(owner=self.u, name='Rent', kind='expense')
+        self.today = timezone.localdate()
+
+    def test_past_occurrences_are_materialized_and_future_ones_projected(self):
+        start = self.today - timedelta(days=2)
+        res = self.client.post('/api/finance/recurring-transactions/', {
+            'account': self.wallet.id, 'category': self.rent.id, 'amount': '10.00', 'memo': 'daily',
+            'starts_at': timezone.make_aware(datetime(start.year, start.month, start.day, 8)).isoformat(),
+            'recurrence': 'FREQ=DAILY',
+        }, content_type='application/json')
+        self.assertEqual(res.status_code, 201, res.content)
+        # 아직 실제 거래가 없으므로 잔액은 그대로이고, 플래너에는 예정 행으로 보인다.
+        self.assertEqual(Account.objects.get(pk=self.wallet.pk).balance, Decimal('0'))
+        day = self.client.get('/planner/day/', {'date': self.today.isoformat()})
+        self.assertEqual([row['memo'] for row in day.context['projected_transactions']], ['daily'])
+        self.assertEqual(day.context['daily_totals'], {})
+
+        out = StringIO()
+        call_command('materialize_recurrences', stdout=out)
+        self.assertIn('3 recurring transactions', out.getvalue())
+        call_command('materialize_recurrences', stdout=StringIO())
+        self.assertEqual(Transaction.objects.filter(recurring_id=res.json()['id']).count(), 3)
+        self.assertEqual(Account.objects.get(pk=self.wallet.pk).balance, Decimal('-30'))
+        self.assertEqual(balances.verify(), [])
+
+        day = self.client.get('/planner/day/', {'date': self.today.isoformat()})
+        self.assertEqual(day.context['projected_transactions'], [])
+        self.assertEqual(day.context['daily_totals'], {'expense': Decimal('10')})
+        tomorrow = self.client.get('/planner/day/', {'date': (self.today + timedelta(days=1)).isoformat()})
+        self.assertEqual(len(tomorrow.context['projected_transactions']), 1)
+
+    def test_rejects_other_users_account_and_bad_rule(self):
+        other = User.objects.create_user(username='u2', password='p')
+        foreign = Account.objects.create(owner=other, name='Theirs', type='cash')
+        res = self.client.post('/api/finance/recurring-transactions/', {
+            'account': foreign.id, 'category': self.rent.id, 'amount': '10.00',
+            'starts_at': '2024-03-01T09:00:00+09:00', 'recurrence': 'FREQ=SOMETIMES',
+        }, content_type='application/json')
+        self.assertEqual(set(res.json()), {'account', 'recurrence'})
+        self.assertFalse(RecurringTransaction.objects.exists())
+
+
+class BudgetUtilizationTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.a = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.food = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.bus = Category.objects.create(owner=self.u, name='Bus', kind='expense')
+        self.period = BudgetPeriod.objects.create(owner=self.u, start_date=date(2024, 3, 1), end_date=date(2024, 3, 31))
+        self.item = BudgetItem.objects.create(period=self.period, category=self.food, limit_amount=Decimal('100'))
+
+    def tx(self, amount, day=15, category=None):
+        return Transaction.objects.create(
+            owner=self.u, account=self.a, category=category or self.food, amount=Decimal(amount),
+            occurred_at=timezone.make_aware(datetime(2024, 3, day, 12)),
+        )
+
+    def item_state(self):
+        self.item.refresh_from_db()
+        return self.item.spent, self.item.alert_level
+
+    def test_incremental_spend_and_threshold_alerts(self):
+        self.tx('70')
+        self.tx('999', day=1, category=self.bus)
+        self.assertEqual(self.item_state(), (Decimal('70'), 0))
+        self.tx('15')
+        last = self.tx('20')
+        self.assertEqual(self.item_state(), (Decimal('105'), 100))
+        self.assertEqual(list(BudgetAlert.objects.order_by('threshold').values_list('threshold', flat=True)), [80, 100])
+
+        # 지출이 줄면 단계가 내려가고, 다시 넘으면 새 알림이 생긴다.
+        last.delete()
+        self.assertEqual(self.item_state(), (Decimal('85'), 80))
+        outside = self.tx('30')
+        outside.occurred_at = timezone.make_aware(datetime(2024, 4, 1, 12))
+        outside.save()
+        self.assertEqual(self.item_state(), (Decimal('85'), 80))
+        self.assertEqual(BudgetAlert.objects.count(), 3)
+
+    def test_new_items_and_period_changes_recompute_from_rollup(self):
+        self.tx('40', category=self.bus)
+        self.tx('10', day=31, category=self.bus)
+        bus_item = BudgetItem.objects.create(period=self.period, category=self.bus, limit_amount=Decimal('50'))
+        self.assertEqual(BudgetItem.objects.get(pk=bus_item.pk).spent, Decimal('50'))
+        self.period.end_date = date(2024, 3, 30)
+        self.period.save()
+        self.assertEqual(BudgetItem.objects.get(pk=bus_item.pk).spent, Decimal('40'))
+
+    def test_bulk_writes_update_spend(self):
+        self.client.force_login(self.u)
+        item = {'account': self.a.id, 'category': self.food.id, 'amount': '30.00', 'occurred_at': '2024-03-15T12:00:00+09:00'}
+        self.client.post('/api/finance/transactions/bulk/', {'items': [item] * 3}, content_type='application/json')
+        self.assertEqual(self.item_state(), (Decimal('90'), 80))
+        self.assertEqual(BudgetAlert.objects.get().threshold, 80)
+
+    def test_status_endpoints_are_cached_per_ledger_version(self):
+        self.client.force_login(self.u)
+        BudgetItem.objects.create(period=self.period, category=self.bus, limit_amount=Decimal('0'))
+        self.tx('25')
+        url = f'/api/finance/budget-periods/{self.period.id}/status/'
+        body = self.client.get(url).json()
+        food = next(row for row in body['items'] if row['category']['name'] == 'Food')
+        self.assertEqual((food['spent'], food['remaining'], food['percent']), ('25.00', '75.00', 25.0))
+        self.assertEqual(body['totals']['limit'], '100.00')
+
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get('/api/finance/budget-periods/status/?date=2024-03-10')
+        self.assertNotIn('finance_budgetitem', ' '.join(q['sql'] for q in cached.captured_queries))
+
+        self.tx('5')
+        current = self.client.get('/api/finance/budget-periods/status/?date=2024-03-10').json()
+        self.assertEqual(current[0]['totals']['spent'], '30.00')
+        self.assertEqual(self.client.get('/api/finance/budget-periods/status/?date=2024-05-01').json(), [])
+
+
+class SpendingAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.wallet = Account.objects.create(owner=self.u, name='Wallet', type='cash')
+        self.card = Account.objects.create(owner=self.u, name='Card', type='card')
+        self.food = Category.objects.create(owner=self.u, name='Food', kind='expense')
+        self.rent = Category.objects.create(owner=self.u, name='Rent', kind='expense')
+        self.salary = Category.objects.create(owner=self.u, name='Salary', kind='income')
+
+    def spend(self, day, amount, category=None, account=None):
+        return Transaction.objects.create(
+            owner=self.u, account=account or self.wallet, category=category or self.food, amount=Decimal(amount),
+            occurred_at=timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=12)),
+        )
+
+    def get(self, path, **params):
+        res = self.client.get(f'/api/finance/analytics/{path}/', params)
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()
+
+    def test_series_fills_empty_weeks_and_ranks_groups(self):
+        self.spend(date(2024, 3, 3), '10')    # 일요일
+        self.spend(date(2024, 3, 9), '5')     # 같은 주 토요일
+        self.spend(date(2024, 3, 20), '100', category=self.rent)
+        self.spend(date(2024, 3, 20), '999', category=self.salary)
+        data = self.get('series', **{'from': '2024-03-01', 'to': '2024-03-23', 'granularity': 'week', 'group_by': 'category'})
+        self.assertEqual(data['periods'], ['2024-02-25', '2024-03-03', '2024-03-10', '2024-03-17'])
+        self.assertEqual(data['totals'], ['0.00', '15.00', '0.00', '100.00'])
+        self.assertEqual([(row['name'], row['total']) for row in data['series']], [('Rent', '100.00'), ('Food', '15.00')])
+
+        monthly = self.get('series', **{'from': '2024-02-01', 'to': '2024-03-31', 'granularity': 'month', 'kind': 'income'})
+        self.assertEqual(monthly['totals'], ['0.00', '999.00'])
+        self.assertNotIn('series', monthly)
+
+    def test_year_over_year_compares_the_same_dates(self):
+        self.spend(date(2023, 3, 10), '40')
+        self.spend(date(2023, 3, 20), '1000')   # 전년도 through 이후라 비교에서 빠진다.
+        self.spend(date(2024, 3, 15), '50', account=self.card)
+        data = self.get('yoy', year=2024, through='2024-03-15', group_by='account')
+        self.assertEqual(len(data['months']), 3)
+        self.assertEqual(data['months'][2], {'month': '2024-03', 'current': '50.00', 'previous': '40.00', 'change': '10.00', 'change_pct': 25.0})
+        self.assertEqual(data['total']['change_pct'], 25.0)
+        self.assertEqual([row['name'] for row in data['series']], ['Card', 'Wallet'])
+        # 전년에 없던 계정은 증감률을 계산하지 않는다.
+        self.assertIsNone(data['series'][0]['months'][2]['change_pct'])
+        self.assertEqual(data['series'][1]['months'][2]['change_pct'], -100.0)
+
+    def test_rolling_average_counts_days_before_the_range(self):
+        self.spend(date(2024, 3, 1), '70')
+        self.spend(date(2024, 3, 8), '14')
+        data = self.get('rolling', **{'from': '2024-03-07', 'to': '2024-03-08', 'windows': '7'})
+        self.assertEqual(data['periods'], ['2024-03-07', '2024-03-08'])
+        self.assertEqual(data['totals'], ['0.00', '14.00'])
+        self.assertEqual(data['averages'], {'7': ['10.00', '2.00']})
+
+    def test_results_are_cached_per_ledger_version(self):
+        self.spend(date(2024, 3, 3), '10')
+        params = {'from': '2024-03-01', 'to': '2024-03-31'}
+        first = self.client.get('/api/finance/analytics/series/', params)
+        with self.assertNumQueries(3):  # session, user, 워터마크
+            self.client.get('/api/finance/analytics/series/', params)
+        self.assertEqual(
+            self.client.get('/api/finance/analytics/series/', params, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304
+        )
+        self.spend(date(2024, 3, 4), '5')
+        self.assertEqual(self.get('series', **params)['total'], '15.00')
+
+    def test_invalid_parameters(self):
+        for path, params in [
+            ('series', {'granularity': 'hour'}),
+            ('series', {'from': '2024-03-02', 'to': '2024-03-01'}),
+            ('series', {'from': '2000-01-01', 'to': '2024-01-01'}),
+            ('yoy', {'year': 'last'}),
+            ('rolling', {'windows': '0,7'}),
+        ]:
+            self.assertEqual(self.client.get(f'/api/finance/analytics/{path}/', params).status_code, 400, (path, params))
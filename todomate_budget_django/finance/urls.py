@@ -1,17 +1,23 @@
 from django.urls import path
 from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
-from django.utils import timezone
 from .models import Transaction, Account, Category
 from tasks.models import Task
-from django.db.models import Sum
+from core.pagination import InvalidCursor, keyset_page
+from . import rollups
+
+TRANSACTION_PAGE_SIZE = 50
 
 def transaction_list(request):
     if not request.user.is_authenticated:
         return redirect('/admin/login/?next=' + request.path)
     txs = Transaction.objects.filter(owner=request.user).select_related('account','category')
-    totals = txs.values('category__kind').annotate(total=Sum('amount'))
-    return render(request, 'finance/list.html', {'transactions': txs, 'totals': totals})
+    # 전체 내역 대신 API와 같은 (occurred_at, id) 키셋 커서로 한 페이지씩 보여준다.
+    try:
+        page, next_cursor = keyset_page(txs, ['-occurred_at'], request.GET.get('cursor'), TRANSACTION_PAGE_SIZE)
+    except InvalidCursor:
+        page, next_cursor = keyset_page(txs, ['-occurred_at'], None, TRANSACTION_PAGE_SIZE)
+    totals = rollups.totals_by_kind(request.user)
+    return render(request, 'finance/list.html', {'transactions': page, 'next_cursor': next_cursor, 'totals': totals})
 
 def transaction_create(request):
     if not request.user.is_authenticated:
@@ -0,0 +1,37 @@
+"""사용자별 가계부 변경 워터마크(LedgerWatermark) 헬퍼."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LedgerWatermark
+
+
+def bump(owner_id: int) -> None:
+    """owner의 가계부 데이터가 바뀌었음을 기록한다. bulk 경로도 이 함수를 직접 호출한다."""
+
+    now = timezone.now()
+    updated = LedgerWatermark.objects.filter(owner_id=owner_id).update(version=F('version') + 1, changed_at=now)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            LedgerWatermark.objects.create(owner_id=owner_id, version=1, changed_at=now)
+    except IntegrityError:
+        LedgerWatermark.objects.filter(owner_id=owner_id).update(version=F('version') + 1, changed_at=now)
+
+
+def current(owner_id: int) -> tuple[int, datetime | None]:
+    """(version, changed_at). 아직 변경 기록이 없으면 (0, None)."""
+
+    row = LedgerWatermark.objects.filter(owner_id=owner_id).values_list('version', 'changed_at').first()
+    return row if row else (0, None)
+
+
+async def acurrent(owner_id: int) -> tuple[int, datetime | None]:
+    row = await LedgerWatermark.objects.filter(owner_id=owner_id).values_list('version', 'changed_at').afirst()
+    return row if row else (0, None)
@@ -12,3 +12,4 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ("status","priority","tags")
     search_fields = ("title","description")
     autocomplete_fields = ("tags",)
+    raw_id_fields = ("recurrence_parent",)
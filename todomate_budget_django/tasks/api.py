@@ -1,7 +1,19 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
+from core import changelog, occurrences, planner_cache, recurrence
+from core.bulk import BulkWriteMixin, task_effects, task_state
+from core.conditional import ConditionalRequestMixin, combine_validators, tag_columns, task_validators
+from core.fastread import RowReadMixin
+from core.optimizer import OptimizedQuerysetMixin
+from finance import watermarks
+from finance.models import Transaction
+from finance.rollups import local_date_of
+from core.pagination import KeysetPagination
 from .models import Task, Tag
 from .serializers import TaskSerializer, TagSerializer
 
@@ -9,7 +21,7 @@ class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return getattr(obj, "owner_id", None) == request.user.id
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -17,21 +29,97 @@ class TagViewSet(viewsets.ModelViewSet):
     search_fields = ["name"]
     ordering_fields = ["name","id"]
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(BulkWriteMixin, ConditionalRequestMixin, OptimizedQuerysetMixin, RowReadMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["status","priority","is_all_day","tags"]
     search_fields = ["title","description"]
     ordering_fields = ["created_at","due_at","priority"]
+    pagination_class = KeysetPagination
+    keyset_ordering = ["-created_at"]
+    bulk_m2m_fields = ("tags",)
+    bulk_derived_fields = ("recurrence_until",)
+    optimized_actions = ("list", "retrieve", "upcoming")
+    optimized_extra_fields = ("owner",)
+
+    def bulk_state(self, obj):
+        return task_state(obj)
+
+    def bulk_prepare(self, obj):
+        obj.refresh_recurrence_until()
+
+    def bulk_effects(self, owner_id, before, after):
+        task_effects(owner_id, before, after)
+
+    def before_bulk_destroy(self, owner_id, ids):
+        # 연결된 거래는 SET_NULL로 '기타' 지출이 되므로 변경 로그와 캐시에 함께 반영한다.
+        linked = list(Transaction.objects.filter(task_id__in=ids).values_list("id", "occurred_at"))
+        if linked:
+            watermarks.bump(owner_id)
+            changelog.record(owner_id, "transaction", [tx_id for tx_id, _ in linked])
+            planner_cache.invalidate_days(owner_id, {local_date_of(occurred_at) for _, occurred_at in linked})
+        # 실제 행으로 만든 발생을 지우면 원본 예외에 날짜를 더한다(시그널의 skip_deleted_occurrence와 같다).
+        skipped = {}
+        occurrence_rows = (
+            Task.objects.filter(pk__in=ids, recurrence_parent__isnull=False)
+            .exclude(recurrence_parent_id__in=ids).values_list("recurrence_parent_id", "recurrence_date")
+        )
+        for parent_id, day in occurrence_rows:
+            skipped.setdefault(parent_id, set()).add(day.isoformat())
+        if skipped:
+            masters = list(Task.objects.filter(owner_id=owner_id, pk__in=list(skipped)))
+            now = timezone.now()
+            for master in masters:
+                master.recurrence_exceptions = sorted({*master.recurrence_exceptions, *skipped[master.pk]})
+                master.updated_at = now
+            Task.objects.bulk_update(masters, ["recurrence_exceptions", "updated_at"])
+            changelog.record(owner_id, "task", [master.pk for master in masters])
 
     def get_queryset(self):
-        return Task.objects.filter(owner=self.request.user).select_related("owner").prefetch_related("tags")
+        return super().get_queryset().filter(owner=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def get_conditional_validators(self, detail):
+        if detail:
+            # 상세는 해당 일정의 updated_at과 태그 집계로 충분하다.
+            try:
+                row = (
+                    Task.objects.filter(pk=self.kwargs.get(self.lookup_field), owner=self.request.user)
+                    .annotate(**tag_columns()).values("updated_at", "tags_last", "tags_count").first()
+                )
+            except (TypeError, ValueError):
+                row = None
+            row = row or {"updated_at": None, "tags_last": None, "tags_count": None}
+            return combine_validators(
+                (("task", row["updated_at"]), row["updated_at"]),
+                (("tags", row["tags_last"], row["tags_count"]), row["tags_last"]),
+            )
+        return task_validators(self.request.user.id)
+
     @action(detail=False, methods=["get"])
     def upcoming(self, request):
-        qs = self.get_queryset().order_by("due_at")[:10]
-        return Response(TaskSerializer(qs, many=True).data)
+        def build():
+            return Response(self.read_many(self.get_queryset().order_by("due_at")[:10]))
+        return self.conditional_response(False, build)
+
+    @action(detail=True, methods=["post"], url_path="occurrences")
+    def materialize_occurrence(self, request, pk=None):
+        """반복 일정의 발생 하나를 실제 일정으로 만든다. 완료 표시나 그 날만의 수정 전에 호출한다."""
+        master = self.get_object()
+        try:
+            day = parse_date(str(request.data.get("date", "")))
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({"date": "YYYY-MM-DD 형식의 날짜가 필요합니다."})
+        if not master.recurrence:
+            raise ValidationError({"recurrence": "반복 일정이 아닙니다."})
+        dtstart = timezone.localdate(master.start_at)
+        if day == dtstart or not any(recurrence.occurrences(recurrence.parse(master.recurrence), dtstart, day, day)):
+            raise ValidationError({"date": "이 일정의 반복 발생 날짜가 아닙니다."})
+        task = occurrences.materialize_task(master, day)
+        return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
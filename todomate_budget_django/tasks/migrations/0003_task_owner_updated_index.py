@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_task_owner_range_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["owner", "updated_at"], name="task_owner_updated_idx"
+            ),
+        ),
+    ]
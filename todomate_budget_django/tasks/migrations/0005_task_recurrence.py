@@ -0,0 +1,68 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="materialized_until",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="recurrence",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="recurrence_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="recurrence_exceptions",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="recurrence_parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="occurrences",
+                to="tasks.task",
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="recurrence_until",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("recurrence", ""), _negated=True),
+                fields=["owner", "start_at"],
+                name="task_owner_recurring_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="task",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("recurrence_parent__isnull", False)),
+                fields=("recurrence_parent", "recurrence_date"),
+                name="task_unique_occurrence",
+            ),
+        ),
+    ]
@@ -1,11 +1,16 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core import recurrence
 
 User = get_user_model()
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     color = models.CharField(max_length=7, default="#888888")  # hex color
+    # 일정 응답에 이름/색이 함께 실리므로 일정 ETag(core.conditional)가 태그 수정도 알아챈다.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -30,11 +35,59 @@ class Task(models.Model):
     due_at = models.DateTimeField(null=True, blank=True)
     is_all_day = models.BooleanField(default=False)
     tags = models.ManyToManyField(Tag, blank=True, related_name="tasks")
+    # 반복 규칙(RRULE 부분집합, core.recurrence). 규칙이 있는 일정이 원본이며 start_at이 첫 발생이다.
+    recurrence = models.CharField(max_length=200, blank=True, default="")
+    # 건너뛸 발생 날짜(ISO 문자열 목록)
+    recurrence_exceptions = models.JSONField(default=list, blank=True)
+    # 마지막 발생 날짜. UNTIL/COUNT가 없으면 비워 두며 구간 조회에서 끝난 규칙을 거르는 데 쓴다.
+    recurrence_until = models.DateField(null=True, blank=True, editable=False)
+    # 이 날짜까지의 발생은 실제 행으로 만들어졌다. 이후 날짜만 화면에서 가상으로 전개한다.
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    # 실제 행으로 만들어진(또는 따로 수정된) 발생이 가리키는 원본과 원래 발생 날짜
+    recurrence_parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, null=True, blank=True, related_name="occurrences"
+    )
+    recurrence_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # 플래너의 하루/월 범위 조회가 인덱스 범위 스캔으로 끝나도록 owner를 선두 컬럼으로 둔다.
+            models.Index(fields=["owner", "start_at"], name="task_owner_start_idx"),
+            models.Index(fields=["owner", "due_at", "id"], name="task_owner_due_id_idx"),
+            # 목록 API의 기본 정렬(-created_at, -id) 키셋 페이지네이션용
+            models.Index(fields=["owner", "created_at", "id"], name="task_owner_created_id_idx"),
+            # 조건부 요청의 ETag 계산(Max(updated_at))이 인덱스만 읽도록 한다.
+            models.Index(fields=["owner", "updated_at"], name="task_owner_updated_idx"),
+            # 보고 있는 구간에 걸친 반복 원본만 읽는다.
+            models.Index(
+                fields=["owner", "start_at"],
+                name="task_owner_recurring_idx",
+                condition=~models.Q(recurrence=""),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recurrence_parent", "recurrence_date"],
+                name="task_unique_occurrence",
+                condition=models.Q(recurrence_parent__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def refresh_recurrence_until(self):
+        """규칙과 시작 시각에서 마지막 발생 날짜를 다시 계산한다. save()를 거치지 않는 bulk 쓰기도 부른다."""
+        start = timezone.localdate(self.start_at) if self.start_at else None
+        self.recurrence_until = recurrence.rule_end(self.recurrence, start)
+
+    def save(self, *args, **kwargs):
+        # 규칙이 바뀌어도 구간 조회가 맞도록 마지막 발생 날짜를 함께 저장한다.
+        self.refresh_recurrence_until()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "recurrence" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "recurrence_until"}
+        super().save(*args, **kwargs)
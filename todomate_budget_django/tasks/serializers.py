@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from core import recurrence
+from core.relations import OwnerUsernameField, PrefetchedPrimaryKeyRelatedField
 from .models import Task, Tag
 
 class TagSerializer(serializers.ModelSerializer):
@@ -8,11 +10,35 @@ class TagSerializer(serializers.ModelSerializer):
 
 class TaskSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
-    tag_ids = serializers.PrimaryKeyRelatedField(
+    # 태그는 사용자 공용이라 owner로 거르지 않고, id 목록을 요청당 한 번의 IN 쿼리로 읽기만 한다.
+    tag_ids = PrefetchedPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True, write_only=True, required=False, source="tags"
     )
-    owner = serializers.ReadOnlyField(source="owner.username")
+    owner = OwnerUsernameField()
+    recurrence_exceptions = serializers.ListField(child=serializers.DateField(), required=False)
 
     class Meta:
         model = Task
-        fields = ["id","owner","title","description","priority","status","start_at","due_at","is_all_day","tags","tag_ids","created_at","updated_at"]
+        fields = ["id","owner","title","description","priority","status","start_at","due_at","is_all_day","tags","tag_ids",
+                  "recurrence","recurrence_exceptions","recurrence_until","recurrence_parent","recurrence_date",
+                  "created_at","updated_at"]
+        # 발생 행은 원본의 occurrences 액션으로만 만든다.
+        read_only_fields = ["recurrence_until","recurrence_parent","recurrence_date"]
+
+    def validate_recurrence(self, value):
+        try:
+            return recurrence.normalize(value)
+        except recurrence.InvalidRule as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate_recurrence_exceptions(self, value):
+        return sorted({day.isoformat() for day in value})
+
+    def validate(self, attrs):
+        rule = attrs.get("recurrence", getattr(self.instance, "recurrence", ""))
+        start_at = attrs.get("start_at", getattr(self.instance, "start_at", None))
+        if rule and start_at is None:
+            raise serializers.ValidationError({"start_at": "반복 일정에는 시작 시각이 필요합니다."})
+        if rule and getattr(self.instance, "recurrence_parent_id", None):
+            raise serializers.ValidationError({"recurrence": "반복 일정의 발생에는 규칙을 둘 수 없습니다."})
+        return attrs
@@ -1,6 +1,11 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from .models import Task
+from core import occurrences, planner_cache
+from .models import Task, Tag
+from django.utils import timezone
+from datetime import date, timedelta
 
 class TaskModelTest(TestCase):
     def test_create_task(self):
@@ -8,3 +13,216 @@ class TaskModelTest(TestCase):
         t = Task.objects.create(owner=u, title='Test')
         self.assertEqual(t.owner, u)
         self.assertEqual(t.status, 'todo')
+
+
+class TaskConditionalRequestTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.t = Task.objects.create(owner=self.u, title='Test')
+
+    def test_list_short_circuits_with_304(self):
+        first = self.client.get('/api/tasks/')
+        etag = first['ETag']
+        with self.assertNumQueries(3):  # session, user, Max/Count — no page query
+            res = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        Task.objects.create(owner=self.u, title='New')
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_tag_edits_change_the_task_etag(self):
+        tag = Tag.objects.create(name='work')
+        self.t.tags.add(tag)
+        etag = self.client.get('/api/tasks/')['ETag']
+        detail_etag = self.client.get(f'/api/tasks/{self.t.id}/')['ETag']
+        res = self.client.patch(f'/api/tags/{tag.id}/', {'name': 'office'}, content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/tasks/{self.t.id}/', HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+    def test_if_match_guards_lost_updates(self):
+        url = f'/api/tasks/{self.t.id}/'
+        etag = self.client.get(url)['ETag']
+        ok = self.client.patch(url, {'title': 'mine'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(ok.status_code, 200)
+        self.assertNotEqual(ok['ETag'], etag)
+
+        stale = self.client.patch(url, {'title': 'theirs'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        self.t.refresh_from_db()
+        self.assertEqual(self.t.title, 'mine')
+
+
+class TaskKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+
+    def collect(self, url):
+        seen = []
+        while url:
+            body = self.client.get(url).json()
+            self.assertNotIn('count', body)
+            seen.extend(t['title'] for t in body['results'])
+            url = body['next']
+        return seen
+
+    def test_due_at_ordering_walks_every_row_once_with_nulls_last(self):
+        base = timezone.now()
+        for i in range(5):
+            Task.objects.create(owner=self.u, title=f'd{i}', due_at=base + timedelta(days=i % 2))
+        Task.objects.create(owner=self.u, title='none1')
+        Task.objects.create(owner=self.u, title='none2')
+
+        titles = self.collect('/api/tasks/?ordering=due_at&page_size=2')
+        self.assertEqual(titles, ['d0', 'd2', 'd4', 'd1', 'd3', 'none1', 'none2'])
+
+    def test_cursor_is_stable_across_inserts(self):
+        for i in range(4):
+            Task.objects.create(owner=self.u, title=f't{i}')
+        first = self.client.get('/api/tasks/?page_size=2').json()
+        Task.objects.create(owner=self.u, title='newest')
+        second = self.client.get(first['next']).json()
+        self.assertEqual([t['title'] for t in first['results'] + second['results']], ['t3', 't2', 't1', 't0'])
+
+    def test_rejects_tampered_cursor(self):
+        self.assertEqual(self.client.get('/api/tasks/?cursor=garbage').status_code, 404)
+
+
+class TaskBulkTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.tag = Tag.objects.create(name='work')
+
+    def test_bulk_create_and_update_tags(self):
+        res = self.client.post(
+            '/api/tasks/bulk/',
+            {'items': [{'title': 'a', 'tag_ids': [self.tag.id]}, {'title': 'b'}]},
+            content_type='application/json',
+        )
+        self.assertEqual(res.status_code, 201)
+        a_id, b_id = res.json()['created']
+        self.assertEqual(list(Task.objects.get(pk=a_id).tags.all()), [self.tag])
+
+        res = self.client.patch(
+            '/api/tasks/bulk/',
+            {'items': [{'id': a_id, 'tag_ids': []}, {'id': b_id, 'title': 'B', 'tag_ids': [self.tag.id]}]},
+            content_type='application/json',
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(Task.objects.get(pk=a_id).tags.exists())
+        self.assertEqual(Task.objects.get(pk=b_id).title, 'B')
+        self.assertEqual(list(Task.objects.get(pk=b_id).tags.all()), [self.tag])
+
+
+class TaskRecurrenceApiTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+
+    def test_rule_is_validated_and_occurrence_materialized(self):
+        bad = self.client.post('/api/tasks/', {'title': 'gym', 'recurrence': 'FREQ=WEEKLY'}, content_type='application/json')
+        self.assertIn('start_at', bad.json())
+        bad = self.client.post(
+            '/api/tasks/', {'title': 'gym', 'start_at': '2024-03-04T07:00:00+09:00', 'recurrence': 'FREQ=HOURLY'},
+            content_type='application/json',
+        )
+        self.assertIn('recurrence', bad.json())
+
+        res = self.client.post('/api/tasks/', {
+            'title': 'gym', 'start_at': '2024-03-04T07:00:00+09:00',
+            'recurrence': 'freq=daily;count=5', 'recurrence_exceptions': ['2024-03-06'],
+        }, content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        body = res.json()
+        self.assertEqual((body['recurrence'], body['recurrence_until']), ('FREQ=DAILY;COUNT=5', '2024-03-08'))
+
+        url = f"/api/tasks/{body['id']}/occurrences/"
+        self.assertEqual(self.client.post(url, {'date': '2024-03-09'}).status_code, 400)
+        first = self.client.post(url, {'date': '2024-03-07'})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((first.json()['recurrence_parent'], first.json()['start_at']), (body['id'], '2024-03-07T07:00:00+09:00'))
+        again = self.client.post(url, {'date': '2024-03-07'})
+        self.assertEqual(again.json()['id'], first.json()['id'])
+
+
+class TaskBulkRecurrenceTest(TestCase):
+    url = '/api/tasks/bulk/'
+
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+
+    def send(self, method, payload):
+        return getattr(self.client, method)(self.url, payload, content_type='application/json')
+
+    def create_master(self, rule='FREQ=DAILY;COUNT=5'):
+        res = self.send('post', {'items': [{'title': 'gym', 'start_at': '2024-03-04T07:00:00+09:00', 'recurrence': rule}]})
+        self.assertEqual(res.status_code, 201)
+        return Task.objects.get(pk=res.json()['created'][0])
+
+    def test_rule_end_is_kept_up_to_date(self):
+        master = self.create_master()
+        self.assertEqual(master.recurrence_until, date(2024, 3, 8))
+        res = self.send('patch', {'items': [{'id': master.id, 'recurrence': 'FREQ=DAILY;COUNT=50'}]})
+        self.assertEqual(res.status_code, 200)
+        master.refresh_from_db()
+        self.assertEqual(master.recurrence_until, date(2024, 4, 22))
+        self.assertIn(date(2024, 3, 20), occurrences.task_occurrences(self.u, date(2024, 3, 20), date(2024, 3, 20)))
+
+    def test_update_is_validated_against_the_stored_task(self):
+        plain = Task.objects.create(owner=self.u, title='run', start_at=timezone.now())
+        master = self.create_master()
+        occurrence = occurrences.materialize_task(master, date(2024, 3, 6))
+        res = self.send('patch', {'items': [
+            {'id': plain.id, 'recurrence': 'FREQ=WEEKLY'},
+            {'id': occurrence.id, 'recurrence': 'FREQ=WEEKLY'},
+        ]})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([error['index'] for error in res.json()['errors']], [1])
+
+    def test_deleted_occurrence_stays_deleted(self):
+        master = self.create_master()
+        occurrence = occurrences.materialize_task(master, date(2024, 3, 6))
+        res = self.send('delete', {'ids': [occurrence.id]})
+        self.assertEqual(res.status_code, 200)
+        master.refresh_from_db()
+        self.assertEqual(master.recurrence_exceptions, ['2024-03-06'])
+        self.assertEqual(occurrences.task_occurrences(self.u, date(2024, 3, 6), date(2024, 3, 6)), {})
+
+    def test_recurring_writes_invalidate_every_planner_day(self):
+        day = date(2024, 3, 10)
+        cached = planner_cache._versions(self.u.id, day)
+        self.create_master('FREQ=DAILY')
+        self.assertNotEqual(planner_cache._versions(self.u.id, day), cached)
+
+
+class TaskTagIdsTest(TestCase):
+    def setUp(self):
+        self.u = User.objects.create_user(username='u1', password='p')
+        self.client.force_login(self.u)
+        self.tags = [Tag.objects.create(name=f'tag{i}') for i in range(10)]
+
+    def post(self, tag_ids):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post('/api/tasks/', {'title': 't', 'tag_ids': tag_ids}, content_type='application/json')
+        # 응답의 tags prefetch(중간 테이블 조인)를 빼고 검증용 id 조회만 센다.
+        tag_lookups = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "tasks_tag" WHERE "tasks_tag"."id" IN' in q['sql']]
+        return res, len(queries), len(tag_lookups)
+
+    def test_tag_ids_are_resolved_in_one_query(self):
+        one = self.post([self.tags[0].id])
+        many = self.post([tag.id for tag in self.tags])
+        self.assertEqual((one[0].status_code, many[0].status_code), (201, 201))
+        self.assertEqual(one[2], 1)
+        self.assertEqual(many[2], 1)
+        self.assertEqual(one[1], many[1])
+        self.assertEqual(len(many[0].json()['tags']), 10)
+
+    def test_unknown_tag_id_is_rejected(self):
+        res, _, _ = self.post([self.tags[0].id, 999])
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('tag_ids', res.json())
+